@@ -211,6 +211,12 @@ def create_app(config=None):
         
         flask_app.config.update(config_update)
         
+        # Request IDs, query/client timing and /metrics - registered before the
+        # auth middleware so Kratos verification runs inside the request context
+        from app.utils.instrumentation import install as install_instrumentation, instrument_flask
+        install_instrumentation('app')
+        instrument_flask(flask_app)
+
         # Initialize Pure Kratos Authentication Middleware for identity management
         from app.middleware.kratos_auth_middleware import KratosAuthMiddleware
         KratosAuthMiddleware(flask_app)
@@ -51,6 +51,10 @@ fi
 
 echo "Current Vault token: ${VAULT_TOKEN:0:30}..."
 
+# gunicorn workers share /metrics through per-process snapshots; start clean
+export INSTRUMENTATION_MULTIPROC_DIR="${INSTRUMENTATION_MULTIPROC_DIR:-/tmp/sting-metrics}"
+rm -rf "$INSTRUMENTATION_MULTIPROC_DIR" && mkdir -p "$INSTRUMENTATION_MULTIPROC_DIR"
+
 # Determine how to run the application based on environment
 if [ "${APP_ENV}" = "production" ]; then
     echo "Starting application in production mode..."
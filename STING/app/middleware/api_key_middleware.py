@@ -1,8 +1,27 @@
 from functools import wraps
 from flask import request, jsonify, g
 from app.models.api_key_models import ApiKey, ApiKeyUsage
+from app.utils.rate_limiter import GCRARateLimiter
+import os
 import time
 import re
+import redis
+
+_rate_limiter = None
+
+def get_api_key_rate_limiter():
+    """Get or create the shared per-API-key rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = GCRARateLimiter(
+            redis_client=redis.from_url(
+                os.environ.get('REDIS_URL', 'redis://redis:6379/0'),
+                socket_connect_timeout=1, socket_timeout=1
+            ),
+            prefix='api_key:rate_limit',
+            prefetch=int(os.environ.get('API_KEY_RATE_LIMIT_PREFETCH', '5'))
+        )
+    return _rate_limiter
 
 def api_key_required(scopes=None, permissions=None):
     """
@@ -53,6 +72,29 @@ def api_key_required(scopes=None, permissions=None):
                     'message': 'API key is invalid, expired, or inactive'
                 }), 401
             
+            # Check per-key rate limit
+            is_allowed, remaining, reset_time = rate_limit_check(api_key)
+            if not is_allowed:
+                ApiKeyUsage.log_usage(
+                    api_key=api_key,
+                    endpoint=request.endpoint or request.path,
+                    method=request.method,
+                    status_code=429,
+                    ip_address=request.remote_addr,
+                    user_agent=request.headers.get('User-Agent'),
+                    error_message='Rate limit exceeded'
+                )
+                
+                response = jsonify({
+                    'error': 'Rate limit exceeded',
+                    'message': f'API key is limited to {api_key.rate_limit_per_minute} requests per minute',
+                    'retry_after': max(1, reset_time - int(time.time()))
+                })
+                response.headers['X-RateLimit-Limit'] = str(api_key.rate_limit_per_minute)
+                response.headers['X-RateLimit-Remaining'] = '0'
+                response.headers['X-RateLimit-Reset'] = str(reset_time)
+                return response, 429
+            
             # Check required scopes
             if scopes:
                 missing_scopes = []
@@ -186,27 +228,15 @@ def rate_limit_check(api_key, endpoint=None):
     """
     Check if API key has exceeded rate limit
     Returns (is_allowed, remaining_requests, reset_time)
-    """
-    import time
-    from datetime import datetime, timedelta
-    from collections import defaultdict
     
-    # Simple in-memory rate limiting (for production, use Redis)
-    # This is a basic implementation - in production you'd want Redis with sliding window
-    current_minute = int(time.time() // 60)
-    
-    # Get usage in current minute window
-    recent_usage = ApiKeyUsage.query.filter(
-        ApiKeyUsage.api_key_id == api_key.id,
-        ApiKeyUsage.timestamp >= datetime.utcnow() - timedelta(minutes=1)
-    ).count()
-    
-    rate_limit = api_key.rate_limit_per_minute
-    remaining = max(0, rate_limit - recent_usage)
-    is_allowed = recent_usage < rate_limit
-    reset_time = (current_minute + 1) * 60  # Next minute
-    
-    return is_allowed, remaining, reset_time
+    Uses the shared GCRA limiter in Redis: rate_limit_per_minute requests
+    spread over a sliding minute, with no burst at minute boundaries.
+    Requests are allowed if Redis is unavailable.
+    """
+    key = f"{api_key.id}:{endpoint}" if endpoint else str(api_key.id)
+    result = get_api_key_rate_limiter().check(key, api_key.rate_limit_per_minute, 60)
+    reset_time = int(time.time() + (result.retry_after if not result.allowed else result.reset_after))
+    return result.allowed, result.remaining, reset_time
 
 def validate_api_key_format(api_key):
     """Validate API key format"""
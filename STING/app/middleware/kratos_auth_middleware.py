@@ -10,6 +10,8 @@ from datetime import datetime
 from flask import g, request, current_app, jsonify
 from functools import wraps
 
+from app.utils.instrumentation import span
+
 logger = logging.getLogger(__name__)
 
 # Kratos configuration
@@ -39,7 +41,7 @@ class KratosAuthMiddleware:
             '/health', '/api/health',
             '/.ory/', '/login', '/registration',
             '/recovery', '/verification', '/error',
-            '/api/bootstrap/', '/static/'
+            '/api/bootstrap/', '/static/', '/metrics'
         ]
 
         if any(request.path.startswith(route) for route in public_routes):
@@ -151,13 +153,14 @@ class KratosAuthMiddleware:
                 return None
             
             # Call Kratos whoami endpoint
-            response = requests.get(
-                f"{KRATOS_PUBLIC_URL}/sessions/whoami",
-                cookies=cookies,
-                headers={'Accept': 'application/json'},
-                verify=False,  # For dev environment
-                timeout=5
-            )
+            with span("kratos.whoami"):
+                response = requests.get(
+                    f"{KRATOS_PUBLIC_URL}/sessions/whoami",
+                    cookies=cookies,
+                    headers={'Accept': 'application/json'},
+                    verify=False,  # For dev environment
+                    timeout=5
+                )
             
             if response.status_code == 200:
                 return response.json()
@@ -43,6 +43,12 @@ from .improved_cache_manager import ImprovedCacheManager
 from .streaming_processor import StreamingPIIProcessor
 from .mode_detector import ModeDetector
 
+try:
+    # Copied next to app.py in the external AI service image
+    from instrumentation import span
+except ImportError:
+    from app.utils.instrumentation import span
+
 __version__ = "1.0.2"  # Bumped for mode detection
 __all__ = [
     "PIIMiddleware",
@@ -87,6 +93,7 @@ class PIIMiddleware:
         self.cache_manager = PIICacheManager(self.config, redis_client)
         self.audit_logger = PIIAuditLogger(self.config)
 
+    @span("pii.serialize")
     async def serialize_message(
         self,
         message: str,
@@ -159,6 +166,7 @@ class PIIMiddleware:
 
         return serialized_message, context
 
+    @span("pii.deserialize")
     async def deserialize_response(
         self,
         response: str,
@@ -210,6 +218,7 @@ class PIIMiddleware:
 
         return deserialized_response
 
+    @span("pii.deserialize")
     async def deserialize_response_with_metadata(
         self,
         response: str,
@@ -325,3 +334,9 @@ class PIIMiddleware:
     async def cleanup(self):
         """Run cleanup to remove expired/old caches."""
         await self.cache_manager.cleanup()
+
+    async def get_cache_metrics(self) -> dict:
+        """Cache eviction counters and Redis memory usage (basic cache manager only)."""
+        if not hasattr(self.cache_manager, "get_metrics"):
+            return {}
+        return await self.cache_manager.get_metrics()
@@ -8,16 +8,37 @@ Features:
 - Automatic TTL management
 - Memory pressure handling
 - LRU cleanup
+
+LRU index:
+- sting:pii:lru                  sorted set of conversation IDs by last access
+- sting:pii:user:{user_id}:lru   the same per user, by last store
+
+Both are updated in the same pipeline as the mapping itself, so eviction pops
+the oldest conversations straight off the index instead of scanning keyspace.
 """
 
 import redis.asyncio as redis
 import json
+import math
 import time
-from typing import Dict, Optional
+from collections import Counter
+from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+LRU_INDEX_KEY = "sting:pii:lru"
+
+# Conversations evicted per round trip under memory pressure
+EVICTION_BATCH_SIZE = 100
+
+# Evict once used memory passes HIGH_WATERMARK of the limit, down to
+# LOW_WATERMARK, and never more than MAX_EVICT_FRACTION of the index per pass
+# (Redis is shared, so the pressure may not come from PII mappings at all)
+HIGH_WATERMARK = 0.9
+LOW_WATERMARK = 0.8
+MAX_EVICT_FRACTION = 0.25
+
 
 class PIICacheManager:
     """
@@ -38,6 +59,15 @@ class PIICacheManager:
         self.config = config
         self.redis = redis_client or self._create_redis_client()
 
+        # Longest TTL handed to Redis: index entries idle for longer than
+        # this belong to mappings that have already expired
+        self._longest_ttl = max(config.get_ttl(error_occurred=False), config.get_ttl(error_occurred=True))
+
+        # Metrics
+        self.evictions = Counter()  # reason -> conversations evicted
+        self.cleanup_runs = 0
+        self.last_used_memory = 0
+
     def _create_redis_client(self):
         """Create Redis client for PII cache."""
         redis_db = self.config.get_redis_db()
@@ -58,7 +88,9 @@ class PIICacheManager:
         """
         Store PII mapping in cache with TTL.
 
-        Uses Redis pipeline for atomic operations.
+        Uses Redis pipeline for atomic operations. If the user now has more
+        than max_per_user conversations cached, their least recently stored
+        ones are evicted.
 
         Args:
             conversation_id: Conversation identifier
@@ -68,6 +100,8 @@ class PIICacheManager:
         """
         cache_key = self._get_cache_key(conversation_id)
         meta_key = self._get_meta_key(conversation_id)
+        now = time.time()
+        self._longest_ttl = max(self._longest_ttl, ttl)
 
         try:
             # Use pipeline for atomic operations
@@ -80,7 +114,7 @@ class PIICacheManager:
 
                 # Store metadata
                 metadata = {
-                    "created_at": int(time.time()),
+                    "created_at": int(now),
                     "ttl": ttl,
                     "pii_count": len(pii_map),
                     "user_id": user_id or "unknown"
@@ -88,13 +122,22 @@ class PIICacheManager:
                 pipe.hset(meta_key, mapping=metadata)
                 pipe.expire(meta_key, ttl)
 
-                # Add to user's conversation set (for cleanup)
+                # Mark as most recently used
+                pipe.zadd(LRU_INDEX_KEY, {conversation_id: now})
+
+                # Add to user's index and list what's over the per-user cap
                 if user_id:
-                    user_set_key = f"sting:pii:user:{user_id}:conversations"
-                    pipe.sadd(user_set_key, conversation_id)
-                    pipe.expire(user_set_key, ttl + 3600)  # Extra hour
+                    user_index_key = self._get_user_index_key(user_id)
+                    pipe.zadd(user_index_key, {conversation_id: now})
+                    pipe.zremrangebyscore(user_index_key, "-inf", f"({now - self._longest_ttl}")
+                    pipe.expire(user_index_key, ttl + 3600)  # Extra hour
+                    pipe.zrange(user_index_key, 0, -(self.config.get_max_per_user() + 1))
 
-                await pipe.execute()
+                results = await pipe.execute()
+
+            over_cap = results[-1] if user_id else []
+            if over_cap:
+                await self._evict(over_cap, "user_cap", {c: user_id for c in over_cap})
 
             logger.debug(
                 f"Stored PII mapping for {conversation_id}: "
@@ -121,7 +164,11 @@ class PIICacheManager:
         cache_key = self._get_cache_key(conversation_id)
 
         try:
-            pii_map = await self.redis.hgetall(cache_key)
+            async with self.redis.pipeline() as pipe:
+                pipe.hgetall(cache_key)
+                # Refresh recency (XX: never re-index an evicted conversation)
+                pipe.zadd(LRU_INDEX_KEY, {conversation_id: time.time()}, xx=True)
+                pii_map, _ = await pipe.execute()
 
             if pii_map:
                 logger.debug(
@@ -147,12 +194,14 @@ class PIICacheManager:
         """
         cache_key = self._get_cache_key(conversation_id)
         meta_key = self._get_meta_key(conversation_id)
+        self._longest_ttl = max(self._longest_ttl, new_ttl)
 
         try:
             async with self.redis.pipeline() as pipe:
                 pipe.expire(cache_key, new_ttl)
                 pipe.expire(meta_key, new_ttl)
                 pipe.hset(meta_key, "ttl", new_ttl)
+                pipe.zadd(LRU_INDEX_KEY, {conversation_id: time.time()}, xx=True)
                 await pipe.execute()
 
             logger.info(f"Extended TTL for {conversation_id} to {new_ttl}s")
@@ -167,79 +216,132 @@ class PIICacheManager:
         Args:
             conversation_id: Conversation identifier
         """
-        cache_key = self._get_cache_key(conversation_id)
-        meta_key = self._get_meta_key(conversation_id)
-
         try:
-            async with self.redis.pipeline() as pipe:
-                pipe.delete(cache_key)
-                pipe.delete(meta_key)
-                await pipe.execute()
+            await self._evict([conversation_id])
 
             logger.info(f"Deleted PII mapping for {conversation_id}")
 
         except Exception as e:
             logger.error(f"Failed to delete PII mapping: {e}")
 
-    async def cleanup(self):
+    async def cleanup(self) -> int:
         """
         Run cleanup to remove old/expired caches based on memory pressure.
 
         Strategy:
-        1. Check memory usage
-        2. If over threshold, evict oldest success caches
-        3. Keep error caches longer (for debugging)
+        1. Drop index entries whose mappings have certainly expired
+        2. Check memory usage
+        3. If over the high watermark, pop the least recently used
+           conversations off the index in batches and UNLINK them until
+           under the low watermark
+
+        Returns:
+            Number of conversations evicted
         """
+        evicted = 0
         try:
-            # Get all PII cache keys
-            pattern = "sting:pii:conv:*:map"
-            keys = []
-            async for key in self.redis.scan_iter(match=pattern):
-                keys.append(key)
-
-            if not keys:
-                return
+            self.cleanup_runs += 1
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(LRU_INDEX_KEY, "-inf", f"({time.time() - self._longest_ttl}")
+                pipe.zcard(LRU_INDEX_KEY)
+                pipe.info("memory")
+                _, indexed, memory_info = await pipe.execute()
 
-            # Check memory usage
-            memory_info = await self.redis.info("memory")
-            used_memory_mb = memory_info.get("used_memory", 0) / (1024 * 1024)
-            max_memory_mb = self.config.get_max_cache_size_mb()
+            max_memory = self.config.get_max_cache_size_mb() * 1024 * 1024
+            used_memory = self.last_used_memory = memory_info.get("used_memory", 0)
 
-            if used_memory_mb < max_memory_mb * 0.9:
-                # Under 90% capacity - no cleanup needed
-                return
+            if not indexed or used_memory < max_memory * HIGH_WATERMARK:
+                return 0
 
             logger.warning(
-                f"PII cache memory pressure: {used_memory_mb:.1f}MB / {max_memory_mb}MB"
+                f"PII cache memory pressure: {used_memory / (1024 * 1024):.1f}MB / "
+                f"{self.config.get_max_cache_size_mb()}MB"
             )
 
-            # Get metadata for all caches
-            cache_info = []
-            for key in keys:
-                conv_id = key.split(":")[3]  # Extract conversation_id
-                meta_key = self._get_meta_key(conv_id)
-                metadata = await self.redis.hgetall(meta_key)
+            budget = math.ceil(indexed * MAX_EVICT_FRACTION)
+            while evicted < budget and used_memory >= max_memory * LOW_WATERMARK:
+                # ZPOPMIN claims the batch, so concurrent cleanups never overlap
+                oldest = await self.redis.zpopmin(LRU_INDEX_KEY, min(EVICTION_BATCH_SIZE, budget - evicted))
+                if not oldest:
+                    break
+                await self._evict([conversation_id for conversation_id, _ in oldest], "memory_pressure")
+                evicted += len(oldest)
 
-                if metadata:
-                    cache_info.append({
-                        "conversation_id": conv_id,
-                        "created_at": int(metadata.get("created_at", 0)),
-                        "has_error": metadata.get("error_count", "0") != "0"
-                    })
+                memory_info = await self.redis.info("memory")
+                used_memory = self.last_used_memory = memory_info.get("used_memory", 0)
 
-            # Sort by creation time (oldest first), but prioritize non-error caches
-            cache_info.sort(key=lambda x: (x["has_error"], x["created_at"]))
+            logger.info(f"Cleaned up {evicted} PII cache entries")
 
-            # Delete oldest 25% of non-error caches
-            to_delete = int(len(cache_info) * 0.25)
-            for cache in cache_info[:to_delete]:
-                if not cache["has_error"]:
-                    await self.delete_mapping(cache["conversation_id"])
+        except Exception as e:
+            logger.error(f"Cleanup failed: {e}")
+
+        return evicted
+
+    async def get_metrics(self) -> Dict:
+        """
+        Get eviction counters and Redis memory usage for monitoring.
 
-            logger.info(f"Cleaned up {to_delete} PII cache entries")
+        Returns:
+            Dict with indexed conversations, evictions by reason, cleanup
+            runs, and used/limit memory in bytes
+        """
+        metrics = {
+            "indexed_conversations": None,
+            "evictions": dict(self.evictions),
+            "evictions_total": sum(self.evictions.values()),
+            "cleanup_runs": self.cleanup_runs,
+            "used_memory_bytes": self.last_used_memory,
+            "max_memory_bytes": self.config.get_max_cache_size_mb() * 1024 * 1024
+        }
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zcard(LRU_INDEX_KEY)
+                pipe.info("memory")
+                indexed, memory_info = await pipe.execute()
+            metrics["indexed_conversations"] = indexed
+            metrics["used_memory_bytes"] = self.last_used_memory = memory_info.get("used_memory", 0)
 
         except Exception as e:
-            logger.error(f"Cleanup failed: {e}")
+            logger.error(f"Failed to read PII cache metrics: {e}")
+
+        return metrics
+
+    async def _evict(
+        self,
+        conversation_ids: List[str],
+        reason: Optional[str] = None,
+        user_ids: Optional[Dict[str, str]] = None
+    ):
+        """
+        Remove conversations' mappings and their LRU index entries.
+
+        Args:
+            conversation_ids: Conversations to remove
+            reason: Eviction reason counted in metrics (None for explicit deletes)
+            user_ids: conversation_id -> user_id; read from metadata if omitted
+        """
+        if user_ids is None:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for conversation_id in conversation_ids:
+                    pipe.hget(self._get_meta_key(conversation_id), "user_id")
+                user_ids = dict(zip(conversation_ids, await pipe.execute()))
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            # UNLINK frees the values in a background thread
+            pipe.unlink(*[
+                key
+                for conversation_id in conversation_ids
+                for key in (self._get_cache_key(conversation_id), self._get_meta_key(conversation_id))
+            ])
+            pipe.zrem(LRU_INDEX_KEY, *conversation_ids)
+            for conversation_id, user_id in user_ids.items():
+                if user_id and user_id != "unknown":
+                    pipe.zrem(self._get_user_index_key(user_id), conversation_id)
+            await pipe.execute()
+
+        if reason:
+            self.evictions[reason] += len(conversation_ids)
 
     def _get_cache_key(self, conversation_id: str) -> str:
         """Get Redis key for PII mapping."""
@@ -248,3 +350,7 @@ class PIICacheManager:
     def _get_meta_key(self, conversation_id: str) -> str:
         """Get Redis key for cache metadata."""
         return f"sting:pii:conv:{conversation_id}:meta"
+
+    def _get_user_index_key(self, user_id: str) -> str:
+        """Get Redis key for a user's LRU index."""
+        return f"sting:pii:user:{user_id}:lru"
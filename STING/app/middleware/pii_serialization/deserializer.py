@@ -12,12 +12,21 @@ Features:
 import re
 from typing import Dict
 
+try:
+    # Copied next to app.py in the external AI service image
+    from span_rewriter import replace_tokens
+except ImportError:
+    from app.utils.span_rewriter import replace_tokens
+
+# Pattern: ${word}{number}_{word}_{hash}
+TOKEN_PATTERN = re.compile(r'\$[A-Z][a-z]+\d+_[a-z]+_[a-f0-9]{4}')
+
 
 class PIIDeserializer:
     """
     Deserializes PII tokens in AI responses back to original values.
 
-    Simple and fast - just replaces tokens with cached values.
+    Simple and fast - one regex pass, looking each token up in the cached map.
     """
 
     def __init__(self, config):
@@ -52,15 +61,8 @@ class PIIDeserializer:
             }
             Output: "Contact John Smith at john@email.com"
         """
-        if not pii_map:
-            return text
-
         # Replace each token with its original value
-        deserialized_text = text
-        for token, original_value in pii_map.items():
-            deserialized_text = deserialized_text.replace(token, original_value)
-
-        return deserialized_text
+        return replace_tokens(text, TOKEN_PATTERN, pii_map)
 
     def find_tokens(self, text: str) -> list[str]:
         """
@@ -72,6 +74,4 @@ class PIIDeserializer:
         Returns:
             List of token strings found
         """
-        # Pattern: ${word}{number}_{word}_{hash}
-        token_pattern = re.compile(r'\$[A-Z][a-z]+\d+_[a-z]+_[a-f0-9]{4}')
-        return token_pattern.findall(text)
+        return TOKEN_PATTERN.findall(text)
@@ -17,6 +17,12 @@ from typing import List, Dict, Any
 from dataclasses import dataclass
 from enum import Enum
 
+try:
+    # Copied next to app.py in the external AI service image
+    from pii_detection_cache import fingerprint, get_pii_detection_cache
+except ImportError:
+    from app.utils.pii_detection_cache import fingerprint, get_pii_detection_cache
+
 
 class PIIType(str, Enum):
     """Types of PII that can be detected"""
@@ -64,6 +70,7 @@ class PIIDetector:
     - Compiled regex patterns
     - Early exit on mode check
     - Lazy evaluation
+    - Results cached by text hash (see pii_detection_cache)
     """
 
     # Regex patterns for different PII types
@@ -104,6 +111,21 @@ class PIIDetector:
         ],
     }
 
+    # Pattern: 2-3 capitalized words (likely a name)
+    NAME_PATTERN = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,2})\b')
+
+    # Pattern: street address
+    ADDRESS_PATTERN = re.compile(
+        r'\b\d+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+'
+        r'(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd)\b',
+        re.IGNORECASE
+    )
+
+    # Context window around each type's detections (names look further)
+    CONTEXT_WINDOWS = {PIIType.PERSON_NAME: 50}
+
+    DETECTOR_VERSION = fingerprint(PATTERNS, CONTEXT_KEYWORDS, NAME_PATTERN, ADDRESS_PATTERN, CONTEXT_WINDOWS)
+
     def __init__(self, config):
         """
         Initialize detector with configuration.
@@ -134,6 +156,26 @@ class PIIDetector:
         if not enabled_types:
             return []
 
+        cache = get_pii_detection_cache()
+        cache_key = cache.key(text, self.DETECTOR_VERSION, (mode, sorted(t.value for t in enabled_types)))
+        records = cache.get(cache_key)
+        if records is not None:
+            return [self._detection_from_record(text, record) for record in records]
+
+        detections = self._detect_uncached(text, enabled_types)
+        cache.put(cache_key, [
+            {
+                "type": d.pii_type.value,
+                "start": d.start_pos,
+                "end": d.end_pos,
+                "confidence": d.confidence
+            }
+            for d in detections
+        ])
+        return detections
+
+    def _detect_uncached(self, text: str, enabled_types) -> List[PIIDetection]:
+        """Run pattern and heuristic detection for the enabled types."""
         detections = []
 
         # Run pattern-based detection
@@ -167,6 +209,19 @@ class PIIDetector:
 
         return detections
 
+    def _detection_from_record(self, text: str, record: Dict[str, Any]) -> PIIDetection:
+        """Rebuild a cached detection, re-deriving value and context from the text."""
+        pii_type = PIIType(record["type"])
+        start, end = record["start"], record["end"]
+        return PIIDetection(
+            pii_type=pii_type,
+            value=text[start:end],
+            start_pos=start,
+            end_pos=end,
+            confidence=record["confidence"],
+            context=self._extract_context(text, start, end, window=self.CONTEXT_WINDOWS.get(pii_type, 30))
+        )
+
     def _detect_names(self, text: str) -> List[PIIDetection]:
         """
         Detect person names using capitalization heuristics.
@@ -177,12 +232,11 @@ class PIIDetector:
         """
         detections = []
 
-        # Pattern: 2-3 capitalized words (likely a name)
-        name_pattern = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,2})\b')
-
-        for match in name_pattern.finditer(text):
+        for match in self.NAME_PATTERN.finditer(text):
             # Check if near name context keywords
-            context = self._extract_context(text, match.start(), match.end(), window=50)
+            context = self._extract_context(
+                text, match.start(), match.end(), window=self.CONTEXT_WINDOWS[PIIType.PERSON_NAME]
+            )
             context_lower = context.lower()
 
             has_context = any(
@@ -214,14 +268,7 @@ class PIIDetector:
         """
         detections = []
 
-        # Pattern: street address
-        address_pattern = re.compile(
-            r'\b\d+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+'
-            r'(?:Street|St|Avenue|Ave|Road|Rd|Drive|Dr|Lane|Ln|Boulevard|Blvd)\b',
-            re.IGNORECASE
-        )
-
-        for match in address_pattern.finditer(text):
+        for match in self.ADDRESS_PATTERN.finditer(text):
             detection = PIIDetection(
                 pii_type=PIIType.ADDRESS,
                 value=match.group(),
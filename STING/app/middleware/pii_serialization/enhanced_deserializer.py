@@ -7,6 +7,12 @@ import re
 from typing import Dict, Optional, Tuple, List
 from datetime import datetime
 
+try:
+    # Copied next to app.py in the external AI service image
+    from span_rewriter import replace_tokens
+except ImportError:
+    from app.utils.span_rewriter import replace_tokens
+
 logger = logging.getLogger(__name__)
 
 class EnhancedDeserializer:
@@ -66,8 +72,9 @@ class EnhancedDeserializer:
         missed_tokens = []
         pii_metadata = []  # NEW: Track position and type info for visual indicators
 
-        # Build a list of token replacements with positions
-        replacements = []
+        # Resolve each distinct token once
+        resolved = {}
+        sources = {}
         for token in set(tokens):  # Use set to avoid duplicate processing
             original_value = None
             source = None
@@ -94,53 +101,42 @@ class EnhancedDeserializer:
                 source = 'reconstructed' if original_value else None
 
             if original_value:
-                replacements.append({
-                    'token': token,
-                    'value': original_value,
-                    'source': source
-                })
+                resolved[token] = original_value
+                sources[token] = source
                 replaced_count += 1
 
-        # Process replacements and track positions
-        working_response = response
+        # Replace every occurrence in one pass, tracking where each value lands
         cumulative_offset = 0  # Track how positions shift as we replace
 
-        for replacement in replacements:
-            token = replacement['token']
-            value = replacement['value']
-
-            if track_positions:
-                # Find all occurrences of this token
-                import re as regex
-                for match in regex.finditer(regex.escape(token), working_response):
-                    token_start = match.start()
-                    token_end = match.end()
-
-                    # Calculate position in final deserialized text
-                    # (accounting for length differences from previous replacements)
-                    final_start = token_start + cumulative_offset
-                    final_end = final_start + len(value)
-
-                    # Extract PII type and determine risk level
-                    pii_type = self._extract_pii_type(token)
-                    risk_level = self._determine_risk_level(pii_type)
-
-                    pii_metadata.append({
-                        'original_position': {'start': token_start, 'end': token_end},
-                        'deserialized_position': {'start': final_start, 'end': final_end},
-                        'token': token,
-                        'deserialized_value': value,
-                        'pii_type': pii_type,
-                        'risk_level': risk_level,
-                        'confidence': 0.95,  # High confidence for cache hits
-                        'source': replacement['source']
-                    })
-
-                    # Update cumulative offset for next replacements
-                    cumulative_offset += (len(value) - len(token))
-
-            # Perform the actual replacement
-            working_response = working_response.replace(token, value, 1)  # Replace first occurrence
+        def _track_position(match: re.Match, value: str):
+            nonlocal cumulative_offset
+            token = match.group()
+            final_start = match.start() + cumulative_offset
+
+            # Extract PII type and determine risk level
+            pii_type = self._extract_pii_type(token)
+            risk_level = self._determine_risk_level(pii_type)
+
+            pii_metadata.append({
+                'original_position': {'start': match.start(), 'end': match.end()},
+                'deserialized_position': {'start': final_start, 'end': final_start + len(value)},
+                'token': token,
+                'deserialized_value': value,
+                'pii_type': pii_type,
+                'risk_level': risk_level,
+                'confidence': 0.95,  # High confidence for cache hits
+                'source': sources[token]
+            })
+
+            # Update cumulative offset for next replacements
+            cumulative_offset += len(value) - len(token)
+
+        working_response = replace_tokens(
+            response,
+            self.token_pattern,
+            resolved,
+            on_replace=_track_position if track_positions else None
+        )
 
         # Log diagnostics if enabled
         if enable_diagnostics and missed_tokens:
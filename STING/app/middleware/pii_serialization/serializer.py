@@ -23,6 +23,12 @@ from typing import List, Dict, Tuple
 from collections import defaultdict
 from .detector import PIIDetection, PIIType
 
+try:
+    # Copied next to app.py in the external AI service image
+    from span_rewriter import rewrite_spans
+except ImportError:
+    from app.utils.span_rewriter import rewrite_spans
+
 
 class PIISerializer:
     """
@@ -94,17 +100,9 @@ class PIISerializer:
                     token
                 ))
 
-        # Sort by position (reverse order for replacement)
-        tokens_by_position.sort(reverse=True)
-
-        # Replace PII with tokens (from end to start to preserve positions)
-        serialized_text = text
-        for start, end, token in tokens_by_position:
-            serialized_text = (
-                serialized_text[:start] +
-                token +
-                serialized_text[end:]
-            )
+        # Replace PII with tokens in a single pass over the text
+        tokens_by_position.sort()
+        serialized_text = rewrite_spans(text, tokens_by_position)
 
         return serialized_text, token_map
 
@@ -3,10 +3,16 @@ Streaming Response Processor for Real-time PII Deserialization
 """
 import asyncio
 import re
-from typing import AsyncGenerator, Dict, Optional, Set
+from typing import AsyncGenerator, Dict, Optional
 from collections import deque
 import logging
 
+try:
+    # Copied next to app.py in the external AI service image
+    from span_rewriter import replace_tokens
+except ImportError:
+    from app.utils.span_rewriter import replace_tokens
+
 logger = logging.getLogger(__name__)
 
 class StreamingPIIProcessor:
@@ -44,15 +50,11 @@ class StreamingPIIProcessor:
 
         # Buffer for handling tokens split across chunks
         buffer = ""
-        processed_tokens: Set[str] = set()
 
         async for chunk in response_stream:
             # Combine buffer with new chunk
             combined = buffer + chunk
 
-            # Find complete tokens in combined text
-            tokens = self.token_pattern.findall(combined)
-
             # Check if chunk ends with a partial token
             partial_match = self.partial_token_pattern.search(combined)
             if partial_match and partial_match.end() == len(combined):
@@ -64,10 +66,7 @@ class StreamingPIIProcessor:
                 process_text = combined
 
             # Deserialize complete tokens
-            for token in tokens:
-                if token not in processed_tokens and token in pii_mapping:
-                    process_text = process_text.replace(token, pii_mapping[token])
-                    processed_tokens.add(token)
+            process_text = replace_tokens(process_text, self.token_pattern, pii_mapping)
 
             # Yield processed chunk if not empty
             if process_text and not self.partial_token_pattern.fullmatch(process_text):
@@ -75,10 +74,7 @@ class StreamingPIIProcessor:
 
         # Process any remaining buffer
         if buffer:
-            for token in self.token_pattern.findall(buffer):
-                if token in pii_mapping:
-                    buffer = buffer.replace(token, pii_mapping[token])
-            yield buffer
+            yield replace_tokens(buffer, self.token_pattern, pii_mapping)
 
     async def process_chunked_response(
         self,
@@ -106,9 +102,7 @@ class StreamingPIIProcessor:
 
         for chunk in response_chunks:
             # Deserialize tokens in chunk
-            for token in self.token_pattern.findall(chunk):
-                if token in pii_mapping:
-                    chunk = chunk.replace(token, pii_mapping[token])
+            chunk = replace_tokens(chunk, self.token_pattern, pii_mapping)
 
             # Add to buffer
             buffer.append(chunk)
@@ -185,8 +179,7 @@ class StreamingPIIProcessor:
                     self.buffer = ""
 
                 # Deserialize tokens
-                for token, value in self.mapping.items():
-                    process_text = process_text.replace(token, value)
+                process_text = replace_tokens(process_text, self.token_pattern, self.mapping)
 
                 return process_text if process_text else None
 
@@ -195,9 +188,7 @@ class StreamingPIIProcessor:
                 if not self.buffer:
                     return None
 
-                result = self.buffer
-                for token, value in self.mapping.items():
-                    result = result.replace(token, value)
+                result = replace_tokens(self.buffer, self.token_pattern, self.mapping)
 
                 self.buffer = ""
                 return result
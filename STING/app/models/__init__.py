@@ -6,9 +6,10 @@ from .passkey_models import Passkey, PasskeyStatus, PasskeyRegistrationChallenge
 
 # Import file models
 from .file_models import (
-    FileAsset, FilePermission, FileUploadSession,
+    FileAsset, FilePermission, FileUploadSession, StorageUsage,
     StorageBackend, AccessLevel, PermissionType,
-    get_file_by_id, get_user_files, check_file_permission
+    get_file_by_id, get_user_files, check_file_permission,
+    get_storage_usage, reconcile_storage_usage
 )
 
 # Import report models
@@ -37,9 +38,10 @@ __all__ = [
     # Passkey models
     'Passkey', 'PasskeyStatus', 'PasskeyRegistrationChallenge', 'PasskeyAuthenticationChallenge',
     # File models
-    'FileAsset', 'FilePermission', 'FileUploadSession',
+    'FileAsset', 'FilePermission', 'FileUploadSession', 'StorageUsage',
     'StorageBackend', 'AccessLevel', 'PermissionType',
     'get_file_by_id', 'get_user_files', 'check_file_permission',
+    'get_storage_usage', 'reconcile_storage_usage',
     # Report models
     'Report', 'ReportStatus', 'ReportPriority', 'ReportTemplate', 'ReportQueue',
     # API key models
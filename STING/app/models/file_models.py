@@ -3,7 +3,7 @@ File Asset Models for STING-CE
 Handles file metadata, permissions, and relationships.
 """
 
-from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Boolean, Text, ForeignKey, Index
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Boolean, Text, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -262,6 +262,26 @@ class FileUploadSession(Base):
             'is_expired': self.is_expired
         }
 
+class StorageUsage(Base):
+    """
+    Per-user storage counters for one category.
+
+    Maintained by triggers on file_assets and file_permissions (see
+    database/migrations/015_storage_usage_ledger.sql). The category is a
+    file_type for files the user owns, or 'shared' for files shared with them.
+    """
+
+    __tablename__ = 'storage_usage'
+
+    user_id = Column(String(255), primary_key=True)
+    category = Column(String(100), primary_key=True)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
+    file_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<StorageUsage(user_id={self.user_id}, category='{self.category}', bytes={self.total_bytes})>"
+
 # Database initialization functions
 def create_file_tables(engine):
     """Create file-related tables."""
@@ -348,4 +368,21 @@ def check_file_permission(session, file_id: str, user_id: str,
         return is_active
     else:
         logger.info(f"[PERMISSION_CHECK] No explicit permission found for user {user_id} on file {file_id}")
-        return False
\ No newline at end of file
+        return False
+
+def get_storage_usage(session, user_id: str) -> Dict[str, Dict[str, int]]:
+    """Get a user's storage counters as {category: {'bytes': ..., 'count': ...}}."""
+    rows = session.query(StorageUsage).filter(StorageUsage.user_id == user_id).all()
+    return {
+        row.category: {'bytes': row.total_bytes, 'count': row.file_count}
+        for row in rows
+        if row.file_count or row.total_bytes
+    }
+
+def reconcile_storage_usage(session, user_id: str = None) -> int:
+    """Repair storage_usage drift (all users when user_id is None); returns rows corrected."""
+    repaired = session.execute(
+        text("SELECT reconcile_storage_usage(:user_id)"), {'user_id': user_id}
+    ).scalar()
+    session.commit()
+    return repaired or 0
@@ -9,14 +9,16 @@ import shutil
 import uuid
 from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, current_app, g
-from sqlalchemy import func, desc, and_, or_, Column, String, Text, Integer, BigInteger, DateTime, Boolean, ForeignKey
+from sqlalchemy import func, desc, and_, or_, tuple_, Column, Computed, String, Text, Integer, BigInteger, DateTime, Boolean, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import deferred
 from app.utils.decorators import require_auth
+from app.utils.pagination import InvalidCursorError, encode_cursor, decode_cursor
 from app.extensions import db
 from app.models import User
 # Note: FileAsset used for temp files, HoneyReserve not implemented yet
 try:
-    from app.models.file_models import FileAsset as File
+    from app.models.file_models import FileAsset as File, get_storage_usage
 except ImportError:
     File = None  # File model may not exist
 
@@ -33,6 +35,11 @@ def format_bytes(size):
     return f"{size:.2f} {units[i]}"
 
 
+def _escape_like(value):
+    """Escape LIKE wildcards (PostgreSQL's default escape is backslash) so user input matches literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
 # Define models that map to existing database tables
 class HoneyJar(db.Model):
     """SQLAlchemy model for honey_jars table"""
@@ -68,7 +75,9 @@ class Document(db.Model):
     file_path = Column(String(500))
     doc_metadata = Column(JSONB, default=dict)  # Maps to doc_metadata in DB
     tags = Column(JSONB, default=list)
-    upload_date = Column(DateTime, default=datetime.utcnow)  # Maps to upload_date in DB
+    upload_date = Column(DateTime, nullable=False, default=datetime.utcnow)  # Maps to upload_date in DB
+    # Generated by PostgreSQL (database/migrations/016_document_search_indexes.sql)
+    file_extension = deferred(Column(String(255), Computed(r"lower(substring(filename FROM '\.([^./]+)$'))")))
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     embedding_count = Column(Integer, default=0)
     processing_time = Column(db.Float)
@@ -116,24 +125,19 @@ def get_basket_overview():
             )
         ).order_by(desc(Document.upload_date)).all()
 
-        # Get user's temporary files (skip if File model not available or incompatible)
-        temp_files = []
+        # Get user's temporary file counters from the storage usage ledger
+        temp_files_count = 0
+        temp_files_size = 0
         if File is not None:
             try:
-                temp_files = db.session.query(File).filter(
-                    and_(
-                        File.uploader_id == str(user_id),
-                        File.is_temporary == True,
-                        File.created_at > datetime.utcnow() - timedelta(hours=48)
-                    )
-                ).all()
+                temp_usage = get_storage_usage(db.session, str(user_id)).get('temporary', {})
+                temp_files_count = temp_usage.get('count', 0)
+                temp_files_size = temp_usage.get('bytes', 0)
             except Exception as file_query_error:
-                current_app.logger.warning(f"Could not query temp files (model may not be compatible): {file_query_error}")
-                temp_files = []
+                current_app.logger.warning(f"Could not read temp file usage: {file_query_error}")
 
         # Calculate storage breakdown
         documents_size = sum(doc.size_bytes or 0 for doc in user_documents)
-        temp_files_size = sum(getattr(file, 'size', 0) or getattr(file, 'size_bytes', 0) or 0 for file in temp_files)
         total_used = documents_size + temp_files_size
 
         # Group documents by honey jar
@@ -171,27 +175,29 @@ def get_basket_overview():
         cleanup_opportunities = []
 
         # Old temporary files (skip if File model not available or incompatible)
-        old_temp_files = []
-        if File is not None:
+        old_temp_count = 0
+        temp_cleanup_size = 0
+        if temp_files_count:
             try:
-                old_temp_files = db.session.query(File).filter(
+                old_temp_count, temp_cleanup_size = db.session.query(
+                    func.count(File.id), func.coalesce(func.sum(File.file_size), 0)
+                ).filter(
                     and_(
-                        File.uploader_id == str(user_id),
-                        File.is_temporary == True,
+                        File.owner_id == str(user_id),
+                        File.file_type == 'temporary',
+                        File.deleted_at.is_(None),
                         File.created_at < datetime.utcnow() - timedelta(hours=24)
                     )
-                ).all()
+                ).one()
             except Exception as file_query_error:
                 current_app.logger.warning(f"Could not query old temp files: {file_query_error}")
-                old_temp_files = []
 
-        if old_temp_files:
-            temp_cleanup_size = sum(getattr(file, 'size', 0) or getattr(file, 'size_bytes', 0) or 0 for file in old_temp_files)
+        if old_temp_count:
             cleanup_opportunities.append({
                 'type': 'temp_files',
-                'description': f'Delete {len(old_temp_files)} old temporary files',
-                'potential_savings': temp_cleanup_size,
-                'count': len(old_temp_files)
+                'description': f'Delete {old_temp_count} old temporary files',
+                'potential_savings': int(temp_cleanup_size),
+                'count': old_temp_count
             })
 
         # Large files that haven't been accessed recently
@@ -249,7 +255,7 @@ def get_basket_overview():
             'statistics': {
                 'total_documents': len(user_documents),
                 'total_honey_jars': len(honey_jar_breakdown),
-                'total_temp_files': len(temp_files),
+                'total_temp_files': temp_files_count,
                 'largest_file_size': max((doc.size_bytes or 0 for doc in user_documents), default=0),
                 'oldest_document': min((doc.upload_date for doc in user_documents if doc.upload_date), default=datetime.utcnow()).isoformat()
             },
@@ -569,13 +575,20 @@ def search_user_documents():
         query = data.get('query', '').strip()
         honey_jar_ids = data.get('honey_jar_ids', [])  # Filter by specific honey jars
         file_types = data.get('file_types', [])  # Filter by file extensions
+        tags = data.get('tags', [])  # Documents carrying all of these tags
         date_range = data.get('date_range')  # {'start': '2024-01-01', 'end': '2024-12-31'}
         size_range = data.get('size_range')  # {'min': 1024, 'max': 10485760}
         limit = min(data.get('limit', 50), 100)  # Max 100 results
-        
+        cursor = data.get('cursor')  # next_cursor from the previous page
+
         if not query:
             return jsonify({'error': 'Search query is required'}), 400
 
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except InvalidCursorError as e:
+            return jsonify({'error': str(e)}), 400
+
         current_app.logger.info(f"Basket search request: '{query}' by user {user_id}")
 
         # Base query for user's accessible documents
@@ -599,12 +612,15 @@ def search_user_documents():
             )
         )
 
-        # Apply search filters
+        # Apply search filters; see database/migrations/016_document_search_indexes.sql
+        # for the indexes each condition is written to use
         search_conditions = []
-        
-        # Text search in filename
-        if query:
-            search_conditions.append(Document.filename.ilike(f'%{query}%'))
+
+        # Filename substring (trigram index) or exact tag (GIN index)
+        search_conditions.append(or_(
+            Document.filename.ilike(f'%{_escape_like(query)}%'),
+            Document.tags.contains([query])
+        ))
 
         # Honey jar filter
         if honey_jar_ids:
@@ -612,10 +628,12 @@ def search_user_documents():
 
         # File type filter
         if file_types:
-            type_conditions = []
-            for file_type in file_types:
-                type_conditions.append(Document.filename.ilike(f'%.{file_type}'))
-            search_conditions.append(or_(*type_conditions))
+            extensions = sorted({file_type.strip().lstrip('.').lower() for file_type in file_types})
+            search_conditions.append(Document.file_extension.in_(extensions))
+
+        # Tag filter
+        if tags:
+            search_conditions.append(Document.tags.contains(tags))
 
         # Date range filter
         if date_range:
@@ -633,14 +651,16 @@ def search_user_documents():
             if size_range.get('max'):
                 search_conditions.append(Document.size_bytes <= size_range['max'])
 
-        # Apply all conditions
-        if search_conditions:
-            search_query = base_query.filter(and_(*search_conditions))
-        else:
-            search_query = base_query
+        # Resume after the last row of the previous page
+        if after:
+            search_conditions.append(tuple_(Document.upload_date, Document.id) < tuple_(*after))
 
-        # Execute search with limit
-        results = search_query.order_by(desc(Document.upload_date)).limit(limit).all()
+        # Execute search, fetching one extra row to tell whether another page follows
+        results = base_query.filter(and_(*search_conditions)).order_by(
+            desc(Document.upload_date), desc(Document.id)
+        ).limit(limit + 1).all()
+        has_more = len(results) > limit
+        results = results[:limit]
 
         # Format results
         documents = []
@@ -661,15 +681,18 @@ def search_user_documents():
             'query': query,
             'total_results': len(documents),
             'documents': documents,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(results[-1].upload_date, results[-1].id) if has_more else None,
             'filters_applied': {
                 'honey_jar_ids': honey_jar_ids,
                 'file_types': file_types,
+                'tags': tags,
                 'date_range': date_range,
                 'size_range': size_range
             },
             'timestamp': datetime.utcnow().isoformat()
         })
-        
+
     except Exception as e:
         current_app.logger.error(f"Basket search error: {str(e)}")
         return jsonify({
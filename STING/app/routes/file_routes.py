@@ -5,16 +5,16 @@ Handles file upload, download, and management endpoints.
 
 import os
 import logging
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
-from io import BytesIO
 from typing import Optional
 
 from app.services.file_service import FileService, ProfileFileService, FileServiceError
 from app.utils.kratos_client import whoami
 from app.utils.decorators import require_auth, require_auth_method, require_dual_factor
 from app.utils.audit_logger import AuditLogger
+from app.utils.response_helpers import file_download_response
 from app.models.audit_log_models import AuditSeverity
 
 logger = logging.getLogger(__name__)
@@ -160,26 +160,18 @@ def upload_file():
 @file_bp.route('/<file_id>', methods=['GET'])
 @require_auth
 def download_file(file_id: str):
-    """Download a file by ID."""
+    """Download a file by ID (supports Range and If-None-Match)."""
     try:
         user_id = get_current_user()
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Download file
-        file_data = get_file_service().download_file(file_id, user_id)
-        if not file_data:
+        # Resolve file; content is streamed as it is sent
+        download = get_file_service().open_download(file_id, user_id)
+        if not download:
             return jsonify({'error': 'File not found or access denied'}), 404
         
-        # Create file-like object
-        file_obj = BytesIO(file_data['data'])
-        
-        return send_file(
-            file_obj,
-            as_attachment=True,
-            download_name=file_data['filename'],
-            mimetype=file_data.get('mime_type', 'application/octet-stream')
-        )
+        return file_download_response(download, as_attachment=True)
         
     except Exception as e:
         logger.error(f"Error downloading file {file_id}: {e}")
@@ -395,17 +387,14 @@ def get_profile_picture():
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        file_data = get_profile_service().get_profile_picture(user_id)
-        if not file_data:
+        download = get_profile_service().open_profile_picture(user_id)
+        if not download:
             return jsonify({'error': 'No profile picture found'}), 404
         
-        # Create file-like object
-        file_obj = BytesIO(file_data['data'])
-        
-        return send_file(
-            file_obj,
-            mimetype=file_data.get('mime_type', 'image/jpeg'),
-            as_attachment=False
+        return file_download_response(
+            download,
+            as_attachment=False,
+            mimetype=download.mime_type or 'image/jpeg'
         )
         
     except Exception as e:
@@ -14,6 +14,7 @@ from functools import wraps
 
 from app.services.hive_scrambler import HiveScrambler, PIIType, ComplianceFramework, DetectionMode
 from app.utils.decorators import require_auth
+from app.utils.pii_detection_cache import invalidate_pii_detection_cache
 from app.models.pii_audit_models import PIIDetectionRecord, PIIAuditLog
 from app.database import db
 
@@ -289,6 +290,9 @@ def import_patterns():
                 errors.append(f"Error processing pattern '{pattern_data.get('name', 'unknown')}': {str(e)}")
                 continue
         
+        if imported_count:
+            invalidate_pii_detection_cache(f"{imported_count} patterns imported")
+        
         return jsonify({
             'imported_count': imported_count,
             'total_patterns': len(patterns_data),
@@ -406,6 +410,7 @@ def update_profile_settings(profile_id):
         # TODO: Save settings to database/configuration storage
         # For now, just log the settings
         logger.info(f"Updated settings for profile {profile_id}: {settings_data}")
+        invalidate_pii_detection_cache(f"profile {profile_id} settings updated")
         
         return jsonify({
             'success': True,
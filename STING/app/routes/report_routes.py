@@ -6,10 +6,9 @@ Handles report generation, templates, and queue management API endpoints.
 import os
 import logging
 import uuid
-from flask import Blueprint, request, jsonify, send_file, g
+from flask import Blueprint, request, jsonify, g
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
-from io import BytesIO
 
 from app.models.report_models import (
     Report, ReportTemplate, ReportQueue,
@@ -22,6 +21,7 @@ from app.services.report_service import get_report_service
 from app.services.file_service import get_file_service
 from app.middleware.auth_middleware import enforce_passkey_only
 from app.utils.decorators import require_auth_method
+from app.utils.response_helpers import file_download_response
 
 logger = logging.getLogger(__name__)
 
@@ -522,29 +522,28 @@ def download_report(report_id: str):
             if not report.is_completed or not report.result_file_id:
                 return jsonify({'error': 'Report not ready for download'}), 400
 
-            # Download file using file service (same as preview)
+            # Resolve file using file service (same as preview); content is streamed
             file_service = get_file_service()
-            file_data = file_service.download_file(report.result_file_id, user_id)
+            download = file_service.open_download(report.result_file_id, user_id)
 
-            if not file_data:
+            if not download:
                 return jsonify({'error': 'Report file not found'}), 404
 
-            # Update download count
-            report.download_count += 1
-            session.commit()
-
-            # Create file-like object for sending
-            file_obj = BytesIO(file_data['data'])
+            # Update download count (resumed range requests and cache
+            # revalidations answered with 304 are not new downloads)
+            revalidation = bool(download.checksum) and request.if_none_match.contains_weak(download.checksum)
+            if request.range is None and not revalidation:
+                report.download_count += 1
+                session.commit()
 
             # Generate filename
             safe_title = "".join(c for c in report.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
             filename = f"{safe_title}_{report.id[:8]}.{report.output_format}"
 
-            return send_file(
-                file_obj,
+            return file_download_response(
+                download,
                 as_attachment=True,
-                download_name=filename,
-                mimetype=file_data.get('mime_type', 'application/octet-stream')
+                download_name=filename
             )
 
     except Exception as e:
@@ -583,25 +582,23 @@ def preview_report(report_id: str):
             if not report.is_completed or not report.result_file_id:
                 return jsonify({'error': 'Report not ready for preview'}), 400
 
-            # Download file using file service (same as download, but serve inline)
+            # Resolve file using file service (same as download, but serve inline)
             file_service = get_file_service()
-            file_data = file_service.download_file(report.result_file_id, user_id)
+            download = file_service.open_download(report.result_file_id, user_id)
 
-            if not file_data:
+            if not download:
                 return jsonify({'error': 'Report file not found'}), 404
 
-            # Create file-like object for inline viewing
-            file_obj = BytesIO(file_data['data'])
-
             # Generate filename
             safe_title = "".join(c for c in report.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
             filename = f"{safe_title}_{report.id[:8]}.{report.output_format}"
 
-            return send_file(
-                file_obj,
+            # Range support lets browser PDF viewers fetch pages as they need them
+            return file_download_response(
+                download,
                 as_attachment=False,  # KEY DIFFERENCE: Serve inline for browser preview
                 download_name=filename,
-                mimetype=file_data.get('mime_type', 'application/pdf')
+                mimetype=download.mime_type or 'application/pdf'
             )
 
     except Exception as e:
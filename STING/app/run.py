@@ -1,7 +1,16 @@
 # run.py
 import os
 import sys
+import shutil
 from flask import Flask
+
+if __name__ == '__main__' and os.environ.get('FLASK_ENV') == 'production':
+    # gunicorn workers share /metrics through per-process snapshots; set before
+    # the app (and its instrumentation) is imported, and start clean
+    metrics_dir = os.environ.setdefault('INSTRUMENTATION_MULTIPROC_DIR', '/tmp/sting-metrics')
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
 from app import create_app
 
 port = int(os.environ.get('APP_PORT', 5050))
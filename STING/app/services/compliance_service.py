@@ -18,6 +18,7 @@ from app.models.compliance_models import (
     ComplianceFramework, SensitivityLevel, ActionType, RiskLevel
 )
 from app.services.hive_scrambler import HiveScrambler, PIIType
+from app.utils.pii_detection_cache import invalidate_pii_detection_cache
 from app.extensions import db
 
 logger = logging.getLogger(__name__)
@@ -65,6 +66,7 @@ class ComplianceService:
             
             # Add default pattern mappings based on framework
             self._add_default_patterns(profile)
+            invalidate_pii_detection_cache(f"profile {profile.id} created")
             
             logger.info(f"Created compliance profile: {profile.name} ({profile.id})")
             return profile
@@ -113,6 +115,7 @@ class ComplianceService:
             
             profile.updated_at = datetime.utcnow()
             self.db.commit()
+            invalidate_pii_detection_cache(f"profile {profile.id} updated")
             
             logger.info(f"Updated compliance profile: {profile.name}")
             return profile
@@ -145,6 +148,7 @@ class ComplianceService:
             
             self.db.add(rule)
             self.db.commit()
+            invalidate_pii_detection_cache(f"custom rule added to profile {rule.profile_id}")
             
             logger.info(f"Created custom rule: {rule.name} for profile {rule.profile_id}")
             return rule
@@ -250,6 +254,7 @@ class ComplianceService:
                 self.db.add(mapping)
             
             self.db.commit()
+            invalidate_pii_detection_cache(f"pattern {pattern_name} configured for profile {profile_id}")
             return mapping
             
         except Exception as e:
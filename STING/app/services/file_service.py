@@ -6,15 +6,17 @@ Handles file operations, storage, and access control.
 import os
 import logging
 import hashlib
-from typing import Optional, Dict, Any, List, BinaryIO
+from typing import Optional, Dict, Any, List, BinaryIO, Union, Iterator, Callable
 from datetime import datetime, timedelta
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.file_models import (
     FileAsset, FilePermission, FileUploadSession,
     StorageBackend, AccessLevel, PermissionType,
-    get_file_by_id, get_user_files, check_file_permission
+    get_file_by_id, get_user_files, check_file_permission,
+    get_storage_usage, reconcile_storage_usage
 )
 from app.utils.vault_file_client import VaultFileClient, FileUploadHandler
 from app.database import get_db_session
@@ -22,10 +24,42 @@ from app.services.honey_reserve_encryption import get_encryption_service, HoneyR
 
 logger = logging.getLogger(__name__)
 
+# Files larger than this are stored in Vault as separately encrypted segments
+# of this size, so they can be downloaded without loading them whole
+FILE_SEGMENT_SIZE = int(os.environ.get('FILE_SEGMENT_SIZE', str(4 * 1024 * 1024)))
+# Chunk size for streaming files held in memory
+STREAM_CHUNK_SIZE = 64 * 1024
+
 class FileServiceError(Exception):
     """Custom exception for file service errors."""
     pass
 
+class FileDownload:
+    """
+    A file resolved for download.
+    
+    Content is produced lazily by iter_range, one storage segment at a time
+    for segmented files, so routes can stream it and serve byte ranges.
+    """
+    
+    def __init__(self, filename: str, mime_type: Optional[str], size: int, checksum: Optional[str],
+                 metadata: Optional[Dict[str, Any]], encrypted: bool,
+                 read_range: Callable[[int, int], Iterator[bytes]]):
+        self.filename = filename
+        self.mime_type = mime_type
+        self.size = size
+        self.checksum = checksum
+        self.metadata = metadata
+        self.encrypted = encrypted
+        self._read_range = read_range
+    
+    def iter_range(self, start: int = 0, stop: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the bytes in [start, stop) (to the end of the file if stop is None)."""
+        stop = self.size if stop is None else min(stop, self.size)
+        if start >= stop:
+            return iter(())
+        return self._read_range(start, stop)
+
 class FileService:
     """Main file service for handling file operations."""
     
@@ -37,13 +71,14 @@ class FileService:
         # Check if encryption is enabled for Honey Reserve
         self.honey_reserve_encryption_enabled = os.environ.get('HONEY_RESERVE_ENCRYPT_AT_REST', 'true').lower() == 'true'
     
-    def upload_file(self, file_data: bytes, filename: str, file_type: str,
+    def upload_file(self, file_data: Union[bytes, BinaryIO], filename: str, file_type: str,
                    user_id: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Upload a file with validation and storage.
         
         Args:
-            file_data: Binary file data
+            file_data: Binary file data, or a seekable binary file object
+                (e.g. a spooled report) that is validated before being read
             filename: Original filename
             file_type: File type category
             user_id: User ID for ownership
@@ -54,13 +89,22 @@ class FileService:
         """
         try:
             # Validate file first BEFORE encryption
-            validation_result = self.upload_handler.validate_file(file_data, filename, file_type)
+            if hasattr(file_data, 'read'):
+                # Reject oversized or mislabeled streams before reading them into memory
+                validation_result = self.upload_handler.validate_stream(file_data, filename, file_type)
+            else:
+                validation_result = self.upload_handler.validate_file(file_data, filename, file_type)
             if not validation_result['valid']:
                 return {
                     'success': False,
                     'errors': validation_result['errors']
                 }
 
+            if hasattr(file_data, 'read'):
+                # Vault stores files as a single base64 secret, so the content
+                # is materialized once here rather than by every caller
+                file_data = file_data.read()
+
             # Calculate file hash early for use in database creation
             file_hash = hashlib.sha256(file_data).hexdigest()
             vault_file_id = f"{user_id}/{file_type}/{file_hash[:16]}"
@@ -68,11 +112,25 @@ class FileService:
             # Determine if file should be encrypted based on type and configuration
             should_encrypt = self._should_encrypt_file(file_type)
 
+            # Large files are stored as segments so downloads can stream them
+            segmented = len(file_data) > FILE_SEGMENT_SIZE
+
             # Prepare data for storage
             storage_data = file_data
             encryption_info = None
 
-            if should_encrypt:
+            if segmented:
+                try:
+                    upload_result = self._upload_segments(
+                        file_data, filename, file_type, user_id, metadata, vault_file_id, should_encrypt
+                    )
+                except HoneyReserveEncryptionError as e:
+                    logger.error(f"Failed to encrypt file {filename}: {e}")
+                    return {
+                        'success': False,
+                        'errors': [f'Encryption failed: {str(e)}']
+                    }
+            elif should_encrypt:
                 try:
                     # Encrypt file using Honey Reserve encryption
                     encrypted_file = self.encryption_service.encrypt_file(
@@ -95,13 +153,14 @@ class FileService:
                         'errors': [f'Encryption failed: {str(e)}']
                     }
 
-            # Upload file to Vault (either raw data or encrypted data)
-            # Skip validation for encrypted content since we validate before encryption
-            # Pass the vault_file_id to ensure consistent storage path
-            upload_result = self.upload_handler.upload_file(
-                storage_data, filename, file_type, user_id,
-                metadata=metadata, skip_validation=should_encrypt, file_id=vault_file_id
-            )
+            if not segmented:
+                # Upload file to Vault (either raw data or encrypted data)
+                # Skip validation for encrypted content since we validate before encryption
+                # Pass the vault_file_id to ensure consistent storage path
+                upload_result = self.upload_handler.upload_file(
+                    storage_data, filename, file_type, user_id,
+                    metadata=metadata, skip_validation=should_encrypt, file_id=vault_file_id
+                )
             
             if not upload_result['success']:
                 return upload_result
@@ -112,10 +171,13 @@ class FileService:
                 file_metadata = metadata or {}
                 if should_encrypt:
                     file_metadata['encrypted'] = True
-                    file_metadata['encryption_version'] = '1.0'
+                    file_metadata['encryption_version'] = '2.0' if segmented else '1.0'
                     file_metadata['encryption_algorithm'] = 'AES-256-GCM'
                 else:
                     file_metadata['encrypted'] = False
+                if segmented:
+                    file_metadata['storage_format'] = 'segmented'
+                    file_metadata['segment_size'] = FILE_SEGMENT_SIZE
                 
                 file_asset = FileAsset(
                     filename=filename,
@@ -127,7 +189,7 @@ class FileService:
                     storage_path=vault_file_id,
                     owner_id=user_id,
                     access_level=AccessLevel.PRIVATE.value,
-                    metadata=file_metadata
+                    file_metadata=file_metadata
                 )
                 
                 session.add(file_asset)
@@ -157,6 +219,25 @@ class FileService:
                 'errors': [f'Upload failed: {str(e)}']
             }
     
+    def _upload_segments(self, file_data: bytes, filename: str, file_type: str, user_id: str,
+                         metadata: Optional[Dict[str, Any]], vault_file_id: str,
+                         encrypt: bool) -> Dict[str, Any]:
+        """Store file_data as FILE_SEGMENT_SIZE segments, each encrypted on its own if requested."""
+        view = memoryview(file_data)
+        count = max(1, -(-len(view) // FILE_SEGMENT_SIZE))
+        cipher, header = None, None
+        if encrypt:
+            cipher, header = self.encryption_service.create_segment_cipher(user_id, len(view), metadata)
+        
+        def segments():
+            for index in range(count):
+                segment = view[index * FILE_SEGMENT_SIZE:(index + 1) * FILE_SEGMENT_SIZE]
+                yield cipher.encrypt_segment(index, segment, index == count - 1) if cipher else segment
+        
+        return self.upload_handler.upload_file_segments(
+            segments(), filename, file_type, user_id, vault_file_id, metadata, header
+        )
+    
     def _should_encrypt_file(self, file_type: str) -> bool:
         """
         Determine if a file should be encrypted based on type and configuration.
@@ -217,6 +298,21 @@ class FileService:
                            f"owner_id={file_asset.owner_id}, "
                            f"file_size={file_asset.file_size}")
 
+                # Segmented files are reassembled from their segments
+                if (file_asset.storage_backend_enum == StorageBackend.VAULT and
+                        (file_asset.file_metadata or {}).get('storage_format') == 'segmented'):
+                    download = self._segmented_download(file_asset, user_id)
+                    if not download:
+                        return None
+                    return {
+                        'data': b''.join(download.iter_range()),
+                        'filename': download.filename,
+                        'mime_type': download.mime_type,
+                        'size': download.size,
+                        'metadata': download.metadata,
+                        'encrypted': download.encrypted
+                    }
+
                 # Retrieve file from storage
                 if file_asset.storage_backend_enum == StorageBackend.VAULT:
                     logger.info(f"[FILE_DOWNLOAD] Attempting Vault retrieval with path: {file_asset.storage_path}")
@@ -323,6 +419,102 @@ class FileService:
             logger.error(f"[FILE_DOWNLOAD] Exception in download_file for {file_id}: {e}", exc_info=True)
             return None
     
+    def open_download(self, file_id: str, user_id: str) -> Optional[FileDownload]:
+        """
+        Resolve a file for streaming download, with permission checking.
+        
+        Segmented files are fetched from Vault and decrypted one segment at
+        a time as the returned FileDownload is iterated. Files stored as a
+        single secret are loaded as download_file does and served from memory.
+        
+        Args:
+            file_id: File ID
+            user_id: User ID requesting download
+            
+        Returns:
+            FileDownload, or None if not accessible
+        """
+        try:
+            with get_db_session() as session:
+                if not check_file_permission(session, file_id, user_id, PermissionType.READ.value):
+                    logger.warning(f"[FILE_DOWNLOAD] User {user_id} denied access to file {file_id}")
+                    return None
+                
+                file_asset = get_file_by_id(session, file_id)
+                if not file_asset:
+                    return None
+                
+                if (file_asset.storage_backend_enum == StorageBackend.VAULT and
+                        (file_asset.file_metadata or {}).get('storage_format') == 'segmented'):
+                    return self._segmented_download(file_asset, user_id)
+                
+                checksum = file_asset.checksum
+            
+            file_data = self.download_file(file_id, user_id)
+            if not file_data:
+                return None
+            
+            view = memoryview(file_data['data'])
+            
+            def read_range(start: int, stop: int) -> Iterator[bytes]:
+                for offset in range(start, stop, STREAM_CHUNK_SIZE):
+                    yield bytes(view[offset:min(offset + STREAM_CHUNK_SIZE, stop)])
+            
+            return FileDownload(
+                filename=file_data['filename'],
+                mime_type=file_data.get('mime_type'),
+                size=len(view),
+                checksum=checksum,
+                metadata=file_data.get('metadata'),
+                encrypted=file_data.get('encrypted', False),
+                read_range=read_range
+            )
+            
+        except Exception as e:
+            logger.error(f"[FILE_DOWNLOAD] Exception in open_download for {file_id}: {e}", exc_info=True)
+            return None
+    
+    def _segmented_download(self, file_asset: FileAsset, user_id: str) -> Optional[FileDownload]:
+        """FileDownload that reads a segmented file from Vault as it is iterated."""
+        file_id = str(file_asset.file_id)
+        storage_path = file_asset.storage_path
+        file_metadata = file_asset.file_metadata or {}
+        segment_size = file_metadata.get('segment_size', FILE_SEGMENT_SIZE)
+        encrypted = file_metadata.get('encrypted', False)
+        
+        manifest = self.vault_client.retrieve_manifest(storage_path)
+        if not manifest:
+            return None
+        segment_count = manifest['segment_count']
+        
+        cipher = None
+        if encrypted:
+            try:
+                cipher = self.encryption_service.open_segment_cipher(manifest.get('header') or {}, user_id)
+            except HoneyReserveEncryptionError as e:
+                logger.error(f"[FILE_DOWNLOAD] Cannot decrypt file {file_id} for user {user_id}: {e}")
+                return None
+        
+        def read_range(start: int, stop: int) -> Iterator[bytes]:
+            for index in range(start // segment_size, (stop - 1) // segment_size + 1):
+                segment = self.vault_client.retrieve_segment(storage_path, index)
+                if segment is None:
+                    raise FileServiceError(f"Segment {index} of file {file_id} is unavailable")
+                if cipher:
+                    segment = cipher.decrypt_segment(index, segment, index == segment_count - 1)
+                offset = index * segment_size
+                yield segment[max(start - offset, 0):stop - offset]
+        
+        return FileDownload(
+            filename=file_asset.original_filename,
+            mime_type=file_asset.mime_type,
+            size=file_asset.file_size,
+            checksum=file_asset.checksum,
+            metadata=file_asset.file_metadata,
+            encrypted=encrypted,
+            read_range=read_range
+        )
+    
     def delete_file(self, file_id: str, user_id: str) -> bool:
         """
         Delete a file with permission checking.
@@ -544,8 +736,8 @@ class FileService:
         """
         try:
             with get_db_session() as session:
-                # Get user's files with size information
-                user_files = get_user_files(session, user_id, limit=None)
+                # Counters from the usage ledger (one row per file type)
+                usage = get_storage_usage(session, user_id)
                 
                 total_bytes = 0
                 file_count = 0
@@ -556,28 +748,25 @@ class FileService:
                     'other': {'bytes': 0, 'count': 0}
                 }
                 
-                for file_asset in user_files:
-                    if file_asset.deleted_at:
+                for file_type, counters in usage.items():
+                    # Files shared with the user don't count toward their quota
+                    if file_type == 'shared':
                         continue
-                        
-                    file_size = file_asset.file_size or 0
-                    total_bytes += file_size
-                    file_count += 1
                     
-                    # Categorize file
-                    file_type = file_asset.file_type
+                    total_bytes += counters['bytes']
+                    file_count += counters['count']
+                    
+                    # Categorize file type
                     if file_type == 'temporary':
-                        breakdown['temporary']['bytes'] += file_size
-                        breakdown['temporary']['count'] += 1
+                        category = 'temporary'
                     elif file_type in ['honey_jar_document', 'user_document']:
-                        breakdown['honey_jar']['bytes'] += file_size
-                        breakdown['honey_jar']['count'] += 1
+                        category = 'honey_jar'
                     elif file_type in ['report', 'export']:
-                        breakdown['reports']['bytes'] += file_size
-                        breakdown['reports']['count'] += 1
+                        category = 'reports'
                     else:
-                        breakdown['other']['bytes'] += file_size
-                        breakdown['other']['count'] += 1
+                        category = 'other'
+                    breakdown[category]['bytes'] += counters['bytes']
+                    breakdown[category]['count'] += counters['count']
                 
                 # Get user's quota (default 1GB)
                 default_quota = int(os.environ.get('HONEY_RESERVE_DEFAULT_QUOTA', '1073741824'))
@@ -589,6 +778,7 @@ class FileService:
                     'usage_percentage': round((total_bytes / default_quota) * 100, 2),
                     'remaining_bytes': max(0, default_quota - total_bytes),
                     'breakdown': breakdown,
+                    'shared_with_me': usage.get('shared', {'bytes': 0, 'count': 0}),
                     'last_updated': datetime.utcnow().isoformat()
                 }
                 
@@ -773,9 +963,6 @@ class FileService:
         """
         try:
             with get_db_session() as session:
-                # Get all user files
-                user_files = get_user_files(session, user_id, limit=None)
-                
                 breakdown = {
                     'by_type': {},
                     'by_date': {},
@@ -787,44 +974,45 @@ class FileService:
                     }
                 }
                 
-                all_files = []
-                
-                for file_asset in user_files:
-                    if file_asset.deleted_at:
+                # By type breakdown and totals from the usage ledger
+                for file_type, counters in get_storage_usage(session, user_id).items():
+                    if file_type == 'shared':
                         continue
-                    
-                    file_size = file_asset.file_size or 0
-                    file_type = file_asset.file_type
-                    created_date = file_asset.created_at.strftime('%Y-%m')
-                    
-                    # By type breakdown
-                    if file_type not in breakdown['by_type']:
-                        breakdown['by_type'][file_type] = {'count': 0, 'bytes': 0}
-                    breakdown['by_type'][file_type]['count'] += 1
-                    breakdown['by_type'][file_type]['bytes'] += file_size
-                    
-                    # By date breakdown
-                    if created_date not in breakdown['by_date']:
-                        breakdown['by_date'][created_date] = {'count': 0, 'bytes': 0}
-                    breakdown['by_date'][created_date]['count'] += 1
-                    breakdown['by_date'][created_date]['bytes'] += file_size
-                    
-                    # Collect for largest/oldest
-                    all_files.append({
+                    breakdown['by_type'][file_type] = counters
+                    breakdown['total_stats']['total_files'] += counters['count']
+                    breakdown['total_stats']['total_bytes'] += counters['bytes']
+                
+                live_files = session.query(FileAsset).filter(
+                    FileAsset.owner_id == user_id,
+                    FileAsset.deleted_at.is_(None)
+                )
+                
+                # By date breakdown, aggregated in the database
+                month = func.to_char(FileAsset.created_at, 'YYYY-MM')
+                by_date = live_files.with_entities(
+                    month, func.count(), func.coalesce(func.sum(FileAsset.file_size), 0)
+                ).group_by(month).all()
+                for created_date, count, total_bytes in by_date:
+                    breakdown['by_date'][created_date] = {'count': count, 'bytes': int(total_bytes)}
+                
+                def summarize(file_asset):
+                    return {
                         'id': str(file_asset.id),
                         'filename': file_asset.filename,
-                        'size': file_size,
+                        'size': file_asset.file_size or 0,
                         'created_at': file_asset.created_at.isoformat(),
-                        'file_type': file_type
-                    })
-                    
-                    # Update totals
-                    breakdown['total_stats']['total_files'] += 1
-                    breakdown['total_stats']['total_bytes'] += file_size
+                        'file_type': file_asset.file_type
+                    }
                 
-                # Sort for largest and oldest
-                breakdown['largest_files'] = sorted(all_files, key=lambda x: x['size'], reverse=True)[:10]
-                breakdown['oldest_files'] = sorted(all_files, key=lambda x: x['created_at'])[:10]
+                # Largest and oldest
+                breakdown['largest_files'] = [
+                    summarize(file_asset) for file_asset in
+                    live_files.order_by(FileAsset.file_size.desc().nullslast()).limit(10)
+                ]
+                breakdown['oldest_files'] = [
+                    summarize(file_asset) for file_asset in
+                    live_files.order_by(FileAsset.created_at.asc()).limit(10)
+                ]
                 
                 return breakdown
                 
@@ -832,6 +1020,30 @@ class FileService:
             logger.error(f"Error getting storage breakdown for user {user_id}: {e}")
             return {'error': str(e)}
     
+    def reconcile_storage_usage(self, user_id: str = None) -> int:
+        """
+        Repair drift in the storage usage ledger.
+        
+        The ledger is kept current by database triggers; this recomputes it
+        from file_assets and file_permissions and corrects rows that differ.
+        
+        Args:
+            user_id: Only reconcile this user (all users when None)
+            
+        Returns:
+            Number of ledger rows corrected
+        """
+        try:
+            with get_db_session() as session:
+                repaired = reconcile_storage_usage(session, user_id)
+                if repaired:
+                    logger.warning(f"Storage usage ledger: corrected {repaired} drifted row(s)")
+                return repaired
+                
+        except Exception as e:
+            logger.error(f"Error reconciling storage usage: {e}")
+            return 0
+    
     def extract_text_content(self, file_id: str, user_id: str) -> Dict[str, Any]:
         """
         Extract text content from a file for analysis.
@@ -925,6 +1137,14 @@ class ProfileFileService:
         
         return self.file_service.download_file(files[0]['id'], user_id)
     
+    def open_profile_picture(self, user_id: str) -> Optional[FileDownload]:
+        """Resolve user's current profile picture for streaming."""
+        files = self.file_service.list_user_files(user_id, 'profile_picture', limit=1)
+        if not files:
+            return None
+        
+        return self.file_service.open_download(files[0]['id'], user_id)
+    
     def update_profile_picture(self, file_data: bytes, filename: str, user_id: str) -> Dict[str, Any]:
         """Update profile picture (delete old, upload new)."""
         # Delete existing profile picture
@@ -14,9 +14,15 @@ from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
+from app.utils.pii_detection_cache import fingerprint, get_pii_detection_cache
+from app.utils.span_rewriter import replace_tokens, rewrite_spans
+
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Scrambled placeholder: {{<pii_type>_<n>}}
+PLACEHOLDER_PATTERN = re.compile(r'\{\{(\w+)\}\}')
+
 class PIIType(Enum):
     """Types of PII that can be detected"""
     # Personal Identifiers
@@ -153,6 +159,12 @@ class HiveScrambler:
         
         # Load specialized terminology for context detection
         self._load_specialized_terms()
+
+        # Detection results are cached per (text, patterns, mode)
+        self.detector_version = fingerprint(
+            self.patterns, self.medical_patterns, self.legal_patterns,
+            self.medical_terms, self.legal_terms, self.medications
+        )
         
     def _initialize_patterns(self) -> Dict[PIIType, re.Pattern]:
         """Initialize regex patterns for PII detection"""
@@ -308,12 +320,24 @@ class HiveScrambler:
         Returns:
             List of PIIDetection objects with compliance framework assignments
         """
-        detections = []
-        
         # Auto-detect context if requested
         if auto_detect_context and self.detection_mode == DetectionMode.GENERAL:
             self.detection_mode = self._detect_document_context(text)
         
+        cache = get_pii_detection_cache()
+        cache_key = cache.key(text, self.detector_version, self.detection_mode.value)
+        records = cache.get(cache_key)
+        if records is not None:
+            return [self._detection_from_record(text, record) for record in records]
+        
+        detections = self._detect_pii_uncached(text)
+        cache.put(cache_key, [self._detection_to_record(d) for d in detections])
+        return detections
+    
+    def _detect_pii_uncached(self, text: str) -> List[PIIDetection]:
+        """Run every pattern for the current detection mode over the text"""
+        detections = []
+        
         # Process general patterns
         for pii_type, pattern in self.patterns.items():
             detections.extend(self._process_pattern_matches(text, pii_type, pattern))
@@ -336,6 +360,45 @@ class HiveScrambler:
         
         return detections
     
+    def _detection_to_record(self, detection: PIIDetection) -> Dict[str, Any]:
+        """Serialize a detection for the result cache, without its value or context"""
+        return {
+            "type": detection.pii_type.value,
+            "start": detection.start_position,
+            "end": detection.end_position,
+            "confidence": detection.confidence,
+            "frameworks": [fw.value for fw in detection.compliance_frameworks or []],
+            "method": detection.detection_method,
+            "risk": detection.risk_level
+        }
+    
+    def _detection_from_record(self, text: str, record: Dict[str, Any]) -> PIIDetection:
+        """Rebuild a cached detection, re-deriving value and context from the text"""
+        pii_type = PIIType(record["type"])
+        start, end = record["start"], record["end"]
+        value = text[start:end]
+        
+        # Same context windows and masking as the detectors that produced it
+        if record["method"] == "entity_detection":
+            context = text[max(0, start - 200):end + 200].lower()
+            masked_value = f"[MEDICATION_{end - start}]"
+        else:
+            context = text[max(0, start - 100):end + 100]
+            masked_value = self._generate_masked_value(pii_type, value)
+        
+        return PIIDetection(
+            pii_type=pii_type,
+            original_value=value,
+            start_position=start,
+            end_position=end,
+            confidence=record["confidence"],
+            context=context,
+            compliance_frameworks=[ComplianceFramework(fw) for fw in record["frameworks"]],
+            masked_value=masked_value,
+            detection_method=record["method"],
+            risk_level=record["risk"]
+        )
+    
     def detect_pii_with_audit(self, 
                             text: str, 
                             user_id: str,
@@ -569,8 +632,7 @@ class HiveScrambler:
             ScrambledData object with scrambled text and mappings
         """
         detections = self.detect_pii(text)
-        scrambled_text = text
-        offset = 0
+        spans = []
         
         for detection in detections:
             # Generate scrambled value
@@ -587,19 +649,10 @@ class HiveScrambler:
             
             # Replace in text with placeholder
             placeholder = f"{{{{{mapping_key}}}}}"
-            
-            # Adjust positions based on offset from previous replacements
-            start = detection.start_position + offset
-            end = detection.end_position + offset
-            
-            scrambled_text = (
-                scrambled_text[:start] + 
-                placeholder + 
-                scrambled_text[end:]
-            )
-            
-            # Update offset
-            offset += len(placeholder) - (end - start)
+            spans.append((detection.start_position, detection.end_position, placeholder))
+        
+        # Detections are sorted and non-overlapping, so one pass rebuilds the text
+        scrambled_text = rewrite_spans(text, spans)
         
         metadata = {
             "timestamp": datetime.utcnow().isoformat(),
@@ -626,12 +679,7 @@ class HiveScrambler:
         Returns:
             Original text with PII restored
         """
-        unscrambled = scrambled_text
-        
-        for placeholder, original in mapping.items():
-            unscrambled = unscrambled.replace(f"{{{{{placeholder}}}}}", original)
-        
-        return unscrambled
+        return replace_tokens(scrambled_text, PLACEHOLDER_PATTERN, mapping, group=1)
     
     def _generate_scrambled_value(
         self, 
@@ -43,6 +43,33 @@ class HoneyReserveEncryptionError(Exception):
     """Custom exception for encryption service errors."""
     pass
 
+@dataclass
+class SegmentCipher:
+    """
+    Per-file AES-GCM cipher for files stored as independently encrypted segments.
+    
+    Segment n uses nonce = nonce_prefix (8 bytes) + n (4 bytes), and its index
+    and a last-segment flag are authenticated as associated data, so segments
+    cannot be reordered, swapped between files or dropped from the end.
+    """
+    file_key: bytes
+    nonce_prefix: bytes
+    
+    def _nonce_and_aad(self, index: int, last: bool) -> Tuple[bytes, bytes]:
+        position = index.to_bytes(4, 'big')
+        return self.nonce_prefix + position, position + (b'\x01' if last else b'\x00')
+    
+    def encrypt_segment(self, index: int, data: bytes, last: bool) -> bytes:
+        nonce, aad = self._nonce_and_aad(index, last)
+        return AESGCM(self.file_key).encrypt(nonce, bytes(data), aad)
+    
+    def decrypt_segment(self, index: int, data: bytes, last: bool) -> bytes:
+        nonce, aad = self._nonce_and_aad(index, last)
+        try:
+            return AESGCM(self.file_key).decrypt(nonce, data, aad)
+        except Exception as e:
+            raise HoneyReserveEncryptionError(f"Segment {index} failed authentication: {e}")
+
 class HoneyReserveEncryption:
     """
     File encryption service that uses Kratos user identities for key derivation.
@@ -321,6 +348,78 @@ class HoneyReserveEncryption:
         except Exception as e:
             raise HoneyReserveEncryptionError(f"Failed to deserialize encrypted file: {e}")
     
+    def create_segment_cipher(self, user_id: str, file_size: int,
+                              metadata: Dict[str, Any] = None) -> Tuple[SegmentCipher, Dict[str, Any]]:
+        """
+        Create a segment cipher for a new file.
+        
+        Args:
+            user_id: Kratos user identity ID
+            file_size: Plaintext file size
+            metadata: Optional metadata to include
+            
+        Returns:
+            Tuple of (cipher, header); the header holds the file key wrapped
+            with the user's key and is stored alongside the segments
+        """
+        try:
+            user_context = self.get_user_encryption_context(user_id)
+            
+            file_key = secrets.token_bytes(32)
+            nonce_prefix = secrets.token_bytes(8)
+            
+            key_nonce = secrets.token_bytes(12)
+            encrypted_file_key = key_nonce + AESGCM(user_context.derived_key).encrypt(key_nonce, file_key, None)
+            
+            encryption_metadata = {
+                'algorithm': 'AES-256-GCM',
+                'key_derivation': 'HKDF-SHA256',
+                'version': '2.0',
+                'user_id': user_id,
+                'file_size': file_size
+            }
+            if metadata:
+                encryption_metadata['user_metadata'] = metadata
+            
+            header = {
+                'encrypted_file_key': base64.b64encode(encrypted_file_key).decode('utf-8'),
+                'nonce_prefix': base64.b64encode(nonce_prefix).decode('utf-8'),
+                'encryption_metadata': json.dumps(encryption_metadata),
+                'created_at': datetime.utcnow().isoformat()
+            }
+            return SegmentCipher(file_key, nonce_prefix), header
+            
+        except Exception as e:
+            logger.error(f"Failed to create segment cipher for user {user_id}: {e}")
+            raise HoneyReserveEncryptionError(f"Encryption failed: {str(e)}")
+    
+    def open_segment_cipher(self, header: Dict[str, Any], user_id: str) -> SegmentCipher:
+        """
+        Unwrap the file key from a header written by create_segment_cipher.
+        
+        Args:
+            header: Stored segment cipher header
+            user_id: Kratos user identity ID
+            
+        Returns:
+            SegmentCipher for decrypting the file's segments
+        """
+        try:
+            encryption_metadata = json.loads(header['encryption_metadata'])
+            if encryption_metadata.get('user_id') != user_id:
+                raise HoneyReserveEncryptionError("User does not have access to this file")
+            
+            user_context = self.get_user_encryption_context(user_id)
+            encrypted_file_key = base64.b64decode(header['encrypted_file_key'])
+            file_key = AESGCM(user_context.derived_key).decrypt(
+                encrypted_file_key[:12], encrypted_file_key[12:], None
+            )
+            return SegmentCipher(file_key, base64.b64decode(header['nonce_prefix']))
+            
+        except Exception as e:
+            logger.error(f"Failed to open segment cipher for user {user_id}: {e}")
+            raise HoneyReserveEncryptionError(f"Decryption failed: {str(e)}")
+    
     def validate_user_access(self, session_cookie: str) -> Optional[str]:
         """
         Validate user session and return user ID.
@@ -405,6 +405,19 @@ class ReportService:
             logger.error(f"Error cancelling report {report_id}: {e}")
             return False
     
+    def is_cancelled(self, report_id: str) -> bool:
+        """Check whether a report has been cancelled by its owner"""
+        try:
+            with get_db_session() as session:
+                report = get_report_by_id(session, report_id)
+                if not report:
+                    return False
+                status = report.status.value if hasattr(report.status, 'value') else report.status
+                return status == 'cancelled'
+        except Exception as e:
+            logger.error(f"Error checking cancellation for {report_id}: {e}")
+            return False
+    
     def cleanup_stale_jobs(self) -> Dict[str, int]:
         """Clean up stale processing jobs that have timed out"""
         try:
@@ -49,6 +49,21 @@ def cleanup_expired_passkey_challenges():
         db.session.rollback()
         return 0
 
+def reconcile_storage_usage():
+    """
+    Repair drift in the Honey Reserve storage usage ledger.
+    
+    Returns:
+        int: Number of ledger rows corrected
+    """
+    try:
+        from app.services.file_service import get_file_service
+        return get_file_service().reconcile_storage_usage()
+        
+    except Exception as e:
+        logger.error(f"Error reconciling storage usage: {str(e)}")
+        return 0
+
 def run_periodic_cleanup():
     """
     Run all periodic cleanup tasks.
@@ -60,6 +75,9 @@ def run_periodic_cleanup():
     # Clean up expired passkey challenges
     cleanup_expired_passkey_challenges()
     
+    # Repair storage usage counters
+    reconcile_storage_usage()
+    
     logger.info("Completed periodic cleanup tasks")
 
 if __name__ == "__main__":
@@ -0,0 +1,735 @@
+"""
+Request Instrumentation
+
+Shows where time goes across a request that crosses the Flask app, the Bee
+chatbot, the knowledge service and the external AI service:
+
+- Request IDs: taken from the X-Request-ID header (set by nginx) or
+  generated, held in a contextvar for the rest of the request, and added to
+  every outgoing requests/httpx/aiohttp call so the next service joins the
+  same request
+- Span timers: span("kratos.whoami") as a context manager or decorator
+  (sync or async) around the phases we care about
+- Hooks: SQLAlchemy and asyncpg query timing, requests/httpx/aiohttp client
+  timing
+- Metrics: fixed-bucket histograms kept in process and served in the
+  Prometheus text format on /metrics
+
+Metrics:
+- sting_http_request_duration_seconds{method, route, status}
+- sting_span_duration_seconds{span, outcome}
+- sting_db_query_duration_seconds{driver, operation}
+- sting_http_client_duration_seconds{client, host, method, status}
+
+Every series also carries a constant service label.
+
+Cheap enough to leave on in production: an observation is a bisect and a
+counter increment under a lock, nothing is logged per event, and label sets
+are capped per metric. Inbound requests are always recorded; spans, queries
+and client calls are sampled per request:
+- INSTRUMENTATION_ENABLED (default true)
+- INSTRUMENTATION_SAMPLE_RATE (default 1.0; sampled counts are not scaled,
+  divide by sting_instrumentation_sample_rate for totals)
+
+Metrics are per process. When several processes serve the same port
+(gunicorn workers in the Flask app), set INSTRUMENTATION_MULTIPROC_DIR to a
+directory private to the container: each process writes a snapshot of its
+histograms there every INSTRUMENTATION_SNAPSHOT_SECONDS (and on exit), and
+/metrics on any worker sums all snapshots, so counters stay monotonic across
+scrapes. Clear the directory when the container starts.
+
+/metrics is unauthenticated; it is meant to be scraped on the internal
+network, and nginx does not proxy it.
+
+This module only depends on the standard library (the web frameworks, HTTP
+clients and database drivers it hooks are optional) so it can be copied into
+the other service images alongside the Flask app.
+"""
+
+import asyncio
+import atexit
+import functools
+import inspect
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+REQUEST_ID_HEADER = "X-Request-ID"
+METRICS_PATH = "/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; +Inf is implicit
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+CLIENT_BUCKETS = DEFAULT_BUCKETS + (120.0, 300.0)
+
+# Label sets kept per metric; later ones are folded into a single overflow series
+MAX_SERIES_PER_METRIC = 500
+OVERFLOW_LABEL = "__overflow__"
+
+# Incoming request IDs are trusted only if they look like one
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+# Statement keywords reported as the query operation; anything else is OTHER
+SQL_OPERATIONS = frozenset({
+    "SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT",
+    "ROLLBACK", "SAVEPOINT", "RELEASE", "CREATE", "ALTER", "DROP", "SET", "SHOW"
+})
+
+ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() not in ('0', 'false', 'no', 'off')
+SAMPLE_RATE = min(1.0, max(0.0, float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', '1.0'))))
+
+MULTIPROC_DIR = os.environ.get('INSTRUMENTATION_MULTIPROC_DIR', '')
+SNAPSHOT_INTERVAL = float(os.environ.get('INSTRUMENTATION_SNAPSHOT_SECONDS', '5'))
+
+_request_id: ContextVar[Optional[str]] = ContextVar('sting_request_id', default=None)
+_sampled: ContextVar[Optional[bool]] = ContextVar('sting_request_sampled', default=None)
+
+
+class Histogram:
+    """
+    Cumulative histogram with a fixed label set, rendered in Prometheus format.
+
+    Usage:
+        histogram.observe(0.042, "GET", "/api/files", "200")
+    """
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (last is +Inf)..., sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        """Record one observation for the given label values."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                if len(self._series) >= MAX_SERIES_PER_METRIC:
+                    labelvalues = (OVERFLOW_LABEL,) * len(self.labelnames)
+                    series = self._series.get(labelvalues)
+                if series is None:
+                    series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> List[Tuple[Tuple[str, ...], List[float]]]:
+        """Copy of every series as (label values, bucket counts + sum)."""
+        with self._lock:
+            return [(labels, list(series)) for labels, series in self._series.items()]
+
+    def merge(self, labelvalues: Sequence[str], series: Sequence[float]):
+        """Add another process's series for the same label values."""
+        labelvalues = tuple(labelvalues)
+        with self._lock:
+            current = self._series.get(labelvalues)
+            if current is None:
+                self._series[labelvalues] = list(series)
+            else:
+                for index, value in enumerate(series):
+                    current[index] += value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self, const_labels: str = "") -> List[str]:
+        """Exposition lines for this histogram."""
+        snapshot = self.snapshot()
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labelvalues, series in sorted(snapshot):
+            labels = const_labels + "".join(
+                f',{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues)
+            )
+            labels = labels.lstrip(',')
+            separator = "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """The process's histograms and the constant labels added to every series."""
+
+    def __init__(self, multiproc_dir: str = ''):
+        self._metrics: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self.const_labels: Dict[str, str] = {}
+        self.multiproc_dir = multiproc_dir
+        self._writer_pid: Optional[int] = None
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram by name."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        const_labels = ",".join(f'{name}="{_escape(value)}"' for name, value in self.const_labels.items())
+        lines = [
+            "# HELP sting_instrumentation_sample_rate Fraction of requests whose spans, queries and client calls are recorded",
+            "# TYPE sting_instrumentation_sample_rate gauge",
+            f"sting_instrumentation_sample_rate{{{const_labels}}} {_format_value(SAMPLE_RATE if ENABLED else 0.0)}",
+        ]
+        if self.multiproc_dir:
+            self.write_snapshot()
+            metrics = self._merged_metrics()
+        else:
+            with self._lock:
+                metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render(const_labels))
+        return "\n".join(lines) + "\n"
+
+    # --- Multi-process aggregation ---
+
+    def start_snapshot_writer(self):
+        """Write this process's snapshot periodically and on exit (once per process)."""
+        if not self.multiproc_dir or self._writer_pid == os.getpid():
+            return
+        self._writer_pid = os.getpid()
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        threading.Thread(target=self._snapshot_loop, name="instrumentation-snapshot", daemon=True).start()
+        atexit.register(self.write_snapshot)
+
+    def _snapshot_loop(self):
+        while True:
+            time.sleep(SNAPSHOT_INTERVAL)
+            self.write_snapshot()
+
+    def _after_fork(self):
+        # A forked worker starts from zero; the parent's counts stay in the parent's
+        # snapshot. Locks are replaced: another parent thread may have held them.
+        self._lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric._lock = threading.Lock()
+            metric.reset()
+        self._writer_pid = None
+        self.start_snapshot_writer()
+
+    def write_snapshot(self):
+        """Atomically replace this process's snapshot file."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        data = {
+            metric.name: {
+                "documentation": metric.documentation,
+                "labelnames": metric.labelnames,
+                "buckets": metric.buckets,
+                "series": metric.snapshot(),
+            }
+            for metric in metrics
+        }
+        path = os.path.join(self.multiproc_dir, f"{os.getpid()}.json")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    def _merged_metrics(self) -> List[Histogram]:
+        """Sum the snapshots of every process that has written one."""
+        with self._lock:
+            merged = {name: Histogram(metric.name, metric.documentation, metric.labelnames, metric.buckets)
+                      for name, metric in self._metrics.items()}
+        try:
+            filenames = sorted(name for name in os.listdir(self.multiproc_dir) if name.endswith(".json"))
+        except OSError:
+            filenames = []
+        for filename in filenames:
+            try:
+                with open(os.path.join(self.multiproc_dir, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, metric in data.items():
+                target = merged.get(name)
+                if target is None:
+                    target = merged[name] = Histogram(name, metric["documentation"],
+                                                      metric["labelnames"], metric["buckets"])
+                if list(target.buckets) != sorted(metric["buckets"]):
+                    continue
+                for labelvalues, series in metric["series"]:
+                    target.merge(labelvalues, series)
+        return list(merged.values())
+
+
+_registry = MetricsRegistry(MULTIPROC_DIR)
+if MULTIPROC_DIR and hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_registry._after_fork)
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _registry
+
+
+REQUEST_DURATION = _registry.histogram(
+    "sting_http_request_duration_seconds", "Inbound HTTP request duration",
+    ("method", "route", "status"))
+SPAN_DURATION = _registry.histogram(
+    "sting_span_duration_seconds", "Duration of named spans within a request",
+    ("span", "outcome"))
+DB_QUERY_DURATION = _registry.histogram(
+    "sting_db_query_duration_seconds", "Database query duration",
+    ("driver", "operation"), DB_BUCKETS)
+HTTP_CLIENT_DURATION = _registry.histogram(
+    "sting_http_client_duration_seconds", "Outbound HTTP call duration",
+    ("client", "host", "method", "status"), CLIENT_BUCKETS)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+def configure(service: str):
+    """Set the service label reported on every metric."""
+    _registry.const_labels["service"] = service
+    _registry.start_snapshot_writer()
+
+
+# --- Request context -------------------------------------------------------
+
+def get_request_id() -> Optional[str]:
+    """The current request's ID, or None outside a request."""
+    return _request_id.get()
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+def bind_request(request_id: Optional[str] = None) -> Tuple[Any, Any]:
+    """
+    Start a request context: set its ID and make its sampling decision.
+
+    Args:
+        request_id: Incoming X-Request-ID; replaced if missing or malformed
+
+    Returns:
+        Token for unbind_request()
+    """
+    if not request_id or not _REQUEST_ID_PATTERN.match(request_id):
+        request_id = new_request_id()
+    sampled = ENABLED and (SAMPLE_RATE >= 1.0 or random.random() < SAMPLE_RATE)
+    return _request_id.set(request_id), _sampled.set(sampled)
+
+
+def unbind_request(token: Tuple[Any, Any]):
+    """Restore the context from before bind_request()."""
+    request_token, sampled_token = token
+    _sampled.reset(sampled_token)
+    _request_id.reset(request_token)
+
+
+def is_sampled() -> bool:
+    """Whether spans, queries and client calls should be recorded right now."""
+    sampled = _sampled.get()
+    if sampled is None:
+        # Outside a request (startup, background tasks): sample per event
+        return ENABLED and (SAMPLE_RATE >= 1.0 or random.random() < SAMPLE_RATE)
+    return sampled
+
+
+# --- Spans -----------------------------------------------------------------
+
+class Span:
+    """
+    Times a block as sting_span_duration_seconds{span=name}.
+
+    Works as a context manager or as a decorator for sync and async
+    functions. Outcome is "error" if the block raised.
+    """
+
+    __slots__ = ('name', '_start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self._start = None
+
+    def __enter__(self) -> 'Span':
+        self._start = time.perf_counter() if is_sampled() else None
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self._start is not None:
+            if exc_type is None:
+                outcome = "ok"
+            elif issubclass(exc_type, asyncio.CancelledError):
+                outcome = "cancelled"
+            else:
+                outcome = "error"
+            SPAN_DURATION.observe(time.perf_counter() - self._start, self.name, outcome)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        name = self.name
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with Span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def span(name: str) -> Span:
+    """Time a block or function as a named span."""
+    return Span(name)
+
+
+def record_span(name: str, seconds: float, outcome: str = "ok"):
+    """Record a span timed elsewhere (e.g. first token of a streamed response)."""
+    if is_sampled():
+        SPAN_DURATION.observe(seconds, name, outcome)
+
+
+# --- Database hooks --------------------------------------------------------
+
+def sql_operation(statement: Any) -> str:
+    """First keyword of a SQL statement, e.g. SELECT; OTHER if unrecognised."""
+    if not isinstance(statement, str):
+        return "OTHER"
+    words = statement.lstrip(" \t\r\n(").split(None, 1)
+    keyword = words[0].upper() if words else ""
+    return keyword if keyword in SQL_OPERATIONS else "OTHER"
+
+
+def instrument_sqlalchemy() -> bool:
+    """Time every SQLAlchemy cursor execution, for all engines."""
+    try:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+    except ImportError:
+        return False
+
+    if event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        return True
+
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    return True
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and is_sampled():
+        context._sting_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_sting_query_start', None)
+    if start is not None:
+        DB_QUERY_DURATION.observe(time.perf_counter() - start, "sqlalchemy", sql_operation(statement))
+
+
+ASYNCPG_METHODS = ('execute', 'executemany', 'fetch', 'fetchrow', 'fetchval')
+
+
+def instrument_asyncpg() -> bool:
+    """
+    Time asyncpg queries.
+
+    asyncpg has no event hooks, so the query methods of Connection are
+    wrapped; pooled connections and Pool.fetch*() go through them too.
+    """
+    try:
+        from asyncpg.connection import Connection
+    except ImportError:
+        return False
+
+    for method_name in ASYNCPG_METHODS:
+        method = getattr(Connection, method_name)
+        if getattr(method, '_sting_instrumented', False):
+            continue
+        setattr(Connection, method_name, _wrap_asyncpg_method(method))
+    return True
+
+
+def _wrap_asyncpg_method(method: Callable) -> Callable:
+    @functools.wraps(method)
+    async def wrapper(self, query, *args, **kwargs):
+        if not is_sampled():
+            return await method(self, query, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            DB_QUERY_DURATION.observe(time.perf_counter() - start, "asyncpg", sql_operation(query))
+
+    wrapper._sting_instrumented = True
+    return wrapper
+
+
+# --- HTTP client hooks -----------------------------------------------------
+
+def instrument_http_clients() -> List[str]:
+    """
+    Time outgoing requests/httpx/aiohttp calls and forward the request ID.
+
+    Durations run until the response is available to the caller: the full
+    body for requests, the headers for httpx and aiohttp.
+
+    Returns:
+        Names of the client libraries that were instrumented
+    """
+    instrumented = []
+    for name, install in (('requests', _instrument_requests),
+                          ('httpx', _instrument_httpx),
+                          ('aiohttp', _instrument_aiohttp)):
+        try:
+            install()
+        except ImportError:
+            continue
+        instrumented.append(name)
+    return instrumented
+
+
+def _propagate_request_id(headers):
+    request_id = _request_id.get()
+    if request_id and REQUEST_ID_HEADER not in headers:
+        headers[REQUEST_ID_HEADER] = request_id
+
+
+def _record_client_call(client: str, host: Optional[str], method: str, status: Any, start: float):
+    HTTP_CLIENT_DURATION.observe(time.perf_counter() - start, client, host or "", method, str(status))
+
+
+def _instrument_requests():
+    from urllib.parse import urlsplit
+    from requests import Session
+
+    send = Session.send
+    if getattr(send, '_sting_instrumented', False):
+        return
+
+    @functools.wraps(send)
+    def instrumented_send(self, request, **kwargs):
+        _propagate_request_id(request.headers)
+        if not is_sampled():
+            return send(self, request, **kwargs)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = send(self, request, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            _record_client_call("requests", urlsplit(request.url).hostname, request.method, status, start)
+
+    instrumented_send._sting_instrumented = True
+    Session.send = instrumented_send
+
+
+def _instrument_httpx():
+    import httpx
+
+    send = httpx.Client.send
+    if getattr(send, '_sting_instrumented', False):
+        return
+    async_send = httpx.AsyncClient.send
+
+    @functools.wraps(send)
+    def instrumented_send(self, request, *args, **kwargs):
+        _propagate_request_id(request.headers)
+        if not is_sampled():
+            return send(self, request, *args, **kwargs)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = send(self, request, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            _record_client_call("httpx", request.url.host, request.method, status, start)
+
+    @functools.wraps(async_send)
+    async def instrumented_async_send(self, request, *args, **kwargs):
+        _propagate_request_id(request.headers)
+        if not is_sampled():
+            return await async_send(self, request, *args, **kwargs)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await async_send(self, request, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            _record_client_call("httpx", request.url.host, request.method, status, start)
+
+    instrumented_send._sting_instrumented = True
+    httpx.Client.send = instrumented_send
+    httpx.AsyncClient.send = instrumented_async_send
+
+
+def _instrument_aiohttp():
+    import aiohttp
+
+    init = aiohttp.ClientSession.__init__
+    if getattr(init, '_sting_instrumented', False):
+        return
+
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        _propagate_request_id(params.headers)
+        ctx.sting_start = time.perf_counter() if is_sampled() else None
+
+    async def on_request_end(session, ctx, params):
+        if ctx.sting_start is not None:
+            _record_client_call("aiohttp", params.url.host, params.method, params.response.status, ctx.sting_start)
+
+    async def on_request_exception(session, ctx, params):
+        if getattr(ctx, 'sting_start', None) is not None:
+            _record_client_call("aiohttp", params.url.host, params.method, "error", ctx.sting_start)
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    trace_config.freeze()
+
+    # TraceConfig is aiohttp's hook point, but it has to be passed to every
+    # session; add ours to the sessions the services create themselves
+    @functools.wraps(init)
+    def instrumented_init(self, *args, trace_configs=None, **kwargs):
+        init(self, *args, trace_configs=[*(trace_configs or ()), trace_config], **kwargs)
+
+    instrumented_init._sting_instrumented = True
+    aiohttp.ClientSession.__init__ = instrumented_init
+
+
+# --- Web framework integration ---------------------------------------------
+
+def install(service: str):
+    """
+    Configure the service label and install the client and database hooks.
+
+    Call once at startup, before the app creates its clients and engines.
+    """
+    configure(service)
+    if not ENABLED:
+        return
+    instrument_http_clients()
+    instrument_sqlalchemy()
+    instrument_asyncpg()
+
+
+def instrument_flask(app, metrics_path: str = METRICS_PATH):
+    """
+    Bind a request context for every Flask request and serve /metrics.
+
+    Register before other before_request handlers (e.g. authentication) so
+    their time is included and they run with the request ID set.
+    """
+    from flask import Response, g, request
+
+    @app.before_request
+    def _bind_instrumentation_context():
+        g._instrumentation = (bind_request(request.headers.get(REQUEST_ID_HEADER)), time.perf_counter())
+
+    @app.after_request
+    def _record_instrumented_request(response):
+        state = g.get('_instrumentation')
+        if state is not None:
+            response.headers.setdefault(REQUEST_ID_HEADER, get_request_id())
+            route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            REQUEST_DURATION.observe(time.perf_counter() - state[1], request.method, route,
+                                     str(response.status_code))
+        return response
+
+    @app.teardown_request
+    def _unbind_instrumentation_context(exc):
+        state = g.pop('_instrumentation', None)
+        if state is not None:
+            unbind_request(state[0])
+
+    def metrics():
+        return Response(_registry.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule(metrics_path, 'instrumentation_metrics', metrics, methods=['GET'])
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware binding a request context for every HTTP request.
+
+    Add it last so it wraps the other middleware:
+        app.add_middleware(RequestContextMiddleware)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        header = REQUEST_ID_HEADER.lower().encode()
+        incoming = next((value.decode('latin-1') for name, value in scope.get('headers', ()) if name == header), None)
+        token = bind_request(incoming)
+        request_id = get_request_id()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = list(message.get('headers', ()))
+                if not any(name.lower() == header for name, _ in headers):
+                    headers.append((header, request_id.encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = getattr(scope.get('route'), 'path', None) or "<unmatched>"
+            REQUEST_DURATION.observe(time.perf_counter() - start, scope.get('method', ''), route, str(status))
+            unbind_request(token)
+
+
+def instrument_fastapi(app, metrics_path: str = METRICS_PATH):
+    """Add RequestContextMiddleware and serve /metrics on a FastAPI app."""
+    from starlette.responses import Response
+
+    async def metrics():
+        return Response(_registry.render(), media_type=CONTENT_TYPE)
+
+    app.add_middleware(RequestContextMiddleware)
+    app.add_api_route(metrics_path, metrics, methods=['GET'], include_in_schema=False)
@@ -0,0 +1,139 @@
+"""
+Compiled Multi-Keyword Matcher
+
+Classifies a message against many keyword lists in a single pass.
+Used on every chat turn by:
+- Sentiment analysis (chatbot/core/sentiment_analyzer.py)
+- Report-intent detection in bee_chat (external_ai_service/app.py)
+
+All keywords are folded into one trie-shaped regex wrapped in a lookahead,
+so a chat-sized message is scanned once regardless of how many keywords or
+categories are registered. Long texts fall back to per-keyword substring
+scans, which CPython runs faster than the regex engine at that size.
+Results match plain ``keyword in text`` substring semantics, including
+keywords that overlap or are prefixes of each other.
+
+This module only depends on the standard library so it can be copied into
+the chatbot and external AI service images alongside the Flask app.
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Set
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Build a regex alternation factored as a prefix trie.
+
+    The regex engine then walks shared prefixes once instead of retrying
+    every alternative at each text position.
+    """
+    trie: Dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def _build(node: Dict) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + _build(child)
+                    for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if terminal else body
+
+    return _build(trie)
+
+
+class KeywordMatcher:
+    """
+    Matches text against named keyword categories in one pass.
+
+    Example:
+        matcher = KeywordMatcher({
+            'positive': ['thank', 'thanks', 'great'],
+            'urgency': ['urgent', 'asap'],
+        })
+        hits = matcher.match("Thanks, this is urgent")
+        # {'positive': {'thank', 'thanks'}, 'urgency': {'urgent'}}
+    """
+
+    # Text length (chars) above which substring scans beat the compiled regex.
+    # Measured with scripts/benchmarks/keyword_matcher_benchmark.py.
+    long_text_threshold = 128
+
+    def __init__(self, categories: Mapping[str, Iterable[str]], case_sensitive: bool = False):
+        """
+        Args:
+            categories: Mapping of category name to the keywords that signal it.
+                A keyword may appear in several categories.
+            case_sensitive: When False (default), text and keywords are lowercased.
+        """
+        self.case_sensitive = case_sensitive
+        self.categories: Dict[str, List[str]] = {}
+        keyword_categories: Dict[str, Set[str]] = {}
+
+        for category, keywords in categories.items():
+            normalized = [self._normalize(kw) for kw in keywords if kw]
+            self.categories[category] = normalized
+            for keyword in normalized:
+                keyword_categories.setdefault(keyword, set()).add(category)
+
+        self._keyword_categories: Dict[str, FrozenSet[str]] = {
+            kw: frozenset(cats) for kw, cats in keyword_categories.items()
+        }
+
+        # The regex reports the longest keyword starting at each position.
+        # Every other keyword starting there is a prefix of it, so expand
+        # each keyword to the registered keywords it has as prefixes.
+        self._prefix_closure: Dict[str, List[str]] = {
+            kw: [other for other in keyword_categories if kw.startswith(other)]
+            for kw in keyword_categories
+        }
+
+        if keyword_categories:
+            self._pattern = re.compile('(?=(' + _trie_pattern(keyword_categories) + '))')
+        else:
+            self._pattern = None
+
+    def _normalize(self, text: str) -> str:
+        return text if self.case_sensitive else text.lower()
+
+    def find_keywords(self, text: str) -> Set[str]:
+        """Return the distinct keywords that occur anywhere in text."""
+        if not text or self._pattern is None:
+            return set()
+
+        text = self._normalize(text)
+
+        # Past a few lines of text the regex engine's per-position cost loses
+        # to CPython's fast substring search, so scan keyword by keyword.
+        if len(text) > self.long_text_threshold:
+            return {kw for kw in self._keyword_categories if kw in text}
+
+        found: Set[str] = set()
+        for longest in set(self._pattern.findall(text)):
+            found.update(self._prefix_closure[longest])
+        return found
+
+    def match(self, text: str) -> Dict[str, Set[str]]:
+        """
+        Classify text in one pass.
+
+        Returns:
+            Dict mapping each hit category to the distinct keywords found for it.
+            Categories with no hits are omitted.
+        """
+        hits: Dict[str, Set[str]] = {}
+        for keyword in self.find_keywords(text):
+            for category in self._keyword_categories[keyword]:
+                hits.setdefault(category, set()).add(keyword)
+        return hits
+
+    def match_categories(self, text: str) -> Set[str]:
+        """Return only the names of the categories that have at least one hit."""
+        return set(self.match(text))
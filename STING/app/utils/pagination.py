@@ -0,0 +1,52 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Listings ordered by (timestamp DESC, id DESC) hand out the last row's sort key
+as an opaque cursor; the next page is every row strictly after it in that
+order. Unlike OFFSET, a page costs the same however deep it is, and rows
+inserted or deleted meanwhile don't shift later pages.
+"""
+
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(timestamp: datetime, row_id) -> str:
+    """
+    Encode a row's sort key as an opaque, URL-safe cursor.
+
+    Args:
+        timestamp: The row's ordering timestamp
+        row_id: The row's primary key (tie-breaker)
+
+    Returns:
+        str: Cursor to pass back for the next page
+    """
+    payload = json.dumps([timestamp.isoformat(), str(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        Tuple of (timestamp, row_id)
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), uuid.UUID(row_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {cursor!r}") from e
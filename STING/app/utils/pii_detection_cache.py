@@ -0,0 +1,309 @@
+"""
+PII Detection Result Cache
+
+The same text is often scanned for PII more than once: a document on upload,
+rescan and approval, or the brain/system context that goes out with every
+chat turn. Detection is pure in (text, detector patterns, mode/profile), so
+results are cached under that key and reused.
+
+Key: (SHA-256 of the text, detector version, profile fingerprint, generation)
+- detector version: fingerprint of the detector's patterns and term lists,
+  so editing a pattern never serves results from the old one
+- profile: whatever else changes the output (detection mode, enabled types)
+- generation: bumped by invalidate(), e.g. when a compliance profile or
+  custom rule changes. It is shared through Redis when available so an
+  invalidation in the Flask app reaches the other services within
+  GENERATION_CHECK_INTERVAL seconds.
+
+Only positions, types and scores are stored - never the detected values or
+their surrounding context. Callers rebuild those by slicing the text they
+already hold, so the cache never becomes a second copy of the PII.
+
+Bounded by entry count (LRU) and TTL:
+- PII_DETECTION_CACHE_MAX_ENTRIES (default 5000, 0 disables caching)
+- PII_DETECTION_CACHE_TTL_SECONDS (default 3600)
+
+This module only depends on the standard library (Redis is optional) so it
+can be copied into the external AI and knowledge service images alongside
+the Flask app.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "sting:pii:detection_cache:generation"
+
+# How often to poll the shared generation counter
+GENERATION_CHECK_INTERVAL = 5.0
+
+# Record fields that would hold PII; put() refuses them
+RAW_VALUE_FIELDS = frozenset({"value", "original_value", "context", "masked_value"})
+
+CacheKey = Tuple[str, str, str, int]
+
+
+def _canonical(obj: Any) -> Any:
+    """Convert detector configuration into JSON with a deterministic layout."""
+    if isinstance(obj, Enum):
+        return _canonical(obj.value)
+    if isinstance(obj, dict):
+        return sorted((json.dumps(_canonical(k)), _canonical(v)) for k, v in obj.items())
+    if isinstance(obj, (set, frozenset)):
+        return sorted((_canonical(item) for item in obj), key=json.dumps)
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(item) for item in obj]
+    if isinstance(obj, re.Pattern):
+        return [obj.pattern, obj.flags]
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return str(obj)
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Stable short hash of detector configuration (patterns, term lists, modes).
+
+    Dict keys and sets are ordered first, so the result doesn't depend on
+    hash randomization between processes.
+    """
+    payload = json.dumps(_canonical(parts), separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class PIIDetectionCache:
+    """
+    In-process LRU of PII detection results with TTL and shared invalidation.
+
+    Usage:
+        key = cache.key(text, detector_version, profile)
+        records = cache.get(key)
+        if records is None:
+            records = ...  # run detection, serialize without values
+            cache.put(key, records)
+
+    key() snapshots the current generation, so results computed while an
+    invalidation lands are never stored under the new generation.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        redis_url: Optional[str] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum cached texts (env PII_DETECTION_CACHE_MAX_ENTRIES)
+            ttl_seconds: Entry lifetime (env PII_DETECTION_CACHE_TTL_SECONDS)
+            redis_url: Redis for the shared generation counter (env REDIS_URL)
+        """
+        if max_entries is None:
+            max_entries = int(os.environ.get('PII_DETECTION_CACHE_MAX_ENTRIES', '5000'))
+        if ttl_seconds is None:
+            ttl_seconds = float(os.environ.get('PII_DETECTION_CACHE_TTL_SECONDS', '3600'))
+
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url or os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Tuple[Dict[str, Any], ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._generation = 0
+        self._generation_checked_at = 0.0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key(self, text: str, detector_version: str, profile: Hashable = None) -> CacheKey:
+        """
+        Build the cache key for scanning `text`.
+
+        Args:
+            text: Text to be scanned
+            detector_version: fingerprint() of the detector's patterns
+            profile: Anything else that changes the output (mode, enabled types)
+
+        Returns:
+            Opaque key for get()/put()
+        """
+        text_hash = hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+        profile_hash = fingerprint(profile) if profile is not None else ""
+        return (text_hash, detector_version, profile_hash, self._current_generation())
+
+    def get(self, key: CacheKey) -> Optional[Tuple[Dict[str, Any], ...]]:
+        """
+        Look up cached detection records.
+
+        Returns:
+            Tuple of records (shared - do not mutate), or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, records = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return records
+
+    def put(self, key: CacheKey, records: Sequence[Dict[str, Any]]):
+        """
+        Store detection records for a key from key().
+
+        Args:
+            key: Key returned by key() before detection ran
+            records: Serialized detections (positions/types/scores only)
+
+        Raises:
+            ValueError: If a record carries a raw value or context field
+        """
+        for record in records:
+            leaked = RAW_VALUE_FIELDS.intersection(record)
+            if leaked:
+                raise ValueError(f"PII detection cache records must not contain {sorted(leaked)}")
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            # Computed before an invalidation: never valid again
+            if key[3] != self._generation:
+                return
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, tuple(records))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, reason: str = ""):
+        """
+        Drop all cached results here and, via Redis, in every other process.
+
+        Call when anything that affects detection output changes but isn't
+        part of the key, e.g. a compliance profile or custom rule.
+        """
+        generation = None
+        client = self._get_redis()
+        if client is not None:
+            try:
+                generation = int(client.incr(GENERATION_KEY))
+            except Exception as e:
+                logger.warning(f"Could not publish PII detection cache invalidation: {e}")
+
+        with self._lock:
+            self._generation = generation if generation is not None else self._generation + 1
+            self._generation_checked_at = time.monotonic()
+            self._entries.clear()
+            self.invalidations += 1
+
+        logger.info(f"PII detection cache invalidated{f' ({reason})' if reason else ''}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "generation": self._generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+    def _current_generation(self) -> int:
+        """Return the generation, re-reading the shared counter at most every few seconds."""
+        now = time.monotonic()
+        if now - self._generation_checked_at < GENERATION_CHECK_INTERVAL:
+            return self._generation
+
+        self._generation_checked_at = now
+        client = self._get_redis()
+        if client is None:
+            return self._generation
+
+        try:
+            shared = int(client.get(GENERATION_KEY) or 0)
+        except Exception as e:
+            logger.debug(f"PII detection cache generation check failed: {e}")
+            return self._generation
+
+        with self._lock:
+            if shared != self._generation:
+                self._generation = shared
+                self._entries.clear()
+        return self._generation
+
+    def _get_redis(self):
+        """Lazily connect to Redis; None if the client library is not installed."""
+        if redis is None or not self.enabled:
+            return None
+        if self._redis is None:
+            self._redis = redis.from_url(
+                self.redis_url,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5,
+                decode_responses=True
+            )
+        return self._redis
+
+
+_cache: Optional[PIIDetectionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_pii_detection_cache() -> PIIDetectionCache:
+    """Get the process-wide PII detection cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PIIDetectionCache()
+    return _cache
+
+
+def invalidate_pii_detection_cache(reason: str = ""):
+    """Invalidate cached PII detection results in all services."""
+    get_pii_detection_cache().invalidate(reason)
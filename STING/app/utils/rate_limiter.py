@@ -0,0 +1,291 @@
+"""
+GCRA Rate Limiter (Redis + Lua)
+
+Generic Cell Rate Algorithm limiter shared by:
+- Public Bee widget API keys (public_bee/auth.py, async Redis client)
+- Flask API key middleware (app/middleware/api_key_middleware.py, sync client)
+
+"limit requests per window" is enforced as one request every window/limit
+with a burst allowance of the whole window. Unlike fixed windows aligned to
+the clock, a client can never get 2x the limit by straddling a boundary.
+Each key stores a single "theoretical arrival time", and the check/update
+runs as one Lua script, so concurrent workers cannot race each other.
+
+Optional local pre-fetch: when a key is hit again within prefetch_ttl
+seconds, the limiter claims up to `prefetch` tokens in one round trip and
+serves the following requests from memory. Tokens still unused when the
+lease expires are refunded on that key's next round trip. A worker can
+therefore hold at most `prefetch` tokens for up to prefetch_ttl seconds.
+
+Redis errors fail open (the request is allowed), matching the previous
+limiters. After a failure Redis is skipped for failure_backoff seconds so
+an outage doesn't add a connect timeout to every request.
+
+This module only depends on redis-py so it can be copied into the Public
+Bee image alongside the Flask app.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]  limiter key
+# ARGV[1]  emission interval (microseconds per token = window / limit)
+# ARGV[2]  burst tolerance (microseconds = window)
+# ARGV[3]  tokens wanted; grants min(wanted, available), at least 1 or denies
+# ARGV[4]  unused tokens to refund from an expired local lease
+# Returns  {granted, remaining, retry_after_us, reset_after_us}
+GCRA_LUA = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local refund = tonumber(ARGV[4])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then
+  tat = now
+end
+if refund > 0 then
+  tat = math.max(now, tat - refund * interval)
+end
+
+local available = math.floor((tolerance - (tat - now)) / interval)
+local granted = math.min(wanted, available)
+if granted >= 1 then
+  tat = tat + granted * interval
+end
+
+if tat > now then
+  redis.call('SET', KEYS[1], string.format('%.0f', tat), 'PX', math.ceil((tat - now) / 1000))
+end
+
+if granted < 1 then
+  return {0, 0, tat - now + interval - tolerance, tat - now}
+end
+return {granted, available - granted, 0, tat - now}
+"""
+
+
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+
+    __slots__ = ('allowed', 'limit', 'remaining', 'retry_after', 'reset_after')
+
+    def __init__(self, allowed: bool, limit: int, remaining: int,
+                 retry_after: float = 0.0, reset_after: float = 0.0):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after  # Seconds until a request would be allowed
+        self.reset_after = reset_after  # Seconds until the full burst is available again
+
+    @property
+    def reset_at(self) -> int:
+        return int(time.time() + self.reset_after)
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset_at)
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(max(1, int(self.retry_after + 0.999)))
+        return headers
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'allowed': self.allowed,
+            'limit': self.limit,
+            'remaining': self.remaining,
+            'retry_after': round(self.retry_after, 3),
+            'reset_at': self.reset_at
+        }
+
+
+class _Lease:
+    """Tokens pre-fetched for one key"""
+
+    __slots__ = ('tokens', 'unreturned', 'expires_at', 'remaining', 'reset_at', 'last_seen')
+
+    def __init__(self):
+        self.tokens = 0
+        self.unreturned = 0  # Expired tokens not yet refunded to Redis
+        self.expires_at = 0.0
+        self.remaining = 0
+        self.reset_at = 0.0
+        self.last_seen = 0.0
+
+
+class GCRARateLimiter:
+    """Sliding GCRA limiter backed by one Lua script per check"""
+
+    def __init__(self, redis_client=None, async_redis_client=None, prefix: str = 'ratelimit',
+                 prefetch: int = 0, prefetch_ttl: float = 1.0, failure_backoff: float = 5.0):
+        """
+        Args:
+            redis_client: redis.Redis used by check()
+            async_redis_client: redis.asyncio.Redis used by acheck()
+            prefix: Key prefix (keys are "<prefix>:<key>")
+            prefetch: Tokens to claim per round trip for hot keys (0/1 disables)
+            prefetch_ttl: Lease lifetime in seconds; also the "hot key" window
+            failure_backoff: Seconds to skip Redis after an error
+        """
+        self.prefix = prefix
+        self.prefetch = max(1, prefetch)
+        self.prefetch_ttl = prefetch_ttl
+        self.failure_backoff = failure_backoff
+
+        self._script = redis_client.register_script(GCRA_LUA) if redis_client is not None else None
+        self._async_script = (async_redis_client.register_script(GCRA_LUA)
+                              if async_redis_client is not None else None)
+
+        self._leases: Dict[str, _Lease] = {}
+        self._lock = threading.Lock()
+        self._skip_redis_until = 0.0
+
+        # Stats
+        self.checks = 0
+        self.round_trips = 0
+        self.local_hits = 0
+        self.denied = 0
+        self.errors = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def check(self, key: str, limit: int, window: float) -> RateLimitResult:
+        """Check and consume one request for key (blocking Redis client)"""
+        local, wanted, refund = self._reserve(key, limit)
+        if local is not None:
+            return local
+        if self._script is None or not self._redis_available():
+            return self._fail_open(limit)
+        try:
+            reply = self._script(keys=[self._redis_key(key)],
+                                 args=self._script_args(limit, window, wanted, refund))
+        except Exception as e:
+            return self._on_error(key, limit, refund, e)
+        return self._apply(key, limit, reply)
+
+    async def acheck(self, key: str, limit: int, window: float) -> RateLimitResult:
+        """Check and consume one request for key (asyncio Redis client)"""
+        local, wanted, refund = self._reserve(key, limit)
+        if local is not None:
+            return local
+        if self._async_script is None or not self._redis_available():
+            return self._fail_open(limit)
+        try:
+            reply = await self._async_script(keys=[self._redis_key(key)],
+                                             args=self._script_args(limit, window, wanted, refund))
+        except Exception as e:
+            return self._on_error(key, limit, refund, e)
+        return self._apply(key, limit, reply)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'checks': self.checks,
+            'round_trips': self.round_trips,
+            'local_hits': self.local_hits,
+            'denied': self.denied,
+            'errors': self.errors,
+            'prefetch': self.prefetch,
+            'leases': len(self._leases)
+        }
+
+    # ------------------------------------------------------------------
+    # Local token leases
+    # ------------------------------------------------------------------
+
+    def _reserve(self, key: str, limit: int):
+        """
+        Serve from the local lease if possible.
+
+        Returns (result, wanted, refund): result is set when no round trip is
+        needed; otherwise wanted/refund are the token counts for the script.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.checks += 1
+            lease = self._leases.get(key)
+            if lease is None:
+                if len(self._leases) > 10000:
+                    self._prune(now)
+                lease = self._leases[key] = _Lease()
+
+            hot = now - lease.last_seen < self.prefetch_ttl
+            lease.last_seen = now
+
+            if lease.tokens > 0 and now < lease.expires_at:
+                lease.tokens -= 1
+                self.local_hits += 1
+                return RateLimitResult(True, limit, lease.remaining + lease.tokens,
+                                       reset_after=max(0.0, lease.reset_at - now)), 0, 0
+
+            # Expired tokens ride along with this round trip; restored on error
+            refund = lease.unreturned + lease.tokens
+            lease.unreturned = lease.tokens = 0
+            wanted = self.prefetch if hot else 1
+            return None, min(wanted, max(1, limit)), refund
+
+    def _apply(self, key: str, limit: int, reply) -> RateLimitResult:
+        granted, remaining, retry_after_us, reset_after_us = (int(v) for v in reply)
+        now = time.monotonic()
+        with self._lock:
+            self.round_trips += 1
+            if granted < 1:
+                self.denied += 1
+                return RateLimitResult(False, limit, 0, retry_after_us / 1e6, reset_after_us / 1e6)
+
+            lease = self._leases.get(key)
+            if lease is not None and granted > 1:
+                # Concurrent round trips for the same key pool their tokens
+                lease.tokens += granted - 1
+                lease.expires_at = now + self.prefetch_ttl
+                lease.remaining = remaining
+                lease.reset_at = now + reset_after_us / 1e6
+            return RateLimitResult(True, limit, remaining + granted - 1, reset_after=reset_after_us / 1e6)
+
+    def _prune(self, now: float):
+        stale = [k for k, lease in self._leases.items()
+                 if now - lease.last_seen > self.prefetch_ttl and not (lease.tokens or lease.unreturned)]
+        for k in stale:
+            del self._leases[k]
+
+    # ------------------------------------------------------------------
+    # Redis helpers
+    # ------------------------------------------------------------------
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    @staticmethod
+    def _script_args(limit: int, window: float, wanted: int, refund: int):
+        limit = max(1, int(limit))
+        tolerance = int(window * 1_000_000)
+        interval = max(1, tolerance // limit)
+        return [interval, tolerance, wanted, refund]
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._skip_redis_until
+
+    def _fail_open(self, limit: int) -> RateLimitResult:
+        return RateLimitResult(True, limit, limit)
+
+    def _on_error(self, key: str, limit: int, refund: int, error: Exception) -> RateLimitResult:
+        with self._lock:
+            self.errors += 1
+            self._skip_redis_until = time.monotonic() + self.failure_backoff
+            lease = self._leases.get(key)
+            if lease is not None:
+                # Refund on the next successful round trip instead
+                lease.unreturned += refund
+        logger.error(f"Rate limiting error (allowing requests for {self.failure_backoff:.0f}s): {error}")
+        return self._fail_open(limit)
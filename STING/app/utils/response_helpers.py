@@ -2,7 +2,10 @@
 Response helper utilities for consistent API responses
 """
 
-from flask import jsonify
+import unicodedata
+from urllib.parse import quote
+
+from flask import jsonify, request, Response, stream_with_context
 from typing import Any, Dict, Optional
 
 
@@ -143,4 +146,75 @@ def server_error_response(message: str = "Internal server error") -> tuple:
         message=message,
         status_code=500,
         error_code="INTERNAL_ERROR"
-    )
\ No newline at end of file
+    )
+
+
+def file_download_response(download, as_attachment: bool = True, download_name: Optional[str] = None,
+                           mimetype: Optional[str] = None) -> Response:
+    """
+    Stream a FileDownload (see app.services.file_service) to the client
+    
+    Honours single byte-range requests (206 / 416, including If-Range) and
+    If-None-Match (304), using the file's SHA-256 checksum as a strong ETag.
+    The body is generated while it is sent, so the file is never held in
+    memory as a whole.
+    
+    Args:
+        download: FileDownload to send
+        as_attachment: Content-Disposition attachment (True) or inline
+        download_name: Filename offered to the client (defaults to the stored name)
+        mimetype: Content type (defaults to the stored type)
+        
+    Returns:
+        Flask response
+    """
+    size = download.size
+    etag = download.checksum
+    mimetype = mimetype or download.mime_type or 'application/octet-stream'
+    
+    if etag and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    start, stop, status = 0, size, 200
+    byte_range = request.range
+    if byte_range is not None and len(byte_range.ranges) == 1:
+        # A stale If-Range validator means the client's partial copy is out of date
+        if_range = request.if_range
+        if not (if_range.etag or if_range.date) or (etag and if_range.etag == etag):
+            bounds = byte_range.range_for_length(size)
+            if bounds is None:
+                response = Response(status=416)
+                response.headers['Content-Range'] = f"bytes */{size}"
+                response.accept_ranges = 'bytes'
+                return response
+            start, stop = bounds
+            status = 206
+    
+    response = Response(
+        stream_with_context(download.iter_range(start, stop)),
+        status=status,
+        mimetype=mimetype,
+        direct_passthrough=True
+    )
+    response.content_length = stop - start
+    response.accept_ranges = 'bytes'
+    if status == 206:
+        response.content_range = f"bytes {start}-{stop - 1}/{size}"
+    if etag:
+        response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    
+    download_name = download_name or download.filename
+    if download_name:
+        try:
+            download_name.encode('ascii')
+            names = {'filename': download_name}
+        except UnicodeEncodeError:
+            simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+            names = {'filename': simple, 'filename*': f"UTF-8''{quote(download_name, safe='!#$&+-.^_`|~')}"}
+        response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline', **names)
+    
+    return response
@@ -0,0 +1,89 @@
+"""
+Linear-time Span Rewriting
+
+PII serialization swaps detected spans for tokens, and deserialization swaps
+the tokens back. Doing either with ``text[:start] + token + text[end:]`` per
+span, or one ``str.replace`` per mapping entry, copies the whole text once
+per PII item - quadratic for messages with hundreds of items. These helpers
+build the output in a single pass instead:
+
+- rewrite_spans: replace sorted, non-overlapping (start, end) spans
+- replace_tokens: substitute every match of a token regex via dict lookup
+
+Used by:
+- PIISerializer and the PII deserializers (app/middleware/pii_serialization)
+- HiveScrambler.scramble/unscramble (app/services/hive_scrambler.py)
+
+This module only depends on the standard library so it can be copied into
+the external AI service image alongside the PII middleware.
+"""
+
+import re
+from typing import Callable, Iterable, Mapping, Optional, Tuple
+
+
+def rewrite_spans(text: str, spans: Iterable[Tuple[int, int, str]]) -> str:
+    """
+    Replace spans of text in one pass.
+
+    Args:
+        text: Original text
+        spans: (start, end, replacement) sorted by start, non-overlapping,
+               with offsets into the original text
+
+    Returns:
+        Rewritten text
+
+    Raises:
+        ValueError: If spans are unsorted or overlap
+    """
+    parts = []
+    position = 0
+    for start, end, replacement in spans:
+        if start < position:
+            raise ValueError(f"Span ({start}, {end}) overlaps or precedes offset {position}")
+        parts.append(text[position:start])
+        parts.append(replacement)
+        position = end
+
+    if not parts:
+        return text
+
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+def replace_tokens(
+    text: str,
+    pattern: re.Pattern,
+    mapping: Mapping[str, str],
+    group: int = 0,
+    on_replace: Optional[Callable[[re.Match, str], None]] = None
+) -> str:
+    """
+    Replace every token matched by `pattern` with its mapping value.
+
+    Tokens missing from the mapping are left as they are.
+
+    Args:
+        text: Text containing tokens
+        pattern: Compiled regex matching a whole token
+        mapping: Token (or `group` of the match) -> replacement
+        group: Match group used as the mapping key
+        on_replace: Called with (match, replacement) for each replaced token
+
+    Returns:
+        Text with known tokens replaced
+    """
+    if not mapping:
+        return text
+
+    def _substitute(match: re.Match) -> str:
+        replacement = mapping.get(match.group(group))
+        if replacement is None:
+            return match.group(0)
+        if on_replace is not None:
+            on_replace(match, replacement)
+        return replacement
+
+    return pattern.sub(_substitute, text)
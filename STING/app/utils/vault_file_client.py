@@ -8,7 +8,7 @@ import sys
 import base64
 import hashlib
 import logging
-from typing import Optional, Dict, Any, BinaryIO, List
+from typing import Optional, Dict, Any, BinaryIO, List, Iterable
 from pathlib import Path
 import hvac
 
@@ -118,7 +118,7 @@ class VaultFileClient:
             # Decode file data
             encoded_data = secret_data.get('data')
             if not encoded_data:
-                logger.error(f"No data found for file {file_id}")
+                logger.error(f"No data found for file {storage_path}")
                 return None
             
             file_data = base64.b64decode(encoded_data.encode('utf-8'))
@@ -128,7 +128,7 @@ class VaultFileClient:
             calculated_hash = hashlib.sha256(file_data).hexdigest()
             
             if stored_hash != calculated_hash:
-                logger.error(f"File integrity check failed for {file_id}")
+                logger.error(f"File integrity check failed for {storage_path}")
                 return None
             
             return {
@@ -139,7 +139,108 @@ class VaultFileClient:
             }
             
         except Exception as e:
-            logger.error(f"Error retrieving file {file_id}: {e}")
+            logger.error(f"Error retrieving file {storage_path}: {e}")
+            return None
+    
+    def store_file_segments(self, file_id: str, segments: Iterable[bytes], metadata: Dict[str, Any] = None,
+                            header: Dict[str, Any] = None) -> bool:
+        """
+        Store a file as a series of segment secrets plus a small manifest.
+        
+        Each segment is its own secret at files/{file_id}/segments/{n}, so a
+        download can fetch (and decrypt) one segment at a time instead of
+        loading the whole file. The manifest at files/{file_id} is written
+        last, so a failed upload never leaves a manifest pointing at
+        missing segments.
+        
+        Args:
+            file_id: Unique identifier for the file
+            segments: Stored segment bytes (already encrypted if applicable)
+            metadata: Optional metadata dictionary
+            header: Optional encryption header needed to read the segments
+            
+        Returns:
+            bool: True if successful
+        """
+        try:
+            segment_count = 0
+            stored_size = 0
+            for index, segment in enumerate(segments):
+                secret_data = {
+                    'data': base64.b64encode(segment).decode('utf-8'),
+                    'hash': hashlib.sha256(segment).hexdigest()
+                }
+                if not self.vault_manager.write_secret(f"files/{file_id}/segments/{index}", secret_data):
+                    logger.error(f"Failed to store segment {index} of file {file_id} in Vault")
+                    return False
+                segment_count += 1
+                stored_size += len(segment)
+            
+            manifest = {
+                'format': 'segmented',
+                'segment_count': segment_count,
+                'size': stored_size,
+                'metadata': metadata or {},
+                'header': header or {}
+            }
+            success = self.vault_manager.write_secret(f"files/{file_id}", manifest)
+            
+            if success:
+                logger.info(f"Successfully stored file {file_id} in Vault ({segment_count} segments)")
+            else:
+                logger.error(f"Failed to store manifest for file {file_id} in Vault")
+            return success
+            
+        except Exception as e:
+            logger.error(f"Error storing file {file_id}: {e}")
+            return False
+    
+    def retrieve_manifest(self, storage_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the manifest of a file stored with store_file_segments.
+        
+        Args:
+            storage_path: Vault storage path
+            
+        Returns:
+            Manifest dict (segment_count, size, metadata, header), or None
+        """
+        try:
+            manifest = self.vault_manager.read_secret(f"files/{storage_path}")
+            if not manifest or manifest.get('format') != 'segmented':
+                logger.warning(f"No segmented manifest found for file {storage_path}")
+                return None
+            return manifest
+            
+        except Exception as e:
+            logger.error(f"Error retrieving manifest for file {storage_path}: {e}")
+            return None
+    
+    def retrieve_segment(self, storage_path: str, index: int) -> Optional[bytes]:
+        """
+        Retrieve and integrity-check one stored segment of a file.
+        
+        Args:
+            storage_path: Vault storage path
+            index: Segment number
+            
+        Returns:
+            Stored segment bytes, or None if missing or corrupt
+        """
+        try:
+            secret_data = self.vault_manager.read_secret(f"files/{storage_path}/segments/{index}")
+            if not secret_data or not secret_data.get('data'):
+                logger.error(f"Segment {index} of file {storage_path} not found in Vault")
+                return None
+            
+            segment = base64.b64decode(secret_data['data'])
+            if hashlib.sha256(segment).hexdigest() != secret_data.get('hash'):
+                logger.error(f"Integrity check failed for segment {index} of file {storage_path}")
+                return None
+            return segment
+            
+        except Exception as e:
+            logger.error(f"Error retrieving segment {index} of file {storage_path}: {e}")
             return None
     
     def delete_file(self, file_id: str) -> bool:
@@ -155,6 +256,22 @@ class VaultFileClient:
         try:
             path = f"files/{file_id}"
             
+            # Segmented files keep their content under files/{file_id}/segments/
+            try:
+                response = self.vault_manager.client.secrets.kv.v2.list_secrets(
+                    path=f"{path}/segments",
+                    mount_point=self.mount_point
+                )
+                segment_keys = response.get('data', {}).get('keys', [])
+            except hvac.exceptions.InvalidPath:
+                segment_keys = []
+            
+            for key in segment_keys:
+                self.vault_manager.client.secrets.kv.v2.delete_metadata_and_all_versions(
+                    path=f"{path}/segments/{key}",
+                    mount_point=self.mount_point
+                )
+            
             # Use Vault's delete operation
             self.vault_manager.client.secrets.kv.v2.delete_metadata_and_all_versions(
                 path=path,
@@ -283,6 +400,22 @@ class FileUploadHandler:
         Returns:
             Dict with validation results
         """
+        return self._validate(len(file_data), file_data[:16], filename, file_type)
+    
+    def validate_stream(self, stream: BinaryIO, filename: str, file_type: str) -> Dict[str, Any]:
+        """
+        Validate a seekable file object from its size and header, without reading it all.
+        
+        The stream is left positioned at the start.
+        """
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+        header = stream.read(16)
+        stream.seek(0)
+        return self._validate(size, header, filename, file_type)
+    
+    def _validate(self, size: int, header: bytes, filename: str, file_type: str) -> Dict[str, Any]:
         result = {'valid': True, 'errors': []}
         
         config = self.FILE_TYPE_CONFIGS.get(file_type)
@@ -292,7 +425,7 @@ class FileUploadHandler:
             return result
         
         # Check file size
-        if len(file_data) > config['max_size']:
+        if size > config['max_size']:
             result['valid'] = False
             result['errors'].append(f"File too large. Max size: {config['max_size']} bytes")
         
@@ -303,7 +436,7 @@ class FileUploadHandler:
             result['errors'].append(f"Invalid file extension. Allowed: {config['allowed_extensions']}")
         
         # Basic file signature check (magic bytes)
-        if not self._check_file_signature(file_data, file_ext):
+        if not self._check_file_signature(header, file_ext):
             result['valid'] = False
             result['errors'].append("File signature doesn't match extension")
         
@@ -371,13 +504,7 @@ class FileUploadHandler:
             file_hash = hashlib.sha256(file_data).hexdigest()
         
         # Prepare metadata
-        upload_metadata = {
-            'original_filename': filename,
-            'file_type': file_type,
-            'user_id': user_id,
-            'upload_timestamp': int(os.path.getmtime(__file__)),
-            **(metadata or {})
-        }
+        upload_metadata = self._upload_metadata(filename, file_type, user_id, metadata)
         
         # Store file
         success = self.vault_client.store_file(file_id, file_data, upload_metadata)
@@ -393,4 +520,44 @@ class FileUploadHandler:
             return {
                 'success': False,
                 'errors': ['Failed to store file in Vault']
-            }
\ No newline at end of file
+            }
+    
+    def upload_file_segments(self, segments: Iterable[bytes], filename: str, file_type: str,
+                             user_id: str, file_id: str, metadata: Dict[str, Any] = None,
+                             header: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Store an already validated file as segments (see VaultFileClient.store_file_segments).
+        
+        Args:
+            segments: Stored segment bytes, in order
+            filename: Original filename
+            file_type: File type category
+            user_id: User ID for file ownership
+            file_id: Pre-calculated file ID
+            metadata: Additional metadata
+            header: Encryption header for encrypted segments
+            
+        Returns:
+            Dict with upload results
+        """
+        upload_metadata = self._upload_metadata(filename, file_type, user_id, metadata)
+        
+        if self.vault_client.store_file_segments(file_id, segments, upload_metadata, header):
+            return {
+                'success': True,
+                'file_id': file_id
+            }
+        return {
+            'success': False,
+            'errors': ['Failed to store file in Vault']
+        }
+    
+    def _upload_metadata(self, filename: str, file_type: str, user_id: str,
+                         metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        return {
+            'original_filename': filename,
+            'file_type': file_type,
+            'user_id': user_id,
+            'upload_timestamp': int(os.path.getmtime(__file__)),
+            **(metadata or {})
+        }
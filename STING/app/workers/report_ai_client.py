@@ -0,0 +1,185 @@
+"""
+Async AI Client for STING-CE Report Generators
+Pooled, non-blocking HTTP access to the external AI and knowledge services.
+
+Generators run inside ReportWorker's event loop, so every outbound call goes
+through one shared httpx.AsyncClient with:
+- A connection pool and a global concurrency limit across all running jobs
+- Retries with full jitter on connection errors, 429 and 5xx responses;
+  POSTs (e.g. a bee_chat report run) are only retried when the request
+  cannot have been processed: connect failures, 429 and 503
+- Prompt cancellation: cancelling the job task aborts in-flight requests
+"""
+
+import os
+import asyncio
+import logging
+import random
+from typing import Dict, Any, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying (rate limited or transient upstream failures)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Safe to send again whatever happened to the previous attempt
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+# For other methods: the request never reached the server, or the server
+# refused it without doing the work
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+REFUSED_STATUS_CODES = {429, 503}
+
+
+class ReportAIError(Exception):
+    """Raised when an AI/knowledge service call fails after all retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ReportAIClient:
+    """Shared async HTTP client for report generation"""
+
+    def __init__(self):
+        self.external_ai_url = os.environ.get('EXTERNAL_AI_SERVICE_URL', 'http://external-ai:8091')
+        self.knowledge_service_url = os.environ.get('KNOWLEDGE_SERVICE_URL', 'http://knowledge:8090')
+
+        # Concurrency and retry settings
+        self.max_concurrency = int(os.environ.get('REPORT_AI_MAX_CONCURRENCY', '4'))
+        self.max_retries = int(os.environ.get('REPORT_AI_MAX_RETRIES', '3'))
+        self.backoff_base = float(os.environ.get('REPORT_AI_BACKOFF_BASE_SECONDS', '0.5'))
+        self.backoff_max = float(os.environ.get('REPORT_AI_BACKOFF_MAX_SECONDS', '10'))
+        self.default_timeout = float(os.environ.get('REPORT_AI_TIMEOUT_SECONDS', '30'))
+
+        # httpx clients and asyncio primitives are bound to the loop that created them.
+        # The internal API runs jobs via asyncio.run(), so recreate them per loop.
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                verify=False,  # Internal services use self-signed certificates
+                timeout=httpx.Timeout(self.default_timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency * 2,
+                    max_keepalive_connections=self.max_concurrency
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def request(self, method: str, url: str, timeout: Optional[float] = None,
+                      **kwargs) -> httpx.Response:
+        """
+        Send a request with pooling, concurrency limiting and retries.
+
+        Returns the final response (which may be a non-retryable error status).
+        Raises ReportAIError if every attempt failed with a retryable error.
+        Non-idempotent methods are not retried after a read timeout or 5xx, since
+        the server may still be doing (or have done) the work.
+        asyncio.CancelledError is never swallowed, so job cancellation aborts immediately.
+        """
+        client = self._ensure_client()
+        if timeout is not None:
+            kwargs['timeout'] = httpx.Timeout(timeout, connect=10.0)
+
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retryable_errors = httpx.TransportError if idempotent else UNSENT_ERRORS
+        retryable_statuses = RETRYABLE_STATUS_CODES if idempotent else REFUSED_STATUS_CODES
+
+        last_error: Optional[str] = None
+        last_status: Optional[int] = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self._backoff_delay(attempt - 1)
+                logger.info(f"Retrying {method} {url} in {delay:.2f}s (attempt {attempt + 1}/{self.max_retries + 1})")
+                await asyncio.sleep(delay)
+
+            try:
+                async with self._semaphore:
+                    response = await client.request(method, url, **kwargs)
+            except retryable_errors as e:
+                last_error = f"{type(e).__name__}: {e}"
+                last_status = None
+                logger.warning(f"{method} {url} failed: {last_error}")
+                continue
+            except httpx.TransportError as e:
+                raise ReportAIError(f"{method} {url} failed (not retried): {type(e).__name__}: {e}") from e
+
+            if response.status_code in retryable_statuses:
+                last_error = f"HTTP {response.status_code}"
+                last_status = response.status_code
+                logger.warning(f"{method} {url} returned {response.status_code}")
+                continue
+
+            return response
+
+        raise ReportAIError(f"{method} {url} failed after {self.max_retries + 1} attempts: {last_error}",
+                            status_code=last_status)
+
+    async def bee_chat(self, message: str, user_id: str, context: Dict[str, Any],
+                       conversation_id: Optional[str] = None,
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Call the external AI service's /bee/chat endpoint.
+
+        Returns the parsed JSON response. Raises ReportAIError on failure.
+        """
+        payload = {
+            'message': message,
+            'user_id': user_id,
+            'context': context,
+            'require_auth': False  # Auth already validated
+        }
+        if conversation_id:
+            payload['conversation_id'] = conversation_id
+
+        response = await self.request('POST', f"{self.external_ai_url}/bee/chat",
+                                      json=payload, timeout=timeout)
+        if response.status_code != 200:
+            raise ReportAIError(f"External AI service returned {response.status_code}: {response.text}",
+                                status_code=response.status_code)
+        return response.json()
+
+    async def get_json(self, path: str, headers: Optional[Dict[str, str]] = None,
+                       timeout: Optional[float] = None) -> Any:
+        """GET a JSON resource from the knowledge service. Raises ReportAIError on failure."""
+        response = await self.request('GET', f"{self.knowledge_service_url}{path}",
+                                      headers=headers, timeout=timeout)
+        if response.status_code != 200:
+            raise ReportAIError(f"Knowledge service returned {response.status_code} for {path}",
+                                status_code=response.status_code)
+        return response.json()
+
+    async def close(self):
+        """Close the pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+
+# Global client instance
+_report_ai_client = None
+
+def get_report_ai_client() -> ReportAIClient:
+    """Get global report AI client instance"""
+    global _report_ai_client
+    if _report_ai_client is None:
+        _report_ai_client = ReportAIClient()
+    return _report_ai_client
@@ -3,8 +3,8 @@ Fixed Report Generators for STING-CE
 Uses knowledge service API instead of direct model access.
 """
 
+import asyncio
 import logging
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 from abc import ABC, abstractmethod
@@ -13,6 +13,7 @@ import os
 from app.database import get_db_session
 from app.models.user_models import User
 from app.services.hive_scrambler import HiveScrambler
+from app.workers.report_ai_client import get_report_ai_client, ReportAIError
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,9 @@ class BaseReportGenerator(ABC):
         self.parameters = parameters
         self.user_id = user_id
         self.start_time = datetime.now()
+
+        # Shared pooled client for external AI / knowledge service calls
+        self.ai_client = get_report_ai_client()
         
         # Initialize scrambler if needed
         if parameters.get('scrambling_enabled', True):
@@ -107,87 +111,9 @@ class HoneyJarSummaryGenerator(BaseReportGenerator):
     async def collect_data(self) -> Dict[str, Any]:
         """Collect honey jar usage data from knowledge service"""
         try:
-            # Use database-direct approach to get real honey jar data with PII analysis
-            logger.info("Collecting real honey jar data from database with PII analysis...")
-
-            from app.database import get_db_session
-            from sqlalchemy import text
-
-            # Check if specific honey jar requested in parameters
-            specific_jar_id = self.parameters.get('honey_jar_id')
-
-            with get_db_session() as db:
-                if specific_jar_id:
-                    # Analyze specific honey jar with PII data
-                    logger.info(f"📊 Analyzing specific honey jar: {specific_jar_id}")
-                    query = text("""
-                        SELECT h.id, h.name, h.type, h.owner, h.created_date, h.document_count,
-                               h.total_size_bytes, h.last_updated, h.tags,
-                               COUNT(d.id) as actual_doc_count,
-                               SUM(d.size_bytes) as actual_total_size,
-                               COUNT(CASE WHEN d.doc_metadata->'pii_analysis'->>'pii_detected' = 'true' THEN 1 END) as pii_document_count
-                        FROM honey_jars h
-                        LEFT JOIN documents d ON h.id = d.honey_jar_id AND d.status != 'deleted'
-                        WHERE h.id = :jar_id
-                        GROUP BY h.id, h.name, h.type, h.owner, h.created_date, h.document_count,
-                                h.total_size_bytes, h.last_updated, h.tags
-                    """)
-                    result = db.execute(query, {"jar_id": specific_jar_id}).fetchone()
-
-                    if result:
-                        jar_data = [{
-                            'id': str(result.id),
-                            'name': result.name,
-                            'type': result.type,
-                            'owner_id': result.owner,
-                            'created_at': result.created_date.isoformat(),
-                            'doc_count': result.actual_doc_count or 0,
-                            'total_size': result.actual_total_size or 0,
-                            'last_modified': result.last_updated.isoformat() if result.last_updated else result.created_date.isoformat(),
-                            'pii_documents': result.pii_document_count or 0,
-                            'tags': result.tags or [],
-                            'has_pii_analysis': result.pii_document_count > 0
-                        }]
-                        logger.info(f"✅ Found honey jar '{result.name}' with {result.actual_doc_count} documents, {result.pii_document_count} with PII")
-                    else:
-                        logger.warning(f"❌ Honey jar {specific_jar_id} not found")
-                        jar_data = []
-
-                else:
-                    # Get all honey jars with real document statistics (improved from mock data)
-                    logger.info("📊 Analyzing all honey jars with document and PII statistics")
-                    query = text("""
-                        SELECT h.id, h.name, h.type, h.owner, h.created_date, h.document_count,
-                               h.total_size_bytes, h.last_updated, h.tags,
-                               COUNT(d.id) as actual_doc_count,
-                               COALESCE(SUM(d.size_bytes), 0) as actual_total_size,
-                               COUNT(CASE WHEN d.doc_metadata->'pii_analysis'->>'pii_detected' = 'true' THEN 1 END) as pii_document_count
-                        FROM honey_jars h
-                        LEFT JOIN documents d ON h.id = d.honey_jar_id AND d.status != 'deleted'
-                        GROUP BY h.id, h.name, h.type, h.owner, h.created_date, h.document_count,
-                                h.total_size_bytes, h.last_updated, h.tags
-                        ORDER BY actual_doc_count DESC
-                        LIMIT 20
-                    """)
-                    results = db.execute(query).fetchall()
-
-                    jar_data = []
-                    for row in results:
-                        jar_data.append({
-                            'id': str(row.id),
-                            'name': row.name,
-                            'type': row.type,
-                            'owner_id': row.owner,
-                            'created_at': row.created_date.isoformat(),
-                            'doc_count': row.actual_doc_count or 0,
-                            'total_size': row.actual_total_size or 0,
-                            'last_modified': row.last_updated.isoformat() if row.last_updated else row.created_date.isoformat(),
-                            'pii_documents': row.pii_document_count or 0,
-                            'tags': row.tags or [],
-                            'has_pii_analysis': row.pii_document_count > 0
-                        })
-
-                    logger.info(f"✅ Collected real data for {len(jar_data)} honey jars from database")
+            # The database query is synchronous; run it off the event loop so
+            # other jobs and in-flight AI calls keep making progress
+            jar_data = await asyncio.to_thread(self._query_honey_jar_stats)
             
             return {
                 'honey_jars': jar_data,
@@ -199,12 +125,97 @@ class HoneyJarSummaryGenerator(BaseReportGenerator):
         except Exception as e:
             logger.error(f"Failed to collect honey jar data: {e}")
             raise
+
+    def _query_honey_jar_stats(self) -> List[Dict[str, Any]]:
+        """Query honey jar statistics (with PII analysis) from the database"""
+        # Use database-direct approach to get real honey jar data with PII analysis
+        logger.info("Collecting real honey jar data from database with PII analysis...")
+
+        from sqlalchemy import text
+
+        # Check if specific honey jar requested in parameters
+        specific_jar_id = self.parameters.get('honey_jar_id')
+
+        with get_db_session() as db:
+            if specific_jar_id:
+                # Analyze specific honey jar with PII data
+                logger.info(f"📊 Analyzing specific honey jar: {specific_jar_id}")
+                # honey_jar_stats is maintained by a documents trigger, so this
+                # reads one row instead of scanning the jar's documents
+                query = text("""
+                    SELECT h.id, h.name, h.type, h.owner, h.created_date, h.last_updated, h.tags,
+                           COALESCE(s.document_count, 0) as actual_doc_count,
+                           COALESCE(s.total_size_bytes, 0) as actual_total_size,
+                           COALESCE(s.pii_document_count, 0) as pii_document_count,
+                           s.pii_type_counts, s.pii_risk_counts
+                    FROM honey_jars h
+                    LEFT JOIN honey_jar_stats s ON s.honey_jar_id = h.id
+                    WHERE h.id = :jar_id
+                """)
+                result = db.execute(query, {"jar_id": specific_jar_id}).fetchone()
+
+                if result:
+                    jar_data = [{
+                        'id': str(result.id),
+                        'name': result.name,
+                        'type': result.type,
+                        'owner_id': result.owner,
+                        'created_at': result.created_date.isoformat(),
+                        'doc_count': result.actual_doc_count or 0,
+                        'total_size': result.actual_total_size or 0,
+                        'last_modified': result.last_updated.isoformat() if result.last_updated else result.created_date.isoformat(),
+                        'pii_documents': result.pii_document_count or 0,
+                        'pii_type_counts': result.pii_type_counts or {},
+                        'pii_risk_counts': result.pii_risk_counts or {},
+                        'tags': result.tags or [],
+                        'has_pii_analysis': result.pii_document_count > 0
+                    }]
+                    logger.info(f"✅ Found honey jar '{result.name}' with {result.actual_doc_count} documents, {result.pii_document_count} with PII")
+                else:
+                    logger.warning(f"❌ Honey jar {specific_jar_id} not found")
+                    jar_data = []
+
+            else:
+                # Get all honey jars with real document statistics (improved from mock data)
+                logger.info("📊 Analyzing all honey jars with document and PII statistics")
+                query = text("""
+                    SELECT h.id, h.name, h.type, h.owner, h.created_date, h.last_updated, h.tags,
+                           COALESCE(s.document_count, 0) as actual_doc_count,
+                           COALESCE(s.total_size_bytes, 0) as actual_total_size,
+                           COALESCE(s.pii_document_count, 0) as pii_document_count,
+                           s.pii_type_counts, s.pii_risk_counts
+                    FROM honey_jars h
+                    LEFT JOIN honey_jar_stats s ON s.honey_jar_id = h.id
+                    ORDER BY actual_doc_count DESC
+                    LIMIT 20
+                """)
+                results = db.execute(query).fetchall()
+
+                jar_data = []
+                for row in results:
+                    jar_data.append({
+                        'id': str(row.id),
+                        'name': row.name,
+                        'type': row.type,
+                        'owner_id': row.owner,
+                        'created_at': row.created_date.isoformat(),
+                        'doc_count': row.actual_doc_count or 0,
+                        'total_size': row.actual_total_size or 0,
+                        'last_modified': row.last_updated.isoformat() if row.last_updated else row.created_date.isoformat(),
+                        'pii_documents': row.pii_document_count or 0,
+                        'pii_type_counts': row.pii_type_counts or {},
+                        'pii_risk_counts': row.pii_risk_counts or {},
+                        'tags': row.tags or [],
+                        'has_pii_analysis': row.pii_document_count > 0
+                    })
+
+                logger.info(f"✅ Collected real data for {len(jar_data)} honey jars from database")
+
+        return jar_data
     
     async def _generate_ai_insights(self, summary_data: Dict[str, Any]) -> str:
         """Generate AI insights based on the report summary"""
         try:
-            external_ai_url = os.environ.get('EXTERNAL_AI_SERVICE_URL', 'http://external-ai:8091')
-            
             prompt = f"""
             Analyze the following Honey Jar usage statistics and provide a brief, professional executive summary (2-3 sentences) highlighting key risks or observations.
             
@@ -218,24 +229,20 @@ class HoneyJarSummaryGenerator(BaseReportGenerator):
             Focus on the scale of data and potential security implications.
             """
             
-            response = requests.post(
-                f"{external_ai_url}/bee/chat",
-                json={
-                    'message': prompt,
-                    'user_id': self.user_id,
-                    'context': {
-                        'generation_mode': 'insight',
-                        'bypass_token_limit': False
-                    },
-                    'require_auth': False
+            response_data = await self.ai_client.bee_chat(
+                message=prompt,
+                user_id=self.user_id,
+                context={
+                    'generation_mode': 'insight',
+                    'bypass_token_limit': False
                 },
                 timeout=30
             )
+            return response_data.get('response', '').strip()
             
-            if response.status_code == 200:
-                return response.json().get('response', '').strip()
+        except ReportAIError as e:
+            logger.warning(f"AI insights unavailable: {e}")
             return "AI Insights unavailable."
-            
         except Exception as e:
             logger.warning(f"Failed to generate AI insights: {e}")
             return "AI Insights generation failed."
@@ -298,47 +305,45 @@ class DocumentProcessingReportGenerator(BaseReportGenerator):
         if self.parameters.get('demo_scenario') or self.parameters.get('demo_category'):
             # Get REAL data from demo honey jars instead of fake data
             try:
-                import requests
-                import os
-
-                knowledge_service_url = os.environ.get('KNOWLEDGE_SERVICE_URL', 'http://knowledge:8090')
                 api_key = 'sk_XG0Ya4nWFCHn-FLSiPclK58zida1Xsj4w7f-XBQV8I0'
+                headers = {'X-API-Key': api_key}
 
                 # Get all demo honey jars
-                jars_response = requests.get(
-                    f"{knowledge_service_url}/honey-jars",
-                    headers={'X-API-Key': api_key},
-                    timeout=10
-                )
+                try:
+                    all_jars = await self.ai_client.get_json('/honey-jars', headers=headers, timeout=10)
+                    demo_jars = [jar for jar in all_jars if 'Demo' in jar['name']]
+                except ReportAIError as e:
+                    logger.warning(f"Could not list honey jars: {e}")
+                    demo_jars = []
+
+                # Fetch every demo jar's documents concurrently
+                jar_docs_results = await asyncio.gather(*[
+                    self.ai_client.get_json(f"/honey-jars/{jar['id']}/documents", headers=headers, timeout=10)
+                    for jar in demo_jars
+                ], return_exceptions=True)
 
                 real_documents = []
                 total_documents = 0
                 total_pii_detected = 0
 
-                if jars_response.status_code == 200:
-                    all_jars = jars_response.json()
-                    demo_jars = [jar for jar in all_jars if 'Demo' in jar['name']]
-
-                    # Collect real document data from demo honey jars
-                    for jar in demo_jars:
-                        jar_docs_response = requests.get(
-                            f"{knowledge_service_url}/honey-jars/{jar['id']}/documents",
-                            headers={'X-API-Key': api_key},
-                            timeout=10
-                        )
-
-                        if jar_docs_response.status_code == 200:
-                            docs_data = jar_docs_response.json()
-                            for doc in docs_data.get('documents', []):
-                                real_documents.append({
-                                    'filename': doc['filename'],
-                                    'size_bytes': doc.get('size_bytes', 0),
-                                    'pii_count': doc.get('embedding_count', 0),  # Embeddings indicate PII detected
-                                    'status': doc.get('status', 'processed'),
-                                    'jar_name': jar['name']
-                                })
-                                total_documents += 1
-                                total_pii_detected += doc.get('embedding_count', 0)
+                # Collect real document data from demo honey jars
+                for jar, docs_data in zip(demo_jars, jar_docs_results):
+                    if isinstance(docs_data, ReportAIError):
+                        logger.warning(f"Skipping documents for {jar['name']}: {docs_data}")
+                        continue
+                    if isinstance(docs_data, BaseException):
+                        raise docs_data
+
+                    for doc in docs_data.get('documents', []):
+                        real_documents.append({
+                            'filename': doc['filename'],
+                            'size_bytes': doc.get('size_bytes', 0),
+                            'pii_count': doc.get('embedding_count', 0),  # Embeddings indicate PII detected
+                            'status': doc.get('status', 'processed'),
+                            'jar_name': jar['name']
+                        })
+                        total_documents += 1
+                        total_pii_detected += doc.get('embedding_count', 0)
 
                 # Return actual data from real demo honey jars
                 return {
@@ -346,7 +351,7 @@ class DocumentProcessingReportGenerator(BaseReportGenerator):
                     'processing_stats': {
                         'total_documents': total_documents,
                         'pii_instances_detected': total_pii_detected,
-                        'demo_jars_analyzed': len(demo_jars) if 'demo_jars' in locals() else 0,
+                        'demo_jars_analyzed': len(demo_jars),
                         'processing_time_avg': '2.3 seconds',
                         'success_rate': '100%' if total_documents > 0 else '0%'
                     },
@@ -379,8 +384,6 @@ class DocumentProcessingReportGenerator(BaseReportGenerator):
     async def _generate_ai_summary(self, stats: Dict[str, Any], scenario: str) -> str:
         """Generate AI executive summary based on processing stats"""
         try:
-            external_ai_url = os.environ.get('EXTERNAL_AI_SERVICE_URL', 'http://external-ai:8091')
-            
             prompt = f"""
             Generate a professional executive summary for a {scenario} document processing report.
             
@@ -392,24 +395,20 @@ class DocumentProcessingReportGenerator(BaseReportGenerator):
             The summary should emphasize the effectiveness of the PII detection system and compliance implications.
             """
             
-            response = requests.post(
-                f"{external_ai_url}/bee/chat",
-                json={
-                    'message': prompt,
-                    'user_id': self.user_id,
-                    'context': {
-                        'generation_mode': 'summary',
-                        'bypass_token_limit': False
-                    },
-                    'require_auth': False
+            response_data = await self.ai_client.bee_chat(
+                message=prompt,
+                user_id=self.user_id,
+                context={
+                    'generation_mode': 'summary',
+                    'bypass_token_limit': False
                 },
                 timeout=30
             )
+            return response_data.get('response', '').strip()
             
-            if response.status_code == 200:
-                return response.json().get('response', '').strip()
+        except ReportAIError as e:
+            logger.warning(f"AI summary unavailable: {e}")
             return "AI Executive Summary unavailable."
-            
         except Exception as e:
             logger.warning(f"Failed to generate AI summary: {e}")
             return "AI Executive Summary generation failed."
@@ -555,36 +554,28 @@ class BeeConversationalReportGenerator(BaseReportGenerator):
 
             logger.info(f"Generating Bee conversational report for query: {user_query[:100]}...")
 
-            # Prepare request for external-ai service
-            external_ai_url = os.environ.get('EXTERNAL_AI_SERVICE_URL', 'http://external-ai:8091')
-
             # Configurable timeout for report generation (default 15 minutes for comprehensive reports)
             # Can be overridden via REPORT_GENERATION_TIMEOUT_SECONDS env var
             report_timeout = int(os.environ.get('REPORT_GENERATION_TIMEOUT_SECONDS', '900'))
 
             # Call Bee chat with special report generation context
-            response = requests.post(
-                f"{external_ai_url}/bee/chat",
-                json={
-                    'message': user_query,
-                    'user_id': self.user_id,  # Required field
-                    'conversation_id': conversation_id,
-                    'context': {
+            try:
+                response_data = await self.ai_client.bee_chat(
+                    message=user_query,
+                    user_id=self.user_id,  # Required field
+                    conversation_id=conversation_id,
+                    context={
                         **context,
                         'generation_mode': 'report',
                         'output_format': 'detailed_markdown',
                         'bypass_token_limit': True  # Allow full generation
                     },
-                    'require_auth': False  # Auth already validated
-                },
-                timeout=report_timeout  # Allow sufficient time for comprehensive report generation
-            )
-
-            if response.status_code != 200:
-                logger.error(f"External AI service returned {response.status_code}: {response.text}")
-                raise Exception(f"Failed to generate report content: {response.status_code}")
+                    timeout=report_timeout  # Allow sufficient time for comprehensive report generation
+                )
+            except ReportAIError as e:
+                logger.error(str(e))
+                raise Exception(f"Failed to generate report content: {e.status_code}")
 
-            response_data = response.json()
             bee_response = response_data.get('response', '')
 
             if not bee_response:
@@ -652,8 +643,6 @@ class BeeConversationalReportGenerator(BaseReportGenerator):
             # Extract first 1000 chars for title generation (executive summary area)
             content_preview = content[:1000]
 
-            external_ai_url = os.environ.get('EXTERNAL_AI_SERVICE_URL', 'http://external-ai:8091')
-
             title_prompt = f"""Based on the following report content, generate a concise, professional title (5-10 words maximum).
 
 Original User Query: {original_query}
@@ -669,22 +658,20 @@ Examples of good titles:
 
 Your title:"""
 
-            response = requests.post(
-                f"{external_ai_url}/bee/chat",
-                json={
-                    'message': title_prompt,
-                    'user_id': self.user_id,
-                    'context': {
+            try:
+                response_data = await self.ai_client.bee_chat(
+                    message=title_prompt,
+                    user_id=self.user_id,
+                    context={
                         'generation_mode': 'title',
                         'bypass_token_limit': False
                     },
-                    'require_auth': False
-                },
-                timeout=30
-            )
+                    timeout=30
+                )
+            except ReportAIError as e:
+                raise Exception(f"Title generation failed: {e.status_code}")
 
-            if response.status_code == 200:
-                response_data = response.json()
+            if response_data:
                 generated_title = response_data.get('response', '').strip()
 
                 # Aggressive cleanup to ensure plain text title only
@@ -720,7 +707,7 @@ Your title:"""
                 logger.info(f"Generated report title: {generated_title}")
                 return generated_title
             else:
-                raise Exception(f"Title generation failed: {response.status_code}")
+                raise Exception("Title generation failed: empty response")
 
         except Exception as e:
             logger.warning(f"Failed to generate title via LLM: {e}, using fallback")
@@ -0,0 +1,648 @@
+"""
+Report Renderer for STING-CE
+Turns generated report data into CSV, Excel, PDF or JSON files.
+
+Output is written to a spooled temporary file instead of an in-memory buffer:
+small reports stay in memory, large ones roll over to disk. PDF rendering is
+streamed section by section:
+- Generated markdown is split at top-level headings and parsed one section at a time
+- Flowables are produced lazily as ReportLab lays out pages, so only a small
+  window of the document exists as Paragraph objects at any moment
+- Unicode sanitization is a single regex pass with a table lookup per unsafe character
+
+Only depends on ReportLab, markdown-it and pandas so it can be benchmarked
+without the rest of the app (scripts/benchmarks/report_render_benchmark.py).
+"""
+
+import os
+import io
+import re
+import json
+import codecs
+import logging
+import tempfile
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List
+
+from markdown_it import MarkdownIt
+
+logger = logging.getLogger(__name__)
+
+# ASCII equivalents for Unicode characters ReportLab's default fonts can't render
+PDF_UNICODE_REPLACEMENTS = {
+    # Quotes
+    '\u2018': "'",  # Left single quote
+    '\u2019': "'",  # Right single quote
+    '\u201c': '"',  # Left double quote
+    '\u201d': '"',  # Right double quote
+    '\u2033': '"',  # Double prime
+    # Dashes
+    '\u2013': '-',  # En dash
+    '\u2014': '--', # Em dash
+    '\u2212': '-',  # Minus sign
+    # Bullets and list markers
+    '\u2022': '*',  # Bullet
+    '\u2023': '>',  # Triangular bullet
+    '\u2043': '-',  # Hyphen bullet
+    '\u25e6': 'o',  # White bullet
+    '\u25aa': '*',  # Black small square
+    '\u25ab': 'o',  # White small square
+    # Arrows
+    '\u2192': '->',  # Right arrow
+    '\u2190': '<-',  # Left arrow
+    '\u2194': '<->', # Left-right arrow
+    '\u21d2': '=>',  # Right double arrow
+    # Mathematical symbols
+    '\u00d7': 'x',   # Multiplication sign
+    '\u00f7': '/',   # Division sign
+    '\u2260': '!=',  # Not equal
+    '\u2264': '<=',  # Less than or equal
+    '\u2265': '>=',  # Greater than or equal
+    '\u221e': 'inf', # Infinity
+    # Other common symbols
+    '\u2026': '...', # Ellipsis
+    '\u00a9': '(c)', # Copyright
+    '\u00ae': '(R)', # Registered
+    '\u2122': '(TM)',# Trademark
+    '\u00b0': ' deg',# Degree sign
+    '\u00b1': '+/-', # Plus-minus
+}
+
+
+# Anything outside printable ASCII (32-126) and common whitespace
+_PDF_UNSAFE_CHAR = re.compile(r'[^\x20-\x7e\t\n\r]')
+
+
+def _pdf_safe_char(match) -> str:
+    return PDF_UNICODE_REPLACEMENTS.get(match.group(), ' ')
+
+
+def sanitize_for_pdf(text: str) -> str:
+    """
+    Sanitize Unicode characters that ReportLab's default fonts can't render.
+    Replaces problematic characters with ASCII equivalents to prevent ■ blocks in PDF.
+
+    One regex pass finds only the unsafe characters and looks each up in the
+    replacement table, so mostly-ASCII text costs a single C-level scan.
+    """
+    if not text:
+        return text
+    return _PDF_UNSAFE_CHAR.sub(_pdf_safe_char, text)
+
+
+def _escape_xml(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+# Top-level ATX heading (column 0) and fenced code block delimiters
+_HEADING_LINE = re.compile(r'#{1,6}(?:[ \t]|\r?\n|$)')
+_FENCE_LINE = re.compile(r' {0,3}(`{3,}|~{3,})')
+
+
+def split_markdown_sections(content: str) -> Iterator[str]:
+    """
+    Yield markdown content in chunks that start at top-level headings.
+
+    A heading at column 0 always closes the preceding paragraph or list, so
+    parsing each chunk separately yields the same block tokens as parsing the
+    whole document. Headings inside fenced code blocks are not split points.
+    """
+    section: List[str] = []
+    fence = None
+
+    for line in io.StringIO(content):
+        if fence is None:
+            if _HEADING_LINE.match(line) and section:
+                yield ''.join(section)
+                section = []
+            opening = _FENCE_LINE.match(line)
+            if opening:
+                fence = opening.group(1)
+        else:
+            closing = _FENCE_LINE.match(line)
+            if closing and closing.group(1)[0] == fence[0] and len(closing.group(1)) >= len(fence) \
+                    and not line[closing.end():].strip():
+                fence = None
+        section.append(line)
+
+    if section:
+        yield ''.join(section)
+
+
+class _FlowableStream(list):
+    """
+    Story list that pulls flowables from a generator as ReportLab consumes them.
+
+    BaseDocTemplate.build() only looks at the front of the story (plus a short
+    keepWithNext look-ahead) and deletes each flowable once it is drawn, so
+    topping the list up on every len() keeps just a small window in memory.
+    """
+
+    def __init__(self, flowables: Iterable, window: int = 64):
+        super().__init__()
+        self._source = iter(flowables)
+        self._window = window
+        self._exhausted = False
+
+    def __len__(self):
+        while not self._exhausted and list.__len__(self) < self._window:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._exhausted = True
+        return list.__len__(self)
+
+
+class ReportRenderer:
+    """Renders report data into spooled output files"""
+
+    MIME_TYPES = {
+        'csv': 'text/csv',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'pdf': 'application/pdf',
+        'json': 'application/json'
+    }
+
+    def __init__(self):
+        # Output up to this size stays in memory; larger files roll over to disk
+        self.spool_max_memory = int(os.environ.get('REPORT_SPOOL_MAX_MEMORY_BYTES', str(8 * 1024 * 1024)))
+        # Flowables materialized ahead of ReportLab's layout position
+        self.flowable_window = int(os.environ.get('REPORT_PDF_FLOWABLE_WINDOW', '64'))
+
+    def render(self, report_data: Dict[str, Any], output_format: str,
+               template_name: str, report_title: str) -> Dict[str, Any]:
+        """
+        Render the report in the requested format.
+
+        Returns:
+            Dict with 'file' (spooled file positioned at the start; the caller
+            must close it), 'size', 'filename' and 'mime_type'.
+        """
+        # Debug logging for Bee reports
+        if 'generated_content' in report_data:
+            content_len = len(report_data.get('generated_content', ''))
+            logger.info(f"🐝 Creating PDF for Bee report with {content_len} chars of generated_content")
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_title = "".join(c for c in report_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        filename = f"{safe_title}_{timestamp}.{output_format}"
+
+        output = tempfile.SpooledTemporaryFile(max_size=self.spool_max_memory, mode='w+b')
+        try:
+            if output_format == 'csv':
+                self._render_csv(report_data, output)
+            elif output_format == 'xlsx':
+                self._render_xlsx(report_data, output)
+            elif output_format == 'pdf':
+                self._render_pdf(report_data, output, template_name, report_title)
+            else:
+                # Default to JSON
+                self._render_json(report_data, output)
+                output_format = 'json'
+                filename = filename.rsplit('.', 1)[0] + '.json'
+
+            size = output.seek(0, io.SEEK_END)
+            output.seek(0)
+        except Exception:
+            output.close()
+            raise
+
+        return {
+            'file': output,
+            'size': size,
+            'filename': filename,
+            'mime_type': self.MIME_TYPES.get(output_format, 'application/octet-stream')
+        }
+
+    def _render_csv(self, report_data: Dict[str, Any], output):
+        import pandas as pd
+
+        df = pd.DataFrame(report_data.get('data', []))
+        df.to_csv(output, index=False)
+
+    def _render_xlsx(self, report_data: Dict[str, Any], output):
+        import pandas as pd
+
+        # Convert data to Excel with multiple sheets if needed
+        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+            # Main data sheet
+            if 'data' in report_data:
+                df = pd.DataFrame(report_data['data'])
+                df.to_excel(writer, sheet_name='Data', index=False)
+
+            # Summary sheet
+            if 'summary' in report_data:
+                summary_df = pd.DataFrame([report_data['summary']])
+                summary_df.to_excel(writer, sheet_name='Summary', index=False)
+
+            # Charts data if available
+            if 'charts' in report_data:
+                for chart_name, chart_data in report_data['charts'].items():
+                    chart_df = pd.DataFrame(chart_data)
+                    sheet_name = chart_name[:31]  # Excel sheet name limit
+                    chart_df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+    def _render_json(self, report_data: Dict[str, Any], output):
+        # Encode straight into the spool rather than building the whole string
+        writer = codecs.getwriter('utf-8')(output)
+        json.dump(report_data, writer, indent=2)
+        writer.flush()
+
+    def _render_pdf(self, report_data: Dict[str, Any], output,
+                    template_name: str, report_title: str):
+        """Professional STING-branded PDF generation"""
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate
+        from reportlab.lib.units import inch
+
+        doc = SimpleDocTemplate(
+            output,
+            pagesize=letter,
+            leftMargin=0.75*inch,
+            rightMargin=0.75*inch,
+            topMargin=1*inch,
+            bottomMargin=1*inch
+        )
+        styles = self._pdf_styles()
+        story = self._pdf_story(report_data, styles, template_name, report_title)
+
+        # Build PDF with STING branding
+        doc.build(_FlowableStream(story, window=self.flowable_window))
+
+    def _pdf_styles(self) -> Dict[str, Any]:
+        """STING palette and paragraph styles shared by every section"""
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+
+        styles = getSampleStyleSheet()
+
+        # STING Professional Color Palette
+        STING_BLUE = colors.HexColor('#1e40af')      # Professional blue
+        STING_DARK = colors.HexColor('#1f2937')      # Dark gray
+        STING_LIGHT = colors.HexColor('#f8fafc')     # Light background
+
+        return {
+            'blue': STING_BLUE,
+            'dark': STING_DARK,
+            'light': STING_LIGHT,
+            # STING Report title - centered, bold
+            'report': ParagraphStyle(
+                'STINGReportTitle',
+                parent=styles['Normal'],
+                fontSize=24,
+                textColor=STING_BLUE,
+                alignment=1,  # Center
+                spaceBefore=0,
+                spaceAfter=0.05*inch,
+                leading=28
+            ),
+            # Acronym definition - smaller, centered, gray
+            'acronym': ParagraphStyle(
+                'STINGAcronym',
+                parent=styles['Normal'],
+                fontSize=9,
+                textColor=colors.HexColor('#6b7280'),  # Lighter gray
+                alignment=1,  # Center
+                spaceBefore=0,
+                spaceAfter=0.3*inch,
+                leading=11
+            ),
+            # Branded Title Section with improved spacing
+            'title': ParagraphStyle(
+                'STINGTitle',
+                parent=styles['Title'],
+                fontSize=28,
+                textColor=STING_BLUE,
+                spaceBefore=0.3*inch,  # Add space before title
+                spaceAfter=0.15*inch,  # Reduce space after for tighter grouping
+                alignment=1,  # Center align
+                leading=34  # Line height for better spacing
+            ),
+            # Professional subtitle with better separation
+            'subtitle': ParagraphStyle(
+                'STINGSubtitle',
+                parent=styles['Normal'],
+                fontSize=12,
+                textColor=STING_DARK,
+                alignment=1,  # Center align
+                spaceAfter=0.4*inch,  # More space after subtitle before divider
+                leading=16  # Line height for subtitle
+            ),
+            # Metadata with improved spacing
+            'metadata': ParagraphStyle(
+                'STINGMetadata',
+                parent=styles['Normal'],
+                fontSize=10,
+                textColor=STING_DARK,
+                spaceAfter=0.08*inch,  # Add consistent spacing between metadata lines
+                leading=14
+            ),
+            'summary_header': ParagraphStyle(
+                'STINGSectionHeader',
+                parent=styles['Heading2'],
+                fontSize=16,
+                textColor=STING_BLUE,
+                spaceBefore=0.2*inch,
+                spaceAfter=0.1*inch,
+                borderWidth=0,
+                borderColor=STING_BLUE,
+                borderPadding=5
+            ),
+            'summary': ParagraphStyle(
+                'STINGSummary',
+                parent=styles['Normal'],
+                fontSize=11,
+                textColor=STING_DARK,
+                leftIndent=0.2*inch,
+                spaceAfter=4
+            ),
+            'content_header': ParagraphStyle(
+                'STINGContentHeader',
+                parent=styles['Heading2'],
+                fontSize=16,
+                textColor=STING_BLUE,
+                spaceAfter=0.2*inch
+            ),
+            'content': ParagraphStyle(
+                'STINGContent',
+                parent=styles['Normal'],
+                fontSize=11,
+                textColor=STING_DARK,
+                leftIndent=0,
+                rightIndent=0,
+                spaceAfter=16,
+                spaceBefore=8,
+                leading=16,
+                alignment=4  # Justify
+            ),
+            'h1': ParagraphStyle(
+                'STINGH1',
+                parent=styles['Heading1'],
+                fontSize=16,
+                textColor=STING_BLUE,
+                spaceAfter=16,
+                spaceBefore=24,
+                leading=20
+            ),
+            'h2': ParagraphStyle(
+                'STINGH2',
+                parent=styles['Heading2'],
+                fontSize=14,
+                textColor=STING_BLUE,
+                spaceAfter=14,
+                spaceBefore=20,
+                leading=18
+            ),
+            'h3': ParagraphStyle(
+                'STINGH3',
+                parent=styles['Heading3'],
+                fontSize=13,
+                textColor=STING_BLUE,
+                spaceAfter=12,
+                spaceBefore=16,
+                leading=16
+            ),
+            'bullet': ParagraphStyle(
+                'STINGBullet',
+                parent=styles['Normal'],
+                fontSize=11,
+                textColor=STING_DARK,
+                leftIndent=25,
+                bulletIndent=10,
+                spaceAfter=8,
+                spaceBefore=4,
+                leading=16
+            ),
+            'data_header': ParagraphStyle(
+                'STINGDataHeader',
+                parent=styles['Heading2'],
+                fontSize=16,
+                textColor=STING_BLUE,
+                spaceAfter=0.2*inch
+            ),
+            'note': ParagraphStyle(
+                'STINGNote',
+                parent=styles['Italic'],
+                fontSize=9,
+                textColor=STING_DARK,
+                alignment=1  # Center
+            ),
+            'footer': ParagraphStyle(
+                'STINGFooter',
+                parent=styles['Normal'],
+                fontSize=9,
+                textColor=STING_DARK,
+                alignment=1  # Center align
+            ),
+        }
+
+    def _divider(self, width, color):
+        from reportlab.graphics.shapes import Drawing, Rect
+
+        divider = Drawing(width, 1)
+        divider.add(Rect(0, 0, width, 1, fillColor=color, strokeColor=color))
+        return divider
+
+    def _pdf_story(self, report_data: Dict[str, Any], styles: Dict[str, Any],
+                   template_name: str, report_title: str) -> Iterator[Any]:
+        """Yield the report's flowables in document order"""
+        from reportlab.lib import colors
+        from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, Image
+        from reportlab.lib.units import inch
+
+        STING_BLUE = styles['blue']
+        STING_DARK = styles['dark']
+        STING_LIGHT = styles['light']
+
+        # Modern centered STING Report header
+        try:
+            # Try to load the STING logo
+            logo_path = '/opt/sting-ce/app/static/sting-logo.png'
+            if os.path.exists(logo_path):
+                logo = Image(logo_path, width=0.6*inch, height=0.6*inch)
+                # Center the logo
+                logo.hAlign = 'CENTER'
+                yield logo
+                yield Spacer(1, 0.1*inch)
+        except Exception as e:
+            logger.warning(f"Could not load logo: {e}")
+
+        yield Paragraph("<b>STING REPORT</b>", styles['report'])
+        yield Paragraph("Secure Trusted Intelligence &amp; Networking Guardian", styles['acronym'])
+
+        # Single consistent divider line - full width
+        yield self._divider(6.5*inch, STING_BLUE)
+        yield Spacer(1, 0.4*inch)
+
+        yield Paragraph(f"<b>{report_title}</b>", styles['title'])
+        yield Paragraph(f"<i>{template_name}</i>", styles['subtitle'])
+
+        # Consistent divider line - full width
+        yield self._divider(6.5*inch, STING_BLUE)
+        yield Spacer(1, 0.4*inch)
+
+        yield Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['metadata'])
+        yield Paragraph(f"Template: {template_name}", styles['metadata'])
+        yield Spacer(1, 0.4*inch)
+
+        # Professional Summary Section
+        if 'summary' in report_data:
+            yield Paragraph("📊 Executive Summary", styles['summary_header'])
+
+            # Summary metrics in professional format
+            for key, value in report_data['summary'].items():
+                clean_key = key.replace('_', ' ').title()
+                yield Paragraph(f"<b style='color: {STING_BLUE}'>{clean_key}:</b> {value}", styles['summary'])
+            yield Spacer(1, 0.4*inch)
+
+        # Bee Conversational Report Content
+        if 'generated_content' in report_data and report_data['generated_content']:
+            yield Paragraph("Generated Report", styles['content_header'])
+
+            md = MarkdownIt()
+            for section in split_markdown_sections(report_data['generated_content']):
+                yield from self._markdown_flowables(md.parse(section), styles)
+
+            yield Spacer(1, 0.4*inch)
+
+        # Professional Data Table
+        if 'data' in report_data and report_data['data']:
+            yield Paragraph("📈 Detailed Analysis", styles['data_header'])
+
+            # Convert to table format
+            data_rows = report_data['data'][:50]  # Limit for PDF
+            if data_rows:
+                # Headers
+                headers = [h.replace('_', ' ').title() for h in data_rows[0].keys()]
+                table_data = [headers]
+
+                # Data rows
+                for row in data_rows:
+                    table_data.append([str(row.get(h, '')) for h in data_rows[0].keys()])
+
+                # Professional table with STING branding
+                t = Table(table_data, repeatRows=1)
+                t.setStyle(TableStyle([
+                    # Header styling (STING blue theme)
+                    ('BACKGROUND', (0, 0), (-1, 0), STING_BLUE),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 11),
+                    ('TOPPADDING', (0, 0), (-1, 0), 8),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+
+                    # Data rows styling (alternating colors)
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, STING_LIGHT]),
+                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                    ('FONTSIZE', (0, 1), (-1, -1), 10),
+                    ('TOPPADDING', (0, 1), (-1, -1), 6),
+                    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+
+                    # Professional grid
+                    ('GRID', (0, 0), (-1, -1), 0.5, STING_DARK),
+                    ('LINEBELOW', (0, 0), (-1, 0), 2, STING_BLUE),
+                ]))
+                yield t
+
+                if len(report_data['data']) > 50:
+                    yield Spacer(1, 0.3*inch)
+                    yield Paragraph(
+                        f"📋 Showing first 50 of {len(report_data['data'])} records. "
+                        f"Download complete report as CSV or Excel for full dataset.",
+                        styles['note']
+                    )
+
+        # Professional Footer
+        yield Spacer(1, 0.5*inch)
+
+        # Footer divider
+        yield self._divider(400, STING_BLUE)
+        yield Spacer(1, 0.2*inch)
+
+        # STING footer branding
+        generation_time = datetime.now().strftime('%B %d, %Y at %I:%M %p')
+        yield Paragraph(
+            f"<b>STING Platform</b> • Generated on {generation_time} • "
+            f"Secure Intelligence & Analytics",
+            styles['footer']
+        )
+
+    def _markdown_flowables(self, tokens, styles: Dict[str, Any]) -> Iterator[Any]:
+        """Yield flowables for one parsed markdown section"""
+        from reportlab.platypus import Paragraph
+
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+
+            if token.type == 'heading_open':
+                level = int(token.tag[1])  # h1 -> 1, h2 -> 2, etc.
+                i += 1
+                if i < len(tokens) and tokens[i].type == 'inline':
+                    text = self.render_inline_markdown(tokens[i].children) if tokens[i].children else tokens[i].content
+                    if level == 1:
+                        yield Paragraph(text, styles['h1'])
+                    elif level == 2:
+                        yield Paragraph(text, styles['h2'])
+                    else:
+                        yield Paragraph(text, styles['h3'])
+                i += 1  # Skip heading_close
+
+            elif token.type == 'paragraph_open':
+                i += 1
+                if i < len(tokens) and tokens[i].type == 'inline':
+                    text = self.render_inline_markdown(tokens[i].children) if tokens[i].children else tokens[i].content
+                    if text.strip():
+                        yield Paragraph(text, styles['content'])
+                i += 1  # Skip paragraph_close
+
+            elif token.type == 'bullet_list_open':
+                i += 1
+                # Collect all list items
+                while i < len(tokens) and tokens[i].type != 'bullet_list_close':
+                    if tokens[i].type == 'list_item_open':
+                        i += 1
+                        if i < len(tokens) and tokens[i].type == 'paragraph_open':
+                            i += 1
+                            if i < len(tokens) and tokens[i].type == 'inline':
+                                text = self.render_inline_markdown(tokens[i].children) if tokens[i].children else tokens[i].content
+                                yield Paragraph(f"• {text}", styles['bullet'])
+                    i += 1
+
+            else:
+                i += 1
+
+    def render_inline_markdown(self, tokens) -> str:
+        """Render inline markdown tokens (bold, italic, code, etc.) to ReportLab markup"""
+        if not tokens:
+            return ""
+
+        result = []
+        for token in tokens:
+            if token.type == 'text':
+                # Sanitize Unicode first, then escape XML special characters
+                result.append(_escape_xml(sanitize_for_pdf(token.content)))
+            elif token.type == 'strong_open':
+                result.append('<b>')
+            elif token.type == 'strong_close':
+                result.append('</b>')
+            elif token.type == 'em_open':
+                result.append('<i>')
+            elif token.type == 'em_close':
+                result.append('</i>')
+            elif token.type == 'code_inline':
+                # Monospace code - sanitize Unicode first
+                code_text = _escape_xml(sanitize_for_pdf(token.content))
+                result.append(f'<font face="Courier">{code_text}</font>')
+            elif token.type in ('link_open', 'link_close'):
+                # We can't easily handle links in PDF, just render the text
+                pass
+            else:
+                # For any other token, try to get content
+                if hasattr(token, 'content') and token.content:
+                    result.append(_escape_xml(sanitize_for_pdf(token.content)))
+
+        return ''.join(result)
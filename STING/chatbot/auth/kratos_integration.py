@@ -3,6 +3,12 @@ import logging
 from typing import Dict, Optional, Any, List
 from datetime import datetime
 
+try:
+    # Copied next to the chatbot package in the container image
+    from instrumentation import span
+except ImportError:
+    from app.utils.instrumentation import span
+
 logger = logging.getLogger(__name__)
 
 class KratosAuth:
@@ -46,12 +52,13 @@ class KratosAuth:
         try:
             # Call Kratos whoami endpoint
             # Kratos expects the session token as a Cookie, not as a Bearer token
-            response = await self.client.get(
-                f"{self.public_url}/sessions/whoami",
-                headers={
-                    "Cookie": f"ory_kratos_session={session_token}"
-                }
-            )
+            with span("kratos.whoami"):
+                response = await self.client.get(
+                    f"{self.public_url}/sessions/whoami",
+                    headers={
+                        "Cookie": f"ory_kratos_session={session_token}"
+                    }
+                )
             
             if response.status_code == 200:
                 data = response.json()
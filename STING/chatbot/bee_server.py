@@ -42,6 +42,12 @@ from chatbot.core.support_request_handler import SupportRequestHandler
 from chatbot.core.adaptive_context_manager import get_adaptive_context_manager
 import redis
 
+try:
+    # Copied next to the chatbot package in the container image
+    import instrumentation
+except ImportError:
+    from app.utils import instrumentation
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -111,6 +117,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request IDs, query/client timing and /metrics (added last so it wraps CORS)
+instrumentation.install('chatbot')
+instrumentation.instrument_fastapi(app)
+
 # Initialize knowledge base
 knowledge_base = get_knowledge_base()
 
@@ -1,7 +1,12 @@
-import re
 from typing import Dict, List, Optional, Any
 import logging
 
+try:
+    # Copied next to the chatbot package in the container image
+    from keyword_matcher import KeywordMatcher
+except ImportError:
+    from app.utils.keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
 class SentimentAnalyzer:
@@ -47,6 +52,39 @@ class SentimentAnalyzer:
             '🤔': 'neutral', '😐': 'neutral', '😑': 'neutral', '🤷': 'neutral',
             '❓': 'question', '❔': 'question', '⁉️': 'question', '❗': 'urgency'
         }
+
+        # Specific emotion cues (words and emojis)
+        self.emotion_indicators = {
+            'joy': ['happy', 'joy', 'excited', 'love', '😊', '😃', '😄'],
+            'sadness': ['sad', 'unhappy', 'disappointed', '😢', '😞'],
+            'anger': ['angry', 'mad', 'furious', 'annoyed', '😠', '😡'],
+            'fear': ['worried', 'scared', 'afraid', 'concerned'],
+            'surprise': ['wow', 'amazing', 'surprised', 'unexpected', '😮'],
+        }
+
+        # Strong negative and gratitude phrases
+        self.strong_negative_phrases = [
+            "doesn't work", "not working", "completely broken",
+            "total failure", "waste of time"
+        ]
+        self.gratitude_phrases = [
+            "thank you", "thanks so much", "really appreciate", "you're the best"
+        ]
+
+        # Compile every list into one matcher so each message is scanned once
+        categories = {
+            'positive': self.positive_indicators,
+            'negative': self.negative_indicators,
+            'question': self.question_indicators,
+            'urgency': self.urgency_indicators,
+            'strong_negative': self.strong_negative_phrases,
+            'gratitude': self.gratitude_phrases,
+        }
+        for emoji, sentiment in self.emoji_sentiments.items():
+            categories.setdefault(f'emoji_{sentiment}', []).append(emoji)
+        for emotion, indicators in self.emotion_indicators.items():
+            categories[f'emotion_{emotion}'] = indicators
+        self.matcher = KeywordMatcher(categories)
     
     async def analyze(self, text: str) -> Dict[str, float]:
         """Analyze sentiment of the given text"""
@@ -75,22 +113,24 @@ class SentimentAnalyzer:
         if word_count == 0:
             return {'neutral': 1.0}
         
+        # Single pass over the message for every indicator list
+        hits = self.matcher.match(text_lower)
+
+        def hit_count(category: str) -> int:
+            return len(hits.get(category, ()))
+
         # Analyze word-based sentiment
-        positive_count = sum(1 for word in self.positive_indicators if word in text_lower)
-        negative_count = sum(1 for word in self.negative_indicators if word in text_lower)
-        question_count = sum(1 for word in self.question_indicators if word in text_lower)
-        urgency_count = sum(1 for word in self.urgency_indicators if word in text_lower)
+        positive_count = hit_count('positive')
+        negative_count = hit_count('negative')
+        question_count = hit_count('question') + hit_count('emoji_question')
+        urgency_count = hit_count('urgency') + hit_count('emoji_urgency')
         
         # Analyze emoji sentiment
-        emoji_sentiment_counts = {'positive': 0, 'negative': 0, 'neutral': 0}
-        for emoji, sentiment in self.emoji_sentiments.items():
-            if emoji in text:
-                if sentiment in emoji_sentiment_counts:
-                    emoji_sentiment_counts[sentiment] += 1
-                elif sentiment == 'question':
-                    question_count += 1
-                elif sentiment == 'urgency':
-                    urgency_count += 1
+        emoji_sentiment_counts = {
+            'positive': hit_count('emoji_positive'),
+            'negative': hit_count('emoji_negative'),
+            'neutral': hit_count('emoji_neutral')
+        }
         
         # Calculate base scores
         sentiments['positive'] = (positive_count + emoji_sentiment_counts['positive']) / word_count
@@ -99,47 +139,30 @@ class SentimentAnalyzer:
         sentiments['urgency'] = min(urgency_count / word_count, 1.0)
         
         # Analyze specific emotions
-        if any(word in text_lower for word in ['happy', 'joy', 'excited', 'love', '😊', '😃', '😄']):
+        if 'emotion_joy' in hits:
             sentiments['joy'] = 0.7
         
-        if any(word in text_lower for word in ['sad', 'unhappy', 'disappointed', '😢', '😞']):
+        if 'emotion_sadness' in hits:
             sentiments['sadness'] = 0.7
         
-        if any(word in text_lower for word in ['angry', 'mad', 'furious', 'annoyed', '😠', '😡']):
+        if 'emotion_anger' in hits:
             sentiments['anger'] = 0.7
         
-        if any(word in text_lower for word in ['worried', 'scared', 'afraid', 'concerned']):
+        if 'emotion_fear' in hits:
             sentiments['fear'] = 0.6
         
-        if any(word in text_lower for word in ['wow', 'amazing', 'surprised', 'unexpected', '😮']):
+        if 'emotion_surprise' in hits:
             sentiments['surprise'] = 0.6
         
         # Check for strong negative patterns
-        strong_negative_patterns = [
-            r"doesn't work",
-            r"not working",
-            r"completely broken",
-            r"total failure",
-            r"waste of time"
-        ]
-        
-        for pattern in strong_negative_patterns:
-            if re.search(pattern, text_lower):
-                sentiments['negative'] = max(sentiments['negative'], 0.8)
-                sentiments['anger'] = max(sentiments['anger'], 0.5)
+        if 'strong_negative' in hits:
+            sentiments['negative'] = max(sentiments['negative'], 0.8)
+            sentiments['anger'] = max(sentiments['anger'], 0.5)
         
         # Check for gratitude patterns
-        gratitude_patterns = [
-            r"thank you",
-            r"thanks so much",
-            r"really appreciate",
-            r"you're the best"
-        ]
-        
-        for pattern in gratitude_patterns:
-            if re.search(pattern, text_lower):
-                sentiments['positive'] = max(sentiments['positive'], 0.8)
-                sentiments['joy'] = max(sentiments['joy'], 0.6)
+        if 'gratitude' in hits:
+            sentiments['positive'] = max(sentiments['positive'], 0.8)
+            sentiments['joy'] = max(sentiments['joy'], 0.6)
         
         # Normalize sentiment scores
         total_sentiment = sentiments['positive'] + sentiments['negative']
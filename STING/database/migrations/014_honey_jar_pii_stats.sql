@@ -0,0 +1,235 @@
+-- Migration: Materialized per-honey-jar document and PII statistics
+-- Issue: Honey jar summary reports computed PII counts by evaluating
+--        doc_metadata->'pii_analysis' across every document row on each run,
+--        which does not finish interactively on large documents tables
+-- Solution: Maintain per-jar counters incrementally from a documents trigger
+--           so reports and dashboards read one row per honey jar
+
+-- Description:
+-- honey_jar_stats holds, for each honey jar (excluding deleted documents):
+--   document_count, total_size_bytes, pii_document_count,
+--   pii_type_counts  - documents containing each PII type   {"ssn": 3, ...}
+--   pii_risk_counts  - PII detections per risk level         {"high": 7, ...}
+-- The trigger applies only the delta of the changed row (remove OLD, add NEW),
+-- so its cost does not grow with the size of the honey jar.
+-- Run SELECT rebuild_honey_jar_stats(); (or the knowledge service's
+-- scripts/rebuild_honey_jar_stats.py) to recompute from scratch.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS honey_jar_stats (
+    honey_jar_id UUID PRIMARY KEY REFERENCES honey_jars(id) ON DELETE CASCADE,
+    document_count INTEGER NOT NULL DEFAULT 0,
+    total_size_bytes BIGINT NOT NULL DEFAULT 0,
+    pii_document_count INTEGER NOT NULL DEFAULT 0,
+    pii_type_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    pii_risk_counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Sum two {"key": count} objects, dropping keys that reach zero
+CREATE OR REPLACE FUNCTION jsonb_add_counts(base JSONB, delta JSONB)
+RETURNS JSONB AS $$
+    SELECT COALESCE(jsonb_object_agg(key, total) FILTER (WHERE total <> 0), '{}'::jsonb)
+    FROM (
+        SELECT key, SUM(value::bigint) AS total
+        FROM (
+            SELECT key, value FROM jsonb_each_text(COALESCE(base, '{}'::jsonb))
+            UNION ALL
+            SELECT key, value FROM jsonb_each_text(COALESCE(delta, '{}'::jsonb))
+        ) entries
+        GROUP BY key
+    ) totals;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Distinct PII types recorded for one document. Full scrambler results list
+-- them in pii_types; the simple detector reports per-match types instead.
+CREATE OR REPLACE FUNCTION document_pii_types(meta JSONB)
+RETURNS SETOF TEXT AS $$
+    SELECT DISTINCT pii_type FROM (
+        SELECT jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(meta->'pii_analysis'->'pii_types') = 'array'
+                 THEN meta->'pii_analysis'->'pii_types' ELSE '[]'::jsonb END
+        ) AS pii_type
+        UNION
+        SELECT m->>'type'
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof(meta->'pii_analysis'->'matches') = 'array'
+                 THEN meta->'pii_analysis'->'matches' ELSE '[]'::jsonb END
+        ) AS m
+    ) types
+    WHERE pii_type IS NOT NULL;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Add (sign = 1) or remove (sign = -1) one document's contribution
+CREATE OR REPLACE FUNCTION apply_honey_jar_stats_delta(
+    jar_id UUID, doc_status TEXT, doc_size BIGINT, meta JSONB, sign INTEGER
+)
+RETURNS void AS $$
+DECLARE
+    has_pii BOOLEAN;
+    type_delta JSONB;
+    risk_delta JSONB;
+BEGIN
+    IF jar_id IS NULL OR doc_status = 'deleted' THEN
+        RETURN;
+    END IF;
+
+    has_pii := COALESCE(meta->'pii_analysis'->>'pii_detected', 'false') = 'true';
+
+    SELECT COALESCE(jsonb_object_agg(pii_type, sign), '{}'::jsonb)
+    INTO type_delta
+    FROM document_pii_types(meta) AS pii_type;
+
+    SELECT COALESCE(jsonb_object_agg(key, value::bigint * sign), '{}'::jsonb)
+    INTO risk_delta
+    FROM jsonb_each_text(
+        CASE WHEN jsonb_typeof(meta->'pii_analysis'->'risk_summary') = 'object'
+             THEN meta->'pii_analysis'->'risk_summary' ELSE '{}'::jsonb END
+    )
+    WHERE value ~ '^-?[0-9]+$';
+
+    IF sign < 0 THEN
+        -- Removals only touch an existing row; the jar itself may be mid-delete
+        UPDATE honey_jar_stats SET
+            document_count = document_count - 1,
+            total_size_bytes = total_size_bytes - COALESCE(doc_size, 0),
+            pii_document_count = pii_document_count - CASE WHEN has_pii THEN 1 ELSE 0 END,
+            pii_type_counts = jsonb_add_counts(pii_type_counts, type_delta),
+            pii_risk_counts = jsonb_add_counts(pii_risk_counts, risk_delta),
+            updated_at = NOW()
+        WHERE honey_jar_id = jar_id;
+        RETURN;
+    END IF;
+
+    INSERT INTO honey_jar_stats AS s (
+        honey_jar_id, document_count, total_size_bytes, pii_document_count,
+        pii_type_counts, pii_risk_counts, updated_at
+    )
+    VALUES (
+        jar_id, 1, COALESCE(doc_size, 0),
+        CASE WHEN has_pii THEN 1 ELSE 0 END,
+        jsonb_add_counts('{}'::jsonb, type_delta),
+        jsonb_add_counts('{}'::jsonb, risk_delta),
+        NOW()
+    )
+    ON CONFLICT (honey_jar_id) DO UPDATE SET
+        document_count = s.document_count + EXCLUDED.document_count,
+        total_size_bytes = s.total_size_bytes + EXCLUDED.total_size_bytes,
+        pii_document_count = s.pii_document_count + EXCLUDED.pii_document_count,
+        pii_type_counts = jsonb_add_counts(s.pii_type_counts, EXCLUDED.pii_type_counts),
+        pii_risk_counts = jsonb_add_counts(s.pii_risk_counts, EXCLUDED.pii_risk_counts),
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_honey_jar_pii_stats()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- Skip updates that cannot change the statistics (status messages, tags, ...)
+        IF NEW.honey_jar_id IS NOT DISTINCT FROM OLD.honey_jar_id
+           AND NEW.status IS NOT DISTINCT FROM OLD.status
+           AND NEW.size_bytes IS NOT DISTINCT FROM OLD.size_bytes
+           AND (NEW.doc_metadata->'pii_analysis') IS NOT DISTINCT FROM (OLD.doc_metadata->'pii_analysis') THEN
+            RETURN NEW;
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_honey_jar_stats_delta(OLD.honey_jar_id, OLD.status, OLD.size_bytes, OLD.doc_metadata, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_honey_jar_stats_delta(NEW.honey_jar_id, NEW.status, NEW.size_bytes, NEW.doc_metadata, 1);
+        RETURN NEW;
+    END IF;
+
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS documents_pii_stats_update ON documents;
+
+CREATE TRIGGER documents_pii_stats_update
+    AFTER INSERT OR UPDATE OR DELETE ON documents
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_honey_jar_pii_stats();
+
+-- Recompute statistics from the documents table (all jars when jar_id is NULL)
+CREATE OR REPLACE FUNCTION rebuild_honey_jar_stats(jar_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    rebuilt INTEGER;
+BEGIN
+    -- Serialize with the trigger so no delta lands between delete and insert
+    LOCK TABLE honey_jar_stats IN SHARE ROW EXCLUSIVE MODE;
+
+    DELETE FROM honey_jar_stats WHERE jar_id IS NULL OR honey_jar_id = jar_id;
+
+    WITH live_docs AS (
+        SELECT d.honey_jar_id, d.size_bytes, d.doc_metadata
+        FROM documents d
+        WHERE d.status IS DISTINCT FROM 'deleted'
+          AND d.honey_jar_id IS NOT NULL
+          AND (jar_id IS NULL OR d.honey_jar_id = jar_id)
+    ),
+    base AS (
+        SELECT honey_jar_id,
+               COUNT(*) AS document_count,
+               COALESCE(SUM(size_bytes), 0) AS total_size_bytes,
+               COUNT(*) FILTER (
+                   WHERE doc_metadata->'pii_analysis'->>'pii_detected' = 'true'
+               ) AS pii_document_count
+        FROM live_docs
+        GROUP BY honey_jar_id
+    ),
+    types AS (
+        SELECT honey_jar_id, jsonb_object_agg(pii_type, doc_count) AS pii_type_counts
+        FROM (
+            SELECT ld.honey_jar_id, t.pii_type, COUNT(*) AS doc_count
+            FROM live_docs ld
+            CROSS JOIN LATERAL document_pii_types(ld.doc_metadata) AS t(pii_type)
+            GROUP BY ld.honey_jar_id, t.pii_type
+        ) per_type
+        GROUP BY honey_jar_id
+    ),
+    risks AS (
+        SELECT honey_jar_id, jsonb_object_agg(risk_level, total) FILTER (WHERE total <> 0) AS pii_risk_counts
+        FROM (
+            SELECT ld.honey_jar_id, r.key AS risk_level, SUM(r.value::bigint) AS total
+            FROM live_docs ld
+            CROSS JOIN LATERAL jsonb_each_text(
+                CASE WHEN jsonb_typeof(ld.doc_metadata->'pii_analysis'->'risk_summary') = 'object'
+                     THEN ld.doc_metadata->'pii_analysis'->'risk_summary' ELSE '{}'::jsonb END
+            ) AS r
+            WHERE r.value ~ '^-?[0-9]+$'
+            GROUP BY ld.honey_jar_id, r.key
+        ) per_risk
+        GROUP BY honey_jar_id
+    )
+    INSERT INTO honey_jar_stats (
+        honey_jar_id, document_count, total_size_bytes, pii_document_count,
+        pii_type_counts, pii_risk_counts, updated_at
+    )
+    SELECT b.honey_jar_id, b.document_count, b.total_size_bytes, b.pii_document_count,
+           COALESCE(t.pii_type_counts, '{}'::jsonb), COALESCE(r.pii_risk_counts, '{}'::jsonb), NOW()
+    FROM base b
+    JOIN honey_jars h ON h.id = b.honey_jar_id
+    LEFT JOIN types t ON t.honey_jar_id = b.honey_jar_id
+    LEFT JOIN risks r ON r.honey_jar_id = b.honey_jar_id;
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill existing honey jars
+SELECT rebuild_honey_jar_stats();
+
+COMMENT ON TABLE honey_jar_stats IS 'Incrementally maintained per-honey-jar document, storage and PII statistics';
+COMMENT ON FUNCTION apply_honey_jar_stats_delta(UUID, TEXT, BIGINT, JSONB, INTEGER) IS 'Adds or removes one document''s contribution to honey_jar_stats';
+COMMENT ON FUNCTION trigger_honey_jar_pii_stats() IS 'Trigger function keeping honey_jar_stats in sync with documents';
+COMMENT ON FUNCTION rebuild_honey_jar_stats(UUID) IS 'Recomputes honey_jar_stats from documents (all jars when NULL)';
+
+COMMIT;
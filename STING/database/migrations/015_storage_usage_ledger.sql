@@ -0,0 +1,222 @@
+-- Migration: Per-user Honey Reserve storage usage ledger
+-- Issue: Usage, quota and storage breakdown endpoints (polled by the dashboard)
+--        loaded every file_assets row a user owns and summed sizes in Python
+-- Solution: Maintain per-user, per-category byte and file counters from
+--           triggers on file_assets and file_permissions, so usage reads a
+--           handful of rows regardless of how many files a user has
+
+-- Description:
+-- storage_usage holds one row per (user_id, category):
+--   category = file_type  - live (not soft-deleted) files the user owns
+--   category = 'shared'   - live files other users have shared with the user
+--                           (one count per file, however many permissions)
+-- Uploads, deletes (soft or hard), expiry cleanup, ownership/size changes and
+-- share grants/removals all apply their delta in the writing transaction.
+-- Run SELECT reconcile_storage_usage(); (or the app's periodic cleanup task)
+-- to repair drift, e.g. after bulk loads with triggers disabled. It returns
+-- the number of ledger rows it had to correct.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS storage_usage (
+    user_id VARCHAR(255) NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    total_bytes BIGINT NOT NULL DEFAULT 0,
+    file_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, category)
+);
+
+-- Add a delta to one counter row, creating it if needed
+CREATE OR REPLACE FUNCTION apply_storage_usage_delta(
+    usage_user_id TEXT, usage_category TEXT, bytes_delta BIGINT, count_delta INTEGER
+)
+RETURNS void AS $$
+BEGIN
+    IF usage_user_id IS NULL OR (bytes_delta = 0 AND count_delta = 0) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO storage_usage AS u (user_id, category, total_bytes, file_count, updated_at)
+    VALUES (usage_user_id, usage_category, bytes_delta, count_delta, NOW())
+    ON CONFLICT (user_id, category) DO UPDATE SET
+        total_bytes = u.total_bytes + EXCLUDED.total_bytes,
+        file_count = u.file_count + EXCLUDED.file_count,
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add (sign = 1) or remove (sign = -1) one live file's contribution for its
+-- owner and for every user it is shared with
+CREATE OR REPLACE FUNCTION apply_file_usage_delta(
+    asset_file_id UUID, asset_owner TEXT, asset_type TEXT, asset_size BIGINT, sign INTEGER
+)
+RETURNS void AS $$
+BEGIN
+    PERFORM apply_storage_usage_delta(
+        asset_owner, COALESCE(asset_type, 'other'), sign * COALESCE(asset_size, 0), sign
+    );
+
+    PERFORM apply_storage_usage_delta(grantee_id, 'shared', sign * COALESCE(asset_size, 0), sign)
+    FROM (
+        SELECT DISTINCT grantee_id
+        FROM file_permissions
+        WHERE file_id = asset_file_id
+          AND grantee_id IS DISTINCT FROM asset_owner
+    ) grantees;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_file_assets_storage_usage()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        -- Skip updates that cannot change usage (access times, metadata, ...)
+        IF NEW.file_id IS NOT DISTINCT FROM OLD.file_id
+           AND NEW.owner_id IS NOT DISTINCT FROM OLD.owner_id
+           AND NEW.file_type IS NOT DISTINCT FROM OLD.file_type
+           AND NEW.file_size IS NOT DISTINCT FROM OLD.file_size
+           AND (NEW.deleted_at IS NULL) = (OLD.deleted_at IS NULL) THEN
+            RETURN NEW;
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL THEN
+        PERFORM apply_file_usage_delta(OLD.file_id, OLD.owner_id, OLD.file_type, OLD.file_size, -1);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NEW.deleted_at IS NULL THEN
+            PERFORM apply_file_usage_delta(NEW.file_id, NEW.owner_id, NEW.file_type, NEW.file_size, 1);
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS file_assets_storage_usage ON file_assets;
+DROP TRIGGER IF EXISTS file_assets_storage_usage_delete ON file_assets;
+
+CREATE TRIGGER file_assets_storage_usage
+    AFTER INSERT OR UPDATE ON file_assets
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_file_assets_storage_usage();
+
+-- Hard deletes are counted BEFORE the row goes, while its permissions (which
+-- the foreign key cascades away) still say who it was shared with
+CREATE TRIGGER file_assets_storage_usage_delete
+    BEFORE DELETE ON file_assets
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_file_assets_storage_usage();
+
+-- Share counters change when a grantee gains their first, or loses their
+-- last, permission on a live file they don't own
+CREATE OR REPLACE FUNCTION trigger_file_permissions_storage_usage()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND NOT EXISTS (
+        SELECT 1 FROM file_permissions
+        WHERE file_id = OLD.file_id AND grantee_id = OLD.grantee_id
+    ) THEN
+        PERFORM apply_storage_usage_delta(OLD.grantee_id, 'shared', -COALESCE(f.file_size, 0), -1)
+        FROM file_assets f
+        WHERE f.file_id = OLD.file_id
+          AND f.deleted_at IS NULL
+          AND f.owner_id IS DISTINCT FROM OLD.grantee_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF (SELECT COUNT(*) FROM file_permissions
+            WHERE file_id = NEW.file_id AND grantee_id = NEW.grantee_id) = 1 THEN
+            PERFORM apply_storage_usage_delta(NEW.grantee_id, 'shared', COALESCE(f.file_size, 0), 1)
+            FROM file_assets f
+            WHERE f.file_id = NEW.file_id
+              AND f.deleted_at IS NULL
+              AND f.owner_id IS DISTINCT FROM NEW.grantee_id;
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS file_permissions_storage_usage ON file_permissions;
+
+CREATE TRIGGER file_permissions_storage_usage
+    AFTER INSERT OR DELETE OR UPDATE OF file_id, grantee_id ON file_permissions
+    FOR EACH ROW
+    EXECUTE FUNCTION trigger_file_permissions_storage_usage();
+
+-- Recompute the ledger from file_assets and file_permissions (all users when
+-- user_id is NULL) and correct only the rows that drifted
+CREATE OR REPLACE FUNCTION reconcile_storage_usage(for_user_id TEXT DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    repaired INTEGER;
+    removed INTEGER;
+BEGIN
+    -- Serialize with the triggers so no delta lands while comparing
+    LOCK TABLE storage_usage IN SHARE ROW EXCLUSIVE MODE;
+
+    CREATE TEMP TABLE expected_storage_usage ON COMMIT DROP AS
+    SELECT owner_id AS user_id, COALESCE(file_type, 'other') AS category,
+           COALESCE(SUM(file_size), 0)::BIGINT AS total_bytes, COUNT(*)::INTEGER AS file_count
+    FROM file_assets
+    WHERE deleted_at IS NULL
+      AND owner_id IS NOT NULL
+      AND (for_user_id IS NULL OR owner_id = for_user_id)
+    GROUP BY owner_id, COALESCE(file_type, 'other')
+    UNION ALL
+    SELECT shared.grantee_id, 'shared',
+           COALESCE(SUM(f.file_size), 0)::BIGINT, COUNT(*)::INTEGER
+    FROM (
+        SELECT DISTINCT file_id, grantee_id
+        FROM file_permissions
+        WHERE for_user_id IS NULL OR grantee_id = for_user_id
+    ) shared
+    JOIN file_assets f ON f.file_id = shared.file_id
+    WHERE f.deleted_at IS NULL
+      AND f.owner_id IS DISTINCT FROM shared.grantee_id
+    GROUP BY shared.grantee_id;
+
+    INSERT INTO storage_usage AS u (user_id, category, total_bytes, file_count, updated_at)
+    SELECT e.user_id, e.category, e.total_bytes, e.file_count, NOW()
+    FROM expected_storage_usage e
+    LEFT JOIN storage_usage s ON s.user_id = e.user_id AND s.category = e.category
+    WHERE s.user_id IS NULL
+       OR s.total_bytes <> e.total_bytes
+       OR s.file_count <> e.file_count
+    ON CONFLICT (user_id, category) DO UPDATE SET
+        total_bytes = EXCLUDED.total_bytes,
+        file_count = EXCLUDED.file_count,
+        updated_at = NOW();
+    GET DIAGNOSTICS repaired = ROW_COUNT;
+
+    DELETE FROM storage_usage s
+    WHERE (for_user_id IS NULL OR s.user_id = for_user_id)
+      AND (s.total_bytes <> 0 OR s.file_count <> 0)
+      AND NOT EXISTS (
+          SELECT 1 FROM expected_storage_usage e
+          WHERE e.user_id = s.user_id AND e.category = s.category
+      );
+    GET DIAGNOSTICS removed = ROW_COUNT;
+
+    DROP TABLE expected_storage_usage;
+    RETURN repaired + removed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill existing files and shares
+SELECT reconcile_storage_usage();
+
+COMMENT ON TABLE storage_usage IS 'Incrementally maintained per-user Honey Reserve storage counters (file_type categories plus shared)';
+COMMENT ON FUNCTION apply_storage_usage_delta(TEXT, TEXT, BIGINT, INTEGER) IS 'Adds a byte/count delta to one storage_usage row';
+COMMENT ON FUNCTION apply_file_usage_delta(UUID, TEXT, TEXT, BIGINT, INTEGER) IS 'Adds or removes one file''s contribution for its owner and grantees';
+COMMENT ON FUNCTION trigger_file_assets_storage_usage() IS 'Trigger function keeping storage_usage in sync with file_assets';
+COMMENT ON FUNCTION trigger_file_permissions_storage_usage() IS 'Trigger function keeping shared storage_usage in sync with file_permissions';
+COMMENT ON FUNCTION reconcile_storage_usage(TEXT) IS 'Repairs storage_usage drift from file_assets/file_permissions; returns rows corrected';
+
+COMMIT;
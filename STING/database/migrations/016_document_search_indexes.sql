@@ -0,0 +1,58 @@
+-- Migration: Indexed document metadata search and keyset pagination
+-- Issue: Basket search filtered on filename ILIKE '%query%' and a chain of
+--        filename ILIKE '%.ext' conditions, and honey jar document listings
+--        paged with OFFSET, so every search and every deep page scanned the
+--        documents table
+-- Solution: Trigram and JSONB GIN indexes for filename and tag matching, a
+--           generated extension column for file type filters, and composite
+--           (upload_date, id) indexes that keyset (cursor) pagination walks
+
+-- Description:
+-- documents.file_extension is the lowercased text after the last '.' in the
+-- filename (NULL when there is none), kept up to date by PostgreSQL.
+-- Listings and searches order by upload_date DESC, id DESC; a cursor is the
+-- last row's (upload_date, id), and the next page is everything strictly
+-- after it in that order. upload_date becomes NOT NULL so the order is total.
+-- Substring searches use the trigram index once the query has 3 or more
+-- characters. Adding the stored column rewrites the documents table, so
+-- run this during a maintenance window on large installations.
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Keyset order needs a value on every row
+UPDATE documents SET upload_date = COALESCE(updated_at, NOW()) WHERE upload_date IS NULL;
+ALTER TABLE documents ALTER COLUMN upload_date SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE documents ALTER COLUMN upload_date SET NOT NULL;
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS file_extension VARCHAR(255)
+    GENERATED ALWAYS AS (lower(substring(filename FROM '\.([^./]+)$'))) STORED;
+
+-- Substring matches on filename (ILIKE '%query%')
+CREATE INDEX IF NOT EXISTS idx_documents_filename_trgm
+    ON documents USING gin (filename gin_trgm_ops);
+
+-- Tag containment (tags @> '["finance"]')
+CREATE INDEX IF NOT EXISTS idx_documents_tags
+    ON documents USING gin (tags jsonb_path_ops);
+
+-- File type filters (file_extension IN ('pdf', 'docx'))
+CREATE INDEX IF NOT EXISTS idx_documents_file_extension
+    ON documents (file_extension);
+
+-- Keyset pagination within a honey jar and across honey jars
+CREATE INDEX IF NOT EXISTS idx_documents_honey_jar_keyset
+    ON documents (honey_jar_id, upload_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_documents_upload_keyset
+    ON documents (upload_date DESC, id DESC);
+
+ANALYZE documents;
+
+COMMENT ON COLUMN documents.file_extension IS 'Lowercased filename extension (generated), used by file type filters';
+COMMENT ON INDEX idx_documents_filename_trgm IS 'Trigram index for filename substring search';
+COMMENT ON INDEX idx_documents_tags IS 'GIN index for tag containment filters';
+COMMENT ON INDEX idx_documents_honey_jar_keyset IS 'Keyset pagination order for honey jar document listings';
+COMMENT ON INDEX idx_documents_upload_keyset IS 'Keyset pagination order for cross honey jar document search';
+
+COMMIT;
@@ -24,6 +24,15 @@ from llm_queue_manager import LLMQueueManager, QueuedRequest, RequestStatus, Use
 # Import Bee Context Manager for enhanced chat capabilities
 from bee_context_manager import BeeContextManager
 
+# Shared single-pass keyword matcher (copied from app/utils in the image)
+from keyword_matcher import KeywordMatcher
+
+# Micro-batching embedding server shared with the indexers
+from embedding_batcher import get_embedding_batcher
+
+# Shared request instrumentation (copied from app/utils in the image)
+import instrumentation
+
 # Configure logging first (before PII import that may fail)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -53,6 +62,24 @@ CORS_ORIGINS = os.getenv('CORS_ORIGINS', '').split(',') if os.getenv('CORS_ORIGI
     "https://host.docker.internal:8443"
 ]
 
+# Report-intent keywords, compiled once and matched in a single pass per message
+REPORT_INTENT_MATCHER = KeywordMatcher({
+    'report': ["generate report", "create report", "report on", "analyze", "summary report", "detailed analysis"],
+    'word_report': ["word analysis", "word report"],
+    'use_case': [
+        'use case', 'use-case', 'usecase', 'how can', 'how would', 'how could',
+        'business scenario', 'real world', 'real-world', 'practical example',
+        'application', 'implement', 'deploy', 'leverage', 'utilize'
+    ],
+    'comparison': [
+        'compare', 'versus', 'vs', 'difference', 'better', 'pros and cons',
+        'advantages', 'disadvantages', 'alternative'
+    ],
+    'summary': [
+        'summary', 'overview', 'summarize', 'brief', 'quick', 'tldr', 'highlights'
+    ],
+})
+
 # Configuration
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 SERVICE_PORT = int(os.getenv("EXTERNAL_AI_PORT", "8091"))
@@ -73,6 +100,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request IDs, query/client timing and /metrics (added last so it wraps CORS)
+instrumentation.install('external-ai')
+instrumentation.instrument_fastapi(app)
+
 # Pydantic models
 class ReportRequest(BaseModel):
     templateId: str
@@ -393,6 +424,7 @@ class OllamaClient:
             logger.error(f"❌ Exception in get_status_and_models: {e}")
             return {"running": False, "error": str(e)}, []
     
+    @instrumentation.span("llm.generate")
     async def generate(self, model: str, prompt: str, options: Dict[str, Any] = None) -> Dict[str, Any]:
         """Generate text using OpenAI-compatible API only (/v1/chat/completions).
 
@@ -734,10 +766,12 @@ async def pii_diagnostics():
             }
     else:
         # Basic middleware without enhanced features
+        cache_manager = pii_middleware.cache_manager
         return {
             "status": "basic",
             "message": "Basic PII middleware active (no position tracking or visual indicators)",
             "enhanced_mode": False,
+            "cache_metrics": await cache_manager.get_metrics() if hasattr(cache_manager, 'get_metrics') else None,
             "features": {
                 "position_tracking": False,
                 "visual_indicators": False,
@@ -872,7 +906,7 @@ Format the response as a structured report.
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/bee/chat")
-async def bee_chat(request: BeeChatRequest):
+async def bee_chat(request: BeeChatRequest, background_tasks: BackgroundTasks):
     """Unified Bee chat endpoint that can handle both conversations and report generation"""
     try:
         # If async mode, enqueue the request
@@ -928,8 +962,8 @@ async def bee_chat(request: BeeChatRequest):
 
         # If not explicitly set in context, check keywords in message
         if not is_report_request:
-            report_keywords = ["generate report", "create report", "report on", "analyze", "summary report", "detailed analysis", "word analysis", "word report"]
-            is_report_request = any(keyword in request.message.lower() for keyword in report_keywords)
+            intent_hits = REPORT_INTENT_MATCHER.match_categories(request.message)
+            is_report_request = bool(intent_hits & {'report', 'word_report'})
 
         if is_report_request:
             # Override model for report generation - use model from config (user-editable in config.yml)
@@ -979,34 +1013,29 @@ async def bee_chat(request: BeeChatRequest):
                     # Continue with original message on error
 
             # Handle as report generation with enhanced context
+            context_report = {}
             enhanced_prompt = await bee_context_manager.build_enhanced_prompt(
                 user_message,  # Use PII-serialized message
                 request.user_id,
                 conversation_id=request.conversation_id,
                 conversation_history=None,
-                honey_jar_id=request.honey_jar_id
+                honey_jar_id=request.honey_jar_id,
+                context_report=context_report
             )
+            if request.conversation_id:
+                background_tasks.add_task(bee_context_manager.update_conversation_summary, request.conversation_id)
 
             # Detect report type from user's request to provide appropriate guidance
-            user_msg_lower = user_message.lower()
+            report_type_hits = REPORT_INTENT_MATCHER.match_categories(user_message)
 
             # Detect use case / business scenario requests
-            is_use_case_request = any(kw in user_msg_lower for kw in [
-                'use case', 'use-case', 'usecase', 'how can', 'how would', 'how could',
-                'business scenario', 'real world', 'real-world', 'practical example',
-                'application', 'implement', 'deploy', 'leverage', 'utilize'
-            ])
+            is_use_case_request = 'use_case' in report_type_hits
 
             # Detect comparison/evaluation requests
-            is_comparison_request = any(kw in user_msg_lower for kw in [
-                'compare', 'versus', 'vs', 'difference', 'better', 'pros and cons',
-                'advantages', 'disadvantages', 'alternative'
-            ])
+            is_comparison_request = 'comparison' in report_type_hits
 
             # Detect summary/overview requests
-            is_summary_request = any(kw in user_msg_lower for kw in [
-                'summary', 'overview', 'summarize', 'brief', 'quick', 'tldr', 'highlights'
-            ])
+            is_summary_request = 'summary' in report_type_hits
 
             # Build appropriate report prompt based on request type
             if is_use_case_request:
@@ -1265,6 +1294,7 @@ Begin the report now.
                     "tokens_used": result.get("eval_count", 0),
                     "privacy_level": "high" if not request.encryption_required else "maximum"
                 },
+                "context_sources": context_report,  # Which context sources made the deadline
                 "pii_protection": pii_protected_metadata  # NEW: PII metadata for frontend visual indicators
             }
         else:
@@ -1316,14 +1346,18 @@ Begin the report now.
 
             # Use the BeeContextManager to build enhanced prompt with honey jar context AND conversation history
             # Uses the PII-serialized user message if PII protection is enabled
+            context_report = {}
             enhanced_prompt = await bee_context_manager.build_enhanced_prompt(
                 user_message,  # Use serialized message if PII enabled
                 request.user_id,
                 conversation_id=conversation_id,  # Pass conversation_id to load history from Redis
                 conversation_history=None,  # Will be loaded from Redis automatically
                 honey_jar_id=request.honey_jar_id,
-                custom_system_prompt=nectar_bot_system_prompt  # Pass custom prompt for Nectar Bots
+                custom_system_prompt=nectar_bot_system_prompt,  # Pass custom prompt for Nectar Bots
+                context_report=context_report
             )
+            # Rolling conversation summary is updated after the response is sent
+            background_tasks.add_task(bee_context_manager.update_conversation_summary, conversation_id)
 
             # Save user message to conversation history (use ORIGINAL message, not serialized)
             await bee_context_manager.save_message_to_history(
@@ -1402,6 +1436,7 @@ Begin the report now.
                 "tools_used": request.tools_enabled,
                 "processing_time": result.get('total_duration', 0) / 1e9,
                 "report_generated": False,
+                "context_sources": context_report,  # Which context sources made the deadline
                 "pii_protection": pii_protected_metadata  # NEW: PII metadata for frontend visual indicators
             }
             
@@ -1449,36 +1484,49 @@ async def sync_knowledge(request: KnowledgeSyncRequest):
 async def create_embeddings(request: EmbeddingRequest):
     """Create embeddings for documents"""
     try:
-        if request.provider == "ollama":
-            # Check Ollama status
-            status = await ollama_client.check_status()
-            if not status.get("running"):
-                raise HTTPException(status_code=503, detail="Ollama service is not available")
-            
-            # In a real implementation, this would use Ollama's embedding model
-            # For now, return mock embeddings
-            embeddings = []
-            for i, doc in enumerate(request.documents):
-                embeddings.append({
-                    "document": doc[:100] + "..." if len(doc) > 100 else doc,
-                    "embedding": [0.1] * 384,  # Mock 384-dimensional embedding
-                    "index": i
-                })
-            
-            return {
-                "embeddings": embeddings,
-                "model": request.model,
-                "dimensions": 384,
-                "processingTime": f"{len(request.documents) * 0.1:.1f} seconds",
-                "provider": request.provider
-            }
-        else:
+        if request.provider not in ("ollama", "local"):
             raise HTTPException(status_code=400, detail=f"Provider {request.provider} not supported")
-            
+
+        # Concurrent callers are merged into shared batched encodes
+        batcher = get_embedding_batcher()
+        start_time = datetime.now()
+        vectors = await batcher.embed_async(request.documents)
+        elapsed = (datetime.now() - start_time).total_seconds()
+
+        embeddings = []
+        for i, (doc, vector) in enumerate(zip(request.documents, vectors)):
+            embeddings.append({
+                "document": doc[:100] + "..." if len(doc) > 100 else doc,
+                "embedding": vector,
+                "index": i
+            })
+
+        return {
+            "embeddings": embeddings,
+            "model": batcher.model_name,
+            "dimensions": len(vectors[0]) if vectors else 0,
+            "processingTime": f"{elapsed:.3f} seconds",
+            "provider": request.provider
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to create embeddings: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/knowledge/embeddings/stats")
+async def get_embedding_stats():
+    """Embedding batcher throughput plus batch-size and queue-wait histograms"""
+    return get_embedding_batcher().get_stats()
+
+@app.get("/conversations/semantic-search/stats")
+async def get_conversation_search_stats():
+    """Conversation semantic search stats, including indexing lag"""
+    if not bee_context_manager.conversation_search:
+        return {"enabled": False, "reason": "Conversation semantic search not initialized"}
+    return await asyncio.to_thread(bee_context_manager.conversation_search.get_stats)
+
 @app.get("/queue/status/{request_id}")
 async def get_queue_status(request_id: str):
     """Get status of a queued request"""
@@ -1505,8 +1553,13 @@ async def cancel_request(request_id: str):
         raise HTTPException(status_code=404, detail="Request not found or already processing")
 
 @app.post("/admin/index-knowledge")
-async def trigger_indexing():
-    """Manually trigger knowledge indexing (admin endpoint)"""
+async def trigger_indexing(rebuild: bool = False):
+    """
+    Manually trigger knowledge indexing (admin endpoint)
+
+    Indexing is incremental: only changed sections are re-embedded. Pass
+    rebuild=true to clear the collection and embed everything again.
+    """
     try:
         if not bee_context_manager.knowledge_indexer or not bee_context_manager.knowledge_indexer.enabled:
             raise HTTPException(status_code=503, detail="ChromaDB not available")
@@ -1516,20 +1569,18 @@ async def trigger_indexing():
         current_count = stats.get('document_count', 0)
 
         # Clear existing collection
-        if current_count > 0:
+        if rebuild and current_count > 0:
             logger.info(f"Clearing existing {current_count} documents...")
             bee_context_manager.knowledge_indexer.clear_collection()
 
-        # Load brain knowledge
-        brain_knowledge = await bee_context_manager.load_brain_knowledge()
-
         # Trigger background indexing
-        asyncio.create_task(index_knowledge_background(brain_knowledge))
+        asyncio.create_task(index_knowledge_background())
 
         return {
             "status": "indexing_started",
             "message": "Knowledge indexing started in background",
             "previous_count": current_count,
+            "rebuild": rebuild,
             "check_status_url": "/admin/index-status"
         }
 
@@ -1660,8 +1711,7 @@ async def process_chat_request(request: QueuedRequest) -> Dict[str, Any]:
     message = payload.get("message", "")
     
     # Check if this is a report request
-    report_keywords = ["generate report", "create report", "report on", "analyze", "summary report", "detailed analysis"]
-    is_report_request = any(keyword in message.lower() for keyword in report_keywords)
+    is_report_request = 'report' in REPORT_INTENT_MATCHER.match_categories(message)
     
     if is_report_request:
         # Handle as report with enhanced formatting
@@ -1723,11 +1773,13 @@ Include relevant security considerations where applicable.
         }
     else:
         # Handle as regular conversation using BeeContextManager for enhanced context
+        context_report = {}
         enhanced_prompt = await bee_context_manager.build_enhanced_prompt(
             payload.get("message", ""),
             payload.get("user_id", "anonymous"),
             conversation_history=None,  # Could pass history if available
-            honey_jar_id=payload.get("honey_jar_id")
+            honey_jar_id=payload.get("honey_jar_id"),
+            context_report=context_report
         )
         
         # Get available models and use the appropriate one
@@ -1752,7 +1804,8 @@ Include relevant security considerations where applicable.
             "timestamp": datetime.now().isoformat(),
             "tools_used": payload.get("tools_enabled", []),
             "processing_time": result.get('total_duration', 0) / 1e9,  # Return numeric value, not string
-            "report_generated": False
+            "report_generated": False,
+            "context_sources": context_report
         }
 
 async def process_report_request(request: QueuedRequest) -> Dict[str, Any]:
@@ -1863,15 +1916,20 @@ BEGIN COMPREHENSIVE REPORT:
 
 async def process_embedding_request(request: QueuedRequest) -> Dict[str, Any]:
     """Process an embedding request"""
-    # Placeholder for embedding logic
+    batcher = get_embedding_batcher()
+    vectors = await batcher.embed_async(request.payload.get("documents", []))
     return {
-        "embeddings": [],
-        "model": "nomic-embed-text",
-        "dimensions": 384
+        "embeddings": vectors,
+        "model": batcher.model_name,
+        "dimensions": len(vectors[0]) if vectors else 0
     }
 
-async def index_knowledge_background(brain_knowledge: str):
-    """Background task to index knowledge in ChromaDB without blocking startup"""
+async def index_knowledge_background():
+    """Background task to index knowledge in ChromaDB without blocking startup
+
+    Goes through the brain auto-indexer so brain files and docs are stored under
+    the same source keys ("brain:<file>", "doc:<path>") the watcher keeps in sync.
+    """
     try:
         is_indexing.set()  # Mark indexing as in progress
         logger.info("🔄 Background indexing started...")
@@ -1879,42 +1937,13 @@ async def index_knowledge_background(brain_knowledge: str):
         # Delay to ensure service is fully started
         await asyncio.sleep(5)
 
-        # Index brain knowledge with progress updates
-        if brain_knowledge:
-            logger.info(f"📖 Indexing brain knowledge ({len(brain_knowledge)} chars)...")
-            logger.info("⏳ This may take 30-60 seconds for embedding generation...")
-
-            # Run in executor to avoid blocking
-            loop = asyncio.get_event_loop()
-            success = await loop.run_in_executor(
-                None,
-                bee_context_manager.knowledge_indexer.index_brain_knowledge,
-                brain_knowledge
-            )
-
-            if success:
-                logger.info("✅ Brain knowledge indexed successfully")
-            else:
-                logger.error("❌ Failed to index brain knowledge")
-
-            # Small delay between brain and docs indexing
-            await asyncio.sleep(2)
-
-        # Index documentation
-        from pathlib import Path
-        docs_path = Path(__file__).parent.parent / "docs"
-        if docs_path.exists():
-            logger.info("📚 Indexing documentation...")
-            loop = asyncio.get_event_loop()
-            success = await loop.run_in_executor(
-                None,
-                bee_context_manager.knowledge_indexer.index_documentation,
-                docs_path
-            )
-            if success:
-                logger.info("✅ Documentation indexed successfully")
-            else:
-                logger.warning("⚠️  Documentation indexing incomplete")
+        from knowledge_indexer import get_brain_auto_indexer
+        logger.info("📖 Indexing brain knowledge and documentation (changed sections only)...")
+        result = await asyncio.to_thread(get_brain_auto_indexer().index_now)
+        if result.get("status") in ("reindexed", "current"):
+            logger.info(f"✅ Knowledge index current: {result.get('message')}")
+        else:
+            logger.error(f"❌ Knowledge indexing incomplete: {result.get('message')}")
 
         # Show final stats
         stats = bee_context_manager.knowledge_indexer.get_stats()
@@ -1934,7 +1963,11 @@ async def pii_cache_cleanup_task(cache_manager):
     while True:
         try:
             await asyncio.sleep(300)  # Run every 5 minutes (matches config cleanup interval)
-            await cache_manager.cleanup_expired()
+            if hasattr(cache_manager, 'cleanup_expired'):
+                await cache_manager.cleanup_expired()
+            else:
+                # Basic PIICacheManager: LRU eviction under memory pressure
+                await cache_manager.cleanup()
             logger.debug("PII cache cleanup completed")
         except asyncio.CancelledError:
             logger.info("PII cache cleanup task cancelled")
@@ -1973,6 +2006,7 @@ async def startup_event():
         except Exception as enhance_error:
             logger.warning(f"Failed to upgrade to enhanced PII components: {enhance_error}")
             logger.info("Continuing with basic PII middleware")
+            asyncio.create_task(pii_cache_cleanup_task(pii_middleware.cache_manager))
 
     # Initialize Bee Context Manager and load brain knowledge
     logger.info("Loading Bee Brain knowledge into memory...")
@@ -2048,6 +2082,13 @@ async def shutdown_event():
     # Close LLM connection pool
     await LLMConnectionPool.close()
 
+    # Index queued conversation messages (needs the embedding batcher)
+    if bee_context_manager.conversation_search:
+        await bee_context_manager.conversation_search.drain_index_queue()
+
+    # Finish queued embedding requests
+    await asyncio.to_thread(get_embedding_batcher().stop)
+
     logger.info("External AI Service shut down")
 
 if __name__ == "__main__":
@@ -4,18 +4,43 @@ Bee Context Manager - Integrates documentation and honey jars for enhanced Bee C
 """
 
 import os
+import time
 import aiohttp
 import asyncio
 import json
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import logging
 
+from keyword_index import BM25Index, tokenize
+# Shared request instrumentation (copied from app/utils in the image)
+from instrumentation import record_span, span
+
 logger = logging.getLogger(__name__)
 
+# Default per-source budgets (ms) for context assembly, each capped by
+# BEE_CONTEXT_BUDGET_MS; override with BEE_CONTEXT_<SOURCE>_BUDGET_MS
+CONTEXT_SOURCE_BUDGETS_MS = {
+    "history": 1500,
+    "system_prompt": 500,
+    "honey_jar": 2000,
+    "docs": 1000,
+    "brain": 500,
+}
+
 class BeeContextManager:
     """Manages context from documentation, brain knowledge, and honey jars for Bee Chat"""
 
+    # Key documentation files to prioritize
+    PRIORITY_DOCS = [
+        "README.md",
+        "ARCHITECTURE.md",
+        "DATA_PROTECTION_ARCHITECTURE.md",
+        "WORKER_BEE_CONNECTOR_FRAMEWORK.md",
+        "REPORT_GENERATION_FRAMEWORK.md",
+        "AI_ASSISTANT.md"
+    ]
+
     def __init__(self):
         self.knowledge_service_url = os.getenv("KNOWLEDGE_SERVICE_URL", "http://knowledge:8090")
         self.docs_path = Path(__file__).parent.parent / "docs"
@@ -77,9 +102,28 @@ class BeeContextManager:
         self.brain_knowledge = ""  # Core brain knowledge loaded in memory
         self.brain_loaded = False
         self.use_semantic_search = True  # Use ChromaDB when available
+
+        # Keyword fallback: BM25 indexes built once, rebuilt when source files change
+        self.docs_index: Optional[BM25Index] = None
+        self.brain_index: Optional[BM25Index] = None
+        self._brain_index_source: Optional[str] = None
+        self._source_signature: Optional[Tuple] = None
+        self._sources_checked_at = 0.0
+        self._source_check_interval = float(os.getenv("BEE_KEYWORD_INDEX_CHECK_SECONDS", "30"))
+
+        # Context assembly deadline: sources still loading when their budget runs out
+        # are cancelled and the prompt is built without them (0 disables the limit)
+        self.context_budget_ms = float(os.getenv("BEE_CONTEXT_BUDGET_MS", "2500"))
+        # Start the authenticated honey jar search if public hasn't answered by then (0 = never hedge)
+        self.honey_jar_hedge_ms = float(os.getenv("BEE_HONEY_JAR_HEDGE_MS", "750"))
+        self.context_source_budgets_ms = {
+            name: float(os.getenv(f"BEE_CONTEXT_{name.upper()}_BUDGET_MS", str(default)))
+            for name, default in CONTEXT_SOURCE_BUDGETS_MS.items()
+        }
         
     async def load_brain_knowledge(self) -> str:
         """Load Bee brain knowledge from the brain file into memory"""
+        await self._check_sources_changed()
         if self.brain_loaded and self.brain_knowledge:
             return self.brain_knowledge
 
@@ -120,20 +164,10 @@ class BeeContextManager:
             
         docs_content = {}
         
-        # Key documentation files to prioritize
-        priority_docs = [
-            "README.md",
-            "ARCHITECTURE.md", 
-            "DATA_PROTECTION_ARCHITECTURE.md",
-            "WORKER_BEE_CONNECTOR_FRAMEWORK.md",
-            "REPORT_GENERATION_FRAMEWORK.md",
-            "AI_ASSISTANT.md"
-        ]
-        
         try:
             # Load priority docs from root
             root_path = self.docs_path.parent
-            for doc in priority_docs:
+            for doc in self.PRIORITY_DOCS:
                 doc_path = root_path / doc
                 if doc_path.exists():
                     docs_content[doc] = doc_path.read_text()
@@ -153,7 +187,13 @@ class BeeContextManager:
         return docs_content
     
     async def get_honey_jar_context(self, query: str, user_id: str, honey_jar_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get relevant context from honey jars"""
+        """Get relevant context from honey jars
+
+        The public endpoint is tried first. The authenticated endpoint is queried
+        when public returns nothing or fails, or - hedging against a slow public
+        search - once BEE_HONEY_JAR_HEDGE_MS has passed without a public answer.
+        Public results win when there are any.
+        """
         try:
             logger.info(f"Getting honey jar context - URL: {self.knowledge_service_url}, query: {query}, honey_jar_id: {honey_jar_id}")
             
@@ -169,39 +209,53 @@ class BeeContextManager:
                 if honey_jar_id:
                     payload["honey_jar_id"] = honey_jar_id
                 
-                # Try public endpoint first (no auth required)
-                public_url = f"{self.knowledge_service_url}/bee/context/public"
-                logger.info(f"Trying public endpoint: {public_url}")
-                
-                async with session.post(public_url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results = data.get("results", [])
-                        logger.info(f"Got {len(results)} results from public honey jars")
-                        if results:
-                            return results
-                    else:
-                        logger.info(f"Public endpoint returned {response.status}, trying authenticated endpoint")
-                
-                # If no public results or public endpoint failed, try authenticated endpoint
-                auth_url = f"{self.knowledge_service_url}/bee/context"
-                logger.info(f"Trying authenticated endpoint: {auth_url}")
-                
-                async with session.post(auth_url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results = data.get("results", [])
-                        logger.info(f"Got {len(results)} results from authenticated endpoint")
+                # Public endpoint (no auth required) is preferred. Cancelling a request does
+                # not stop the search it started, so the authenticated fallback is only
+                # sent when needed or when public is slow enough to be worth the hedge
+                public_task = asyncio.create_task(self._fetch_honey_jar_results(
+                    session, f"{self.knowledge_service_url}/bee/context/public", payload, "public"))
+                auth_task = None
+                try:
+                    if self.honey_jar_hedge_ms > 0:
+                        done, _ = await asyncio.wait({public_task}, timeout=self.honey_jar_hedge_ms / 1000)
+                        if not done:
+                            logger.info(f"Public honey jar search still running after "
+                                        f"{self.honey_jar_hedge_ms:.0f}ms, also trying authenticated endpoint")
+                            auth_task = asyncio.create_task(self._fetch_honey_jar_results(
+                                session, f"{self.knowledge_service_url}/bee/context", payload, "authenticated"))
+
+                    results = await public_task
+                    if results:
                         return results
-                    else:
-                        error_text = await response.text()
-                        logger.warning(f"Authenticated endpoint failed: {response.status} - {error_text}")
-                        # Return empty list but don't fail completely
-                        return []
+                    if auth_task is None:
+                        auth_task = asyncio.create_task(self._fetch_honey_jar_results(
+                            session, f"{self.knowledge_service_url}/bee/context", payload, "authenticated"))
+                    # Return empty list but don't fail completely
+                    return await auth_task or []
+                finally:
+                    public_task.cancel()
+                    if auth_task is not None:
+                        auth_task.cancel()
                         
         except Exception as e:
             logger.error(f"Error fetching honey jar context: {e}")
             return []
+
+    async def _fetch_honey_jar_results(self, session: aiohttp.ClientSession, url: str,
+                                       payload: Dict[str, Any], label: str) -> Optional[List[Dict[str, Any]]]:
+        """POST a context query to one knowledge endpoint; None if it failed"""
+        try:
+            async with session.post(url, json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    results = data.get("results", [])
+                    logger.info(f"Got {len(results)} results from {label} honey jar endpoint")
+                    return results
+                error_text = await response.text()
+                logger.warning(f"{label.capitalize()} honey jar endpoint failed: {response.status} - {error_text}")
+        except Exception as e:
+            logger.warning(f"{label.capitalize()} honey jar endpoint error: {e}")
+        return None
     
     async def search_documentation(self, query: str, max_results: int = 3) -> List[Dict[str, str]]:
         """Search documentation for relevant content using semantic search or keyword fallback"""
@@ -229,35 +283,99 @@ class BeeContextManager:
             except Exception as e:
                 logger.warning(f"Semantic search failed, falling back to keyword search: {e}")
 
-        # Fallback to keyword search
-        docs = await self.load_documentation()
+        # Fallback to keyword search (BM25 over pre-tokenized sections)
+        index = await self._get_docs_index()
+        query_words = set(tokenize(query))
         results = []
+        seen_sources = set()
+
+        for score, section in index.search(query, limit=max_results * 5):
+            # Best section per document, like the previous per-file results
+            if section.source in seen_sources:
+                continue
+            seen_sources.add(section.source)
+            results.append({
+                "source": section.source,
+                "score": round(score, 3),
+                "snippet": self._extract_snippet(section.text, query_words, max_length=500)
+            })
+            if len(results) >= max_results:
+                break
+
+        logger.info(f"📚 Found {len(results)} docs via keyword search")
+        return results
+
+    async def _check_sources_changed(self):
+        """Drop loaded brain/docs (and their indexes) when the files change.
+
+        Checked at most every BEE_KEYWORD_INDEX_CHECK_SECONDS; the file scan
+        runs in a worker thread.
+        """
+        now = time.monotonic()
+        if now - self._sources_checked_at < self._source_check_interval:
+            return
+        self._sources_checked_at = now
 
-        # Simple keyword search
-        query_lower = query.lower()
-        query_words = set(query_lower.split())
-
-        for doc_name, content in docs.items():
-            content_lower = content.lower()
-
-            # Score based on keyword matches
-            score = 0
-            for word in query_words:
-                score += content_lower.count(word)
+        try:
+            signature = await asyncio.to_thread(self._compute_source_signature)
+        except Exception as e:
+            logger.warning(f"Failed to check brain/docs files for changes: {e}")
+            return
 
-            if score > 0:
-                # Extract relevant snippet
-                snippet = self._extract_snippet(content, query_words, max_length=500)
-                results.append({
-                    "source": doc_name,
-                    "score": score,
-                    "snippet": snippet
-                })
-
-        # Sort by score and return top results
-        results.sort(key=lambda x: x["score"], reverse=True)
-        logger.info(f"📚 Found {len(results[:max_results])} docs via keyword search")
-        return results[:max_results]
+        if self._source_signature is not None and signature != self._source_signature:
+            logger.info("📚 Brain or documentation files changed, rebuilding keyword indexes")
+            self.documentation_cache = {}
+            self.docs_index = None
+            self.brain_index = None
+            self._brain_index_source = None
+            if self.use_versioned_brain and hasattr(self, 'brain_manager'):
+                await asyncio.to_thread(self.brain_manager.reload)
+            self.brain_loaded = False
+            self.brain_knowledge = ""
+        self._source_signature = signature
+
+    def _compute_source_signature(self) -> Tuple:
+        """(path, mtime, size) of every brain and documentation source file"""
+        paths = []
+        root_path = self.docs_path.parent
+        paths.extend(root_path / doc for doc in self.PRIORITY_DOCS)
+        if self.docs_path.exists():
+            paths.extend(self.docs_path.rglob("*.md"))
+        if self.use_versioned_brain and hasattr(self, 'brain_manager'):
+            if self.brain_manager.bee_brains_dir.exists():
+                paths.extend(self.brain_manager.bee_brains_dir.rglob("*"))
+        elif hasattr(self, 'brain_path'):
+            paths.append(self.brain_path)
+
+        signature = []
+        for path in paths:
+            try:
+                stat = path.stat()
+                signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                continue
+        return tuple(sorted(signature))
+
+    async def _get_docs_index(self) -> BM25Index:
+        """BM25 index over the loaded documentation (built in a worker thread)"""
+        await self._check_sources_changed()
+        if self.docs_index is None:
+            docs = await self.load_documentation()
+            started = time.perf_counter()
+            self.docs_index = await asyncio.to_thread(BM25Index, docs)
+            logger.info(f"📚 Built documentation keyword index: {self.docs_index.get_stats()} "
+                        f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return self.docs_index
+
+    def _get_brain_index(self, brain_knowledge: str) -> BM25Index:
+        """BM25 index over the brain text, rebuilt when a different text is passed"""
+        if self.brain_index is None or self._brain_index_source is not brain_knowledge:
+            started = time.perf_counter()
+            self.brain_index = BM25Index({"bee_brain": brain_knowledge})
+            self._brain_index_source = brain_knowledge
+            logger.info(f"🧠 Built brain keyword index: {self.brain_index.get_stats()} "
+                        f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return self.brain_index
     
     def _extract_snippet(self, content: str, query_words: set, max_length: int = 500) -> str:
         """Extract most relevant snippet from content"""
@@ -324,86 +442,14 @@ class BeeContextManager:
             except Exception as e:
                 logger.warning(f"Semantic brain search failed, falling back to keyword: {e}")
 
-        # Fallback to keyword-based extraction
-        lines = brain_knowledge.split('\n')
-        query_lower = user_message.lower()
-        query_words = set(query_lower.split())
-        
-        # Keywords that indicate different types of queries
-        topic_keywords = {
-            'authentication': ['auth', 'login', 'passkey', 'totp', 'kratos', 'webauthn', 'aal2', 'password', 'biometric'],
-            'honey_jars': ['honey', 'jar', 'knowledge', 'document', 'storage', 'upload', 'search', 'repository'],
-            'architecture': ['architecture', 'service', 'component', 'database', 'postgres', 'redis', 'port', 'api'],
-            'security': ['security', 'encryption', 'compliance', 'gdpr', 'hipaa', 'sox', 'pii', 'audit', 'vault'],
-            'business': ['business', 'roi', 'cost', 'value', 'enterprise', 'deployment', 'implementation'],
-            'troubleshooting': ['error', 'issue', 'problem', 'fix', 'troubleshoot', 'debug', 'help', 'support'],
-            'features': ['feature', 'capability', 'function', 'tool', 'integration', 'report']
-        }
-        
-        # Identify the primary topic
-        primary_topic = None
-        max_matches = 0
-        for topic, keywords in topic_keywords.items():
-            matches = sum(1 for word in query_words if any(keyword in word for keyword in keywords))
-            if matches > max_matches:
-                max_matches = matches
-                primary_topic = topic
-        
-        # Extract sections based on topic or use general scoring
+        # Fallback to keyword-based extraction (BM25 over pre-tokenized brain sections)
         relevant_sections = []
-        
-        if primary_topic:
-            # Look for sections related to the primary topic
-            in_relevant_section = False
-            current_section = []
-            
-            for line in lines:
-                line_lower = line.lower()
-                
-                # Check if this line starts a relevant section
-                if line.startswith('#') and any(keyword in line_lower for keyword in topic_keywords[primary_topic]):
-                    if current_section and in_relevant_section:
-                        relevant_sections.append('\n'.join(current_section))
-                    current_section = [line]
-                    in_relevant_section = True
-                elif line.startswith('#'):
-                    if current_section and in_relevant_section:
-                        relevant_sections.append('\n'.join(current_section))
-                    current_section = [line]
-                    in_relevant_section = False
-                elif in_relevant_section:
-                    current_section.append(line)
-                elif any(keyword in line_lower for keyword in topic_keywords.get(primary_topic, [])):
-                    current_section.append(line)
-                    in_relevant_section = True
-            
-            if current_section and in_relevant_section:
-                relevant_sections.append('\n'.join(current_section))
-        
-        # If no specific sections found or need more content, use general keyword matching
-        if not relevant_sections or len('\n'.join(relevant_sections)) < 500:
-            scored_lines = []
-            for i, line in enumerate(lines):
-                line_lower = line.lower()
-                score = sum(1 for word in query_words if word in line_lower)
-                if score > 0:
-                    scored_lines.append((i, score, line))
-            
-            scored_lines.sort(key=lambda x: x[1], reverse=True)
-            
-            # Take top scoring lines and add surrounding context
-            selected_lines = set()
-            for line_idx, score, line in scored_lines[:10]:  # Top 10 scoring lines
-                for context_idx in range(max(0, line_idx - 2), min(len(lines), line_idx + 3)):
-                    selected_lines.add(context_idx)
-            
-            # Convert back to text, maintaining order
-            general_context = []
-            for i in sorted(selected_lines):
-                general_context.append(lines[i])
-            
-            if general_context:
-                relevant_sections.append('\n'.join(general_context))
+        total_len = 0
+        for score, section in self._get_brain_index(brain_knowledge).search(user_message, limit=5):
+            if relevant_sections and total_len + len(section.text) > max_length:
+                break
+            relevant_sections.append(section.text)
+            total_len += len(section.text) + 2
         
         # Combine and limit length
         combined_context = '\n\n'.join(relevant_sections)
@@ -446,6 +492,7 @@ class BeeContextManager:
 3. **Stay Professional**: Maintain a friendly, approachable tone while being informative
 4. **Be Specific**: Provide actionable, detailed information tailored to the user's needs"""
 
+    @span("bee.prompt.build")
     async def build_enhanced_prompt(
         self,
         user_message: str,
@@ -453,19 +500,27 @@ class BeeContextManager:
         conversation_id: Optional[str] = None,
         conversation_history: Optional[List[Dict[str, str]]] = None,
         honey_jar_id: Optional[str] = None,
-        custom_system_prompt: Optional[str] = None
+        custom_system_prompt: Optional[str] = None,
+        context_report: Optional[Dict[str, Any]] = None
     ) -> str:
         """Build an enhanced prompt that preserves Bee's personality while adding context
 
         Args:
             custom_system_prompt: If provided (e.g., for Nectar Bots), use this instead of Bee's prompt
+            context_report: If provided, filled with which context sources made it into
+                the prompt (included / partial / timeout / error) for response metadata
 
-        Performance: Uses asyncio.gather() to parallelize independent operations
+        Performance: Uses asyncio.gather() to parallelize independent operations, each
+        bounded by its context budget so one slow source can't hold up the reply
         """
         import time
         start_time = time.time()
 
+        # Best-so-far results, used when a source runs out of budget part way through
+        partial: Dict[str, Any] = {}
+
         # Define async tasks for parallel execution
+        @span("bee.context.history")
         async def load_history():
             """Load conversation history with keyword + semantic search + summarization
 
@@ -473,7 +528,7 @@ class BeeContextManager:
             1. PostgreSQL (source of truth) - try first
             2. Redis (hot cache fallback)
             """
-            history_with_summary = {"messages": [], "summary": None}
+            history_with_summary = {"messages": [], "summary": None, "source": "none"}
             cached = None
 
             if conversation_id:
@@ -482,13 +537,14 @@ class BeeContextManager:
                 await self._ensure_conversation_store()
                 if self.conversation_store:
                     try:
-                        pg_messages = await self.conversation_store.get_messages(
+                        pg_messages, source = await self.conversation_store.get_messages_with_source(
                             conversation_id,
                             limit=30  # Load more to detect when summarization is needed
                         )
                         if pg_messages:
                             cached = pg_messages
-                            logger.debug(f"📜 Loaded {len(pg_messages)} messages from PostgreSQL for {conversation_id[:8]}")
+                            history_with_summary["source"] = source
+                            logger.debug(f"📜 Loaded {len(pg_messages)} messages ({source}) for {conversation_id[:8]}")
                     except Exception as e:
                         logger.warning(f"Failed to load from PostgreSQL, trying Redis: {e}")
 
@@ -500,11 +556,14 @@ class BeeContextManager:
                             limit=30
                         )
                         if cached:
+                            history_with_summary["source"] = "conversation_cache"
                             logger.debug(f"📜 Loaded {len(cached)} messages from Redis cache")
                     except Exception as e:
                         logger.warning(f"Failed to load conversation history from Redis: {e}")
 
                 if cached:
+                    partial["history"] = {"messages": cached[-10:], "summary": None,
+                                          "source": history_with_summary["source"]}
                     filtered = cached
 
                     # For long conversations (>15 messages), summarize older ones
@@ -514,14 +573,29 @@ class BeeContextManager:
                         recent_messages = cached[-10:]  # Keep last 10 verbatim
 
                         try:
-                            # Get or generate summary for older messages
-                            summary_data = await self.conversation_summarizer.summarize_messages(
-                                messages=messages_to_summarize,
-                                conversation_id=conversation_id
-                            )
-                            history_with_summary["summary"] = summary_data
-                            filtered = recent_messages
-                            logger.info(f"📝 Summarized {len(messages_to_summarize)} older messages, keeping {len(recent_messages)} recent")
+                            if self.conversation_summarizer.mode == 'rolling':
+                                # Use the stored rolling summary; messages it doesn't cover yet
+                                # stay verbatim and are folded in after the response is sent
+                                summary_data, uncovered = self.conversation_summarizer.get_rolling_summary(
+                                    conversation_id, messages_to_summarize
+                                )
+                                if uncovered:
+                                    self.conversation_summarizer.schedule_rolling_update(
+                                        conversation_id, messages_to_summarize
+                                    )
+                                history_with_summary["summary"] = summary_data
+                                filtered = uncovered + recent_messages
+                                logger.info(f"📝 Rolling summary covers {len(messages_to_summarize) - len(uncovered)} "
+                                            f"older messages, keeping {len(filtered)} verbatim")
+                            else:
+                                # Get or generate summary for older messages
+                                summary_data = await self.conversation_summarizer.summarize_messages(
+                                    messages=messages_to_summarize,
+                                    conversation_id=conversation_id
+                                )
+                                history_with_summary["summary"] = summary_data
+                                filtered = recent_messages
+                                logger.info(f"📝 Summarized {len(messages_to_summarize)} older messages, keeping {len(recent_messages)} recent")
                         except Exception as e:
                             logger.warning(f"Summarization failed, using all messages: {e}")
 
@@ -563,6 +637,7 @@ class BeeContextManager:
             history_with_summary["messages"] = conversation_history or []
             return history_with_summary
 
+        @span("bee.context.system_prompt")
         async def load_system_prompt():
             """Load system prompt (Bee or custom)"""
             if custom_system_prompt:
@@ -570,48 +645,98 @@ class BeeContextManager:
                 return custom_system_prompt
             return await self.load_bee_system_prompt()
 
+        @span("bee.context.honey_jar")
         async def load_honey_jar():
             """Get honey jar context"""
             return await self.get_honey_jar_context(user_message, user_id, honey_jar_id)
 
+        @span("bee.context.docs")
         async def load_docs():
             """Search documentation"""
             return await self.search_documentation(user_message)
 
+        @span("bee.context.brain")
         async def load_brain():
             """Load brain knowledge"""
             return await self.load_brain_knowledge()
 
+        sources: Dict[str, Dict[str, Any]] = {}
+
+        async def within_budget(name, loader):
+            """Run one loader under its budget; returns None if it produced nothing usable"""
+            budget_ms = self._context_source_budget_ms(name)
+            source_start = time.time()
+            task = asyncio.ensure_future(loader())
+            try:
+                if budget_ms:
+                    await asyncio.wait({task}, timeout=budget_ms / 1000)
+                if budget_ms and not task.done():
+                    # Out of budget: cancel the loader and use what it had so far
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    value = partial.get(name)
+                    status = "partial" if value is not None else "timeout"
+                    logger.warning(f"⏱️ Context task '{name}' exceeded its {budget_ms:.0f}ms budget ({status})")
+                else:
+                    try:
+                        # A loader's own timeout (e.g. aiohttp) is an error here, not a budget miss
+                        value = await task
+                        status = "included"
+                    except Exception as e:
+                        value = None
+                        status = "error"
+                        logger.warning(f"⚠️ Context task '{name}' failed: {e!r}")
+            finally:
+                # The whole prompt build was cancelled
+                if not task.done():
+                    task.cancel()
+            sources[name] = {
+                "status": status,
+                "elapsed_ms": round((time.time() - source_start) * 1000),
+                "budget_ms": budget_ms or None,
+            }
+            return value
+
         # Execute ALL context loading in parallel using asyncio.gather()
-        # This saves 200-700ms compared to sequential execution
+        # This saves 200-700ms compared to sequential execution; sources past their
+        # budget are cancelled and replaced by their partial result or fallback
         results = await asyncio.gather(
-            load_history(),
-            load_system_prompt(),
-            load_honey_jar(),
-            load_docs(),
-            load_brain(),
-            return_exceptions=True  # Don't fail if one task fails
+            within_budget("history", load_history),
+            within_budget("system_prompt", load_system_prompt),
+            within_budget("honey_jar", load_honey_jar),
+            within_budget("docs", load_docs),
+            within_budget("brain", load_brain),
         )
 
-        # Unpack results (handle exceptions gracefully)
-        history_result = results[0] if not isinstance(results[0], Exception) else {"messages": conversation_history or [], "summary": None}
-        system_prompt = results[1] if not isinstance(results[1], Exception) else "You are Bee, a helpful AI assistant."
-        honey_jar_results = results[2] if not isinstance(results[2], Exception) else []
-        doc_results = results[3] if not isinstance(results[3], Exception) else []
-        brain_knowledge = results[4] if not isinstance(results[4], Exception) else ""
+        # Unpack results (fall back for sources that failed or ran out of time)
+        history_result = results[0] if results[0] is not None else {"messages": conversation_history or [], "summary": None}
+        system_prompt = results[1] if results[1] is not None else "You are Bee, a helpful AI assistant."
+        honey_jar_results = results[2] if results[2] is not None else []
+        doc_results = results[3] if results[3] is not None else []
+        brain_knowledge = results[4] if results[4] is not None else ""
 
         # Extract messages and summary from history result
         conversation_history = history_result.get("messages", [])
         conversation_summary = history_result.get("summary")
 
-        # Log any exceptions that occurred
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                task_names = ['history', 'system_prompt', 'honey_jar', 'docs', 'brain']
-                logger.warning(f"⚠️ Context task '{task_names[i]}' failed: {result}")
-
         elapsed = (time.time() - start_time) * 1000
-        logger.info(f"⚡ Context loading completed in {elapsed:.0f}ms (parallel)")
+        record_span("bee.context.load", elapsed / 1000)
+        if context_report is not None:
+            context_report.update({
+                "budget_ms": self.context_budget_ms or None,
+                "elapsed_ms": round(elapsed),
+                "sources": {name: sources[name] for name in CONTEXT_SOURCE_BUDGETS_MS},
+                "included": [name for name in CONTEXT_SOURCE_BUDGETS_MS if sources[name]["status"] in ("included", "partial")],
+                "dropped": [name for name in CONTEXT_SOURCE_BUDGETS_MS if sources[name]["status"] in ("timeout", "error")],
+            })
+
+        history_source = history_result.get("source", "none")
+        if self.conversation_store:
+            hit_rate = self.conversation_store.get_cache_stats()["hit_rate"]
+            logger.info(f"⚡ Context loading completed in {elapsed:.0f}ms (parallel, history: {history_source}, "
+                        f"tail cache hit rate {hit_rate:.0%})")
+        else:
+            logger.info(f"⚡ Context loading completed in {elapsed:.0f}ms (parallel, history: {history_source})")
 
         # Build context sections - keep them subtle and supportive
         context_parts = []
@@ -683,6 +808,11 @@ Bee: """
 
         return prompt
 
+    def _context_source_budget_ms(self, name: str) -> float:
+        """Budget for one context source in ms, capped by the overall budget (0 = unlimited)"""
+        budgets = [b for b in (self.context_budget_ms, self.context_source_budgets_ms.get(name, 0)) if b > 0]
+        return min(budgets) if budgets else 0
+
     async def _ensure_conversation_store(self):
         """Lazily initialize PostgreSQL conversation store."""
         if self.conversation_store is not None or self._store_init_attempted:
@@ -697,6 +827,15 @@ Bee: """
             logger.warning(f"⚠️ PostgreSQL store not available, using Redis only: {e}")
             self.conversation_store = None
 
+    async def update_conversation_summary(self, conversation_id: str):
+        """Fold messages aged out during this turn into the rolling summary.
+
+        Scheduled as a background task so the LLM call happens after the
+        response has been sent.
+        """
+        if self.conversation_summarizer and conversation_id:
+            await self.conversation_summarizer.run_pending_update(conversation_id)
+
     async def save_message_to_history(
         self,
         conversation_id: str,
@@ -9,12 +9,20 @@ Benefits:
 - Find semantically similar messages even without keyword overlap
 - Better context retrieval for follow-up questions
 - Reduces tangents by providing relevant prior context
+
+Messages are indexed through ConversationIndexQueue: index_message() only
+enqueues, and a background task embeds and upserts batches of up to
+CONVERSATION_INDEX_BATCH_SIZE messages (or whatever arrived within
+CONVERSATION_INDEX_MAX_WAIT_MS), retrying with backoff when ChromaDB fails.
 """
 
 import os
+import time
+import asyncio
 import logging
 import hashlib
-from typing import List, Dict, Any, Optional
+from collections import deque
+from typing import Deque, List, Dict, Any, Optional
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -28,6 +36,238 @@ except ImportError:
     logger.warning("ChromaDB not available - conversation semantic search disabled")
     CHROMADB_AVAILABLE = False
 
+from embedding_batcher import Histogram, get_embedding_batcher
+
+# Enqueue -> indexed latency histogram bounds (seconds)
+INDEX_LAG_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+class _IndexItem:
+    __slots__ = ("doc_id", "document", "metadata", "enqueued_at", "attempts")
+
+    def __init__(self, doc_id: str, document: str, metadata: Dict[str, Any]):
+        self.doc_id = doc_id
+        self.document = document
+        self.metadata = metadata
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class ConversationIndexQueue:
+    """Batches conversation messages into ChromaDB upserts off the request path.
+
+    Memory is bounded by max_pending: when ChromaDB is down long enough for
+    the queue to fill, the oldest messages are dropped (they remain in
+    PostgreSQL, only semantic search misses them).
+    """
+
+    def __init__(
+        self,
+        search: "ConversationSemanticSearch",
+        batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        max_attempts: Optional[int] = None
+    ):
+        self.search = search
+        self.batch_size = batch_size or int(os.getenv("CONVERSATION_INDEX_BATCH_SIZE", "64"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None
+                         else float(os.getenv("CONVERSATION_INDEX_MAX_WAIT_MS", "250"))) / 1000.0
+        self.max_pending = max_pending or int(os.getenv("CONVERSATION_INDEX_MAX_PENDING", "5000"))
+        self.max_attempts = max_attempts or int(os.getenv("CONVERSATION_INDEX_MAX_ATTEMPTS", "5"))
+        # How long a deleted conversation is remembered; must outlast a batch's retries
+        self.tombstone_ttl = float(os.getenv("CONVERSATION_INDEX_TOMBSTONE_TTL_SECONDS", "600"))
+
+        self._pending: Deque[_IndexItem] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._backoff = 0.0
+        # conversation_id -> monotonic time it was deleted; messages enqueued
+        # before then are never (re)indexed, even if already popped for a batch
+        self._discarded: Dict[str, float] = {}
+
+        # Metrics
+        self.lag_histogram = Histogram(INDEX_LAG_BUCKETS)
+        self.enqueued_total = 0
+        self.indexed_total = 0
+        self.batches_total = 0
+        self.failures_total = 0
+        self.retried_total = 0
+        self.dropped_total = 0
+        self.last_indexed_at: Optional[str] = None
+
+    def enqueue(self, doc_id: str, document: str, metadata: Dict[str, Any]) -> bool:
+        """Queue a message for indexing (never blocks)"""
+        if self._closing:
+            return False
+        if len(self._pending) >= self.max_pending:
+            self._pending.popleft()
+            self.dropped_total += 1
+        self._pending.append(_IndexItem(doc_id, document, metadata))
+        self.enqueued_total += 1
+        self._ensure_worker()
+        self._wakeup.set()
+        return True
+
+    def discard_conversation(self, conversation_id: str) -> int:
+        """Drop queued messages of a deleted conversation
+
+        The conversation is also tombstoned for tombstone_ttl seconds so a batch
+        already taken off the queue (in flight or waiting to be retried) skips
+        its messages, or removes them again if its upsert raced the delete.
+        """
+        self._prune_tombstones()
+        self._discarded[conversation_id] = time.monotonic()
+        kept = [item for item in self._pending if item.metadata.get("conversation_id") != conversation_id]
+        removed = len(self._pending) - len(kept)
+        self._pending = deque(kept)
+        return removed
+
+    def _is_discarded(self, item: _IndexItem) -> bool:
+        discarded_at = self._discarded.get(item.metadata.get("conversation_id"))
+        return discarded_at is not None and item.enqueued_at <= discarded_at
+
+    def _prune_tombstones(self):
+        cutoff = time.monotonic() - self.tombstone_ttl
+        for conversation_id in [c for c, at in self._discarded.items() if at < cutoff]:
+            del self._discarded[conversation_id]
+
+    async def drain(self, timeout: float = 10.0):
+        """Stop accepting messages and index what is queued (used on shutdown)"""
+        self._closing = True
+        if not self._task or self._task.done():
+            return
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning(f"Conversation index queue drain timed out, {len(self._pending)} messages not indexed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        try:
+            oldest = self._pending[0].enqueued_at
+        except IndexError:
+            oldest = None
+        return {
+            "running": bool(self._task and not self._task.done()),
+            "pending": len(self._pending),
+            "discarded_conversations": len(self._discarded),
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            # How far semantic search trails live chat right now
+            "lag_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            "retry_backoff_seconds": self._backoff,
+            "enqueued_total": self.enqueued_total,
+            "indexed_total": self.indexed_total,
+            "batches_total": self.batches_total,
+            "failures_total": self.failures_total,
+            "retried_total": self.retried_total,
+            "dropped_total": self.dropped_total,
+            "last_indexed_at": self.last_indexed_at,
+            "index_lag_seconds": self.lag_histogram.snapshot()
+        }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._task and not self._task.done():
+            return
+        self._wakeup = self._wakeup or asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while self._pending or not self._closing:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Let the batch fill until max_wait after its oldest message arrived
+            deadline = self._pending[0].enqueued_at + self.max_wait
+            while len(self._pending) < self.batch_size and not self._closing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            if await self._flush(batch):
+                self._backoff = 0.0
+                continue
+
+            self._requeue(batch)
+            if self._closing:
+                logger.warning(f"Dropping {len(self._pending)} unindexed messages on shutdown")
+                self.dropped_total += len(self._pending)
+                self._pending.clear()
+                return
+            self._backoff = min(30.0, max(0.5, self._backoff * 2))
+            await asyncio.sleep(self._backoff)
+
+    async def _flush(self, batch: List[_IndexItem]) -> bool:
+        if self._discarded:
+            self._prune_tombstones()
+            batch = [item for item in batch if not self._is_discarded(item)]
+            if not batch:
+                return True
+        # ChromaDB rejects duplicate ids within one upsert; the last write wins
+        items = list({item.doc_id: item for item in batch}.values())
+        try:
+            embeddings = await get_embedding_batcher().embed_async([item.document for item in items])
+            await asyncio.to_thread(
+                self.search.collection.upsert,
+                documents=[item.document for item in items],
+                embeddings=embeddings,
+                metadatas=[item.metadata for item in items],
+                ids=[item.doc_id for item in items]
+            )
+        except Exception as e:
+            self.failures_total += 1
+            logger.warning(f"Failed to index batch of {len(items)} conversation messages: {e}")
+            return False
+
+        # The conversation may have been deleted while this batch was being written
+        raced = [item.doc_id for item in items if self._is_discarded(item)]
+        if raced:
+            try:
+                await asyncio.to_thread(self.search.collection.delete, ids=raced)
+            except Exception as e:
+                logger.warning(f"Failed to remove {len(raced)} messages of deleted conversations: {e}")
+
+        now = time.monotonic()
+        for item in batch:
+            self.lag_histogram.observe(now - item.enqueued_at)
+        self.indexed_total += len(items)
+        self.batches_total += 1
+        self.last_indexed_at = datetime.now().isoformat()
+        logger.debug(f"Indexed {len(items)} conversation messages")
+        return True
+
+    def _requeue(self, batch: List[_IndexItem]):
+        retry = []
+        for item in batch:
+            if self._is_discarded(item):
+                continue
+            item.attempts += 1
+            if item.attempts < self.max_attempts:
+                retry.append(item)
+            else:
+                self.dropped_total += 1
+        self.retried_total += len(retry)
+        self._pending.extendleft(reversed(retry))
+        while len(self._pending) > self.max_pending:
+            self._pending.popleft()
+            self.dropped_total += 1
+
 
 class ConversationSemanticSearch:
     """Semantic search for conversation history using ChromaDB.
@@ -55,6 +295,7 @@ class ConversationSemanticSearch:
         self.enabled = False
         self.client = None
         self.collection = None
+        self.index_queue = ConversationIndexQueue(self)
 
         if not CHROMADB_AVAILABLE:
             logger.warning("ChromaDB not installed - semantic search disabled")
@@ -131,7 +372,7 @@ class ConversationSemanticSearch:
             metadata: Additional metadata
 
         Returns:
-            True if indexed successfully
+            True if queued for indexing
         """
         if not self.enabled or not self.collection:
             return False
@@ -140,37 +381,29 @@ class ConversationSemanticSearch:
         if len(content.strip()) < 10:
             return True  # Not an error, just skip
 
-        try:
-            ts = timestamp or datetime.now().isoformat()
-            doc_id = self._generate_id(conversation_id, content, ts)
-
-            # Build metadata
-            msg_metadata = {
-                "conversation_id": conversation_id,
-                "user_id": user_id,
-                "role": role,
-                "timestamp": ts,
-                "content_length": len(content),
-            }
-            if metadata:
-                msg_metadata.update(metadata)
+        ts = timestamp or datetime.now().isoformat()
+        doc_id = self._generate_id(conversation_id, content, ts)
 
-            # Truncate very long messages for indexing
-            index_content = content[:2000] if len(content) > 2000 else content
+        # Build metadata
+        msg_metadata = {
+            "conversation_id": conversation_id,
+            "user_id": user_id,
+            "role": role,
+            "timestamp": ts,
+            "content_length": len(content),
+        }
+        if metadata:
+            msg_metadata.update(metadata)
 
-            # Add to collection (upsert to handle duplicates)
-            self.collection.upsert(
-                documents=[index_content],
-                metadatas=[msg_metadata],
-                ids=[doc_id]
-            )
+        # Truncate very long messages for indexing
+        index_content = content[:2000] if len(content) > 2000 else content
 
-            logger.debug(f"Indexed message {doc_id[:8]} for conversation {conversation_id[:8]}")
-            return True
+        # Embedded and upserted with other messages by the index queue
+        return self.index_queue.enqueue(doc_id, index_content, msg_metadata)
 
-        except Exception as e:
-            logger.error(f"Failed to index message: {e}")
-            return False
+    async def drain_index_queue(self, timeout: float = 10.0):
+        """Index queued messages before shutdown."""
+        await self.index_queue.drain(timeout)
 
     async def search_conversation(
         self,
@@ -194,8 +427,10 @@ class ConversationSemanticSearch:
             return []
 
         try:
-            results = self.collection.query(
-                query_texts=[query],
+            query_embeddings = await get_embedding_batcher().embed_async([query])
+            results = await asyncio.to_thread(
+                self.collection.query,
+                query_embeddings=query_embeddings,
                 n_results=n_results,
                 where={"conversation_id": conversation_id}
             )
@@ -248,8 +483,10 @@ class ConversationSemanticSearch:
             return []
 
         try:
-            results = self.collection.query(
-                query_texts=[query],
+            query_embeddings = await get_embedding_batcher().embed_async([query])
+            results = await asyncio.to_thread(
+                self.collection.query,
+                query_embeddings=query_embeddings,
                 n_results=n_results,
                 where={"user_id": user_id}
             )
@@ -289,6 +526,7 @@ class ConversationSemanticSearch:
             return False
 
         try:
+            self.index_queue.discard_conversation(conversation_id)
             self.collection.delete(
                 where={"conversation_id": conversation_id}
             )
@@ -308,10 +546,11 @@ class ConversationSemanticSearch:
             return {
                 "enabled": True,
                 "collection": self.COLLECTION_NAME,
-                "indexed_messages": count
+                "indexed_messages": count,
+                "index_queue": self.index_queue.get_stats()
             }
         except Exception as e:
-            return {"enabled": True, "error": str(e)}
+            return {"enabled": True, "error": str(e), "index_queue": self.index_queue.get_stats()}
 
 
 # Global instance
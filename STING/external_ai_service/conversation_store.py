@@ -18,12 +18,12 @@ import logging
 import asyncio
 import hashlib
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
 from uuid import UUID, uuid4
 
 import asyncpg
-import redis
+import redis.asyncio as aioredis
 
 logger = logging.getLogger(__name__)
 
@@ -79,9 +79,14 @@ class ConversationStore(ABC):
         self,
         conversation_id: str,
         limit: int = 20,
-        before: Optional[datetime] = None
+        before: Optional[datetime] = None,
+        before_id: Optional[str] = None
     ) -> List[Dict]:
-        """Get messages from a conversation, ordered by time descending."""
+        """Get messages from a conversation, ordered by time ascending.
+
+        before/before_id is a keyset cursor (the timestamp and id of the
+        oldest message already loaded) for paging further back.
+        """
         pass
 
     @abstractmethod
@@ -109,18 +114,68 @@ class ConversationStore(ABC):
         pass
 
 
+# Append a message to a cached tail, if the conversation is cached at all.
+# KEYS: tail list, complete marker, version; ARGV: message json, max size, ttl
+TAIL_APPEND_LUA = """
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+local has_tail = redis.call('EXISTS', KEYS[1]) == 1
+local complete = redis.call('EXISTS', KEYS[2]) == 1
+if not has_tail and not complete then
+  return 0
+end
+local size = redis.call('RPUSH', KEYS[1], ARGV[1])
+if size > tonumber(ARGV[2]) then
+  redis.call('LTRIM', KEYS[1], -tonumber(ARGV[2]), -1)
+  redis.call('DEL', KEYS[2])
+  complete = false
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+if complete then
+  redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+return 1
+"""
+
+# Replace a cached tail with rows read from PostgreSQL, unless a write
+# happened since the read started (the version moved).
+# KEYS: tail list, complete marker, version; ARGV: expected version, ttl, complete flag, messages...
+TAIL_POPULATE_LUA = """
+if (redis.call('GET', KEYS[3]) or '0') ~= ARGV[1] then
+  return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+if #ARGV > 3 then
+  redis.call('RPUSH', KEYS[1], unpack(ARGV, 4))
+  redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+if ARGV[3] == '1' then
+  redis.call('SET', KEYS[2], '1', 'EX', ARGV[2])
+end
+return 1
+"""
+
+
 class PostgresConversationStore(ConversationStore):
     """
     PostgreSQL-backed conversation store with Redis caching.
 
     Architecture:
     - PostgreSQL: Source of truth, persistent storage
-    - Redis: Hot cache for recent conversations (24h TTL)
+    - Redis: Write-through tail cache of the most recent messages (24h TTL)
+
+    The tail cache holds the last TAIL_SIZE messages of a conversation in
+    chronological order. add_message appends to it, edits and deletes
+    invalidate it, and a per-conversation version counter keeps a read that
+    raced with a write from caching stale rows. A "complete" marker records
+    that the tail is the whole conversation, so short conversations are
+    served from Redis even when fewer messages exist than were asked for.
+    Reads beyond the tail continue in PostgreSQL with a keyset cursor.
 
     Connection pooling and async operations for performance.
     """
 
-    REDIS_PREFIX = "bee:conversation:"
+    REDIS_PREFIX = "bee:conversation:tail:"
     REDIS_TTL = 86400  # 24 hours
 
     def __init__(
@@ -151,88 +206,149 @@ class PostgresConversationStore(ConversationStore):
         self._pg_pool: Optional[asyncpg.Pool] = None
 
         # Redis connection
-        self._redis: Optional[redis.Redis] = None
+        self._redis: Optional[aioredis.Redis] = None
         self._redis_host = redis_host or os.getenv("REDIS_HOST", "redis")
         self._redis_port = redis_port or int(os.getenv("REDIS_PORT", 6379))
+        self.tail_size = int(os.getenv("BEE_CONVERSATION_TAIL_SIZE", "50"))
+
+        # Cache statistics (hits include partial hits completed from PostgreSQL)
+        self.cache_hits = 0
+        self.cache_partial_hits = 0
+        self.cache_misses = 0
 
         self._initialized = False
+        self._init_lock = asyncio.Lock()
 
     async def _ensure_initialized(self):
         """Ensure connections are established."""
         if self._initialized:
             return
 
-        # Initialize PostgreSQL connection pool
+        async with self._init_lock:
+            if self._initialized:
+                return
+
+            # Initialize PostgreSQL connection pool
+            try:
+                self._pg_pool = await asyncpg.create_pool(
+                    self.pg_dsn,
+                    min_size=2,
+                    max_size=10,
+                    command_timeout=30
+                )
+                logger.info("✅ PostgreSQL conversation store connected")
+            except Exception as e:
+                logger.error(f"❌ Failed to connect to PostgreSQL: {e}")
+                raise
+
+            # Initialize Redis connection
+            try:
+                self._redis = aioredis.Redis(
+                    host=self._redis_host,
+                    port=self._redis_port,
+                    decode_responses=True,
+                    socket_connect_timeout=5
+                )
+                await self._redis.ping()
+                self._append_script = self._redis.register_script(TAIL_APPEND_LUA)
+                self._populate_script = self._redis.register_script(TAIL_POPULATE_LUA)
+                logger.info("✅ Redis tail cache connected for conversation store")
+            except Exception as e:
+                logger.warning(f"⚠️ Redis not available, running without cache: {e}")
+                self._redis = None
+
+            self._initialized = True
+
+    def _cache_keys(self, conversation_id: str) -> List[str]:
+        """Redis keys for a conversation: tail list, complete marker, version."""
+        base = f"{self.REDIS_PREFIX}{conversation_id}"
+        return [base, f"{base}:complete", f"{base}:version"]
+
+    @staticmethod
+    def _encode_message(message: Dict) -> str:
+        return json.dumps(message, default=str)
+
+    async def _append_to_tail(self, conversation_id: str, message: Dict):
+        """Append a newly stored message to the cached tail (no-op if not cached)."""
+        if not self._redis:
+            return
         try:
-            self._pg_pool = await asyncpg.create_pool(
-                self.pg_dsn,
-                min_size=2,
-                max_size=10,
-                command_timeout=30
+            await self._append_script(
+                keys=self._cache_keys(conversation_id),
+                args=[self._encode_message(message), self.tail_size, self.REDIS_TTL]
             )
-            logger.info("✅ PostgreSQL conversation store connected")
         except Exception as e:
-            logger.error(f"❌ Failed to connect to PostgreSQL: {e}")
-            raise
+            logger.warning(f"Failed to append to conversation tail cache: {e}")
+            await self._invalidate_cache(conversation_id)
 
-        # Initialize Redis connection
+    async def _get_cache_version(self, conversation_id: str) -> Optional[str]:
+        """Read the version before querying PostgreSQL (None = don't populate)."""
+        if not self._redis:
+            return None
         try:
-            self._redis = redis.Redis(
-                host=self._redis_host,
-                port=self._redis_port,
-                decode_responses=True,
-                socket_connect_timeout=5
-            )
-            self._redis.ping()
-            logger.info("✅ Redis cache connected for conversation store")
+            return await self._redis.get(self._cache_keys(conversation_id)[2]) or "0"
         except Exception as e:
-            logger.warning(f"⚠️ Redis not available, running without cache: {e}")
-            self._redis = None
-
-        self._initialized = True
-
-    def _cache_key(self, conversation_id: str) -> str:
-        """Generate Redis cache key for a conversation."""
-        return f"{self.REDIS_PREFIX}{conversation_id}"
+            logger.warning(f"Failed to read conversation cache version: {e}")
+            return None
 
-    async def _cache_messages(self, conversation_id: str, messages: List[Dict]):
-        """Cache messages in Redis."""
-        if not self._redis:
-            return
+    async def _populate_tail(self, conversation_id: str, messages: List[Dict], complete: bool, version: str):
+        """Cache the newest messages read from PostgreSQL."""
         try:
-            key = self._cache_key(conversation_id)
-            # Store as list of JSON strings (most recent first)
-            pipe = self._redis.pipeline()
-            pipe.delete(key)
-            for msg in messages:
-                pipe.rpush(key, json.dumps(msg, default=str))
-            pipe.expire(key, self.REDIS_TTL)
-            pipe.execute()
+            await self._populate_script(
+                keys=self._cache_keys(conversation_id),
+                args=[version, self.REDIS_TTL, "1" if complete else "0",
+                      *(self._encode_message(m) for m in messages[-self.tail_size:])]
+            )
         except Exception as e:
-            logger.warning(f"Failed to cache messages: {e}")
+            logger.warning(f"Failed to cache conversation tail: {e}")
+
+    async def _get_cached_tail(self, conversation_id: str, limit: int):
+        """
+        Read up to `limit` newest messages from the tail cache.
 
-    async def _get_cached_messages(self, conversation_id: str, limit: int) -> Optional[List[Dict]]:
-        """Get messages from Redis cache."""
+        Returns (messages, complete) or (None, False) on a miss.
+        """
         if not self._redis:
-            return None
+            return None, False
         try:
-            key = self._cache_key(conversation_id)
-            cached = self._redis.lrange(key, 0, limit - 1)
-            if cached:
-                return [json.loads(msg) for msg in cached]
+            tail_key, complete_key, _ = self._cache_keys(conversation_id)
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.lrange(tail_key, -limit, -1)
+            pipe.exists(complete_key)
+            cached, complete = await pipe.execute()
+            if not cached and not complete:
+                return None, False
+            return [json.loads(msg) for msg in cached], bool(complete)
         except Exception as e:
             logger.warning(f"Failed to get cached messages: {e}")
-        return None
+            return None, False
 
     async def _invalidate_cache(self, conversation_id: str):
-        """Invalidate Redis cache for a conversation."""
+        """Invalidate the tail cache (and bump its version) for a conversation."""
         if not self._redis:
             return
         try:
-            self._redis.delete(self._cache_key(conversation_id))
+            tail_key, complete_key, version_key = self._cache_keys(conversation_id)
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.delete(tail_key, complete_key)
+            pipe.incr(version_key)
+            pipe.expire(version_key, self.REDIS_TTL)
+            await pipe.execute()
         except Exception as e:
             logger.warning(f"Failed to invalidate cache: {e}")
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Tail cache hit statistics."""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "enabled": self._redis is not None,
+            "tail_size": self.tail_size,
+            "hits": self.cache_hits,
+            "partial_hits": self.cache_partial_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / total, 3) if total else 0.0
+        }
+
     async def create_conversation(
         self,
         user_id: str,
@@ -330,10 +446,11 @@ class PostgresConversationStore(ConversationStore):
             metadata_json = json.dumps(metadata or {})
 
             async with self._pg_pool.acquire() as conn:
-                await conn.execute(
+                row = await conn.fetchrow(
                     """
                     INSERT INTO messages (conversation_id, role, content, metadata)
                     VALUES ($1, $2, $3, $4)
+                    RETURNING id, created_at
                     """,
                     conv_uuid,
                     role,
@@ -341,8 +458,14 @@ class PostgresConversationStore(ConversationStore):
                     metadata_json
                 )
 
-            # Invalidate cache so next read gets fresh data
-            await self._invalidate_cache(conversation_id)
+            # Write through to the cached tail (same shape as get_messages rows)
+            await self._append_to_tail(conversation_id, self._message_from_row({
+                "id": row["id"],
+                "role": role,
+                "content": content,
+                "metadata": metadata_json,
+                "created_at": row["created_at"]
+            }))
 
             logger.debug(f"Added {role} message to conversation {conversation_id[:8]}")
             return True
@@ -355,31 +478,94 @@ class PostgresConversationStore(ConversationStore):
         self,
         conversation_id: str,
         limit: int = 20,
-        before: Optional[datetime] = None
+        before: Optional[datetime] = None,
+        before_id: Optional[str] = None
     ) -> List[Dict]:
         """Get messages from a conversation, ordered by time ascending."""
+        messages, _ = await self.get_messages_with_source(conversation_id, limit, before, before_id)
+        return messages
+
+    async def get_messages_with_source(
+        self,
+        conversation_id: str,
+        limit: int = 20,
+        before: Optional[datetime] = None,
+        before_id: Optional[str] = None
+    ) -> Tuple[List[Dict], str]:
+        """
+        Get messages plus where they came from.
+
+        Returns:
+            Tuple of (messages, source) where source is "cache", "cache+postgres"
+            (tail from Redis, older messages from PostgreSQL) or "postgres"
+        """
         await self._ensure_initialized()
 
-        # Convert conversation_id to UUID for lookup
-        conv_uuid = string_to_uuid(conversation_id)
+        # Paging further back than the caller's cursor always reads PostgreSQL
+        if before:
+            return await self._fetch_messages(conversation_id, limit, before, before_id), "postgres"
+
+        cached, complete = await self._get_cached_tail(conversation_id, limit)
+        if cached is not None and (len(cached) >= limit or complete):
+            self.cache_hits += 1
+            logger.debug(f"📜 Tail cache hit for {conversation_id[:8]}: {len(cached)} messages")
+            return cached, "cache"
+
+        if cached:
+            # More requested than the tail holds: continue from its oldest message
+            self.cache_hits += 1
+            self.cache_partial_hits += 1
+            oldest = cached[0]
+            older = await self._fetch_messages(
+                conversation_id,
+                limit - len(cached),
+                datetime.fromisoformat(oldest["timestamp"]),
+                oldest["id"]
+            )
+            return older + cached, "cache+postgres"
+
+        self.cache_misses += 1
+        version = await self._get_cache_version(conversation_id)
+        fetch_limit = max(limit, self.tail_size)
+        messages = await self._fetch_messages(conversation_id, fetch_limit)
+        if version is not None:
+            await self._populate_tail(conversation_id, messages, len(messages) < fetch_limit, version)
 
-        # Skip Redis cache for now - PostgreSQL is source of truth
-        # TODO: Fix cache population to include all messages, not just latest
-        # if not before:
-        #     cached = await self._get_cached_messages(conversation_id, limit)
-        #     if cached:
-        #         logger.info(f"📜 Cache hit for conversation {conversation_id[:8]}: {len(cached)} messages")
-        #         return cached
+        logger.debug(f"Loaded {len(messages)} messages from PostgreSQL for {conversation_id[:8]}")
+        return messages[-limit:] if limit > 0 else [], "postgres"
+
+    async def _fetch_messages(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[datetime] = None,
+        before_id: Optional[str] = None
+    ) -> List[Dict]:
+        """Read the newest `limit` messages (before the keyset cursor) from PostgreSQL."""
+        conv_uuid = string_to_uuid(conversation_id)
 
-        # Query PostgreSQL
         async with self._pg_pool.acquire() as conn:
-            if before:
+            if before and before_id:
+                rows = await conn.fetch(
+                    """
+                    SELECT id, role, content, metadata, created_at
+                    FROM messages
+                    WHERE conversation_id = $1 AND (created_at, id) < ($2, $3) AND deleted_at IS NULL
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT $4
+                    """,
+                    conv_uuid,
+                    before,
+                    UUID(before_id),
+                    limit
+                )
+            elif before:
                 rows = await conn.fetch(
                     """
                     SELECT id, role, content, metadata, created_at
                     FROM messages
                     WHERE conversation_id = $1 AND created_at < $2 AND deleted_at IS NULL
-                    ORDER BY created_at DESC
+                    ORDER BY created_at DESC, id DESC
                     LIMIT $3
                     """,
                     conv_uuid,
@@ -392,29 +578,85 @@ class PostgresConversationStore(ConversationStore):
                     SELECT id, role, content, metadata, created_at
                     FROM messages
                     WHERE conversation_id = $1 AND deleted_at IS NULL
-                    ORDER BY created_at DESC
+                    ORDER BY created_at DESC, id DESC
                     LIMIT $2
                     """,
                     conv_uuid,
                     limit
                 )
 
-        messages = []
-        for row in reversed(rows):  # Reverse to get chronological order
-            messages.append({
-                "id": str(row["id"]),
-                "role": row["role"],
-                "content": row["content"],
-                "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
-                "timestamp": row["created_at"].isoformat() if row["created_at"] else None,
-            })
+        # Reverse to get chronological order
+        return [self._message_from_row(row) for row in reversed(rows)]
+
+    @staticmethod
+    def _message_from_row(row) -> Dict:
+        return {
+            "id": str(row["id"]),
+            "role": row["role"],
+            "content": row["content"],
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+            "timestamp": row["created_at"].isoformat() if row["created_at"] else None,
+        }
+
+    async def update_message(
+        self,
+        conversation_id: str,
+        message_id: str,
+        content: Optional[str] = None,
+        metadata: Optional[Dict] = None
+    ) -> bool:
+        """Edit a message's content and/or metadata."""
+        await self._ensure_initialized()
 
-        # Cache the result
-        if not before and messages:
-            await self._cache_messages(conversation_id, messages)
+        if content is None and metadata is None:
+            return False
 
-        logger.debug(f"Loaded {len(messages)} messages from PostgreSQL for {conversation_id[:8]}")
-        return messages
+        try:
+            async with self._pg_pool.acquire() as conn:
+                result = await conn.execute(
+                    """
+                    UPDATE messages
+                    SET content = COALESCE($3, content),
+                        metadata = COALESCE($4::jsonb, metadata)
+                    WHERE id = $1 AND conversation_id = $2 AND deleted_at IS NULL
+                    """,
+                    UUID(message_id),
+                    string_to_uuid(conversation_id),
+                    content,
+                    json.dumps(metadata) if metadata is not None else None
+                )
+            await self._invalidate_cache(conversation_id)
+            return result != "UPDATE 0"
+        except Exception as e:
+            logger.error(f"Failed to update message: {e}")
+            return False
+
+    async def delete_message(self, conversation_id: str, message_id: str, hard: bool = False) -> bool:
+        """Delete a message (soft delete by default)."""
+        await self._ensure_initialized()
+
+        try:
+            async with self._pg_pool.acquire() as conn:
+                if hard:
+                    result = await conn.execute(
+                        "DELETE FROM messages WHERE id = $1 AND conversation_id = $2",
+                        UUID(message_id),
+                        string_to_uuid(conversation_id)
+                    )
+                else:
+                    result = await conn.execute(
+                        """
+                        UPDATE messages SET deleted_at = NOW()
+                        WHERE id = $1 AND conversation_id = $2 AND deleted_at IS NULL
+                        """,
+                        UUID(message_id),
+                        string_to_uuid(conversation_id)
+                    )
+            await self._invalidate_cache(conversation_id)
+            return not result.endswith(" 0")
+        except Exception as e:
+            logger.error(f"Failed to delete message: {e}")
+            return False
 
     async def list_conversations(
         self,
@@ -526,7 +768,7 @@ class PostgresConversationStore(ConversationStore):
         if self._pg_pool:
             await self._pg_pool.close()
         if self._redis:
-            self._redis.close()
+            await self._redis.aclose()
 
 
 # Global instance
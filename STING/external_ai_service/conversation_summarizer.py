@@ -10,7 +10,7 @@ import os
 import redis
 import json
 import hashlib
-from typing import List, Dict, Optional, Any, Callable
+from typing import List, Dict, Optional, Any, Callable, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -23,6 +23,9 @@ class ConversationSummarizer:
     Features:
     - Direct LLM inference (no HTTP calls when running in external-ai)
     - Redis caching for summaries (24h TTL)
+    - Rolling summaries: the last summary plus a high-water mark per
+      conversation, folding in only newly aged-out messages (in the
+      background, after the response is sent)
     - Fallback to keyword extraction if LLM unavailable
     """
 
@@ -30,6 +33,10 @@ class ConversationSummarizer:
     SUMMARY_CACHE_PREFIX = "bee:summary:"
     SUMMARY_CACHE_TTL = 86400  # 24 hours
 
+    # Rolling summary state: {"summary": {...}, "covered_until": ts, "covered_key": fingerprint}
+    ROLLING_CACHE_PREFIX = "bee:summary:rolling:"
+    MAX_LOCAL_ROLLING_STATES = 1000  # In-memory fallback when Redis is unavailable
+
     def __init__(self,
                  model: str = None,
                  max_summary_tokens: int = 200,
@@ -48,6 +55,14 @@ class ConversationSummarizer:
         self.max_summary_tokens = max_summary_tokens
         self.llm_generate_fn = llm_generate_fn  # Set via set_llm_generator()
 
+        # Rolling mode (default) keeps one summary per conversation and folds new
+        # messages in batches; "full" re-summarizes everything aged out each turn
+        self.mode = os.getenv('BEE_CONVERSATION_SUMMARY_MODE', 'rolling').lower()
+        self.rolling_batch_size = int(os.getenv('BEE_CONVERSATION_SUMMARY_BATCH', '4'))
+        self._local_rolling: Dict[str, Dict[str, Any]] = {}
+        self._pending_rolling: Dict[str, List[Dict[str, Any]]] = {}
+        self._rolling_in_progress = set()
+
         # Initialize Redis for caching
         self.redis = redis_client
         if not self.redis:
@@ -152,18 +167,7 @@ class ConversationSummarizer:
         """
         Build a prompt for the LLM to summarize messages.
         """
-        # Format messages for summarization
-        conversation_text = ""
-        for msg in messages:
-            role = msg.get('role', 'user').capitalize()
-            content = msg.get('content', '')
-            timestamp = msg.get('timestamp', '')
-            
-            # Truncate very long messages
-            if len(content) > 500:
-                content = content[:500] + "..."
-            
-            conversation_text += f"{role}: {content}\n"
+        conversation_text = self._format_messages(messages)
         
         # Build the summarization prompt
         prompt = f"""You are a helpful assistant tasked with summarizing conversations.
@@ -191,6 +195,61 @@ Please provide the summary in the following JSON format:
 Summary:"""
         
         return prompt
+
+    def _build_rolling_prompt(
+        self,
+        previous: Dict[str, Any],
+        messages: List[Dict[str, Any]]
+    ) -> str:
+        """
+        Build a prompt that folds new messages into an existing summary.
+        """
+        previous_text = previous.get("summary", "")
+        if previous.get("topics"):
+            previous_text += f"\nTopics: {', '.join(previous['topics'])}"
+        if previous.get("key_points"):
+            previous_text += f"\nKey points: {'; '.join(previous['key_points'])}"
+        if previous.get("action_items"):
+            previous_text += f"\nAction items: {'; '.join(previous['action_items'])}"
+
+        return f"""You are a helpful assistant maintaining a running summary of a conversation.
+Update the existing summary with the new messages that follow it.
+
+Instructions:
+1. Keep the updated summary brief (max {self.max_summary_tokens} tokens)
+2. Preserve earlier points that still matter; drop details that were superseded
+3. Update the topics, entities, key points and action items
+
+Existing summary:
+{previous_text}
+
+Conversation to summarize:
+{self._format_messages(messages)}
+Please provide the summary in the following JSON format:
+{{
+    "summary": "Updated summary of the whole conversation so far",
+    "topics": ["topic1", "topic2"],
+    "entities": ["entity1", "entity2"],
+    "key_points": ["point1", "point2"],
+    "action_items": ["action1", "action2"]
+}}
+
+Summary:"""
+
+    @staticmethod
+    def _format_messages(messages: List[Dict[str, Any]]) -> str:
+        """Format messages as "Role: content" lines for a prompt."""
+        conversation_text = ""
+        for msg in messages:
+            role = msg.get('role', 'user').capitalize()
+            content = msg.get('content', '')
+            
+            # Truncate very long messages
+            if len(content) > 500:
+                content = content[:500] + "..."
+            
+            conversation_text += f"{role}: {content}\n"
+        return conversation_text
     
     async def _generate_summary(self, prompt: str) -> str:
         """
@@ -327,6 +386,131 @@ Summary:"""
         
         return list(topics)[:5]  # Limit to 5 topics
     
+    # ------------------------------------------------------------------
+    # Rolling summaries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _message_key(msg: Dict[str, Any]) -> str:
+        """Stable fingerprint for a message (store id when available)."""
+        if msg.get('id'):
+            return str(msg['id'])
+        raw = f"{msg.get('timestamp', '')}|{msg.get('role', '')}|{msg.get('content', '')}"
+        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+    def _get_rolling_state(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load the rolling summary state for a conversation."""
+        if self.redis:
+            try:
+                cached = self.redis.get(f"{self.ROLLING_CACHE_PREFIX}{conversation_id}")
+                return json.loads(cached) if cached else None
+            except Exception as e:
+                logger.warning(f"Failed to get rolling summary: {e}")
+        return self._local_rolling.get(conversation_id)
+
+    def _save_rolling_state(self, conversation_id: str, state: Dict[str, Any]):
+        """Persist the rolling summary state for a conversation."""
+        if self.redis:
+            try:
+                self.redis.setex(f"{self.ROLLING_CACHE_PREFIX}{conversation_id}",
+                                 self.SUMMARY_CACHE_TTL, json.dumps(state))
+                return
+            except Exception as e:
+                logger.warning(f"Failed to cache rolling summary: {e}")
+        if len(self._local_rolling) >= self.MAX_LOCAL_ROLLING_STATES:
+            self._local_rolling.pop(next(iter(self._local_rolling)))
+        self._local_rolling[conversation_id] = state
+
+    def _split_uncovered(
+        self,
+        state: Optional[Dict[str, Any]],
+        messages: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Return the messages after the state's high-water mark."""
+        if not state:
+            return messages
+        covered_key = state.get('covered_key')
+        for i in range(len(messages) - 1, -1, -1):
+            if self._message_key(messages[i]) == covered_key:
+                return messages[i + 1:]
+        # Mark no longer in the loaded window: fall back to timestamps
+        covered_until = state.get('covered_until')
+        if covered_until:
+            return [m for m in messages if (m.get('timestamp') or '') > covered_until]
+        return messages
+
+    def get_rolling_summary(
+        self,
+        conversation_id: str,
+        aged_out: List[Dict[str, Any]]
+    ) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Get the rolling summary for messages that aged out of the recent window.
+
+        Never calls the LLM. Messages not yet folded into the summary are
+        returned so the caller can keep them verbatim until the next update.
+
+        Returns:
+            Tuple of (summary or None, uncovered messages)
+        """
+        state = self._get_rolling_state(conversation_id)
+        return (state or {}).get('summary'), self._split_uncovered(state, aged_out)
+
+    def schedule_rolling_update(self, conversation_id: str, aged_out: List[Dict[str, Any]]):
+        """Remember aged-out messages to fold in by run_pending_update()."""
+        self._pending_rolling.pop(conversation_id, None)
+        if len(self._pending_rolling) >= self.MAX_LOCAL_ROLLING_STATES:
+            self._pending_rolling.pop(next(iter(self._pending_rolling)))
+        self._pending_rolling[conversation_id] = aged_out
+
+    async def run_pending_update(self, conversation_id: str):
+        """Fold scheduled messages into the rolling summary (run after the response is sent)."""
+        messages = self._pending_rolling.pop(conversation_id, None)
+        if not messages or conversation_id in self._rolling_in_progress:
+            return
+        self._rolling_in_progress.add(conversation_id)
+        try:
+            await self.update_rolling_summary(conversation_id, messages)
+        except Exception as e:
+            logger.warning(f"Rolling summary update failed for {conversation_id[:8]}: {e}")
+        finally:
+            self._rolling_in_progress.discard(conversation_id)
+
+    async def update_rolling_summary(
+        self,
+        conversation_id: str,
+        aged_out: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fold newly aged-out messages into the conversation's rolling summary.
+
+        The first summary is created as soon as messages age out; after that
+        the LLM is only called once rolling_batch_size new messages are waiting.
+        """
+        state = self._get_rolling_state(conversation_id)
+        previous = (state or {}).get('summary')
+        uncovered = self._split_uncovered(state, aged_out)
+        if not uncovered or (previous and len(uncovered) < self.rolling_batch_size):
+            return previous
+
+        if previous:
+            prompt = self._build_rolling_prompt(previous, uncovered)
+        else:
+            prompt = self._build_summarization_prompt(uncovered)
+        summary_data = self._parse_summary_response(await self._generate_summary(prompt), uncovered)
+        if previous:
+            summary_data["message_count"] = previous.get("message_count", 0) + len(uncovered)
+            summary_data["start_timestamp"] = previous.get("start_timestamp")
+
+        self._save_rolling_state(conversation_id, {
+            "summary": summary_data,
+            "covered_until": uncovered[-1].get("timestamp"),
+            "covered_key": self._message_key(uncovered[-1])
+        })
+        logger.info(f"📝 Folded {len(uncovered)} messages into rolling summary for {conversation_id[:8]} "
+                    f"({summary_data['message_count']} summarized)")
+        return summary_data
+
     async def summarize_for_pruning(
         self,
         conversation_id: str,
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Micro-batching Embedding Server for Bee
+
+Every chat turn indexes messages and every search embeds a query, and on CPU
+nodes the fixed per-call cost of the embedding model dominates when texts
+are encoded one at a time. EmbeddingBatcher collects concurrent requests for
+up to EMBEDDING_BATCH_MAX_WAIT_MS or EMBEDDING_BATCH_MAX_SIZE texts, runs a
+single batched encode and fans the vectors back out to each caller.
+
+Callers may be coroutines (ConversationSemanticSearch, /knowledge/embeddings)
+or worker threads (KnowledgeIndexer runs via asyncio.to_thread), so requests
+are handed to a dedicated encoder thread and answered through
+concurrent.futures.Future objects.
+
+The default model is ChromaDB's built-in embedding function, the same one
+ChromaDB collections use when given raw documents, so vectors computed here
+are interchangeable with ones ChromaDB computes itself.
+"""
+
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Histogram bucket upper bounds
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_WAIT_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Histogram:
+    """Minimal cumulative histogram (Prometheus bucket semantics)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+            else:
+                self.counts[-1] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative = {}
+            running = 0
+            for bound, count in zip(self.buckets, self.counts):
+                running += count
+                cumulative[str(bound)] = running
+            cumulative["+Inf"] = running + self.counts[-1]
+            return {
+                "buckets": cumulative,
+                "count": self.count,
+                "sum": round(self.sum, 3),
+                "avg": round(self.sum / self.count, 3) if self.count else 0.0
+            }
+
+
+class _PendingRequest:
+    __slots__ = ("texts", "future", "enqueued_at")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+def _default_embed_fn() -> Callable[[List[str]], List[List[float]]]:
+    """ChromaDB's default embedding function (ONNX MiniLM, 384 dimensions)"""
+    from chromadb.utils import embedding_functions
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+class EmbeddingBatcher:
+    """Collects concurrent embedding requests into batched encodes"""
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[List[str]], Any]] = None,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        model_name: str = DEFAULT_MODEL_NAME
+    ):
+        """
+        Args:
+            embed_fn: Callable mapping a list of texts to a list of vectors.
+                Defaults to ChromaDB's embedding function, loaded on first use.
+            max_batch_size: Texts per encode (default: EMBEDDING_BATCH_MAX_SIZE or 32)
+            max_wait_ms: How long the first request in a batch waits for
+                company (default: EMBEDDING_BATCH_MAX_WAIT_MS or 10)
+            model_name: Reported in responses and stats
+        """
+        self._embed_fn = embed_fn
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None
+                         else float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "10"))) / 1000.0
+        self.model_name = model_name
+
+        self._queue: "queue.Queue[Optional[_PendingRequest]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stopping = False
+
+        # Metrics
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_histogram = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self.requests_total = 0
+        self.texts_total = 0
+        self.batches_total = 0
+        self.errors_total = 0
+        self.encode_seconds_total = 0.0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """Queue texts for embedding; the future resolves to one vector per text"""
+        request = _PendingRequest(list(texts))
+        if not request.texts:
+            request.future.set_result([])
+            return request.future
+        if self._stopping:
+            request.future.set_exception(RuntimeError("Embedding batcher is shut down"))
+            return request.future
+
+        self._ensure_started()
+        self._queue.put(request)
+        return request.future
+
+    def embed(self, texts: Sequence[str], timeout: Optional[float] = None) -> List[List[float]]:
+        """Blocking embed for worker threads"""
+        return self.submit(texts).result(timeout=timeout)
+
+    async def embed_async(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed from a coroutine without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def stop(self, timeout: float = 10.0):
+        """Stop accepting requests, finish queued ones and join the encoder thread"""
+        self._stopping = True
+        if self._thread and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize(),
+            "requests_total": self.requests_total,
+            "texts_total": self.texts_total,
+            "batches_total": self.batches_total,
+            "errors_total": self.errors_total,
+            "avg_texts_per_batch": round(self.texts_total / self.batches_total, 2) if self.batches_total else 0.0,
+            "encode_seconds_total": round(self.encode_seconds_total, 3),
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_wait_ms": self.queue_wait_histogram.snapshot()
+        }
+
+    # ------------------------------------------------------------------
+    # Encoder thread
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+            logger.info(f"🧮 Embedding batcher started (max {self.max_batch_size} texts / "
+                        f"{self.max_wait * 1000:.0f}ms)")
+
+    def _collect_batch(self, first: _PendingRequest) -> Tuple[List[_PendingRequest], bool]:
+        """Gather requests until the batch is full or the first one has waited max_wait"""
+        batch = [first]
+        size = len(first.texts)
+        deadline = first.enqueued_at + self.max_wait
+        shutdown = False
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                shutdown = True
+                break
+            batch.append(request)
+            size += len(request.texts)
+
+        return batch, shutdown
+
+    def _run(self):
+        shutdown = False
+        while not shutdown or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=1.0) if not shutdown else self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            if first is None:
+                shutdown = True
+                continue
+
+            batch, hit_shutdown = self._collect_batch(first)
+            shutdown = shutdown or hit_shutdown
+            self._process(batch)
+
+        logger.info("Embedding batcher stopped")
+
+    def _process(self, batch: List[_PendingRequest]):
+        # Drop requests whose callers gave up; the rest can no longer be cancelled
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        started = time.monotonic()
+        texts: List[str] = []
+        for request in batch:
+            self.queue_wait_histogram.observe((started - request.enqueued_at) * 1000)
+            texts.extend(request.texts)
+
+        try:
+            if self._embed_fn is None:
+                self._embed_fn = _default_embed_fn()
+
+            vectors: List[List[float]] = []
+            # A single oversized request is still encoded in max_batch_size slices
+            for i in range(0, len(texts), self.max_batch_size):
+                chunk = texts[i:i + self.max_batch_size]
+                vectors.extend(self._to_list(v) for v in self._embed_fn(chunk))
+                self.batch_size_histogram.observe(len(chunk))
+                self.batches_total += 1
+        except Exception as e:
+            self.errors_total += 1
+            logger.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        finally:
+            self.encode_seconds_total += time.monotonic() - started
+
+        self.requests_total += len(batch)
+        self.texts_total += len(texts)
+
+        offset = 0
+        for request in batch:
+            count = len(request.texts)
+            request.future.set_result(vectors[offset:offset + count])
+            offset += count
+
+    @staticmethod
+    def _to_list(vector: Any) -> List[float]:
+        # ONNX models return numpy arrays; callers and JSON responses want plain lists
+        return vector.tolist() if hasattr(vector, "tolist") else list(vector)
+
+
+# Global instance
+_embedding_batcher: Optional[EmbeddingBatcher] = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Get or create global embedding batcher instance"""
+    global _embedding_batcher
+    if _embedding_batcher is None:
+        _embedding_batcher = EmbeddingBatcher()
+    return _embedding_batcher
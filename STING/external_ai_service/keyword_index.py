@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Keyword Index - In-process BM25 search over brain and documentation sections
+
+Used by BeeContextManager when ChromaDB is unavailable. Documents are split
+into markdown sections and tokenized once when the index is built; a query
+only walks the postings of its own terms, so lookups stay well under a
+millisecond even for the full docs tree.
+"""
+
+import re
+import math
+import heapq
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its
+me my of on or so that the their them then there these this to was we were what when
+where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with plural "s" stripped"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def split_sections(text: str, max_chars: int = 1500, min_chars: int = 300) -> List[Tuple[str, str]]:
+    """
+    Split markdown into (heading, body) sections.
+
+    "#" lines inside fenced code blocks are not headings. Sections shorter
+    than min_chars are merged with the next one, and sections longer than
+    max_chars are split further on blank lines, so a match returns a
+    focused passage rather than a lone heading or a whole chapter.
+    """
+    sections = []
+    heading = ""
+    current: List[str] = []
+    pending_heading = ""
+    pending = ""
+
+    def emit(section_heading: str, body: str):
+        if len(body) <= max_chars:
+            sections.append((section_heading, body))
+            return
+        chunk = ""
+        for paragraph in body.split("\n\n"):
+            if chunk and len(chunk) + len(paragraph) + 2 > max_chars:
+                sections.append((section_heading, chunk))
+                chunk = ""
+            chunk = f"{chunk}\n\n{paragraph}" if chunk else paragraph
+        if chunk:
+            sections.append((section_heading, chunk[:max_chars * 2]))
+
+    def flush():
+        nonlocal pending, pending_heading
+        body = "\n".join(current).strip()
+        if not body:
+            return
+        if pending:
+            body = f"{pending}\n\n{body}"
+        else:
+            pending_heading = heading
+        if len(body) < min_chars:
+            pending = body
+            return
+        emit(pending_heading, body)
+        pending = ""
+
+    in_code = False
+    for line in text.split("\n"):
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        if not in_code and _HEADING_RE.match(line):
+            flush()
+            heading = line.lstrip("#").strip()
+            current = [line]
+        else:
+            current.append(line)
+    flush()
+    if pending:
+        emit(pending_heading, pending)
+    return sections
+
+
+class Section:
+    __slots__ = ("source", "heading", "text", "length")
+
+    def __init__(self, source: str, heading: str, text: str, length: int):
+        self.source = source
+        self.heading = heading
+        self.text = text
+        self.length = length
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, documents: Dict[str, str], max_section_chars: int = 1500,
+                 k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            documents: Mapping of source name to markdown text
+            max_section_chars: Target size of indexed sections
+            k1, b: BM25 term-frequency saturation and length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.sections: List[Section] = []
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+
+        term_counts = []
+        total_length = 0
+        for source, text in documents.items():
+            for heading, body in split_sections(text, max_section_chars):
+                # Headings count twice: they name what the section is about
+                tokens = tokenize(body) + tokenize(heading)
+                if not tokens:
+                    continue
+                self.sections.append(Section(source, heading, body, len(tokens)))
+                term_counts.append(Counter(tokens))
+                total_length += len(tokens)
+
+        # Store each posting's BM25 term-frequency component so a query only
+        # multiplies by idf and sums
+        count = len(self.sections)
+        avg_length = total_length / count if count else 0.0
+        for index, counts in enumerate(term_counts):
+            norm = k1 * (1 - b + b * self.sections[index].length / avg_length)
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((index, tf * (k1 + 1) / (tf + norm)))
+
+        self.avg_length = avg_length
+        self.idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[float, Section]]:
+        """Return up to `limit` (score, section) pairs, best first"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for index, weight in postings:
+                scores[index] = scores.get(index, 0.0) + idf * weight
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self.sections[index]) for index, score in best]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "sections": len(self.sections),
+            "terms": len(self.postings),
+            "sources": len({section.source for section in self.sections})
+        }
@@ -5,16 +5,37 @@ Indexes brain knowledge and documentation for fast semantic search
 """
 
 import os
+import json
 import logging
 import asyncio
+import threading
 import chromadb
 from chromadb.config import Settings
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import hashlib
 
+from embedding_batcher import get_embedding_batcher
+
 logger = logging.getLogger(__name__)
 
+# Bump when chunking or chunk ids change; the next sync rebuilds the collection
+INDEX_FORMAT = 2
+
+# Source key the admin endpoint used to index the whole brain under; now
+# owned by the "brain:" files, so any leftover copy is removed on sync
+LEGACY_BRAIN_SOURCE = "bee_brain"
+
+# Priority documentation files (indexed from the repository root)
+PRIORITY_DOCS = [
+    "README.md",
+    "ARCHITECTURE.md",
+    "DATA_PROTECTION_ARCHITECTURE.md",
+    "WORKER_BEE_CONNECTOR_FRAMEWORK.md",
+    "REPORT_GENERATION_FRAMEWORK.md",
+    "AI_ASSISTANT.md"
+]
+
 class KnowledgeIndexer:
     """Manages ChromaDB indexing for Bee's knowledge base"""
 
@@ -43,6 +64,7 @@ class KnowledgeIndexer:
 
         self.collection_name = collection_name
         self.collection = None
+        self._sync_lock = threading.Lock()
 
     def _get_or_create_collection(self) -> Optional[Any]:
         """Get or create ChromaDB collection"""
@@ -107,226 +129,278 @@ class KnowledgeIndexer:
 
         return chunks
 
-    def _generate_id(self, text: str, prefix: str = "", section_idx: int = 0, chunk_idx: int = 0) -> str:
-        """Generate unique ID for a document - includes section and chunk indices for uniqueness"""
-        hash_obj = hashlib.md5(text.encode())
-        return f"{prefix}_s{section_idx}_c{chunk_idx}_{hash_obj.hexdigest()[:8]}"
+    @staticmethod
+    def _split_sections(text: str, default_header: str = "Introduction") -> List[Tuple[str, str]]:
+        """Split markdown into (header, content) sections; "#" lines in code fences are not headers"""
+        sections = []
+        current_section: List[str] = []
+        current_header = default_header
+        in_code = False
+
+        def flush():
+            section_text = '\n'.join(current_section).strip()
+            if section_text:
+                sections.append((current_header, section_text))
+
+        for line in text.split('\n'):
+            if line.lstrip().startswith('```'):
+                in_code = not in_code
+            if not in_code and line.startswith('#'):
+                # Save previous section, start a new one
+                flush()
+                current_header = line.strip('# ').strip()
+                current_section = []
+            else:
+                current_section.append(line)
+        flush()
+        return sections
+
+    @staticmethod
+    def _section_hash(header: str, content: str, chunk_size: int, overlap: int) -> str:
+        """Content hash of a section; chunk ids derive from it, so unchanged sections keep theirs"""
+        key = f"{INDEX_FORMAT}:{chunk_size}:{overlap}:{header}\n{content}"
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    # Manifest of indexed sources, persisted in the collection metadata as
+    # {source_key: content hash}; per-section hashes live in chunk metadata
+
+    def _load_manifest(self, collection) -> Optional[Dict[str, str]]:
+        """Indexed source hashes, or None for a collection from an older indexer"""
+        metadata = collection.metadata or {}
+        if metadata.get("index_format") != INDEX_FORMAT:
+            return None
+        try:
+            return json.loads(metadata.get("index_manifest") or "{}")
+        except ValueError:
+            return None
 
-    def index_brain_knowledge(self, brain_text: str) -> bool:
-        """Index Bee's brain knowledge into ChromaDB"""
-        if not self.enabled:
-            return False
+    def _save_manifest(self, collection, manifest: Dict[str, str]):
+        metadata = {k: v for k, v in (collection.metadata or {}).items() if not k.startswith("hnsw:")}
+        metadata.update({
+            "index_format": INDEX_FORMAT,
+            "index_manifest": json.dumps(manifest, sort_keys=True)
+        })
+        collection.modify(metadata=metadata)
 
+    def get_indexed_sources(self) -> Dict[str, str]:
+        """Source keys and content hashes currently in the index"""
+        if not self.enabled:
+            return {}
         try:
             collection = self._get_or_create_collection()
-            if not collection:
-                return False
+            return (self._load_manifest(collection) or {}) if collection else {}
+        except Exception as e:
+            logger.error(f"Failed to read index manifest: {e}")
+            return {}
 
-            logger.info(f"Indexing brain knowledge ({len(brain_text)} chars)...")
+    def _sync_source(self, collection, source_key: str, text: str, metadata: Dict[str, Any],
+                     chunk_size: int, overlap: int, default_header: str) -> Dict[str, int]:
+        """
+        Bring one source's chunks in line with its text.
 
-            # Split brain into sections by headers
-            logger.info("Splitting brain into sections...")
-            sections = []
-            current_section = []
-            current_header = "Introduction"
-
-            for line in brain_text.split('\n'):
-                if line.startswith('#'):
-                    # Save previous section
-                    if current_section:
-                        section_text = '\n'.join(current_section).strip()
-                        if section_text:
-                            sections.append({
-                                'header': current_header,
-                                'content': section_text
-                            })
-
-                    # Start new section
-                    current_header = line.strip('# ').strip()
-                    current_section = []
-                else:
-                    current_section.append(line)
-
-            # Save last section
-            if current_section:
-                section_text = '\n'.join(current_section).strip()
-                if section_text:
-                    sections.append({
-                        'header': current_header,
-                        'content': section_text
-                    })
+        Only sections whose hash is not already indexed are chunked and
+        embedded; chunks of sections that no longer exist are deleted.
+        """
+        existing = collection.get(where={"source_key": source_key}, include=["metadatas"])
+        existing_ids: Dict[str, List[str]] = {}
+        for chunk_id, chunk_metadata in zip(existing.get('ids') or [], existing.get('metadatas') or []):
+            existing_ids.setdefault((chunk_metadata or {}).get("section_hash", ""), []).append(chunk_id)
+
+        documents = []
+        metadatas = []
+        ids = []
+        wanted = set()
+        unchanged = 0
+
+        for header, content in self._split_sections(text, default_header):
+            section_hash = self._section_hash(header, content, chunk_size, overlap)
+            if section_hash in wanted:
+                continue  # Identical section repeated within the source
+            wanted.add(section_hash)
+            if section_hash in existing_ids:
+                unchanged += 1
+                continue
+
+            for i, chunk in enumerate(self._chunk_text(content, chunk_size=chunk_size, overlap=overlap)):
+                documents.append(chunk)
+                metadatas.append({
+                    **metadata,
+                    'section': header,
+                    'chunk': i,
+                    'source_key': source_key,
+                    'section_hash': section_hash
+                })
+                ids.append(f"{source_key}#{section_hash}#{i}")
+
+        # Add to ChromaDB in batches to avoid hanging on large additions
+        batch_size = 10  # Process 10 chunks at a time
+        for i in range(0, len(documents), batch_size):
+            batch_docs = documents[i:i+batch_size]
+            collection.upsert(
+                documents=batch_docs,
+                embeddings=get_embedding_batcher().embed(batch_docs),
+                metadatas=metadatas[i:i+batch_size],
+                ids=ids[i:i+batch_size]
+            )
+
+        stale_ids = [chunk_id for section_hash, section_ids in existing_ids.items()
+                     if section_hash not in wanted for chunk_id in section_ids]
+        if stale_ids:
+            collection.delete(ids=stale_ids)
 
-            logger.info(f"Found {len(sections)} sections, chunking...")
+        return {
+            "sections_unchanged": unchanged,
+            "sections_indexed": len(wanted) - unchanged,
+            "chunks_added": len(documents),
+            "chunks_deleted": len(stale_ids)
+        }
 
-            # Chunk each section and index
-            documents = []
-            metadatas = []
-            ids = []
+    def sync_sources(self, sources: Dict[str, Dict[str, Any]], scope: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Incrementally index a set of sources.
 
-            logger.info(f"Processing {len(sections)} sections into chunks...")
-            for idx, section in enumerate(sections):
-                # Log progress every 20 sections, plus extra for final sections
-                if idx % 20 == 0 or idx >= 140:
-                    logger.info(f"  Processing section {idx+1}/{len(sections)}: {section['header'][:50]}...")
+        Args:
+            sources: source_key -> {"text", "metadata", "chunk_size", "overlap", "header"}
+            scope: Source key prefix owned by this call; indexed sources with
+                   this prefix that are missing from `sources` are deleted
 
-                # Chunk large sections
+        Sources whose content hash matches the manifest are skipped without
+        touching ChromaDB, so an unchanged tree costs one metadata read.
+        """
+        result = {"sources_changed": 0, "sources_unchanged": 0, "sources_removed": 0,
+                  "chunks_added": 0, "chunks_deleted": 0, "errors": 0}
+        if not self.enabled:
+            return result
+
+        with self._sync_lock:
+            # Fresh handle: the manifest lives in the collection metadata
+            self.collection = None
+            collection = self._get_or_create_collection()
+            if not collection:
+                result["errors"] += 1
+                return result
+
+            manifest = self._load_manifest(collection)
+            if manifest is None and collection.count() == 0:
+                manifest = {}
+            if manifest is None:
+                # Chunks from the previous indexer have no section hashes
+                logger.info("🗑️ Index predates incremental indexing, rebuilding once...")
+                self.clear_collection()
+                collection = self._get_or_create_collection()
+                manifest = {}
+            original = dict(manifest)
+
+            for source_key, source in sources.items():
+                content_hash = hashlib.sha256(source["text"].encode()).hexdigest()
+                if manifest.get(source_key) == content_hash:
+                    result["sources_unchanged"] += 1
+                    continue
                 try:
-                    chunks = self._chunk_text(section['content'], chunk_size=800, overlap=150)
-                    if idx >= 140:
-                        logger.info(f"    → Section {idx+1} produced {len(chunks)} chunks")
+                    stats = self._sync_source(
+                        collection, source_key, source["text"], source.get("metadata", {}),
+                        source.get("chunk_size", 1000), source.get("overlap", 200),
+                        source.get("header", "Introduction")
+                    )
+                    manifest[source_key] = content_hash
+                    result["sources_changed"] += 1
+                    result["chunks_added"] += stats["chunks_added"]
+                    result["chunks_deleted"] += stats["chunks_deleted"]
+                    logger.info(f"  ✓ {source_key}: {stats['sections_indexed']} sections re-indexed, "
+                                f"{stats['sections_unchanged']} unchanged, {stats['chunks_deleted']} chunks removed")
                 except Exception as e:
-                    logger.error(f"Error chunking section {idx+1} '{section['header']}': {e}")
-                    continue
+                    result["errors"] += 1
+                    logger.error(f"  ✗ Failed to index {source_key}: {e}")
 
-                for i, chunk in enumerate(chunks):
+            if scope is not None:
+                for source_key in [k for k in manifest if k.startswith(scope) and k not in sources]:
                     try:
-                        doc_id = self._generate_id(chunk, f"brain", section_idx=idx, chunk_idx=i)
-                        documents.append(chunk)
-                        metadatas.append({
-                            'source': 'bee_brain',
-                            'section': section['header'],
-                            'chunk': i,
-                            'type': 'knowledge'
-                        })
-                        ids.append(doc_id)
+                        collection.delete(where={"source_key": source_key})
+                        del manifest[source_key]
+                        result["sources_removed"] += 1
+                        logger.info(f"  🗑️ {source_key}: removed")
                     except Exception as e:
-                        logger.error(f"Error processing chunk {i} of section {idx+1}: {e}")
-                        continue
-
-            logger.info(f"✓ Prepared {len(documents)} document chunks for indexing")
+                        result["errors"] += 1
+                        logger.error(f"  ✗ Failed to remove {source_key}: {e}")
 
-            # Add to ChromaDB in batches to avoid hanging on large additions
-            batch_size = 10  # Process 10 chunks at a time
-            total = len(documents)
-            logger.info(f"Adding {total} chunks in batches of {batch_size}...")
+            if manifest != original:
+                self._save_manifest(collection, manifest)
 
-            for i in range(0, total, batch_size):
-                batch_docs = documents[i:i+batch_size]
-                batch_metas = metadatas[i:i+batch_size]
-                batch_ids = ids[i:i+batch_size]
+        return result
 
-                try:
-                    collection.add(
-                        documents=batch_docs,
-                        metadatas=batch_metas,
-                        ids=batch_ids
-                    )
-                    logger.info(f"  ✓ Batch {i//batch_size + 1}/{(total + batch_size - 1)//batch_size}: {len(batch_docs)} chunks added")
-                except Exception as e:
-                    logger.error(f"  ✗ Batch {i//batch_size + 1} failed: {e}")
-                    # Continue with next batch even if one fails
-                    continue
+    def index_brain_knowledge(self, brain_text: str, source_key: str = "bee_brain") -> bool:
+        """Index Bee's brain knowledge into ChromaDB (only changed sections are re-embedded)"""
+        if not self.enabled:
+            return False
 
-            logger.info(f"✅ Indexed {len(documents)} brain knowledge chunks")
-            return True
+        try:
+            logger.info(f"Indexing brain knowledge ({len(brain_text)} chars)...")
+            result = self.sync_sources({
+                source_key: {
+                    "text": brain_text,
+                    "metadata": {'source': 'bee_brain', 'type': 'knowledge'},
+                    "chunk_size": 800,
+                    "overlap": 150
+                }
+            })
+            logger.info(f"✅ Brain knowledge index current: {result}")
+            return not result["errors"]
 
         except Exception as e:
             logger.error(f"Failed to index brain knowledge: {e}")
             return False
 
+    def _documentation_sources(self, docs_path: Path) -> Dict[str, Dict[str, Any]]:
+        """Priority docs from the repository root plus every markdown file under docs/"""
+        sources = {}
+        root_path = docs_path.parent
+
+        for doc_name in PRIORITY_DOCS:
+            doc_path = root_path / doc_name
+            if doc_path.exists():
+                sources[f"doc:{doc_name}"] = {
+                    "text": doc_path.read_text(encoding='utf-8'),
+                    "metadata": {
+                        'source': doc_name,
+                        'path': str(doc_path.relative_to(root_path)),
+                        'type': 'documentation',
+                        'priority': True
+                    }
+                }
+
+        if docs_path.exists():
+            for md_file in docs_path.rglob("*.md"):
+                # Skip if already indexed as priority
+                if md_file.name in PRIORITY_DOCS:
+                    continue
+                relative_path = str(md_file.relative_to(root_path))
+                sources[f"doc:{relative_path}"] = {
+                    "text": md_file.read_text(encoding='utf-8'),
+                    "metadata": {
+                        'source': md_file.name,
+                        'path': relative_path,
+                        'type': 'documentation',
+                        'priority': False
+                    }
+                }
+        return sources
+
     def index_documentation(self, docs_path: Path) -> bool:
-        """Index documentation files into ChromaDB"""
+        """Index documentation files into ChromaDB (only changed sections are re-embedded)"""
         if not self.enabled:
             return False
 
         try:
-            collection = self._get_or_create_collection()
-            if not collection:
-                return False
-
             logger.info(f"Indexing documentation from {docs_path}...")
-
-            # Priority documentation files
-            priority_docs = [
-                "README.md",
-                "ARCHITECTURE.md",
-                "DATA_PROTECTION_ARCHITECTURE.md",
-                "WORKER_BEE_CONNECTOR_FRAMEWORK.md",
-                "REPORT_GENERATION_FRAMEWORK.md",
-                "AI_ASSISTANT.md"
-            ]
-
-            documents = []
-            metadatas = []
-            ids = []
-
-            # Index priority docs from root
-            root_path = docs_path.parent
-            for doc_name in priority_docs:
-                doc_path = root_path / doc_name
-                if doc_path.exists():
-                    logger.info(f"  Indexing priority doc: {doc_name}")
-                    content = doc_path.read_text(encoding='utf-8')
-
-                    # Chunk the document
-                    chunks = self._chunk_text(content, chunk_size=1000, overlap=200)
-
-                    for i, chunk in enumerate(chunks):
-                        doc_id = self._generate_id(chunk, f"doc_{doc_name}")
-                        documents.append(chunk)
-                        metadatas.append({
-                            'source': doc_name,
-                            'path': str(doc_path.relative_to(root_path)),
-                            'chunk': i,
-                            'type': 'documentation',
-                            'priority': True
-                        })
-                        ids.append(doc_id)
-
-            # Index docs from docs/ directory
-            if docs_path.exists():
-                for md_file in docs_path.rglob("*.md"):
-                    relative_path = str(md_file.relative_to(root_path))
-
-                    # Skip if already indexed as priority
-                    if md_file.name in priority_docs:
-                        continue
-
-                    content = md_file.read_text(encoding='utf-8')
-
-                    # Chunk the document
-                    chunks = self._chunk_text(content, chunk_size=1000, overlap=200)
-
-                    for i, chunk in enumerate(chunks):
-                        doc_id = self._generate_id(chunk, f"doc_{md_file.name}")
-                        documents.append(chunk)
-                        metadatas.append({
-                            'source': md_file.name,
-                            'path': relative_path,
-                            'chunk': i,
-                            'type': 'documentation',
-                            'priority': False
-                        })
-                        ids.append(doc_id)
-
-            # Add to ChromaDB in batches
-            if documents:
-                batch_size = 10  # Process 10 chunks at a time
-                total = len(documents)
-                logger.info(f"Adding {total} documentation chunks in batches of {batch_size}...")
-
-                for i in range(0, total, batch_size):
-                    batch_docs = documents[i:i+batch_size]
-                    batch_metas = metadatas[i:i+batch_size]
-                    batch_ids = ids[i:i+batch_size]
-
-                    try:
-                        collection.add(
-                            documents=batch_docs,
-                            metadatas=batch_metas,
-                            ids=batch_ids
-                        )
-                        logger.info(f"  ✓ Batch {i//batch_size + 1}/{(total + batch_size - 1)//batch_size}: {len(batch_docs)} chunks added")
-                    except Exception as e:
-                        logger.error(f"  ✗ Batch {i//batch_size + 1} failed: {e}")
-                        continue
-
-                logger.info(f"✅ Indexed {len(documents)} documentation chunks")
-                return True
-            else:
+            sources = self._documentation_sources(docs_path)
+            if not sources:
                 logger.warning("No documentation files found to index")
                 return False
 
+            result = self.sync_sources(sources, scope="doc:")
+            logger.info(f"✅ Documentation index current: {result}")
+            return not result["errors"]
+
         except Exception as e:
             logger.error(f"Failed to index documentation: {e}")
             return False
@@ -391,6 +465,7 @@ class KnowledgeIndexer:
                 "enabled": True,
                 "collection_name": self.collection_name,
                 "document_count": count,
+                "indexed_sources": len(self._load_manifest(self.collection) or {}),
                 "status": "healthy"
             }
 
@@ -431,33 +506,31 @@ def get_knowledge_indexer() -> KnowledgeIndexer:
 
 class BrainAutoIndexer:
     """
-    Automatically indexes Bee Brain files when they change.
-    Uses hash-based change detection to avoid unnecessary re-indexing.
+    Automatically indexes Bee Brain files (and the docs tree, when present) when they change.
+    Files are compared by size and mtime first, then by content hash against the
+    manifest persisted in the collection, so a restart with unchanged files does
+    no indexing at all. Changed files only re-embed their changed sections.
     """
 
     def __init__(
         self,
         brain_dir: str = "/app",
         brain_pattern: str = "bee_brain*.md",
+        docs_path: Optional[Path] = None,
         check_interval: int = 60  # Check every 60 seconds
     ):
         self.brain_dir = Path(brain_dir)
         self.brain_pattern = brain_pattern
+        self.docs_path = docs_path if docs_path is not None else Path(__file__).parent.parent / "docs"
         self.check_interval = check_interval
-        self.indexed_hashes: Dict[str, str] = {}  # filename -> content hash
+        self.indexed_hashes: Dict[str, str] = {}  # source key -> content hash
         self.indexer = get_knowledge_indexer()
         self._running = False
         self._last_index_time = 0
         self._debounce_seconds = 5  # Wait 5 seconds after change before indexing
-
-    def _compute_file_hash(self, filepath: Path) -> str:
-        """Compute SHA256 hash of file content"""
-        try:
-            content = filepath.read_text(encoding='utf-8')
-            return hashlib.sha256(content.encode()).hexdigest()
-        except Exception as e:
-            logger.error(f"Failed to hash {filepath}: {e}")
-            return ""
+        self._file_signature: Optional[tuple] = None  # (path, size, mtime) of every watched file
+        # The watcher and the admin endpoint both sync from worker threads
+        self._sync_lock = threading.Lock()
 
     def _get_brain_files(self) -> List[Path]:
         """Find all brain files matching pattern"""
@@ -470,35 +543,105 @@ class BrainAutoIndexer:
             logger.error(f"Failed to find brain files: {e}")
             return []
 
+    def _watched_files(self) -> List[Path]:
+        files = self._get_brain_files()
+        if self.docs_path.exists():
+            root_path = self.docs_path.parent
+            files.extend(root_path / name for name in PRIORITY_DOCS if (root_path / name).exists())
+            files.extend(sorted(self.docs_path.rglob("*.md")))
+        return files
+
+    def _compute_signature(self, files: List[Path]) -> tuple:
+        signature = []
+        for path in files:
+            try:
+                stat = path.stat()
+                signature.append((str(path), stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                continue
+        return tuple(signature)
+
+    def _build_sources(self, brain_files: List[Path]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Sources by scope ("brain:" and, when the docs tree exists, "doc:")"""
+        brain_sources = {}
+        for brain_file in brain_files:
+            try:
+                brain_sources[f"brain:{brain_file.name}"] = {
+                    "text": brain_file.read_text(encoding='utf-8'),
+                    "metadata": {'source': 'bee_brain', 'file': brain_file.name, 'type': 'knowledge'},
+                    "chunk_size": 800,
+                    "overlap": 150
+                }
+            except Exception as e:
+                logger.error(f"Failed to read {brain_file}: {e}")
+        scopes = {"brain:": brain_sources}
+        if self.docs_path.exists():
+            scopes["doc:"] = self.indexer._documentation_sources(self.docs_path)
+        # Empty scope: a brain copy left under the old key shows up as removed
+        scopes[LEGACY_BRAIN_SOURCE] = {}
+        return scopes
+
+    def index_now(self) -> Dict[str, Any]:
+        """
+        Sync brain files and docs immediately, skipping the change check and
+        debounce (admin trigger, e.g. after clearing the collection).
+        Uses the same source keys and scopes as the watcher.
+        """
+        with self._sync_lock:
+            self.indexed_hashes = {}
+            self._file_signature = None
+            self._last_index_time = 0
+            return self._check_and_index()
+
     def check_and_index(self) -> Dict[str, Any]:
         """
         Check for brain file changes and re-index if needed.
         Returns status dict.
         """
+        with self._sync_lock:
+            return self._check_and_index()
+
+    def _check_and_index(self) -> Dict[str, Any]:
         import time
 
         if not self.indexer.enabled:
             return {"status": "disabled", "message": "ChromaDB not available"}
 
         brain_files = self._get_brain_files()
-        if not brain_files:
+        watched = self._watched_files()
+        if not watched:
             return {"status": "no_files", "message": "No brain files found"}
 
-        changes_detected = []
-        current_hashes = {}
+        signature = self._compute_signature(watched)
+        if signature == self._file_signature:
+            return {"status": "current", "message": "Brain index is up to date", "files": len(watched)}
 
-        for brain_file in brain_files:
-            file_hash = self._compute_file_hash(brain_file)
-            current_hashes[brain_file.name] = file_hash
+        scopes = self._build_sources(brain_files)
+        current_hashes = {
+            key: hashlib.sha256(source["text"].encode()).hexdigest()
+            for sources in scopes.values() for key, source in sources.items()
+        }
 
-            # Check if this file is new or changed
-            if brain_file.name not in self.indexed_hashes:
-                changes_detected.append({"file": brain_file.name, "reason": "new"})
-            elif self.indexed_hashes[brain_file.name] != file_hash:
-                changes_detected.append({"file": brain_file.name, "reason": "modified"})
+        # After a restart, compare against what the collection already holds
+        indexed = self.indexed_hashes or {
+            key: value for key, value in self.indexer.get_indexed_sources().items()
+            if key.startswith(tuple(scopes))
+        }
+
+        changes_detected = []
+        for key, file_hash in current_hashes.items():
+            if key not in indexed:
+                changes_detected.append({"file": key, "reason": "new"})
+            elif indexed[key] != file_hash:
+                changes_detected.append({"file": key, "reason": "modified"})
+        for key in indexed:
+            if key not in current_hashes:
+                changes_detected.append({"file": key, "reason": "removed"})
 
         if not changes_detected:
-            return {"status": "current", "message": "Brain index is up to date", "files": list(current_hashes.keys())}
+            self.indexed_hashes = current_hashes
+            self._file_signature = signature
+            return {"status": "current", "message": "Brain index is up to date", "files": len(watched)}
 
         # Debounce - wait a bit in case more changes are coming
         time_since_last = time.time() - self._last_index_time
@@ -507,31 +650,25 @@ class BrainAutoIndexer:
 
         logger.info(f"🔄 Brain changes detected: {changes_detected}")
 
-        # Re-index all brain files
         try:
-            # Clear old index first
-            logger.info("🗑️ Clearing old brain index...")
-            self.indexer.clear_collection()
-
-            # Index all brain files
-            total_indexed = 0
-            for brain_file in brain_files:
-                logger.info(f"📚 Indexing {brain_file.name}...")
-                try:
-                    content = brain_file.read_text(encoding='utf-8')
-                    if self.indexer.index_brain_knowledge(content):
-                        total_indexed += 1
-                        self.indexed_hashes[brain_file.name] = current_hashes[brain_file.name]
-                except Exception as e:
-                    logger.error(f"Failed to index {brain_file.name}: {e}")
+            totals = {"sources_changed": 0, "sources_removed": 0, "chunks_added": 0, "chunks_deleted": 0, "errors": 0}
+            for scope, sources in scopes.items():
+                result = self.indexer.sync_sources(sources, scope=scope)
+                for key in totals:
+                    totals[key] += result.get(key, 0)
 
             self._last_index_time = time.time()
+            if not totals["errors"]:
+                self.indexed_hashes = current_hashes
+                self._file_signature = signature
 
             return {
                 "status": "reindexed",
-                "message": f"Re-indexed {total_indexed} brain files",
+                "message": f"Re-indexed {totals['sources_changed']} sources "
+                           f"({totals['chunks_added']} chunks added, {totals['chunks_deleted']} removed)",
                 "changes": changes_detected,
-                "files_indexed": total_indexed
+                "files_indexed": totals["sources_changed"],
+                **totals
             }
 
         except Exception as e:
@@ -549,14 +686,14 @@ class BrainAutoIndexer:
         self._running = True
         logger.info(f"🔍 Starting brain auto-indexer (checking every {self.check_interval}s)")
 
-        # Initial index check
-        result = self.check_and_index()
+        # Initial index check (file reads and embedding stay off the event loop)
+        result = await asyncio.to_thread(self.check_and_index)
         logger.info(f"Initial brain index check: {result.get('status')} - {result.get('message')}")
 
         while self._running:
             try:
                 await asyncio.sleep(self.check_interval)
-                result = self.check_and_index()
+                result = await asyncio.to_thread(self.check_and_index)
                 if result.get('status') == 'reindexed':
                     logger.info(f"🔄 Brain auto-reindex: {result.get('message')}")
             except asyncio.CancelledError:
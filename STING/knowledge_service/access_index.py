@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Honey Jar Access Index for STING Knowledge Service
+Resolves which honey jars a caller can read with one query, so search
+fans out only to those jars (and to all of them, however many there are)
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import Session, object_session
+
+from database import HoneyJar
+
+logger = logging.getLogger(__name__)
+
+ACCESS_INDEX_TTL_SECONDS = float(os.getenv('ACCESS_INDEX_TTL_SECONDS', '300'))
+ACCESS_INDEX_MAX_ENTRIES = int(os.getenv('ACCESS_INDEX_MAX_ENTRIES', '1000'))
+
+# Columns that decide who can read a honey jar (or how it is listed)
+ACCESS_COLUMNS = ("type", "owner", "permissions", "name")
+
+ReadableHoneyJar = namedtuple("ReadableHoneyJar", ["id", "name", "type"])
+
+
+class HoneyJarAccessIndex:
+    """Per-principal cache of readable honey jar IDs"""
+
+    def __init__(self, ttl: float = ACCESS_INDEX_TTL_SECONDS, max_entries: int = ACCESS_INDEX_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _principal(user: Optional[Dict[str, Any]]) -> tuple:
+        """Cache key: everything can_access_honey_jar looks at"""
+        if user is None:
+            return ("public",)
+        if user.get("role", "user") == "admin":
+            return ("admin",)
+        return ("user", user.get("email", ""), user.get("role", "user"),
+                tuple(sorted(user.get("teams", []) or [])))
+
+    @staticmethod
+    def _query(db: Session, principal: tuple) -> List[ReadableHoneyJar]:
+        """
+        Readable honey jars for a principal, filtered in PostgreSQL.
+
+        Mirrors KnowledgeAuth.can_access_honey_jar; keep the two in step.
+        """
+        query = db.query(HoneyJar.id, HoneyJar.name, HoneyJar.type)
+        if principal[0] == "public":
+            query = query.filter(HoneyJar.type == "public")
+        elif principal[0] == "user":
+            _, email, role, teams = principal
+            permissions = HoneyJar.permissions
+            conditions = [
+                HoneyJar.type == "public",
+                permissions["public_read"].astext == "true",
+                permissions["allowed_roles"].contains([role])
+            ]
+            if email:
+                conditions.append(HoneyJar.owner == email)
+                conditions.append(permissions["allowed_users"].contains([email]))
+            for team in teams:
+                conditions.append(permissions["allowed_teams"].contains([team]))
+            query = query.filter(or_(*conditions))
+
+        return [ReadableHoneyJar(str(row.id), row.name, row.type)
+                for row in query.order_by(HoneyJar.created_date).all()]
+
+    def readable_honey_jars(self, db: Session, user: Optional[Dict[str, Any]]) -> List[ReadableHoneyJar]:
+        """
+        Honey jars the user can read (public ones only when user is None)
+
+        Cached per principal until a honey jar is created, deleted or has
+        its access columns changed, or for at most ttl seconds (which covers
+        writes made by other processes).
+        """
+        principal = self._principal(user)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(principal)
+            if entry is not None and entry[0] == self._version and entry[1] > now:
+                self._entries.move_to_end(principal)
+                self.hits += 1
+                return entry[2]
+            version = self._version
+            self.misses += 1
+
+        honey_jars = self._query(db, principal)
+
+        with self._lock:
+            # Don't cache a result that an invalidation raced past
+            if version == self._version:
+                self._entries[principal] = (version, now + self.ttl, honey_jars)
+                self._entries.move_to_end(principal)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return honey_jars
+
+    def get_readable_honey_jar(self, db: Session, user: Optional[Dict[str, Any]],
+                               honey_jar_id: str) -> Optional[ReadableHoneyJar]:
+        """The honey jar if the user can read it, otherwise None"""
+        for honey_jar in self.readable_honey_jars(db, user):
+            if honey_jar.id == honey_jar_id:
+                return honey_jar
+        return None
+
+    def invalidate(self):
+        """Drop every cached entry (honey jar access changed)"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "invalidations": self.invalidations
+        }
+
+
+# Global instance
+honey_jar_access = HoneyJarAccessIndex()
+
+
+# Invalidate after commits that create or delete honey jars or change
+# their access columns (stats updates leave the cache alone)
+
+def _mark_changed(target):
+    session = object_session(target)
+    if session is not None:
+        session.info["honey_jar_access_changed"] = True
+
+
+@event.listens_for(HoneyJar, "after_insert")
+@event.listens_for(HoneyJar, "after_delete")
+def _honey_jar_added_or_removed(mapper, connection, target):
+    _mark_changed(target)
+
+
+@event.listens_for(HoneyJar, "after_update")
+def _honey_jar_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in ACCESS_COLUMNS):
+        _mark_changed(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("honey_jar_access_changed", False):
+        honey_jar_access.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("honey_jar_access_changed", None)
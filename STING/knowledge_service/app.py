@@ -34,11 +34,19 @@ from concurrent.futures import ThreadPoolExecutor
 import threading
 from core.nectar_processor import NectarProcessor
 from semantic_search import SemanticSearchEngine
+from access_index import honey_jar_access
+from core.pollination_engine import PollinationEngine
 from auth.knowledge_auth import knowledge_auth
 from auth.auth_dependencies import get_current_user_flexible
 from sqlalchemy.orm import Session
-from database import get_db, create_tables, HoneyJar, Document, HoneyJarRepository, DocumentRepository
+from database import get_db, create_tables, HoneyJar, Document, HoneyJarRepository, DocumentRepository, encode_document_cursor, decode_document_cursor
 from pii_integration import pii_integration
+
+try:
+    # Shared with the Flask app (mounted next to app.py in the knowledge container)
+    import instrumentation
+except ImportError:
+    from app.utils import instrumentation
 from config.security import mask_api_key, SECURITY_CONFIG
 
 # HTTP client for email service API calls
@@ -147,6 +155,7 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
     total_results: int
     processing_time: float
+    timings: Optional[Dict[str, Any]] = None
 
 # Bulk upload models
 class BulkUploadOptions(BaseModel):
@@ -239,12 +248,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request IDs, query/client timing and /metrics (added last so it wraps the
+# audit and CORS middleware)
+instrumentation.install('knowledge')
+instrumentation.instrument_fastapi(app)
+
 # Initialize NectarProcessor
 nectar_processor = NectarProcessor()
 
 # Initialize Semantic Search Engine
 semantic_search = SemanticSearchEngine(chroma_client if chroma_available else None)
 
+# Hybrid (vector + BM25) retrieval for search and Bee context
+pollination_engine = PollinationEngine(None, search_engine=semantic_search)
+
 # Pending documents for approval (kept in memory for now)
 pending_documents_db = {}
 
@@ -678,11 +695,10 @@ async def delete_honey_jar(
     for doc in documents:
         doc_repo.delete_document(str(doc.id))
     
-    # Delete ChromaDB collection if available
+    # Delete ChromaDB collection (and its lexical index) if available
     if chroma_available:
-        collection_name = f"honey_jar_{str(honey_jar.id).replace('-', '_')}"
         try:
-            chroma_client.delete_collection(collection_name)
+            semantic_search.delete_collection(str(honey_jar.id))
             logger.info(f"Deleted ChromaDB collection for honey jar: {honey_jar.name}")
         except Exception as e:
             logger.error(f"Failed to delete ChromaDB collection: {e}")
@@ -903,22 +919,30 @@ async def upload_document(
 async def list_documents(
     honey_jar_id: str,
     limit: int = Query(50, description="Maximum number of results"),
-    offset: int = Query(0, description="Offset for pagination"),
+    offset: int = Query(0, description="Offset for pagination (prefer cursor)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: Dict[str, Any] = Depends(get_current_user_flexible),
     db: Session = Depends(get_db)
 ):
-    """List documents in a honey jar"""
+    """List documents in a honey jar, newest first"""
     # Verify honey jar exists
     repo = HoneyJarRepository(db)
     honey_jar = repo.get_honey_jar(honey_jar_id)
-    
+
     if not honey_jar:
         raise HTTPException(status_code=404, detail="Honey jar not found")
-    
-    # Get documents
+
+    try:
+        after = decode_document_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Get documents, plus one to tell whether another page follows
     doc_repo = DocumentRepository(db)
-    documents = doc_repo.list_documents(honey_jar_id, limit=limit, offset=offset)
-    
+    documents = doc_repo.list_documents(honey_jar_id, limit=limit + 1, offset=offset, after=after)
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+
     # Convert to response format
     response = []
     for doc in documents:
@@ -937,7 +961,9 @@ async def list_documents(
         "honey_jar_id": honey_jar_id,
         "honey_jar_name": honey_jar.name,
         "documents": response,
-        "total": len(response)
+        "total": len(response),
+        "has_more": has_more,
+        "next_cursor": encode_document_cursor(documents[-1]) if has_more else None
     }
 
 # Search endpoints
@@ -952,37 +978,28 @@ async def search_honey_jars(
     
     results = []
     
+    timings = None
+    
     if semantic_search.available:
-        # Use semantic search
+        # Hybrid search (vector + BM25, fused by rank)
         try:
             # Get all accessible honey jars
-            repo = HoneyJarRepository(db)
-            honey_jars = repo.list_honey_jars(limit=100)
+            honey_jars = honey_jar_access.readable_honey_jars(db, current_user)
             
-            # Search each honey jar's collection
-            for honey_jar in honey_jars:
-                collection_name = f"honey_jar_{str(honey_jar.id).replace('-', '_')}"
-                try:
-                    jar_results = semantic_search.search(
-                        query=request.query,
-                        honey_jar_ids=[str(honey_jar.id)],
-                        limit=request.top_k
-                    )
-                    
-                    for result in jar_results:
-                        results.append(SearchResult(
-                            content=result["content"],
-                            score=result["score"],
-                            honey_jar_id=str(honey_jar.id),
-                            honey_jar_name=honey_jar.name
-                        ))
-                except Exception as e:
-                    logger.error(f"Error searching collection {collection_name}: {e}")
-                    continue
+            jar_results, timings = await pollination_engine.search_with_timings(
+                query=request.query,
+                honey_jar_ids=[str(honey_jar.id) for honey_jar in honey_jars],
+                top_k=request.top_k,
+                honey_jar_names={str(honey_jar.id): honey_jar.name for honey_jar in honey_jars}
+            )
             
-            # Sort by score and limit
-            results.sort(key=lambda x: x.score, reverse=True)
-            results = results[:request.top_k]
+            for result in jar_results:
+                results.append(SearchResult(
+                    content=result["content"],
+                    score=result["score"],
+                    honey_jar_id=result["honey_jar_id"],
+                    honey_jar_name=result["honey_jar_name"]
+                ))
             
         except Exception as e:
             logger.error(f"Semantic search failed: {e}")
@@ -990,9 +1007,8 @@ async def search_honey_jars(
     
     if not results:
         # Fallback to keyword search
-        repo = HoneyJarRepository(db)
         doc_repo = DocumentRepository(db)
-        honey_jars = repo.list_honey_jars(limit=100)
+        honey_jars = honey_jar_access.readable_honey_jars(db, current_user)
         
         query_lower = request.query.lower()
         
@@ -1020,71 +1036,90 @@ async def search_honey_jars(
         query=request.query,
         results=results,
         total_results=len(results),
-        processing_time=processing_time
+        processing_time=processing_time,
+        timings=timings
     )
 
 # Bee Integration Endpoints
+async def _search_bee_context(query: str, honey_jars: List[HoneyJar], limit: int,
+                              db: Session) -> tuple:
+    """
+    Hybrid search over honey jars for the Bee context endpoints.
+    
+    Returns (context_results, timings). If the search itself fails, falls
+    back to substring matching over each document's extracted text.
+    """
+    try:
+        results, timings = await pollination_engine.search_with_timings(
+            query=query,
+            honey_jar_ids=[str(honey_jar.id) for honey_jar in honey_jars],
+            top_k=limit,
+            honey_jar_names={str(honey_jar.id): honey_jar.name for honey_jar in honey_jars}
+        )
+        return [{
+            "content": result["content"],
+            "score": result["score"],
+            "metadata": {
+                "source": result.get("metadata", {}).get("filename", "Unknown"),
+                "honey_jar_id": result["honey_jar_id"],
+                "honey_jar_name": result["honey_jar_name"],
+                "vector_rank": result.get("vector_rank"),
+                "lexical_rank": result.get("lexical_rank")
+            }
+        } for result in results], timings
+    except Exception as e:
+        logger.error(f"Hybrid search failed: {e}")
+    
+    # Fallback: search documents directly
+    context_results = []
+    doc_repo = DocumentRepository(db)
+    for honey_jar in honey_jars:
+        try:
+            documents = doc_repo.list_documents(str(honey_jar.id))
+            logger.info(f"Fallback search: Found {len(documents)} documents in {honey_jar.name}")
+            for doc in documents:
+                if doc.status == "completed" and doc.doc_metadata:
+                    extracted_text = doc.doc_metadata.get("extracted_text", "")
+                    logger.debug(f"Checking document {doc.filename}, has text: {len(extracted_text)} chars")
+                    if query.lower() in extracted_text.lower():
+                        logger.info(f"Fallback match found in {doc.filename}")
+                        context_results.append({
+                            "content": extracted_text,
+                            "score": 0.5,  # Default score for keyword match
+                            "metadata": {
+                                "source": doc.filename,
+                                "honey_jar_id": str(honey_jar.id),
+                                "honey_jar_name": honey_jar.name
+                            }
+                        })
+        except Exception as fallback_error:
+            logger.error(f"Fallback search also failed: {fallback_error}")
+    return context_results, None
+
 @app.post("/bee/context/public")
 async def get_public_bee_context(request: dict, db: Session = Depends(get_db)):
     """Get relevant context from public honey jars only - no authentication required"""
     query = request.get("query", "")
     user_id = request.get("user_id", "anonymous")
     limit = request.get("limit", 5)
+    honey_jar_id = request.get("honey_jar_id", None)
     
-    logger.info(f"Public bee context request: query='{query}', user_id='{user_id}', limit={limit}")
+    logger.info(f"Public bee context request: query='{query}', user_id='{user_id}', limit={limit}, honey_jar_id={honey_jar_id}")
     
     context_results = []
     
     # Get public honey jars
-    repo = HoneyJarRepository(db)
-    honey_jars = repo.list_honey_jars(limit=100)
-    public_jars = [hj for hj in honey_jars if hj.type == "public"]
+    if honey_jar_id:
+        honey_jar = honey_jar_access.get_readable_honey_jar(db, None, honey_jar_id)
+        public_jars = [honey_jar] if honey_jar else []
+    else:
+        public_jars = honey_jar_access.readable_honey_jars(db, None)
+    
+    timings = None
     
     if semantic_search.available:
-        # Use semantic search
-        for honey_jar in public_jars:
-            collection_name = f"honey_jar_{str(honey_jar.id).replace('-', '_')}"
-            try:
-                jar_results = semantic_search.search(
-                    query=query,
-                    honey_jar_ids=[str(honey_jar.id)],
-                    limit=limit
-                )
-                
-                for result in jar_results:
-                    context_results.append({
-                        "content": result["content"],
-                        "score": result["score"],
-                        "metadata": {
-                            "source": result.get("metadata", {}).get("filename", "Unknown"),
-                            "honey_jar_id": str(honey_jar.id),
-                            "honey_jar_name": honey_jar.name
-                        }
-                    })
-            except Exception as e:
-                logger.error(f"Error searching collection {collection_name}: {e}")
-                # Fallback: search documents directly
-                try:
-                    doc_repo = DocumentRepository(db)
-                    documents = doc_repo.list_documents(str(honey_jar.id))
-                    logger.info(f"Fallback search: Found {len(documents)} documents in {honey_jar.name}")
-                    for doc in documents:
-                        if doc.status == "completed" and doc.doc_metadata:
-                            extracted_text = doc.doc_metadata.get("extracted_text", "")
-                            logger.debug(f"Checking document {doc.filename}, has text: {len(extracted_text)} chars")
-                            if query.lower() in extracted_text.lower():
-                                logger.info(f"Fallback match found in {doc.filename}")
-                                context_results.append({
-                                    "content": extracted_text,
-                                    "score": 0.5,  # Default score for keyword match
-                                    "metadata": {
-                                        "source": doc.filename,
-                                        "honey_jar_id": str(honey_jar.id),
-                                        "honey_jar_name": honey_jar.name
-                                    }
-                                })
-                except Exception as fallback_error:
-                    logger.error(f"Fallback search also failed: {fallback_error}")
+        # Hybrid search (vector + BM25, fused by rank)
+        context_results, timings = await _search_bee_context(query, public_jars, limit, db)
     else:
         # Fallback to keyword search
         doc_repo = DocumentRepository(db)
@@ -1118,7 +1153,8 @@ async def get_public_bee_context(request: dict, db: Session = Depends(get_db)):
     return {
         "results": context_results,
         "total_results": len(context_results),
-        "search_type": "semantic" if semantic_search.available else "keyword"
+        "search_type": "hybrid" if semantic_search.available else "keyword",
+        "timings": timings
     }
 
 @app.post("/bee/context")
@@ -1137,62 +1173,18 @@ async def get_bee_context(
     
     context_results = []
     
-    # Get honey jars to search
-    repo = HoneyJarRepository(db)
+    # Get honey jars to search (only those the caller can read)
     if honey_jar_id:
-        honey_jar = repo.get_honey_jar(honey_jar_id)
-        if honey_jar:
-            honey_jars = [honey_jar]
-        else:
-            honey_jars = []
+        honey_jar = honey_jar_access.get_readable_honey_jar(db, current_user, honey_jar_id)
+        honey_jars = [honey_jar] if honey_jar else []
     else:
-        honey_jars = repo.list_honey_jars(limit=100)
+        honey_jars = honey_jar_access.readable_honey_jars(db, current_user)
+    
+    timings = None
     
     if semantic_search.available:
-        # Use semantic search
-        for honey_jar in honey_jars:
-            collection_name = f"honey_jar_{str(honey_jar.id).replace('-', '_')}"
-            try:
-                jar_results = semantic_search.search(
-                    query=query,
-                    honey_jar_ids=[str(honey_jar.id)],
-                    limit=limit
-                )
-                
-                for result in jar_results:
-                    context_results.append({
-                        "content": result["content"],
-                        "score": result["score"],
-                        "metadata": {
-                            "source": result.get("metadata", {}).get("filename", "Unknown"),
-                            "honey_jar_id": str(honey_jar.id),
-                            "honey_jar_name": honey_jar.name
-                        }
-                    })
-            except Exception as e:
-                logger.error(f"Error searching collection {collection_name}: {e}")
-                # Fallback: search documents directly
-                try:
-                    doc_repo = DocumentRepository(db)
-                    documents = doc_repo.list_documents(str(honey_jar.id))
-                    logger.info(f"Fallback search: Found {len(documents)} documents in {honey_jar.name}")
-                    for doc in documents:
-                        if doc.status == "completed" and doc.doc_metadata:
-                            extracted_text = doc.doc_metadata.get("extracted_text", "")
-                            logger.debug(f"Checking document {doc.filename}, has text: {len(extracted_text)} chars")
-                            if query.lower() in extracted_text.lower():
-                                logger.info(f"Fallback match found in {doc.filename}")
-                                context_results.append({
-                                    "content": extracted_text,
-                                    "score": 0.5,  # Default score for keyword match
-                                    "metadata": {
-                                        "source": doc.filename,
-                                        "honey_jar_id": str(honey_jar.id),
-                                        "honey_jar_name": honey_jar.name
-                                    }
-                                })
-                except Exception as fallback_error:
-                    logger.error(f"Fallback search also failed: {fallback_error}")
+        # Hybrid search (vector + BM25, fused by rank)
+        context_results, timings = await _search_bee_context(query, honey_jars, limit, db)
     else:
         # Fallback to keyword search
         doc_repo = DocumentRepository(db)
@@ -1236,7 +1228,8 @@ async def get_bee_context(
     return {
         "results": context_results,
         "total_results": len(context_results),
-        "search_type": "semantic" if semantic_search.available else "keyword"
+        "search_type": "hybrid" if semantic_search.available else "keyword",
+        "timings": timings
     }
 
 # Admin endpoints for pending documents
@@ -1474,11 +1467,22 @@ async def get_honey_jar_pii_summary(
         user_id=user_email
     )
     
+    # Materialized per-jar counters (single row read, no document scan)
+    stats = repo.get_pii_stats(honey_jar_id)
+    
     return {
         "honey_jar_id": honey_jar_id,
         "honey_jar_name": honey_jar.name,
         "pii_detection_available": pii_integration.is_available(),
-        "summary": pii_summary
+        "summary": pii_summary,
+        "document_stats": {
+            "document_count": stats.document_count if stats else 0,
+            "total_size_bytes": stats.total_size_bytes if stats else 0,
+            "pii_document_count": stats.pii_document_count if stats else 0,
+            "pii_type_counts": (stats.pii_type_counts or {}) if stats else {},
+            "pii_risk_counts": (stats.pii_risk_counts or {}) if stats else {},
+            "updated_at": stats.updated_at.isoformat() if stats and stats.updated_at else None
+        }
     }
 
 @app.post("/honey-jars/{honey_jar_id}/documents/{document_id}/pii-rescan")
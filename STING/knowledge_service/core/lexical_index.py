@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Lexical Index - Per Honey Jar BM25 index over document chunks
+Keeps exact identifiers (error codes, part numbers, config keys) searchable
+alongside the ChromaDB vector collections
+"""
+
+import re
+import math
+import heapq
+import logging
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Word runs joined by - _ . / : stay together as one identifier token
+# ("ERR-4012", "max_connections", "v2.3.1"); their parts are indexed too
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*")
+_PART_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its
+me my of on or so that the their them then there these this to was we were what when
+where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens without stopwords; compound identifiers also yield their parts"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        parts = _PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.append(token)
+        for part in parts:
+            if part in STOPWORDS:
+                continue
+            if len(part) > 3 and part.isalpha() and part.endswith("s") and not part.endswith("ss"):
+                part = part[:-1]
+            tokens.append(part)
+    return tokens
+
+
+class IndexedChunk:
+    __slots__ = ("id", "content", "metadata", "length", "terms")
+
+    def __init__(self, chunk_id: str, content: str, metadata: Dict[str, Any], terms: Counter):
+        self.id = chunk_id
+        self.content = content
+        self.metadata = metadata
+        self.terms = terms
+        self.length = sum(terms.values())
+
+
+class LexicalIndex:
+    """Incrementally maintained inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunks: Dict[str, IndexedChunk] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.document_chunks: Dict[str, set] = {}
+        self.total_length = 0
+        self._norms: Optional[Dict[str, float]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def add(self, chunks: Iterable[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """Index (chunk_id, content, metadata) triples; re-adding an id replaces it"""
+        added = 0
+        with self._lock:
+            for chunk_id, content, metadata in chunks:
+                metadata = metadata or {}
+                if chunk_id in self.chunks:
+                    self._remove(chunk_id)
+                terms = Counter(tokenize(content or ""))
+                chunk = IndexedChunk(chunk_id, content or "", metadata, terms)
+                self.chunks[chunk_id] = chunk
+                self.total_length += chunk.length
+                for term, tf in terms.items():
+                    self.postings.setdefault(term, {})[chunk_id] = tf
+                document_id = metadata.get("document_id")
+                if document_id:
+                    self.document_chunks.setdefault(document_id, set()).add(chunk_id)
+                added += 1
+            self._norms = None
+        return added
+
+    def remove_document(self, document_id: str) -> int:
+        """Drop every chunk of a document"""
+        with self._lock:
+            chunk_ids = self.document_chunks.pop(document_id, set())
+            for chunk_id in chunk_ids:
+                self._remove(chunk_id)
+            self._norms = None
+        return len(chunk_ids)
+
+    def _remove(self, chunk_id: str):
+        chunk = self.chunks.pop(chunk_id, None)
+        if chunk is None:
+            return
+        self.total_length -= chunk.length
+        for term in chunk.terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self.postings[term]
+        document_id = chunk.metadata.get("document_id")
+        if document_id in self.document_chunks:
+            self.document_chunks[document_id].discard(chunk_id)
+
+    def search(self, query: str, limit: int = 5,
+               where: Optional[Dict[str, Any]] = None) -> List[Tuple[float, IndexedChunk]]:
+        """
+        Return up to `limit` (score, chunk) pairs, best first.
+
+        Args:
+            query: Free text; identifiers match exactly as well as by their parts
+            limit: Number of results
+            where: Optional metadata equality filter
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self.chunks)
+            if not count or not terms:
+                return []
+            if self._norms is None:
+                # Length normalization changes with the average chunk length,
+                # so it's recomputed once after each batch of writes
+                avg_length = self.total_length / count or 1.0
+                self._norms = {
+                    chunk_id: self.k1 * (1 - self.b + self.b * chunk.length / avg_length)
+                    for chunk_id, chunk in self.chunks.items()
+                }
+            norms = self._norms
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    weight = idf * tf * (self.k1 + 1) / (tf + norms[chunk_id])
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + weight
+
+            if where:
+                scores = {
+                    chunk_id: score for chunk_id, score in scores.items()
+                    if all(self.chunks[chunk_id].metadata.get(k) == v for k, v in where.items())
+                }
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(score, self.chunks[chunk_id]) for chunk_id, score in best]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "chunks": len(self.chunks),
+            "documents": len(self.document_chunks),
+            "terms": len(self.postings),
+            "avg_chunk_tokens": round(self.total_length / len(self.chunks), 1) if self.chunks else 0
+        }
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked id lists with reciprocal rank fusion.
+
+    Each list contributes 1 / (k + rank) for every id it contains (rank is
+    1-based), so the fused order only depends on ranks, never on how the
+    vector distances and BM25 scores happen to be scaled.
+    """
+    fused: Dict[str, float] = {}
+    for ranked in ranked_lists:
+        for rank, item_id in enumerate(ranked, start=1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -5,17 +5,24 @@ Handles intelligent search across Honey Jar knowledge bases with context awarene
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import asyncio
+import time
 
 logger = logging.getLogger(__name__)
 
 class PollinationEngine:
     """Intelligent search engine for Honey Jar knowledge bases"""
     
-    def __init__(self, honeycomb_manager):
+    def __init__(self, honeycomb_manager, search_engine=None):
+        """
+        Args:
+            honeycomb_manager: Vector store used when no search_engine is given
+            search_engine: SemanticSearchEngine; enables hybrid vector + BM25 retrieval
+        """
         self.honeycomb_manager = honeycomb_manager
+        self.search_engine = search_engine
         self.search_cache = {}
         self.suggestion_cache = {}
         
@@ -24,7 +31,8 @@ class PollinationEngine:
         query: str,
         honey_jar_ids: List[str],
         top_k: int = 5,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        honey_jar_names: Optional[Dict[str, str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Perform semantic search across specified Honey Pots
@@ -34,36 +42,69 @@ class PollinationEngine:
             honey_jar_ids: List of Honey Jar IDs to search
             top_k: Number of results to return
             filters: Optional metadata filters
+            honey_jar_names: Optional display names by Honey Jar ID
             
         Returns:
             List of search results with content, metadata, and scores
         """
+        results, _ = await self.search_with_timings(query, honey_jar_ids, top_k, filters, honey_jar_names)
+        return results
+    
+    async def search_with_timings(
+        self,
+        query: str,
+        honey_jar_ids: List[str],
+        top_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        honey_jar_names: Optional[Dict[str, str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Same as search(), also returning per-stage latencies in milliseconds
+        (vector_ms, lexical_ms, fusion_ms, total_ms)
+        """
         try:
             logger.info(f"Searching across {len(honey_jar_ids)} Honey Pots for: {query}")
             
-            # Use honeycomb manager to search multiple collections
-            results = await self.honeycomb_manager.search_multiple_collections(
-                collection_ids=honey_jar_ids,
-                query=query,
-                top_k=top_k,
-                filters=filters
-            )
+            if self.search_engine is not None:
+                # Exact identifiers come from the lexical side, paraphrases
+                # from the vector side; both rankings are fused with RRF
+                results, timings = await asyncio.to_thread(
+                    self.search_engine.hybrid_search, query, honey_jar_ids, top_k, filters
+                )
+            else:
+                started = time.perf_counter()
+                results = await self.honeycomb_manager.search_multiple_collections(
+                    collection_ids=honey_jar_ids,
+                    query=query,
+                    top_k=top_k,
+                    filters=filters
+                )
+                elapsed = round((time.perf_counter() - started) * 1000, 2)
+                timings = {"vector_ms": elapsed, "total_ms": elapsed}
             
             # Enhance results with additional metadata
             enhanced_results = []
             for result in results:
+                honey_jar_id = result.get("honey_jar_id") or result["collection_id"]
+                if honey_jar_names and honey_jar_id in honey_jar_names:
+                    honey_jar_name = honey_jar_names[honey_jar_id]
+                else:
+                    honey_jar_name = await self._get_honey_jar_name(honey_jar_id)
                 enhanced_result = {
                     "content": result["content"],
                     "metadata": result["metadata"],
                     "score": result["score"],
-                    "honey_jar_id": result["collection_id"],
-                    "honey_jar_name": await self._get_honey_jar_name(result["collection_id"]),
+                    "honey_jar_id": honey_jar_id,
+                    "honey_jar_name": honey_jar_name,
                     "search_timestamp": datetime.utcnow().isoformat()
                 }
+                for key in ("vector_score", "lexical_score", "vector_rank", "lexical_rank"):
+                    if key in result:
+                        enhanced_result[key] = result[key]
                 enhanced_results.append(enhanced_result)
             
-            logger.info(f"Found {len(enhanced_results)} results")
-            return enhanced_results
+            logger.info(f"Found {len(enhanced_results)} results in {timings['total_ms']:.0f}ms")
+            return enhanced_results, timings
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
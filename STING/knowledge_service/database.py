@@ -6,13 +6,17 @@ SQLAlchemy models for PostgreSQL persistence of honey pot metadata.
 """
 
 import os
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, JSON, Text, Boolean, Float
+from sqlalchemy import create_engine, Column, String, Integer, BigInteger, DateTime, JSON, Text, Boolean, Float, text, tuple_
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
+import base64
+import binascii
+import json
 from datetime import datetime
+from typing import Optional, Tuple
 from uuid import UUID as PyUUID
 
 # Database configuration
@@ -53,7 +57,7 @@ class Document(Base):
     filename = Column(String(255), nullable=False)
     content_type = Column(String(100))
     size_bytes = Column(Integer)
-    upload_date = Column(DateTime, default=datetime.utcnow)
+    upload_date = Column(DateTime, nullable=False, default=datetime.utcnow)
     status = Column(String(50), default="pending")  # pending, processing, completed, failed
     doc_metadata = Column(JSONB, default=dict)
     tags = Column(JSONB, default=list)
@@ -62,6 +66,19 @@ class Document(Base):
     error_message = Column(Text)
     file_path = Column(String(500))
 
+class HoneyJarStats(Base):
+    """Per-honey-jar document and PII statistics, maintained by a documents trigger
+    (see database/migrations/014_honey_jar_pii_stats.sql)"""
+    __tablename__ = "honey_jar_stats"
+
+    honey_jar_id = Column(UUID(as_uuid=True), primary_key=True)
+    document_count = Column(Integer, default=0)
+    total_size_bytes = Column(BigInteger, default=0)
+    pii_document_count = Column(Integer, default=0)
+    pii_type_counts = Column(JSONB, default=dict)  # {pii_type: documents containing it}
+    pii_risk_counts = Column(JSONB, default=dict)  # {risk_level: detections}
+    updated_at = Column(DateTime(timezone=True))
+
 class MarketplaceListing(Base):
     """Marketplace listings stored in PostgreSQL"""
     __tablename__ = "marketplace_listings"
@@ -202,10 +219,45 @@ class HoneyJarRepository:
             # Invalid UUID format - skip stats update
             pass
     
+    def get_pii_stats(self, honey_jar_id: str) -> HoneyJarStats:
+        """Get materialized document/PII statistics for a honey jar"""
+        try:
+            if isinstance(honey_jar_id, str):
+                honey_jar_uuid = PyUUID(honey_jar_id)
+            else:
+                honey_jar_uuid = honey_jar_id
+            return self.db.query(HoneyJarStats).filter(HoneyJarStats.honey_jar_id == honey_jar_uuid).first()
+        except (ValueError, TypeError) as e:
+            # Invalid UUID format
+            return None
+
+    def rebuild_pii_stats(self, honey_jar_id: str = None) -> int:
+        """Recompute materialized statistics from documents (all jars if honey_jar_id is None)"""
+        rebuilt = self.db.execute(
+            text("SELECT rebuild_honey_jar_stats(CAST(:jar_id AS UUID))"),
+            {"jar_id": str(honey_jar_id) if honey_jar_id else None}
+        ).scalar()
+        self.db.commit()
+        return rebuilt or 0
+
     def get_honey_jar_by_name(self, name: str) -> HoneyJar:
         """Get honey jar by name"""
         return self.db.query(HoneyJar).filter(HoneyJar.name == name).first()
 
+def encode_document_cursor(document: Document) -> str:
+    """Opaque cursor for the page after this document (upload_date DESC, id DESC order)"""
+    payload = json.dumps([document.upload_date.isoformat(), str(document.id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_document_cursor(cursor: str) -> Tuple[datetime, PyUUID]:
+    """(upload_date, id) from encode_document_cursor; ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        upload_date, document_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(upload_date), PyUUID(document_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+
 class DocumentRepository:
     """Repository for document operations"""
     
@@ -278,15 +330,26 @@ class DocumentRepository:
             # Invalid UUID format
             return None
     
-    def list_documents(self, honey_jar_id: str, limit: int = 100, offset: int = 0):
-        """List documents for a honey pot"""
+    def list_documents(self, honey_jar_id: str, limit: int = 100, offset: int = 0,
+                       after: Optional[Tuple[datetime, PyUUID]] = None):
+        """
+        List documents for a honey pot, newest first
+
+        Pass after=decode_document_cursor(cursor) to page by keyset instead
+        of offset; (honey_jar_id, upload_date, id) is indexed, so every page
+        costs the same.
+        """
         try:
             # Convert string to UUID if needed
             if isinstance(honey_jar_id, str):
                 honey_jar_uuid = PyUUID(honey_jar_id)
             else:
                 honey_jar_uuid = honey_jar_id
-            return self.db.query(Document).filter(Document.honey_jar_id == honey_jar_uuid).offset(offset).limit(limit).all()
+            query = self.db.query(Document).filter(Document.honey_jar_id == honey_jar_uuid)
+            if after is not None:
+                query = query.filter(tuple_(Document.upload_date, Document.id) < tuple_(*after))
+            query = query.order_by(Document.upload_date.desc(), Document.id.desc())
+            return query.offset(offset).limit(limit).all()
         except (ValueError, TypeError) as e:
             # Invalid UUID format
             return []
@@ -34,6 +34,15 @@ except ImportError as e:
         PII_AVAILABLE = False
         PII_MODE = "none"
 
+try:
+    # Shared with the Flask app (mounted next to app.py in the knowledge container)
+    from pii_detection_cache import fingerprint, get_pii_detection_cache
+except ImportError:
+    try:
+        from app.utils.pii_detection_cache import fingerprint, get_pii_detection_cache
+    except ImportError:
+        get_pii_detection_cache = None
+
 logger = logging.getLogger(__name__)
 
 class PIIIntegrationService:
@@ -63,6 +72,12 @@ class PIIIntegrationService:
         elif self.pii_available and PII_MODE == "simple":
             # Use simple detector
             self.simple_detector = simple_pii_detector
+            if get_pii_detection_cache is not None:
+                self.detection_cache = get_pii_detection_cache()
+                self.simple_detector_version = fingerprint(simple_pii_detector.patterns)
+            else:
+                self.detection_cache = None
+                logger.info("PII detection cache not available - documents are rescanned every time")
             logger.info("✅ PII Integration Service initialized with simple detector")
         else:
             self.scramblers = {}
@@ -105,11 +120,12 @@ class PIIIntegrationService:
             if self.pii_mode == "simple":
                 # Use simple PII detector
                 logger.info(f"🔍 Running simple PII detection on document {document_id}")
-                pii_results = self.simple_detector.detect_pii(
-                    text=document_text,
-                    mode=detection_mode if detection_mode != "auto" else "healthcare"
-                )
-                return pii_results
+                mode = detection_mode if detection_mode != "auto" else "healthcare"
+                if self.detection_cache is None:
+                    return self.simple_detector.detect_pii(text=document_text, mode=mode)
+
+                # Upload, rescan and approval scan the same text; matches don't depend on mode
+                return self.simple_detector.summarize(self._find_simple_matches(document_text), mode)
 
             else:
                 # Use full scrambler system
@@ -175,6 +191,23 @@ class PIIIntegrationService:
                 "recommendations": []
             }
     
+    def _find_simple_matches(self, text: str) -> List:
+        """Run the simple detector through the detection cache"""
+        cache_key = self.detection_cache.key(text, self.simple_detector_version)
+        records = self.detection_cache.get(cache_key)
+        if records is not None:
+            return [
+                self.simple_detector.build_match(text, record["type"], record["start"], record["end"])
+                for record in records
+            ]
+
+        matches = self.simple_detector.find_matches(text)
+        self.detection_cache.put(cache_key, [
+            {"type": m.pii_type, "start": m.start_pos, "end": m.end_pos}
+            for m in matches
+        ])
+        return matches
+
     async def get_pii_summary_for_honey_jar(self, 
                                           honey_jar_id: str,
                                           user_id: str) -> Dict[str, Any]:
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Rebuild materialized honey jar statistics
+
+honey_jar_stats is kept current by a trigger on the documents table. Use this
+to repair it after bulk loads with triggers disabled, restores, or manual
+edits to documents.
+
+Usage (inside the knowledge container):
+    python scripts/rebuild_honey_jar_stats.py                 # all honey jars
+    python scripts/rebuild_honey_jar_stats.py --jar <uuid>    # one honey jar
+"""
+
+import os
+import sys
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal, HoneyJarRepository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild materialized honey jar document/PII statistics")
+    parser.add_argument('--jar', dest='honey_jar_id', help="Only rebuild this honey jar")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        repo = HoneyJarRepository(db)
+        rebuilt = repo.rebuild_pii_stats(args.honey_jar_id)
+        target = args.honey_jar_id or "all honey jars"
+        logger.info(f"✅ Rebuilt statistics for {target} ({rebuilt} row(s))")
+    except Exception as e:
+        logger.error(f"❌ Failed to rebuild honey jar statistics: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,35 @@
 #!/usr/bin/env python3
 """
 Semantic Search implementation for STING Knowledge Service
-Uses ChromaDB for vector embeddings and similarity search
+Uses ChromaDB for vector embeddings and similarity search, plus a per
+honey jar BM25 index (core/lexical_index.py) for hybrid retrieval
 """
 
 import chromadb
 from chromadb.config import Settings
+import os
+import time
 import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from core.lexical_index import LexicalIndex, reciprocal_rank_fusion
+
+try:
+    # Shared with the Flask app (mounted next to app.py in the knowledge container)
+    from instrumentation import span
+except ImportError:
+    from app.utils.instrumentation import span
 
 logger = logging.getLogger(__name__)
 
+# Hybrid retrieval settings
+HYBRID_RRF_K = int(os.getenv('HYBRID_RRF_K', '60'))
+HYBRID_CANDIDATES = int(os.getenv('HYBRID_CANDIDATES', '20'))  # Per retriever, before fusion
+LEXICAL_INDEX_CHECK_SECONDS = float(os.getenv('LEXICAL_INDEX_CHECK_SECONDS', '30'))
+LEXICAL_INDEX_LOAD_BATCH = 1000
+
 class SemanticSearchEngine:
     """Handles semantic search using ChromaDB"""
     
@@ -36,13 +53,24 @@ class SemanticSearchEngine:
                 logger.error(f"Failed to connect to ChromaDB: {e}")
                 self.available = False
                 self.client = None
+
+        # Lexical indexes are built from each collection on first use and then
+        # kept in step with add/delete; chunks written by other processes
+        # (initialization, upload_file.py) are picked up by a periodic count check
+        self.lexical_indexes: Dict[str, LexicalIndex] = {}
+        self._lexical_checked_at: Dict[str, float] = {}
+        self._lexical_lock = threading.Lock()
+    
+    @staticmethod
+    def _collection_name(honey_jar_id: str) -> str:
+        return f"honey_jar_{honey_jar_id}".replace("-", "_")
     
     def get_or_create_collection(self, honey_jar_id: str) -> Optional[Any]:
         """Get or create a collection for a honey jar"""
         if not self.available:
             return None
             
-        collection_name = f"honey_jar_{honey_jar_id}".replace("-", "_")
+        collection_name = self._collection_name(honey_jar_id)
         
         try:
             # Try to get existing collection
@@ -95,6 +123,10 @@ class SemanticSearchEngine:
                 metadatas=chunk_metadatas
             )
             
+            index = self.lexical_indexes.get(honey_jar_id)
+            if index is not None:
+                index.add(zip(chunk_ids, chunks, chunk_metadatas))
+            
             logger.info(f"Added {len(chunks)} chunks for document {document_id}")
             return True
             
@@ -103,7 +135,7 @@ class SemanticSearchEngine:
             return False
     
     def search(self, query: str, honey_jar_ids: Optional[List[str]] = None, 
-               limit: int = 5) -> List[Dict[str, Any]]:
+               limit: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Perform semantic search across honey jars"""
         if not self.available:
             return []
@@ -134,10 +166,12 @@ class SemanticSearchEngine:
         for honey_jar_id, collection in collections_to_search:
             try:
                 # Query the collection
-                query_results = collection.query(
-                    query_texts=[query],
-                    n_results=limit
-                )
+                with span("chroma.query"):
+                    query_results = collection.query(
+                        query_texts=[query],
+                        n_results=limit,
+                        where=where or None
+                    )
                 
                 # Process results
                 if query_results['documents'] and query_results['documents'][0]:
@@ -179,6 +213,10 @@ class SemanticSearchEngine:
                 where={"document_id": {"$eq": document_id}}
             )
             
+            index = self.lexical_indexes.get(honey_jar_id)
+            if index is not None:
+                index.remove_document(document_id)
+            
             if results['ids']:
                 collection.delete(ids=results['ids'])
                 logger.info(f"Deleted {len(results['ids'])} chunks for document {document_id}")
@@ -206,9 +244,167 @@ class SemanticSearchEngine:
             return {
                 "available": True,
                 "chunk_count": count,
-                "collection_name": f"honey_jar_{honey_jar_id}".replace("-", "_")
+                "collection_name": self._collection_name(honey_jar_id)
             }
             
         except Exception as e:
             logger.error(f"Failed to get collection stats: {e}")
-            return {"available": False, "error": str(e)}
\ No newline at end of file
+            return {"available": False, "error": str(e)}
+
+    def delete_collection(self, honey_jar_id: str) -> bool:
+        """Delete a honey jar's collection and its lexical index"""
+        with self._lexical_lock:
+            self.lexical_indexes.pop(honey_jar_id, None)
+            self._lexical_checked_at.pop(honey_jar_id, None)
+        if not self.available:
+            return False
+        self.client.delete_collection(self._collection_name(honey_jar_id))
+        return True
+    
+    # Lexical (BM25) search
+    
+    def _list_honey_jar_ids(self) -> List[str]:
+        return [
+            coll.metadata.get("honey_jar_id", coll.name)
+            for coll in self.client.list_collections()
+            if coll.name.startswith("honey_jar_")
+        ]
+    
+    def _load_lexical_index(self, collection) -> LexicalIndex:
+        """Build a lexical index from every chunk stored in a collection"""
+        index = LexicalIndex()
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["documents", "metadatas"],
+                limit=LEXICAL_INDEX_LOAD_BATCH,
+                offset=offset
+            )
+            ids = page.get('ids') or []
+            if not ids:
+                break
+            index.add(zip(ids, page['documents'], page['metadatas'] or [{}] * len(ids)))
+            offset += len(ids)
+            if len(ids) < LEXICAL_INDEX_LOAD_BATCH:
+                break
+        return index
+    
+    def get_lexical_index(self, honey_jar_id: str) -> Optional[LexicalIndex]:
+        """Lexical index for a honey jar, built or refreshed from ChromaDB when needed"""
+        index = self.lexical_indexes.get(honey_jar_id)
+        now = time.monotonic()
+        if index is not None and now - self._lexical_checked_at.get(honey_jar_id, 0) < LEXICAL_INDEX_CHECK_SECONDS:
+            return index
+        if not self.available:
+            return index
+        
+        with self._lexical_lock:
+            index = self.lexical_indexes.get(honey_jar_id)
+            if index is not None and now - self._lexical_checked_at.get(honey_jar_id, 0) < LEXICAL_INDEX_CHECK_SECONDS:
+                return index
+            collection = self.get_or_create_collection(honey_jar_id)
+            if not collection:
+                return index
+            try:
+                if index is None or collection.count() != len(index):
+                    started = time.perf_counter()
+                    index = self._load_lexical_index(collection)
+                    self.lexical_indexes[honey_jar_id] = index
+                    logger.info(f"Built lexical index for honey jar {honey_jar_id}: {len(index)} chunks "
+                                f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+                self._lexical_checked_at[honey_jar_id] = now
+            except Exception as e:
+                logger.error(f"Failed to build lexical index for {honey_jar_id}: {e}")
+            return index
+    
+    def lexical_search(self, query: str, honey_jar_ids: Optional[List[str]] = None,
+                       limit: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """BM25 keyword search across honey jars (same result shape as search())"""
+        if honey_jar_ids is None:
+            if not self.available:
+                return []
+            try:
+                honey_jar_ids = self._list_honey_jar_ids()
+            except Exception as e:
+                logger.error(f"Failed to list collections: {e}")
+                return []
+        
+        results = []
+        for honey_jar_id in honey_jar_ids:
+            index = self.get_lexical_index(honey_jar_id)
+            if index is None:
+                continue
+            for score, chunk in index.search(query, limit, where):
+                results.append({
+                    'content': chunk.content,
+                    'score': score,
+                    'honey_jar_id': honey_jar_id,
+                    'metadata': chunk.metadata,
+                    'id': chunk.id
+                })
+        
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results[:limit]
+    
+    # Hybrid search
+    
+    def hybrid_search(self, query: str, honey_jar_ids: Optional[List[str]] = None, limit: int = 5,
+                      where: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Vector + BM25 search fused with reciprocal rank fusion
+        
+        Each retriever returns its top candidates across the requested honey
+        jars; a chunk found by both ranks above one found by either alone.
+        Results keep the search() shape, with 'score' scaled so that a chunk
+        ranked first by both retrievers scores 1.0, plus the per-retriever
+        ranks and scores.
+        
+        Returns:
+            (results, timings) where timings has per-stage milliseconds
+        """
+        started = time.perf_counter()
+        candidates = max(limit, HYBRID_CANDIDATES)
+        
+        if honey_jar_ids is None and self.available:
+            try:
+                honey_jar_ids = self._list_honey_jar_ids()
+            except Exception as e:
+                logger.error(f"Failed to list collections: {e}")
+                honey_jar_ids = []
+        
+        vector_results = self.search(query, honey_jar_ids, candidates, where) if honey_jar_ids else []
+        vector_done = time.perf_counter()
+        lexical_results = self.lexical_search(query, honey_jar_ids, candidates, where) if honey_jar_ids else []
+        lexical_done = time.perf_counter()
+        
+        by_id: Dict[str, Dict[str, Any]] = {}
+        ranked_lists = []
+        for retriever, results in (("vector", vector_results), ("lexical", lexical_results)):
+            ranked = []
+            for rank, result in enumerate(results, start=1):
+                key = result.get('id') or hashlib.md5(result['content'].encode()).hexdigest()
+                entry = by_id.setdefault(key, {**result, 'vector_score': None, 'lexical_score': None,
+                                               'vector_rank': None, 'lexical_rank': None})
+                entry[f'{retriever}_score'] = round(result['score'], 4)
+                entry[f'{retriever}_rank'] = rank
+                ranked.append(key)
+            ranked_lists.append(ranked)
+        
+        best_possible = len(ranked_lists) / (HYBRID_RRF_K + 1)
+        fused = []
+        for key, rrf_score in reciprocal_rank_fusion(ranked_lists, HYBRID_RRF_K)[:limit]:
+            entry = by_id[key]
+            entry['score'] = round(rrf_score / best_possible, 4)
+            entry['rrf_score'] = round(rrf_score, 6)
+            fused.append(entry)
+        finished = time.perf_counter()
+        
+        timings = {
+            'vector_ms': round((vector_done - started) * 1000, 2),
+            'lexical_ms': round((lexical_done - vector_done) * 1000, 2),
+            'fusion_ms': round((finished - lexical_done) * 1000, 2),
+            'total_ms': round((finished - started) * 1000, 2),
+            'vector_candidates': len(vector_results),
+            'lexical_candidates': len(lexical_results)
+        }
+        return fused, timings
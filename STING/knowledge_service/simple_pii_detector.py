@@ -86,49 +86,7 @@ class SimplePIIDetector:
             Dictionary with detection results
         """
         try:
-            matches = []
-            pii_count = 0
-
-            for pii_type, pattern_info in self.patterns.items():
-                pattern = pattern_info['regex']
-                confidence = pattern_info['confidence']
-                description = pattern_info['description']
-
-                for match in re.finditer(pattern, text, re.IGNORECASE):
-                    # Extract context around the match
-                    start = max(0, match.start() - 20)
-                    end = min(len(text), match.end() + 20)
-                    context = text[start:end].replace('\n', ' ').strip()
-
-                    pii_match = PIIMatch(
-                        pii_type=pii_type,
-                        value=match.group(0),
-                        start_pos=match.start(),
-                        end_pos=match.end(),
-                        confidence=confidence,
-                        context=context
-                    )
-                    matches.append(pii_match)
-                    pii_count += 1
-
-            # Generate recommendations based on findings
-            recommendations = self._generate_recommendations(matches, mode)
-
-            return {
-                "pii_detected": pii_count > 0,
-                "detection_count": pii_count,
-                "matches": [
-                    {
-                        "type": m.pii_type,
-                        "description": self.patterns[m.pii_type]['description'],
-                        "confidence": m.confidence,
-                        "context": m.context[:50] + "..." if len(m.context) > 50 else m.context
-                    }
-                    for m in matches
-                ],
-                "recommendations": recommendations,
-                "message": f"Detected {pii_count} PII instances using {mode} mode"
-            }
+            return self.summarize(self.find_matches(text), mode)
 
         except Exception as e:
             logger.error(f"Error during PII detection: {e}")
@@ -140,6 +98,53 @@ class SimplePIIDetector:
                 "message": f"PII detection failed: {str(e)}"
             }
 
+    def find_matches(self, text: str) -> List[PIIMatch]:
+        """Run every pattern over the text (matches don't depend on mode)"""
+        matches = []
+
+        for pii_type, pattern_info in self.patterns.items():
+            for match in re.finditer(pattern_info['regex'], text, re.IGNORECASE):
+                matches.append(self.build_match(text, pii_type, match.start(), match.end()))
+
+        return matches
+
+    def build_match(self, text: str, pii_type: str, start: int, end: int) -> PIIMatch:
+        """Build a match from its position, extracting context around it"""
+        context_start = max(0, start - 20)
+        context_end = min(len(text), end + 20)
+
+        return PIIMatch(
+            pii_type=pii_type,
+            value=text[start:end],
+            start_pos=start,
+            end_pos=end,
+            confidence=self.patterns[pii_type]['confidence'],
+            context=text[context_start:context_end].replace('\n', ' ').strip()
+        )
+
+    def summarize(self, matches: List[PIIMatch], mode: str = "healthcare") -> Dict[str, Any]:
+        """Build the detection result and recommendations for a set of matches"""
+        pii_count = len(matches)
+
+        # Generate recommendations based on findings
+        recommendations = self._generate_recommendations(matches, mode)
+
+        return {
+            "pii_detected": pii_count > 0,
+            "detection_count": pii_count,
+            "matches": [
+                {
+                    "type": m.pii_type,
+                    "description": self.patterns[m.pii_type]['description'],
+                    "confidence": m.confidence,
+                    "context": m.context[:50] + "..." if len(m.context) > 50 else m.context
+                }
+                for m in matches
+            ],
+            "recommendations": recommendations,
+            "message": f"Detected {pii_count} PII instances using {mode} mode"
+        }
+
     def _generate_recommendations(self, matches: List[PIIMatch], mode: str) -> List[str]:
         """Generate compliance recommendations based on detected PII"""
         recommendations = []
@@ -13,12 +13,17 @@ from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Union
 from pathlib import Path
 
+from sanitizer_engine import FileResult, SanitizerEngine, compile_rules
+
 logger = logging.getLogger(__name__)
 
 
 class EnhancedPollenFilter:
     """Enhanced version of pollen filter with support system integration"""
     
+    # re flags every pattern is compiled with
+    PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE | re.DOTALL
+    
     def __init__(self, config_path: Optional[str] = None):
         """Initialize enhanced pollen filter
         
@@ -36,6 +41,11 @@ class EnhancedPollenFilter:
         
         self.patterns = self._initialize_patterns()
         self.realtime_patterns = self._initialize_realtime_patterns()
+        self._engines: Dict[str, SanitizerEngine] = {}
+        self._compiled_realtime = [
+            (re.compile(pattern, re.IGNORECASE), replacement)
+            for pattern, replacement in self.realtime_patterns
+        ]
         
         # Load custom config if provided
         if config_path and os.path.exists(config_path):
@@ -204,6 +214,43 @@ class EnhancedPollenFilter:
             (r'\b(?:\d{1,3}\.){3}\d{1,3}\b', '***IP***'),
         ]
     
+    def _get_engine(self, context: str) -> SanitizerEngine:
+        """Sanitizer engine for the pattern groups used in a context (compiled once)"""
+        pattern_groups = tuple(self._get_patterns_for_context(context))
+        engine = self._engines.get(pattern_groups)
+        if engine is None:
+            rules = compile_rules(self.patterns, regex_key='pattern', flags=self.PATTERN_FLAGS,
+                                  categories=[group for group in pattern_groups if group in self.patterns])
+            engine = self._engines[pattern_groups] = SanitizerEngine(rules)
+        return engine
+    
+    def _record_matches(self, engine: SanitizerEngine, counts: List[int],
+                        original_length: int, sanitized_length: int) -> Dict:
+        """Add per-rule match counts to the stats and build the sanitization stats"""
+        matches_found = {}
+        for rule, match_count in zip(engine.rules, counts):
+            if match_count > 0:
+                group_name = rule.category
+                matches_found[group_name] = matches_found.get(group_name, 0) + match_count
+                self.stats['patterns_matched'] += match_count
+                
+                # Track by category
+                category_key = f"{group_name}_instances"
+                if category_key in self.stats:
+                    self.stats[category_key] += match_count
+        
+        # Update stats
+        bytes_redacted = original_length - sanitized_length
+        self.stats['bytes_redacted'] += bytes_redacted
+        
+        return {
+            'original_size': original_length,
+            'sanitized_size': sanitized_length,
+            'bytes_redacted': bytes_redacted,
+            'patterns_matched': matches_found,
+            'sanitization_effectiveness': len(matches_found) > 0
+        }
+    
     def sanitize_content(self, content: str, context: str = 'general') -> Tuple[str, Dict]:
         """
         Sanitize content and return sanitized version with statistics
@@ -215,58 +262,19 @@ class EnhancedPollenFilter:
         Returns:
             Tuple of (sanitized_content, sanitization_stats)
         """
-        original_length = len(content)
-        sanitized_content = content
-        matches_found = {}
-        
         # Apply pattern groups based on context
-        pattern_groups = self._get_patterns_for_context(context)
-        
-        for group_name in pattern_groups:
-            if group_name not in self.patterns:
-                continue
-                
-            group_matches = 0
-            for pattern_info in self.patterns[group_name]:
-                pattern = pattern_info['pattern']
-                replacement = pattern_info['replacement']
-                
-                # Apply pattern and count matches
-                new_content, match_count = re.subn(
-                    pattern, replacement, sanitized_content, flags=re.IGNORECASE | re.MULTILINE | re.DOTALL
-                )
-                
-                if match_count > 0:
-                    sanitized_content = new_content
-                    group_matches += match_count
-                    self.stats['patterns_matched'] += match_count
-                    
-                    # Track by category
-                    category_key = f"{group_name}_instances"
-                    if category_key in self.stats:
-                        self.stats[category_key] += match_count
-            
-            if group_matches > 0:
-                matches_found[group_name] = group_matches
-        
-        # Update stats
-        bytes_redacted = original_length - len(sanitized_content)
-        self.stats['bytes_redacted'] += bytes_redacted
-        
-        sanitization_stats = {
-            'original_size': original_length,
-            'sanitized_size': len(sanitized_content),
-            'bytes_redacted': bytes_redacted,
-            'patterns_matched': matches_found,
-            'sanitization_effectiveness': len(matches_found) > 0
-        }
+        engine = self._get_engine(context)
+        sanitized_content, counts = engine.sanitize(content)
         
+        sanitization_stats = self._record_matches(engine, counts, len(content), len(sanitized_content))
         return sanitized_content, sanitization_stats
     
     def sanitize_file(self, file_path: str, output_path: Optional[str] = None) -> Dict:
         """
         Sanitize a file and optionally save to new location
         
+        Large files are streamed in batches of lines rather than read whole.
+        
         Args:
             file_path: Path to file to sanitize
             output_path: Optional output path (default: add .sanitized suffix)
@@ -274,32 +282,25 @@ class EnhancedPollenFilter:
         Returns:
             Dictionary with sanitization results
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-        except Exception as e:
-            logger.error(f"Failed to read file {file_path}: {e}")
-            return {'success': False, 'error': str(e)}
-        
         # Determine context from file extension/path
         context = self._determine_file_context(file_path)
-        
-        # Sanitize content
-        sanitized_content, stats = self.sanitize_content(content, context)
+        engine = self._get_engine(context)
         
         # Determine output path
         if not output_path:
             path_obj = Path(file_path)
             output_path = str(path_obj.with_suffix(f'.sanitized{path_obj.suffix}'))
         
-        # Write sanitized content
+        # Sanitize content and write it out
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(sanitized_content)
+            result: FileResult = engine.sanitize_file(
+                file_path, output_path, errors='ignore', write_unchanged=True
+            )
         except Exception as e:
-            logger.error(f"Failed to write sanitized file {output_path}: {e}")
+            logger.error(f"Failed to sanitize file {file_path} to {output_path}: {e}")
             return {'success': False, 'error': str(e)}
         
+        stats = self._record_matches(engine, result.counts, result.original_size, result.sanitized_size)
         self.stats['files_processed'] += 1
         
         return {
@@ -322,8 +323,8 @@ class EnhancedPollenFilter:
         """
         sanitized_line = log_line
         
-        for pattern, replacement in self.realtime_patterns:
-            sanitized_line = re.sub(pattern, replacement, sanitized_line, flags=re.IGNORECASE)
+        for pattern, replacement in self._compiled_realtime:
+            sanitized_line = pattern.sub(replacement, sanitized_line)
         
         return sanitized_line
     
@@ -428,6 +429,7 @@ class EnhancedPollenFilter:
                         self.patterns[group].extend(patterns)
                     else:
                         self.patterns[group] = patterns
+                self._engines.clear()
             
             logger.info(f"Loaded custom sanitization config from {config_path}")
             
@@ -15,6 +15,10 @@ from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 import mimetypes
 
+from sanitizer_engine import (
+    FileResult, SanitizerEngine, compile_rules, default_workers, parallel_map
+)
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -29,6 +33,9 @@ class PollenFilter:
     while preserving the structure and diagnostic value of logs.
     """
     
+    # re flags every pattern is compiled with
+    PATTERN_FLAGS = re.MULTILINE | re.DOTALL
+    
     def __init__(self, config_file: Optional[str] = None):
         self.stats = {
             'files_processed': 0,
@@ -39,11 +46,19 @@ class PollenFilter:
         
         # Default sensitive data patterns
         self.patterns = self._get_default_patterns()
+        self._engine = None
         
         # Load custom patterns if config file provided
         if config_file and os.path.exists(config_file):
             self._load_config(config_file)
     
+    @property
+    def engine(self) -> SanitizerEngine:
+        """Sanitizer engine with the current patterns compiled"""
+        if self._engine is None:
+            self._engine = SanitizerEngine(compile_rules(self.patterns, flags=self.PATTERN_FLAGS))
+        return self._engine
+    
     def _get_default_patterns(self) -> Dict[str, List[Dict]]:
         """
         Define default patterns for sensitive data detection.
@@ -197,6 +212,7 @@ class PollenFilter:
                         self.patterns[category].extend(patterns)
                     else:
                         self.patterns[category] = patterns
+                self._engine = None
                         
             logger.info(f"Loaded custom patterns from {config_file}")
             
@@ -241,79 +257,69 @@ class PollenFilter:
         Filter sensitive content from a string.
         Returns (filtered_content, number_of_matches)
         """
-        filtered_content = content
-        total_matches = 0
-        
-        for category, patterns in self.patterns.items():
-            for pattern_info in patterns:
-                regex = pattern_info['regex']
-                replacement = pattern_info['replacement']
-                
-                try:
-                    # Use re.MULTILINE and re.DOTALL for better matching
-                    matches = re.findall(regex, filtered_content, re.MULTILINE | re.DOTALL)
-                    if matches:
-                        match_count = len(matches)
-                        total_matches += match_count
-                        
-                        # Apply the replacement
-                        filtered_content = re.sub(regex, replacement, filtered_content, flags=re.MULTILINE | re.DOTALL)
-                        
-                        logger.debug(f"Applied {category} filter to {file_path}: {match_count} matches ({pattern_info['description']})")
-                        
-                except re.error as e:
-                    logger.warning(f"Invalid regex in {category}: {regex} - {e}")
-                    continue
-        
-        return filtered_content, total_matches
+        filtered_content, counts = self.engine.sanitize(content)
+        self._log_matches(counts, file_path)
+        return filtered_content, sum(counts)
     
-    def filter_file(self, file_path: str) -> bool:
+    def _log_matches(self, counts: List[int], file_path: str):
+        """Log which filters matched in a file"""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        for rule, match_count in zip(self.engine.rules, counts):
+            if match_count:
+                logger.debug(f"Applied {rule.category} filter to {file_path}: {match_count} matches ({rule.info['description']})")
+    
+    def _sanitize_path(self, file_path: str) -> Optional[FileResult]:
         """
-        Filter a single file.
-        Returns True if file was processed (regardless of whether changes were made)
+        Sanitize a file in place if it is text.
+        Returns None for skipped (binary) or unreadable files
         """
         try:
             if not self._is_text_file(file_path):
                 logger.debug(f"Skipping binary file: {file_path}")
-                return False
+                return None
             
-            # Read file content
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    original_content = f.read()
-            except UnicodeDecodeError:
-                # Try with latin-1 encoding as fallback
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    original_content = f.read()
-            
-            # Apply filtering
-            filtered_content, match_count = self._filter_content(original_content, file_path)
-            
-            # Update statistics
-            self.stats['files_processed'] += 1
-            
-            if match_count > 0:
-                # Write filtered content back
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(filtered_content)
-                
-                self.stats['files_filtered'] += 1
-                self.stats['patterns_matched'] += match_count
-                self.stats['bytes_filtered'] += len(original_content) - len(filtered_content)
-                
-                logger.info(f"Filtered {file_path}: {match_count} sensitive patterns removed")
-            else:
-                logger.debug(f"No sensitive patterns found in {file_path}")
-            
-            return True
+            # Fall back to latin-1 for files that aren't valid UTF-8;
+            # large files are streamed in batches of lines
+            return self.engine.sanitize_file(file_path, encodings=('utf-8', 'latin-1'))
             
         except Exception as e:
             logger.error(f"Error filtering {file_path}: {e}")
+            return None
+    
+    def _record_result(self, file_path: str, result: Optional[FileResult]) -> bool:
+        """
+        Add a file's result to the statistics.
+        Returns True if the file was processed
+        """
+        if result is None:
             return False
+        
+        self.stats['files_processed'] += 1
+        
+        if result.match_count > 0:
+            self._log_matches(result.counts, file_path)
+            self.stats['files_filtered'] += 1
+            self.stats['patterns_matched'] += result.match_count
+            self.stats['bytes_filtered'] += result.original_size - result.sanitized_size
+            
+            logger.info(f"Filtered {file_path}: {result.match_count} sensitive patterns removed")
+        else:
+            logger.debug(f"No sensitive patterns found in {file_path}")
+        
+        return True
     
-    def filter_directory(self, directory_path: str) -> bool:
+    def filter_file(self, file_path: str) -> bool:
+        """
+        Filter a single file.
+        Returns True if file was processed (regardless of whether changes were made)
+        """
+        return self._record_result(file_path, self._sanitize_path(file_path))
+    
+    def filter_directory(self, directory_path: str, workers: Optional[int] = None) -> bool:
         """
         Recursively filter all files in a directory.
+        Files are spread across `workers` processes (default: one per CPU).
         Returns True if successful
         """
         try:
@@ -332,13 +338,16 @@ class PollenFilter:
             
             logger.info(f"Found {len(all_files)} files to examine")
             
-            # Process each file
-            for file_path in all_files:
-                try:
-                    self.filter_file(file_path)
-                except Exception as e:
-                    logger.warning(f"Skipping {file_path}: {e}")
-                    continue
+            # Process each file, in worker processes when there's more than one
+            workers = workers or default_workers()
+            if workers > 1 and len(all_files) > 1:
+                results = parallel_map(_filter_in_worker, all_files, workers,
+                                       initializer=_init_worker, initargs=(self.patterns,))
+            else:
+                results = map(self._sanitize_path, all_files)
+            
+            for file_path, result in zip(all_files, results):
+                self._record_result(file_path, result)
             
             # Report statistics
             logger.info(f"Filtering complete:")
@@ -425,6 +434,17 @@ class PollenFilter:
         
         logger.info(f"Filter pattern report saved to: {output_file}")
 
+# Filter used by each worker process in filter_directory
+_worker_filter: Optional[PollenFilter] = None
+
+def _init_worker(patterns: Dict[str, List[Dict]]):
+    global _worker_filter
+    _worker_filter = PollenFilter()
+    _worker_filter.patterns = patterns
+
+def _filter_in_worker(file_path: str) -> Optional[FileResult]:
+    return _worker_filter._sanitize_path(file_path)
+
 def main():
     parser = argparse.ArgumentParser(
         description="🧹 STING Pollen Filter - Remove sensitive data from diagnostic bundles",
@@ -450,6 +470,7 @@ Examples:
     parser.add_argument('--test', action='store_true', help='Test filter patterns')
     parser.add_argument('--report', help='Generate filter pattern report')
     parser.add_argument('--verbose', action='store_true', help='Verbose output')
+    parser.add_argument('--workers', type=int, help='Worker processes for directories (default: one per CPU)')
     
     args = parser.parse_args()
     
@@ -476,7 +497,7 @@ Examples:
     
     # Filter the specified path
     if os.path.isdir(args.path):
-        success = filter_instance.filter_directory(args.path)
+        success = filter_instance.filter_directory(args.path, workers=args.workers)
     elif os.path.isfile(args.path):
         success = filter_instance.filter_file(args.path)
     else:
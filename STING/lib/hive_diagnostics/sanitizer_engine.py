@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+"""
+🧹 STING Sanitizer Engine - Shared matching core for the pollen filters
+Used by pollen_filter.py, enhanced_pollen_filter.py and vault_pollen_filter.py
+
+- Patterns are compiled once per filter, not re-parsed for every file
+- Each rule is one subn() pass that both replaces and counts
+- Files over STREAM_THRESHOLD are read in batches of whole lines, so
+  multi-gigabyte logs never sit in memory at once
+- Directories are spread across a process pool
+
+Rules run in order, each over the output of the previous one, exactly as the
+filters always applied them, so output is unchanged for any file that fits in
+one batch. Batches never split a PEM block (up to MAX_BATCH_SIZE), but other
+matches cannot span two batches of a streamed file.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Files larger than this are sanitized in batches instead of read whole
+STREAM_THRESHOLD = 64 * 1024 * 1024
+
+# Target batch size when streaming, and the most a batch may grow to keep
+# a PEM block together
+BATCH_SIZE = 8 * 1024 * 1024
+MAX_BATCH_SIZE = 4 * BATCH_SIZE
+
+PEM_BEGIN = '-----BEGIN '
+PEM_END = '-----END '
+
+
+@dataclass
+class SanitizerRule:
+    """A compiled pattern with its replacement and the config it came from"""
+    category: str
+    pattern: re.Pattern
+    replacement: Union[str, Callable[[re.Match], str]]
+    info: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class FileResult:
+    """Outcome of sanitizing one file; sizes are in characters"""
+    counts: List[int]
+    original_size: int = 0
+    sanitized_size: int = 0
+    written: bool = False
+
+    @property
+    def match_count(self) -> int:
+        return sum(self.counts)
+
+
+def compile_rules(patterns: Dict[str, List[Dict]],
+                  regex_key: str = 'regex',
+                  replacement_key: str = 'replacement',
+                  flags: int = 0,
+                  categories: Optional[Sequence[str]] = None,
+                  replacement_factory: Optional[Callable[[Dict], Any]] = None) -> List[SanitizerRule]:
+    """
+    Compile a filter's pattern table into ordered rules.
+
+    Args:
+        patterns: {category: [pattern dict, ...]} as defined by each filter
+        regex_key: Key holding the regex in each pattern dict
+        replacement_key: Key holding the replacement string
+        flags: re flags for every pattern
+        categories: Only these categories, in this order (default: all)
+        replacement_factory: Builds the replacement from a pattern dict
+            (for callable replacements); overrides replacement_key
+
+    Invalid regexes are logged once here and skipped.
+    """
+    rules = []
+    for category in (categories if categories is not None else patterns.keys()):
+        for info in patterns.get(category, []):
+            regex = info[regex_key]
+            try:
+                compiled = re.compile(regex, flags)
+            except re.error as e:
+                logger.warning(f"Invalid regex in {category}: {regex} - {e}")
+                continue
+
+            if replacement_factory is not None:
+                replacement = replacement_factory(info)
+            else:
+                replacement = info.get(replacement_key, '[FILTERED]')
+            rules.append(SanitizerRule(category, compiled, replacement, info))
+    return rules
+
+
+class SanitizerEngine:
+    """
+    Applies an ordered list of rules to strings, line streams and files.
+    """
+
+    def __init__(self, rules: List[SanitizerRule],
+                 stream_threshold: int = STREAM_THRESHOLD,
+                 batch_size: int = BATCH_SIZE):
+        self.rules = rules
+        self.stream_threshold = stream_threshold
+        self.batch_size = batch_size
+
+    def sanitize(self, text: str) -> Tuple[str, List[int]]:
+        """
+        Apply every rule in order.
+        Returns (sanitized_text, match count per rule)
+        """
+        counts = []
+        for rule in self.rules:
+            text, count = rule.pattern.subn(rule.replacement, text)
+            counts.append(count)
+        return text, counts
+
+    def iter_batches(self, lines: Iterable[str]) -> Iterator[str]:
+        """Group lines into batches of about batch_size, keeping PEM blocks whole"""
+        batch = []
+        size = 0
+        in_pem_block = False
+
+        for line in lines:
+            batch.append(line)
+            size += len(line)
+
+            if PEM_BEGIN in line:
+                in_pem_block = PEM_END not in line[line.rindex(PEM_BEGIN):]
+            elif in_pem_block and PEM_END in line:
+                in_pem_block = False
+
+            if size >= self.batch_size and (not in_pem_block or size >= MAX_BATCH_SIZE):
+                yield ''.join(batch)
+                batch = []
+                size = 0
+                in_pem_block = False
+
+        if batch:
+            yield ''.join(batch)
+
+    def sanitize_lines(self, lines: Iterable[str], write: Callable[[str], Any]) -> FileResult:
+        """
+        Sanitize a stream of lines batch by batch, passing output to write().
+        """
+        result = FileResult(counts=[0] * len(self.rules))
+        for batch in self.iter_batches(lines):
+            sanitized, counts = self.sanitize(batch)
+            write(sanitized)
+            result.counts = [total + count for total, count in zip(result.counts, counts)]
+            result.original_size += len(batch)
+            result.sanitized_size += len(sanitized)
+        return result
+
+    def sanitize_file(self, path: str,
+                      output_path: Optional[str] = None,
+                      encodings: Sequence[str] = ('utf-8',),
+                      errors: str = 'strict',
+                      write_unchanged: bool = False) -> FileResult:
+        """
+        Sanitize a file, streaming it if it is larger than stream_threshold.
+
+        Args:
+            path: File to read
+            output_path: Where to write (default: overwrite path)
+            encodings: Encodings to try in order on UnicodeDecodeError
+            errors: Decode error handling passed to open()
+            write_unchanged: Write output even if nothing matched
+
+        Returns:
+            FileResult (written is False if nothing matched and
+            write_unchanged is not set)
+        """
+        output_path = str(output_path or path)
+        streamed = os.path.getsize(path) > self.stream_threshold
+
+        for attempt, encoding in enumerate(encodings):
+            try:
+                if streamed:
+                    return self._sanitize_streamed(path, output_path, encoding, errors, write_unchanged)
+
+                with open(path, 'r', encoding=encoding, errors=errors) as f:
+                    content = f.read()
+                break
+            except UnicodeDecodeError:
+                if attempt == len(encodings) - 1:
+                    raise
+
+        sanitized, counts = self.sanitize(content)
+        result = FileResult(counts, len(content), len(sanitized))
+        if result.match_count or write_unchanged:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(sanitized)
+            result.written = True
+        return result
+
+    def _sanitize_streamed(self, path: str, output_path: str, encoding: str,
+                           errors: str, write_unchanged: bool) -> FileResult:
+        """Stream path through the rules into a temp file, then move it into place"""
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(dir=output_dir, prefix='.pollen-', suffix='.tmp')
+        try:
+            with open(path, 'r', encoding=encoding, errors=errors) as source, \
+                    os.fdopen(fd, 'w', encoding='utf-8') as target:
+                result = self.sanitize_lines(source, target.write)
+
+            if result.match_count or write_unchanged:
+                if os.path.exists(output_path):
+                    shutil.copymode(output_path, temp_path)
+                os.replace(temp_path, output_path)
+                result.written = True
+            return result
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+
+def parallel_map(func: Callable, items: Sequence, workers: int,
+                 initializer: Optional[Callable] = None, initargs: tuple = ()) -> Iterator:
+    """
+    Yield func(item) for each item, in order, from a process pool.
+
+    initializer(*initargs) runs once per worker process to build its filter;
+    func must be a module-level function so it can be pickled.
+    """
+    workers = min(workers, len(items))
+    chunksize = max(1, len(items) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        yield from pool.map(func, items, chunksize=chunksize)
+
+
+def default_workers() -> int:
+    """Worker processes to use when none are requested"""
+    return os.cpu_count() or 1
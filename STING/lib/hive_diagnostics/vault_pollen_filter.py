@@ -20,6 +20,8 @@ import mimetypes
 from dataclasses import dataclass
 from enum import Enum
 
+from sanitizer_engine import SanitizerEngine, compile_rules, default_workers, parallel_map
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -75,6 +77,7 @@ class VaultPollenFilter:
     
     def __init__(self, config_file: Optional[str] = None, vault_enabled: bool = True):
         self.vault_enabled = vault_enabled
+        self.config_file = config_file
         self.stats = {
             'files_processed': 0,
             'files_filtered': 0,
@@ -94,6 +97,41 @@ class VaultPollenFilter:
         # Load custom patterns if config file provided
         if config_file and os.path.exists(config_file):
             self._load_config(config_file)
+        
+        self._engine = None
+    
+    @property
+    def engine(self) -> SanitizerEngine:
+        """Sanitizer engine with the current patterns compiled"""
+        if self._engine is None:
+            self._engine = SanitizerEngine(
+                compile_rules(self.patterns, replacement_factory=self._build_replacement)
+            )
+        return self._engine
+    
+    def _build_replacement(self, pattern_info: Dict):
+        """Replacement for a pattern: a Vault reference builder, or its fixed replacement"""
+        if 'replacement_func' not in pattern_info:
+            # Fallback to simple replacement
+            return pattern_info.get('replacement', '[FILTERED]')
+        
+        def replacer(match):
+            # Get the replacement parts
+            replacement = pattern_info['replacement_func'](match)
+            # Rebuild the full replacement maintaining structure
+            if match.groups():
+                # Preserve non-sensitive parts
+                result = ""
+                for i, group in enumerate(match.groups(), 1):
+                    if i == 2:  # Assuming sensitive data is always in group 2
+                        result += replacement
+                    else:
+                        result += group if group is not None else ""
+                return result
+            else:
+                return replacement
+        
+        return replacer
     
     def _get_vault_aware_patterns(self) -> Dict[str, List[Dict]]:
         """
@@ -327,55 +365,24 @@ class VaultPollenFilter:
         Filter content and replace sensitive data with Vault references.
         Returns tuple of (filtered_content, was_modified).
         """
-        original_content = content
-        modified = False
-        
-        for category_name, pattern_list in self.patterns.items():
-            for pattern_info in pattern_list:
-                regex = pattern_info['regex']
-                
-                # Check if pattern uses replacement function (Vault-aware)
-                if 'replacement_func' in pattern_info:
-                    def replacer(match):
-                        nonlocal modified
-                        modified = True
-                        self.stats['patterns_matched'] += 1
-                        # Get the replacement parts
-                        replacement = pattern_info['replacement_func'](match)
-                        # Rebuild the full replacement maintaining structure
-                        if match.groups():
-                            # Preserve non-sensitive parts
-                            result = ""
-                            group_index = 1
-                            for i, group in enumerate(match.groups(), 1):
-                                if i == 2:  # Assuming sensitive data is always in group 2
-                                    result += replacement
-                                else:
-                                    result += group if group is not None else ""
-                            return result
-                        else:
-                            return replacement
-                    
-                    content = re.sub(regex, replacer, content)
-                else:
-                    # Fallback to simple replacement
-                    matches = re.findall(regex, content)
-                    if matches:
-                        modified = True
-                        self.stats['patterns_matched'] += len(matches)
-                        content = re.sub(regex, pattern_info.get('replacement', '[FILTERED]'), content)
+        filtered_content, counts = self.engine.sanitize(content)
+        self._record_matches(sum(counts), len(content) - len(filtered_content), file_path)
+        return filtered_content, sum(counts) > 0
+    
+    def _record_matches(self, match_count: int, bytes_filtered: int, file_path: str):
+        """Add one file's matches to the stats"""
+        self.stats['patterns_matched'] += match_count
         
         # Update stats
-        if modified:
-            self.stats['bytes_filtered'] += len(original_content) - len(content)
+        if match_count:
+            self.stats['bytes_filtered'] += bytes_filtered
             self.stats['files_filtered'] += 1
             logger.debug(f"Filtered content in {file_path}: {self.stats['patterns_matched']} patterns matched")
-        
-        return content, modified
     
     def filter_file(self, file_path: str, output_path: Optional[str] = None) -> bool:
         """
         Filter a single file and optionally save to output path.
+        Large files are streamed in batches of lines rather than read whole.
         Returns True if file was modified.
         """
         try:
@@ -388,22 +395,16 @@ class VaultPollenFilter:
                 logger.debug(f"Skipping binary file: {file_path}")
                 return False
             
-            # Read file content
+            # Filter content, saving it only if something matched
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-            except Exception as e:
+                result = self.engine.sanitize_file(str(file_path), output_path, errors='ignore')
+            except OSError as e:
                 logger.warning(f"Could not read {file_path}: {e}")
                 return False
             
-            # Filter content
-            filtered_content, was_modified = self.filter_content(content, str(file_path))
+            self._record_matches(result.match_count, result.original_size - result.sanitized_size, str(file_path))
             
-            # Save filtered content
-            if was_modified:
-                output_file = output_path or file_path
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(filtered_content)
+            if result.written:
                 logger.info(f"🧹 Filtered: {file_path}")
                 return True
             else:
@@ -414,9 +415,31 @@ class VaultPollenFilter:
             logger.error(f"Error processing {file_path}: {e}")
             return False
     
-    def filter_directory(self, directory_path: str, output_dir: Optional[str] = None) -> Dict[str, Any]:
+    def _reset_state(self):
+        """Clear stats and references (worker processes report per file)"""
+        self.stats = {key: [] if isinstance(value, list) else 0 for key, value in self.stats.items()}
+        self.vault_references = {}
+        self.reference_cache = {}
+    
+    def _merge_worker_result(self, stats: Dict[str, Any], vault_references: Dict[str, VaultReference]):
+        """Fold a worker's per-file stats and Vault references into this filter"""
+        for key in ('files_processed', 'files_filtered', 'patterns_matched', 'bytes_filtered'):
+            self.stats[key] += stats[key]
+        
+        # The same value seen in several files is still one reference
+        for cache_key, vault_ref in vault_references.items():
+            if cache_key in self.vault_references:
+                continue
+            self.vault_references[cache_key] = vault_ref
+            self.reference_cache[cache_key] = vault_ref.to_vault_ref()
+            self.stats['audit_entries'].append(vault_ref.to_audit_entry())
+            self.stats['vault_references_created'] += 1
+    
+    def filter_directory(self, directory_path: str, output_dir: Optional[str] = None,
+                         workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Recursively filter all files in a directory.
+        Files are spread across `workers` processes (default: one per CPU).
         Returns statistics about the filtering operation.
         """
         directory = Path(directory_path)
@@ -431,7 +454,8 @@ class VaultPollenFilter:
             'errors': []
         }
         
-        # Process all text files recursively
+        # Collect all files recursively, with their output paths
+        jobs = []
         for file_path in directory.rglob('*'):
             if file_path.is_file():
                 results['total_files'] += 1
@@ -444,18 +468,29 @@ class VaultPollenFilter:
                         output_file.parent.mkdir(parents=True, exist_ok=True)
                     else:
                         output_file = None
-                    
-                    # Filter the file
-                    if self.filter_file(file_path, output_file):
-                        results['filtered_files'] += 1
-                    else:
-                        results['skipped_files'] += 1
+                    jobs.append((str(file_path), str(output_file) if output_file else None))
                         
                 except Exception as e:
                     error_msg = f"Error processing {file_path}: {e}"
                     results['errors'].append(error_msg)
                     logger.error(error_msg)
         
+        # Filter the files, in worker processes when there's more than one
+        workers = workers or default_workers()
+        if workers > 1 and len(jobs) > 1:
+            for was_modified, stats, vault_references in parallel_map(
+                _filter_in_worker, jobs, workers,
+                initializer=_init_worker, initargs=(self.config_file, self.vault_enabled)
+            ):
+                self._merge_worker_result(stats, vault_references)
+                results['filtered_files' if was_modified else 'skipped_files'] += 1
+        else:
+            for file_path, output_file in jobs:
+                if self.filter_file(file_path, output_file):
+                    results['filtered_files'] += 1
+                else:
+                    results['skipped_files'] += 1
+        
         return results
     
     def generate_audit_report(self) -> Dict[str, Any]:
@@ -526,6 +561,19 @@ class VaultPollenFilter:
             json.dump(report, f, indent=2, default=str)
         logger.info(f"📊 Audit report saved to: {output_file}")
 
+# Filter used by each worker process in filter_directory
+_worker_filter: Optional[VaultPollenFilter] = None
+
+def _init_worker(config_file: Optional[str], vault_enabled: bool):
+    global _worker_filter
+    _worker_filter = VaultPollenFilter(config_file=config_file, vault_enabled=vault_enabled)
+
+def _filter_in_worker(job: Tuple[str, Optional[str]]) -> Tuple[bool, Dict[str, Any], Dict[str, VaultReference]]:
+    file_path, output_file = job
+    _worker_filter._reset_state()
+    was_modified = _worker_filter.filter_file(file_path, output_file)
+    return was_modified, _worker_filter.stats, _worker_filter.vault_references
+
 def main():
     """Command-line interface for the Vault Pollen Filter"""
     parser = argparse.ArgumentParser(
@@ -541,6 +589,8 @@ def main():
     parser.add_argument('--audit-report', help='Save audit report to file')
     parser.add_argument('-v', '--verbose', action='store_true', 
                        help='Enable verbose logging')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for directories (default: one per CPU)')
     
     args = parser.parse_args()
     
@@ -566,7 +616,7 @@ def main():
         elif input_path.is_dir():
             # Filter directory
             logger.info(f"🧹 Filtering directory: {input_path}")
-            results = filter_engine.filter_directory(str(input_path), args.output)
+            results = filter_engine.filter_directory(str(input_path), args.output, workers=args.workers)
             
             # Display results
             logger.info(f"📊 Filtering Results:")
@@ -0,0 +1,393 @@
+"""
+Per-bot answer cache for Public Bee widget traffic
+
+Public bots see the same few dozen questions over and over, and each one
+costs a honey jar search plus a full LLM call. AnswerCache keeps two tiers
+per bot:
+- Exact: the normalized question (case, punctuation and whitespace folded)
+- Semantic: near-duplicate questions whose embedding cosine similarity is at
+  least PUBLIC_BEE_ANSWER_CACHE_SIMILARITY (embeddings come from the external
+  AI service's /knowledge/embeddings endpoint)
+
+Entries belong to a scope of (system prompt version, honey jar content
+version). The prompt version hashes the bot's system prompt and response
+guidelines; the content version is built from each jar's last_updated and
+document_count, refreshed at most every PUBLIC_BEE_JAR_VERSION_TTL seconds.
+Jar metadata is read with the knowledge service key (KNOWLEDGE_SYSTEM_API_KEY).
+When either changes the bot's cache is dropped.
+
+Per-bot overrides can be set in response_guidelines:
+    answer_cache_enabled, answer_cache_similarity_threshold, answer_cache_ttl_seconds
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models import PublicBot
+from http_clients import get_http_client
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_question(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different questions match"""
+    return _WHITESPACE.sub(' ', _NON_WORD.sub(' ', text.lower())).strip()
+
+
+def _unit_vector(vector: List[float]) -> Optional[np.ndarray]:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    if not norm:
+        return None
+    return array / norm
+
+
+class _CacheEntry:
+    __slots__ = ('question', 'response', 'sources', 'vector', 'created_at', 'hits')
+
+    def __init__(self, question: str, response: str, sources: List[Dict[str, Any]],
+                 vector: Optional[np.ndarray]):
+        self.question = question
+        self.response = response
+        self.sources = sources
+        self.vector = vector
+        self.created_at = time.monotonic()
+        self.hits = 0
+
+
+class _BotCache:
+    """Entries and counters for one bot"""
+
+    def __init__(self):
+        self.scope: Optional[Tuple[str, str]] = None
+        self.entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        # Stacked unit vectors of entries that have one, rebuilt after changes
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._matrix_dirty = True
+        # Questions currently being answered; concurrent askers wait for the first
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def changed(self):
+        self._matrix_dirty = True
+
+    def nearest(self, vector: np.ndarray) -> Tuple[Optional[str], float]:
+        """Key and cosine similarity of the closest cached question"""
+        if self._matrix_dirty:
+            keyed = [(key, entry.vector) for key, entry in self.entries.items() if entry.vector is not None]
+            self._matrix_keys = [key for key, _ in keyed]
+            self._matrix = np.vstack([v for _, v in keyed]) if keyed else None
+            self._matrix_dirty = False
+        if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+            return None, 0.0
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        return self._matrix_keys[best], float(scores[best])
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'exact_hits': self.exact_hits,
+            'semantic_hits': self.semantic_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'prompt_version': self.scope[0] if self.scope else None,
+            'content_version': self.scope[1] if self.scope else None
+        }
+
+
+class AnswerLookup:
+    """Result of AnswerCache.lookup; pass it to store() and release() on a miss"""
+
+    __slots__ = ('bot_id', 'scope', 'key', 'question', 'vector', 'hit', 'match', 'similarity', 'future')
+
+    def __init__(self, bot_id: str, scope: Tuple[str, str], key: str, question: str):
+        self.bot_id = bot_id
+        self.scope = scope
+        self.key = key
+        self.question = question
+        self.vector: Optional[np.ndarray] = None
+        self.hit: Optional[Dict[str, Any]] = None
+        self.match: Optional[str] = None  # 'exact' or 'semantic'
+        self.similarity: Optional[float] = None
+        # Set when this request is the one answering the question for concurrent askers
+        self.future: Optional[asyncio.Future] = None
+
+
+class AnswerCache:
+    """Tiered exact + semantic answer cache, scoped per bot"""
+
+    def __init__(self):
+        self.enabled = os.getenv('PUBLIC_BEE_ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ttl_seconds = float(os.getenv('PUBLIC_BEE_ANSWER_CACHE_TTL_SECONDS', '3600'))
+        self.max_entries_per_bot = int(os.getenv('PUBLIC_BEE_ANSWER_CACHE_MAX_ENTRIES', '500'))
+        self.similarity_threshold = float(os.getenv('PUBLIC_BEE_ANSWER_CACHE_SIMILARITY', '0.92'))
+        self.semantic_enabled = os.getenv('PUBLIC_BEE_ANSWER_CACHE_SEMANTIC', 'true').lower() == 'true'
+        self.jar_version_ttl = float(os.getenv('PUBLIC_BEE_JAR_VERSION_TTL', '60'))
+
+        self.knowledge_service_url = os.getenv('KNOWLEDGE_SERVICE_URL', 'http://knowledge:8090')
+        self.external_ai_url = os.getenv('EXTERNAL_AI_URL', 'http://external-ai:8091')
+        # Service key for reading jar metadata; /honey-jars/{id} requires auth outside dev mode
+        self.knowledge_api_key = os.getenv('KNOWLEDGE_SYSTEM_API_KEY', '')
+
+        self._bots: Dict[str, _BotCache] = {}
+        # jar_id -> (version string, fetched_at)
+        self._jar_versions: Dict[str, Tuple[str, float]] = {}
+
+        self.embedding_failures = 0
+
+    # ------------------------------------------------------------------
+    # Per-bot settings
+    # ------------------------------------------------------------------
+
+    def _setting(self, bot: PublicBot, name: str, default):
+        guidelines = bot.response_guidelines or {}
+        value = guidelines.get(f'answer_cache_{name}')
+        return default if value is None else value
+
+    def enabled_for(self, bot: PublicBot) -> bool:
+        return self.enabled and bool(self._setting(bot, 'enabled', True))
+
+    # ------------------------------------------------------------------
+    # Scope (prompt version + honey jar content version)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def prompt_version(bot: PublicBot) -> str:
+        payload = json.dumps([bot.system_prompt or '', bot.response_guidelines or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    async def content_version(self, bot: PublicBot) -> str:
+        jar_ids = sorted(bot.honey_jar_ids or [])
+        if not jar_ids:
+            return 'none'
+
+        now = time.monotonic()
+        stale = [jar_id for jar_id in jar_ids
+                 if jar_id not in self._jar_versions
+                 or now - self._jar_versions[jar_id][1] >= self.jar_version_ttl]
+        if stale:
+            versions = await asyncio.gather(*(self._fetch_jar_version(jar_id) for jar_id in stale))
+            for jar_id, version in zip(stale, versions):
+                if version is not None:
+                    self._jar_versions[jar_id] = (version, now)
+                elif jar_id in self._jar_versions:
+                    # Keep serving the last known version; retry after the TTL
+                    self._jar_versions[jar_id] = (self._jar_versions[jar_id][0], now)
+                else:
+                    self._jar_versions[jar_id] = ('unavailable', now)
+
+        payload = '|'.join(f"{jar_id}={self._jar_versions[jar_id][0]}" for jar_id in jar_ids)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    async def _fetch_jar_version(self, jar_id: str) -> Optional[str]:
+        try:
+            headers = {'X-API-Key': self.knowledge_api_key} if self.knowledge_api_key else None
+            response = await get_http_client().get(
+                f"{self.knowledge_service_url}/honey-jars/{jar_id}", headers=headers, timeout=5
+            )
+            if response.status_code in (401, 403):
+                logger.warning(f"Knowledge service refused honey jar {jar_id} metadata ({response.status_code}); "
+                               f"answer cache cannot track content changes - check KNOWLEDGE_SYSTEM_API_KEY")
+                return None
+            if response.status_code != 200:
+                return None
+            jar = response.json()
+            stats = jar.get('stats') or {}
+            return f"{jar.get('last_updated')}:{stats.get('document_count')}:{stats.get('embedding_count')}"
+        except Exception as e:
+            logger.debug(f"Could not fetch version for honey jar {jar_id}: {e}")
+            return None
+
+    def _bot_cache(self, bot_id: str, scope: Tuple[str, str]) -> _BotCache:
+        cache = self._bots.get(bot_id)
+        if cache is None:
+            cache = self._bots[bot_id] = _BotCache()
+        if cache.scope != scope:
+            if cache.entries:
+                cache.invalidations += 1
+                logger.info(f"Answer cache for bot {bot_id} invalidated "
+                            f"({len(cache.entries)} entries; prompt or honey jar content changed)")
+            cache.entries.clear()
+            cache.changed()
+            cache.scope = scope
+        return cache
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    async def lookup(self, bot: PublicBot, question: str) -> Optional[AnswerLookup]:
+        """Return a lookup whose .hit holds the cached answer, or None if caching is off"""
+        if not self.enabled_for(bot):
+            return None
+
+        key = normalize_question(question)
+        if not key:
+            return None
+
+        bot_id = str(bot.id)
+        scope = (self.prompt_version(bot), await self.content_version(bot))
+        cache = self._bot_cache(bot_id, scope)
+        lookup = AnswerLookup(bot_id, scope, key, question)
+        ttl = float(self._setting(bot, 'ttl_seconds', self.ttl_seconds))
+        now = time.monotonic()
+
+        self._expire(cache, now, ttl)
+
+        entry = cache.entries.get(key)
+        if entry is not None:
+            cache.entries.move_to_end(key)
+            return self._hit(cache, entry, lookup, 'exact', 1.0)
+
+        pending = cache.inflight.get(key)
+        if pending is not None:
+            entry = await asyncio.shield(pending)
+            if entry is not None and cache.scope == scope:
+                return self._hit(cache, entry, lookup, 'exact', 1.0)
+
+        if self.semantic_enabled:
+            lookup.vector = await self._embed(question)
+            # The cache may have been invalidated while waiting for the embedding
+            if lookup.vector is not None and cache.scope == scope:
+                threshold = float(self._setting(bot, 'similarity_threshold', self.similarity_threshold))
+                best_key, best_score = cache.nearest(lookup.vector)
+                if best_key is not None and best_score >= threshold:
+                    cache.entries.move_to_end(best_key)
+                    return self._hit(cache, cache.entries[best_key], lookup, 'semantic', best_score)
+
+        cache.misses += 1
+        if key not in cache.inflight:
+            lookup.future = cache.inflight[key] = asyncio.get_running_loop().create_future()
+        return lookup
+
+    def store(self, lookup: AnswerLookup, response: str, sources: List[Dict[str, Any]]):
+        """Cache the answer produced after a miss"""
+        if lookup is None or lookup.hit is not None:
+            return
+        cache = self._bots.get(lookup.bot_id)
+        if cache is None or cache.scope != lookup.scope:
+            # Scope moved on while the answer was generated; it may be stale
+            return
+
+        entry = _CacheEntry(lookup.question, response, sources, lookup.vector)
+        cache.entries[lookup.key] = entry
+        cache.entries.move_to_end(lookup.key)
+        self._resolve(lookup, entry)
+        cache.stores += 1
+        while len(cache.entries) > self.max_entries_per_bot:
+            cache.entries.popitem(last=False)
+            cache.evictions += 1
+        cache.changed()
+
+    def release(self, lookup: Optional[AnswerLookup]):
+        """Wake requests waiting on this lookup's question; call after store() or on failure"""
+        if lookup is not None:
+            self._resolve(lookup, None)
+
+    def _resolve(self, lookup: AnswerLookup, entry: Optional[_CacheEntry]):
+        future, lookup.future = lookup.future, None
+        if future is None:
+            return
+        cache = self._bots.get(lookup.bot_id)
+        if cache is not None and cache.inflight.get(lookup.key) is future:
+            del cache.inflight[lookup.key]
+        if not future.done():
+            future.set_result(entry)
+
+    def _hit(self, cache: _BotCache, entry: _CacheEntry, lookup: AnswerLookup,
+             match: str, similarity: float) -> AnswerLookup:
+        entry.hits += 1
+        if match == 'exact':
+            cache.exact_hits += 1
+        else:
+            cache.semantic_hits += 1
+        lookup.hit = {'response': entry.response, 'sources': entry.sources}
+        lookup.match = match
+        lookup.similarity = round(similarity, 4)
+        return lookup
+
+    def _expire(self, cache: _BotCache, now: float, ttl: float):
+        expired = [key for key, entry in cache.entries.items() if now - entry.created_at >= ttl]
+        for key in expired:
+            del cache.entries[key]
+        if expired:
+            cache.evictions += len(expired)
+            cache.changed()
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        try:
+            response = await get_http_client().post(
+                f"{self.external_ai_url}/knowledge/embeddings",
+                json={"documents": [text], "provider": "local"},
+                timeout=5
+            )
+            if response.status_code != 200:
+                self.embedding_failures += 1
+                return None
+            embeddings = response.json().get('embeddings') or []
+            return _unit_vector(embeddings[0]['embedding']) if embeddings else None
+        except Exception as e:
+            self.embedding_failures += 1
+            logger.debug(f"Question embedding failed, skipping semantic cache: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # Admin
+    # ------------------------------------------------------------------
+
+    def clear(self, bot_id: str = None):
+        if bot_id is None:
+            self._bots.clear()
+        else:
+            self._bots.pop(bot_id, None)
+
+    def get_bot_stats(self, bot_id: str) -> Dict[str, Any]:
+        cache = self._bots.get(bot_id)
+        return cache.stats() if cache else _BotCache().stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'semantic_enabled': self.semantic_enabled,
+            'similarity_threshold': self.similarity_threshold,
+            'ttl_seconds': self.ttl_seconds,
+            'max_entries_per_bot': self.max_entries_per_bot,
+            'embedding_failures': self.embedding_failures,
+            'bots': {bot_id: cache.stats() for bot_id, cache in self._bots.items()}
+        }
+
+
+# Global instance
+_answer_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get or create the global answer cache"""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache()
+    return _answer_cache
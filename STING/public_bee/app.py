@@ -15,7 +15,6 @@ import logging
 import time
 import uuid
 from datetime import datetime, timezone
-import requests
 import json
 
 # Database imports
@@ -24,6 +23,9 @@ from sqlalchemy.orm import sessionmaker, Session
 from models import Base, PublicBot, PublicBotAPIKey, PublicBotUsage, PublicBotConversation, PublicBotMessage
 from auth import get_public_bee_auth, PublicBeeAuth
 from bot_manager import PublicBotManager
+from http_clients import get_http_client, close_http_client
+from write_buffer import get_write_buffer
+from answer_cache import get_answer_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,6 +39,12 @@ EXTERNAL_AI_URL = os.getenv('EXTERNAL_AI_URL', 'http://external-ai:8091')
 CHATBOT_URL = os.getenv('CHATBOT_URL', 'http://chatbot:8888')
 KNOWLEDGE_SERVICE_URL = os.getenv('KNOWLEDGE_SERVICE_URL', 'http://knowledge:8090')
 
+# Fallback replies from call_ai_service; never cached as answers
+AI_NO_RESPONSE = "I'm sorry, I couldn't generate a response."
+AI_UNAVAILABLE_RESPONSE = "I'm sorry, I'm temporarily unavailable. Please try again later."
+AI_ERROR_RESPONSE = "I apologize, but I'm experiencing technical difficulties. Please try again later."
+AI_FALLBACK_RESPONSES = {AI_NO_RESPONSE, AI_UNAVAILABLE_RESPONSE, AI_ERROR_RESPONSE}
+
 # Database setup
 try:
     engine = create_engine(POSTGRES_URL)
@@ -76,6 +84,7 @@ class ChatResponse(BaseModel):
     tokens_used: int
     sources: List[Dict[str, Any]] = []
     timestamp: str
+    cached: Optional[str] = None  # 'exact' or 'semantic' when served from the answer cache
 
 class BotInfo(BaseModel):
     id: str
@@ -129,57 +138,6 @@ async def health_check():
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
-# Conversation persistence helpers
-def get_or_create_conversation(db: Session, conversation_id: str, bot_id: str,
-                                session_metadata: Dict = None) -> PublicBotConversation:
-    """Get existing conversation or create a new one"""
-    conversation = db.query(PublicBotConversation).filter(
-        PublicBotConversation.conversation_id == conversation_id
-    ).first()
-
-    if not conversation:
-        conversation = PublicBotConversation(
-            conversation_id=conversation_id,
-            bot_id=bot_id,
-            session_metadata=session_metadata or {},
-            status='active'
-        )
-        db.add(conversation)
-        db.commit()
-        db.refresh(conversation)
-
-    return conversation
-
-
-def save_conversation_message(db: Session, conversation_id: str, role: str, content: str,
-                               tokens_used: int = 0, response_time_ms: int = None,
-                               confidence_score: float = None, sources: List = None):
-    """Save a message to the conversation history"""
-    message = PublicBotMessage(
-        conversation_id=conversation_id,
-        role=role,
-        content=content,
-        tokens_used=tokens_used,
-        response_time_ms=response_time_ms,
-        confidence_score=confidence_score,
-        sources=sources or []
-    )
-    db.add(message)
-
-    # Update conversation stats
-    conversation = db.query(PublicBotConversation).filter(
-        PublicBotConversation.conversation_id == conversation_id
-    ).first()
-
-    if conversation:
-        conversation.message_count = (conversation.message_count or 0) + 1
-        conversation.total_tokens = (conversation.total_tokens or 0) + tokens_used
-        conversation.last_message_at = datetime.now(timezone.utc)
-
-    db.commit()
-    return message
-
-
 @app.get("/api/public/bots", response_model=List[BotInfo])
 async def list_public_bots(db = Depends(get_db)):
     """List all public bots (no authentication required)"""
@@ -239,48 +197,68 @@ async def chat_with_bot(
             "referer": request.headers.get("referer"),
             "api_key_prefix": api_key_record.key_prefix if api_key_record else None
         }
-        get_or_create_conversation(db, conversation_id, str(bot.id), session_metadata)
+        # Conversation and message writes are buffered and committed in batches
+        write_buffer = get_write_buffer()
+        write_buffer.ensure_conversation(conversation_id, str(bot.id), session_metadata)
 
         # Save user message to database
-        save_conversation_message(db, conversation_id, "user", message.message)
-
-        # Get relevant knowledge from bot's honey jars
-        manager = PublicBotManager(db)
-        knowledge_context = manager.query_honey_jars(bot, message.message, max_results=5)
-
-        # Prepare context for the AI
-        context = {
-            "bot_name": bot.display_name,
-            "system_prompt": bot.system_prompt,
-            "knowledge_context": knowledge_context,
-            "conversation_id": conversation_id,
-            "user_message": message.message
-        }
-
-        if message.context:
-            context.update(message.context)
+        write_buffer.add_message(conversation_id, "user", message.message)
+
+        # Repeated questions are answered from the per-bot answer cache.
+        # Caller-supplied context can change the answer, so it bypasses the cache.
+        answer_cache = get_answer_cache()
+        cache_lookup = None
+        if not message.context:
+            cache_lookup = await answer_cache.lookup(bot, message.message)
+
+        if cache_lookup and cache_lookup.hit:
+            ai_response = cache_lookup.hit["response"]
+            sources = cache_lookup.hit["sources"]
+        else:
+            try:
+                # Get relevant knowledge from bot's honey jars (searched concurrently)
+                manager = PublicBotManager(db)
+                knowledge_context = await manager.query_honey_jars(bot, message.message, max_results=5)
+
+                # Prepare context for the AI
+                context = {
+                    "bot_name": bot.display_name,
+                    "system_prompt": bot.system_prompt,
+                    "knowledge_context": knowledge_context,
+                    "conversation_id": conversation_id,
+                    "user_message": message.message
+                }
 
-        # Call the AI service
-        ai_response = await call_ai_service(context)
+                if message.context:
+                    context.update(message.context)
+
+                # Call the AI service
+                ai_response = await call_ai_service(context)
+
+                # Prepare sources from knowledge context
+                sources = [
+                    {
+                        "title": result.get("metadata", {}).get("title", "Document"),
+                        "excerpt": result.get("content", "")[:200] + "..." if len(result.get("content", "")) > 200 else result.get("content", ""),
+                        "score": result.get("score", 0),
+                        "honey_jar": result.get("honey_jar_name", "Knowledge Base")
+                    }
+                    for result in knowledge_context[:3]  # Include top 3 sources
+                ]
+
+                if cache_lookup and ai_response not in AI_FALLBACK_RESPONSES:
+                    answer_cache.store(cache_lookup, ai_response, sources)
+            finally:
+                # Wake concurrent askers of the same question (they retry on failure)
+                answer_cache.release(cache_lookup)
 
         # Calculate processing time and estimate tokens
         processing_time_ms = int((time.time() - start_time) * 1000)
         tokens_used = estimate_tokens(message.message + ai_response)
 
-        # Prepare sources from knowledge context
-        sources = [
-            {
-                "title": result.get("metadata", {}).get("title", "Document"),
-                "excerpt": result.get("content", "")[:200] + "..." if len(result.get("content", "")) > 200 else result.get("content", ""),
-                "score": result.get("score", 0),
-                "honey_jar": result.get("honey_jar_name", "Knowledge Base")
-            }
-            for result in knowledge_context[:3]  # Include top 3 sources
-        ]
-
         # Save assistant response to database
-        save_conversation_message(
-            db, conversation_id, "assistant", ai_response,
+        write_buffer.add_message(
+            conversation_id, "assistant", ai_response,
             tokens_used=tokens_used,
             response_time_ms=processing_time_ms,
             sources=sources
@@ -304,7 +282,8 @@ async def chat_with_bot(
             processing_time_ms=processing_time_ms,
             tokens_used=tokens_used,
             sources=sources,
-            timestamp=datetime.now(timezone.utc).isoformat()
+            timestamp=datetime.now(timezone.utc).isoformat(),
+            cached=cache_lookup.match if cache_lookup else None
         )
         
     except Exception as e:
@@ -358,6 +337,9 @@ async def get_conversation(
     """Get full conversation history for handoff or review"""
     bot, _ = auth_data
 
+    # Include messages still waiting in the write buffer
+    await get_write_buffer().flush()
+
     conversation = db.query(PublicBotConversation).filter(
         PublicBotConversation.conversation_id == conversation_id,
         PublicBotConversation.bot_id == str(bot.id)
@@ -397,6 +379,8 @@ async def list_bot_conversations(
     if str(bot.id) != bot_id:
         raise HTTPException(status_code=403, detail="Not authorized to view this bot's conversations")
 
+    await get_write_buffer().flush()
+
     query = db.query(PublicBotConversation).filter(
         PublicBotConversation.bot_id == bot_id
     )
@@ -433,6 +417,9 @@ async def handoff_conversation(
     """Mark a conversation as handed off to a human agent"""
     bot, _ = auth_data
 
+    # The conversation row may still be buffered
+    await get_write_buffer().flush()
+
     conversation = db.query(PublicBotConversation).filter(
         PublicBotConversation.conversation_id == conversation_id,
         PublicBotConversation.bot_id == str(bot.id)
@@ -488,7 +475,8 @@ async def call_ai_service(context: Dict[str, Any]) -> str:
         })
         
         # Call External AI service
-        response = requests.post(
+        client = get_http_client()
+        response = await client.post(
             f"{EXTERNAL_AI_URL}/v1/chat/completions",
             json=ai_payload,
             timeout=30
@@ -511,7 +499,7 @@ async def call_ai_service(context: Dict[str, Any]) -> str:
             }
         }
         
-        chatbot_response = requests.post(
+        chatbot_response = await client.post(
             f"{CHATBOT_URL}/chat",
             json=chatbot_payload,
             timeout=30
@@ -519,14 +507,14 @@ async def call_ai_service(context: Dict[str, Any]) -> str:
         
         if chatbot_response.status_code == 200:
             result = chatbot_response.json()
-            return result.get("response", "I'm sorry, I couldn't generate a response.")
+            return result.get("response", AI_NO_RESPONSE)
         
         # Final fallback
-        return "I'm sorry, I'm temporarily unavailable. Please try again later."
+        return AI_UNAVAILABLE_RESPONSE
         
     except Exception as e:
         logger.error(f"Error calling AI service: {e}")
-        return "I apologize, but I'm experiencing technical difficulties. Please try again later."
+        return AI_ERROR_RESPONSE
 
 def estimate_tokens(text: str) -> int:
     """Estimate token count (rough approximation)"""
@@ -541,7 +529,13 @@ async def admin_list_bots(db = Depends(get_db)):
     try:
         manager = PublicBotManager(db)
         bots = manager.list_bots(enabled_only=False)
-        return [bot.to_dict() for bot in bots]
+        answer_cache = get_answer_cache()
+        results = []
+        for bot in bots:
+            bot_dict = bot.to_dict()
+            bot_dict['stats']['answer_cache'] = answer_cache.get_bot_stats(str(bot.id))
+            results.append(bot_dict)
+        return results
     except Exception as e:
         logger.error(f"Error listing bots: {e}")
         raise HTTPException(status_code=500, detail="Failed to list bots")
@@ -565,6 +559,9 @@ async def admin_create_bot(
 @app.on_event("startup")
 async def startup_event():
     """Initialize demo data and configurations"""
+    if SessionLocal:
+        get_write_buffer().start(SessionLocal)
+
     try:
         if SessionLocal:
             db = SessionLocal()
@@ -579,6 +576,12 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Error during startup: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered writes and close pooled connections"""
+    await get_write_buffer().stop()
+    await close_http_client()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=PUBLIC_BEE_HOST, port=PUBLIC_BEE_PORT)
\ No newline at end of file
@@ -2,28 +2,35 @@
 Authentication and security for Public Bee service
 """
 
+import os
 import hashlib
 import secrets
-import time
 from typing import Optional, Dict, Any, List
 from fastapi import HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import redis
+import redis.asyncio as aioredis
 import logging
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from models import PublicBot, PublicBotAPIKey, PublicBotUsage
+from write_buffer import get_write_buffer
+from rate_limiter import GCRARateLimiter  # Shared with the Flask app (app/utils/rate_limiter.py)
 
 logger = logging.getLogger(__name__)
 
-# Redis client for rate limiting
-redis_client = None
-try:
-    redis_client = redis.from_url('redis://redis:6379/3')  # Use DB 3 for public bee
-    redis_client.ping()
-    logger.info("✅ Connected to Redis for rate limiting")
-except Exception as e:
-    logger.warning(f"⚠️ Redis not available for rate limiting: {e}")
+# Rate limiting (GCRA in Redis DB 3). Hot API keys claim a few tokens per
+# round trip so bursts of widget traffic don't hit Redis on every request.
+RATE_LIMIT_WINDOW_SECONDS = 3600  # Bot and API key rate limits are per hour
+rate_limiter = GCRARateLimiter(
+    async_redis_client=aioredis.from_url(
+        os.getenv('PUBLIC_BEE_REDIS_URL', 'redis://redis:6379/3'),
+        socket_connect_timeout=1, socket_timeout=1
+    ),
+    prefix='public_bee:rate_limit',
+    prefetch=int(os.getenv('PUBLIC_BEE_RATE_LIMIT_PREFETCH', '5')),
+    prefetch_ttl=float(os.getenv('PUBLIC_BEE_RATE_LIMIT_PREFETCH_TTL', '1.0'))
+)
 
 security = HTTPBearer()
 
@@ -48,68 +55,6 @@ class APIKeyAuth:
         """Get the display prefix of an API key"""
         return api_key[:8] + "..."
 
-class RateLimiter:
-    """Rate limiting for public bot API endpoints"""
-    
-    def __init__(self):
-        self.redis_client = redis_client
-        self.default_window = 3600  # 1 hour in seconds
-    
-    def is_rate_limited(self, key: str, limit: int, window: int = None) -> tuple[bool, Dict[str, Any]]:
-        """
-        Check if a key is rate limited
-        
-        Args:
-            key: Unique identifier (API key, IP, etc.)
-            limit: Maximum requests allowed
-            window: Time window in seconds (default: 1 hour)
-        
-        Returns:
-            Tuple of (is_limited, rate_info)
-        """
-        if not self.redis_client:
-            # If Redis is not available, allow all requests
-            return False, {'current': 0, 'limit': limit, 'reset_at': None}
-        
-        window = window or self.default_window
-        current_time = int(time.time())
-        window_start = current_time - (current_time % window)
-        
-        redis_key = f"rate_limit:{key}:{window_start}"
-        
-        try:
-            # Get current count
-            current = self.redis_client.get(redis_key)
-            current = int(current) if current else 0
-            
-            if current >= limit:
-                return True, {
-                    'current': current,
-                    'limit': limit,
-                    'reset_at': window_start + window,
-                    'retry_after': (window_start + window) - current_time
-                }
-            
-            # Increment counter
-            pipe = self.redis_client.pipeline()
-            pipe.incr(redis_key)
-            pipe.expire(redis_key, window)
-            pipe.execute()
-            
-            return False, {
-                'current': current + 1,
-                'limit': limit,
-                'reset_at': window_start + window,
-                'retry_after': None
-            }
-        
-        except Exception as e:
-            logger.error(f"Rate limiting error: {e}")
-            # If Redis fails, allow the request
-            return False, {'current': 0, 'limit': limit, 'reset_at': None}
-
-rate_limiter = RateLimiter()
-
 class PublicBeeAuth:
     """Authentication and authorization for Public Bee endpoints"""
     
@@ -160,7 +105,7 @@ class PublicBeeAuth:
         
         return client_ip in api_key_record.allowed_ips
     
-    def check_rate_limit(self, api_key_record: PublicBotAPIKey, bot: PublicBot, client_ip: str) -> tuple[bool, Dict[str, Any]]:
+    async def check_rate_limit(self, api_key_record: PublicBotAPIKey, bot: PublicBot, client_ip: str) -> tuple[bool, Dict[str, Any]]:
         """Check rate limits for the request"""
         # Use API key specific limit or bot's default
         limit = api_key_record.rate_limit or bot.rate_limit
@@ -168,12 +113,31 @@ class PublicBeeAuth:
         # Create a composite key for rate limiting
         rate_key = f"{api_key_record.id}:{client_ip}"
         
-        return rate_limiter.is_rate_limited(rate_key, limit)
+        result = await rate_limiter.acheck(rate_key, limit, RATE_LIMIT_WINDOW_SECONDS)
+        return not result.allowed, result.to_dict()
     
     def log_usage(self, bot: PublicBot, api_key_record: PublicBotAPIKey, request: Request, 
                   conversation_id: str, tokens_used: int, response_time_ms: int, 
                   success: bool = True, error_message: str = None):
         """Log usage statistics"""
+        write_buffer = get_write_buffer()
+        if write_buffer.active:
+            # Deferred: inserted and counted with other requests in the next flush
+            write_buffer.add_usage(
+                bot_id=bot.id,
+                api_key_id=api_key_record.id,
+                api_key_prefix=api_key_record.key_prefix,  # Store only prefix for privacy
+                ip_address=request.client.host if request.client else None,
+                user_agent=request.headers.get('user-agent'),
+                referer=request.headers.get('referer'),
+                conversation_id=conversation_id,
+                tokens_used=tokens_used,
+                response_time_ms=response_time_ms,
+                success=success,
+                error_message=error_message
+            )
+            return
+
         usage = PublicBotUsage(
             bot_id=bot.id,
             api_key=api_key_record.key_prefix,  # Store only prefix for privacy
@@ -203,13 +167,13 @@ class PublicBeeAuth:
             logger.error(f"Failed to log usage: {e}")
             self.db.rollback()
 
-def get_public_bee_auth(request: Request, db, credentials: HTTPAuthorizationCredentials = Depends(security)) -> tuple[PublicBot, PublicBotAPIKey]:
-    """
-    Dependency to authenticate and authorize public bee requests
-    
-    Returns:
-        Tuple of (bot, api_key_record)
-    """
+def _get_db():
+    """Database session dependency (imported lazily because app.py imports this module)"""
+    from app import get_db
+    yield from get_db()
+
+def _authenticate_request(request: Request, db: Session, credentials: HTTPAuthorizationCredentials) -> tuple[PublicBot, PublicBotAPIKey, str]:
+    """Database part of get_public_bee_auth (blocking; runs in the threadpool)"""
     auth = PublicBeeAuth(db)
     
     # Extract bot ID from URL path
@@ -242,17 +206,32 @@ def get_public_bee_auth(request: Request, db, credentials: HTTPAuthorizationCred
     if not auth.check_ip_whitelist(api_key_record, client_ip):
         raise HTTPException(status_code=403, detail="IP address not allowed")
     
-    # Check rate limits
-    is_limited, rate_info = auth.check_rate_limit(api_key_record, bot, client_ip)
+    # Return the pooled connection now instead of holding it while the chat
+    # handler waits on retrieval and the LLM; both records are fully loaded
+    db.close()
+    
+    return bot, api_key_record, client_ip
+
+async def get_public_bee_auth(request: Request, db: Session = Depends(_get_db), credentials: HTTPAuthorizationCredentials = Depends(security)) -> tuple[PublicBot, PublicBotAPIKey]:
+    """
+    Dependency to authenticate and authorize public bee requests
+    
+    Returns:
+        Tuple of (bot, api_key_record)
+    """
+    bot, api_key_record, client_ip = await run_in_threadpool(_authenticate_request, request, db, credentials)
+    
+    # Check rate limits (async Redis, or locally pre-fetched tokens)
+    is_limited, rate_info = await PublicBeeAuth(db).check_rate_limit(api_key_record, bot, client_ip)
     if is_limited:
         raise HTTPException(
             status_code=429, 
             detail="Rate limit exceeded",
             headers={
-                "Retry-After": str(rate_info.get('retry_after', 3600)),
-                "X-RateLimit-Limit": str(rate_info.get('limit')),
+                "Retry-After": str(max(1, int(rate_info['retry_after'] + 0.999))),
+                "X-RateLimit-Limit": str(rate_info['limit']),
                 "X-RateLimit-Remaining": "0",
-                "X-RateLimit-Reset": str(rate_info.get('reset_at'))
+                "X-RateLimit-Reset": str(rate_info['reset_at'])
             }
         )
     
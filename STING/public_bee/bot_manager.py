@@ -2,6 +2,8 @@
 Public Bot management and configuration
 """
 
+import os
+import asyncio
 import logging
 import uuid
 from typing import List, Dict, Any, Optional
@@ -9,6 +11,7 @@ from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from models import PublicBot, PublicBotAPIKey
 from auth import APIKeyAuth
+from http_clients import get_http_client
 import requests
 
 logger = logging.getLogger(__name__)
@@ -18,7 +21,9 @@ class PublicBotManager:
     
     def __init__(self, db: Session):
         self.db = db
-        self.knowledge_service_url = "http://knowledge:8090"
+        self.knowledge_service_url = os.getenv('KNOWLEDGE_SERVICE_URL', 'http://knowledge:8090')
+        # Overall budget for honey jar retrieval; slow jars are dropped, not waited on
+        self.retrieval_deadline = float(os.getenv('PUBLIC_BEE_RETRIEVAL_DEADLINE_SECONDS', '3'))
     
     def create_bot(self, 
                    name: str, 
@@ -166,33 +171,54 @@ class PublicBotManager:
         logger.info(f"Revoked API key {api_key_record.name}")
         return True
     
-    def query_honey_jars(self, bot: PublicBot, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
-        """Query the knowledge service for relevant content"""
+    async def query_honey_jars(self, bot: PublicBot, query: str, max_results: int = 5,
+                               deadline: float = None) -> List[Dict[str, Any]]:
+        """
+        Query the knowledge service for relevant content.
+
+        All of the bot's honey jars are searched concurrently. Jars that have
+        not answered within the deadline are cancelled and left out.
+        """
         if not bot.honey_jar_ids:
             return []
-        
+
+        deadline = deadline if deadline is not None else self.retrieval_deadline
+        client = get_http_client()
+
+        async def search_jar(jar_id: str) -> List[Dict[str, Any]]:
+            response = await client.post(
+                f"{self.knowledge_service_url}/honey-jars/{jar_id}/search",
+                json={
+                    "query": query,
+                    "top_k": max_results
+                },
+                timeout=10
+            )
+            if response.status_code == 200:
+                return response.json().get('results', [])
+            return []
+
         try:
-            # Query each honey jar
+            tasks = {asyncio.create_task(search_jar(jar_id)): jar_id for jar_id in bot.honey_jar_ids}
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"Honey jar search deadline ({deadline}s) hit for bot {bot.name}; "
+                               f"skipped {[tasks[t] for t in pending]}")
+
             all_results = []
-            
-            for jar_id in bot.honey_jar_ids:
-                response = requests.post(
-                    f"{self.knowledge_service_url}/honey-jars/{jar_id}/search",
-                    json={
-                        "query": query,
-                        "top_k": max_results
-                    },
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    results = response.json().get('results', [])
-                    all_results.extend(results)
-            
+            for task in done:
+                if task.exception():
+                    logger.error(f"Error querying honey jar {tasks[task]}: {task.exception()}")
+                    continue
+                all_results.extend(task.result())
+
             # Sort by relevance score and return top results
             all_results.sort(key=lambda x: x.get('score', 0), reverse=True)
             return all_results[:max_results]
-            
+
         except Exception as e:
             logger.error(f"Error querying honey jars: {e}")
             return []
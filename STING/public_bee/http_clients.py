@@ -0,0 +1,39 @@
+"""
+Pooled async HTTP client for Public Bee
+
+Chat requests fan out to the knowledge service (one search per honey jar)
+and the AI services. Sharing one httpx.AsyncClient keeps connections warm
+across visitors and keeps those calls off the event loop thread.
+"""
+
+import os
+import logging
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared async HTTP client"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(float(os.getenv('PUBLIC_BEE_HTTP_TIMEOUT', '30')), connect=5.0),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv('PUBLIC_BEE_HTTP_MAX_CONNECTIONS', '100')),
+                max_keepalive_connections=int(os.getenv('PUBLIC_BEE_HTTP_MAX_KEEPALIVE', '20'))
+            )
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close pooled connections on shutdown"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
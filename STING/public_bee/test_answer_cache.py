@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the Public Bee answer cache scope
+Verifies that honey jar updates invalidate cached answers
+
+Run with: python -m pytest public_bee/test_answer_cache.py
+"""
+
+import os
+import sys
+import asyncio
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import answer_cache
+from answer_cache import AnswerCache
+from models import PublicBot
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+
+class FakeKnowledgeClient:
+    """Stands in for the pooled httpx client; serves jar metadata behind the service key"""
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.jars = {}
+        self.requests = []
+
+    async def get(self, url, headers=None, timeout=None):
+        self.requests.append((url, headers))
+        if (headers or {}).get('X-API-Key') != self.api_key:
+            return FakeResponse(401)
+        jar = self.jars.get(url.rsplit('/', 1)[-1])
+        if jar is None:
+            return FakeResponse(404)
+        return FakeResponse(200, jar)
+
+
+def make_cache(monkeypatch, client, api_key='service-key'):
+    monkeypatch.setattr(answer_cache, 'get_http_client', lambda: client)
+    monkeypatch.setenv('KNOWLEDGE_SYSTEM_API_KEY', api_key)
+    monkeypatch.setenv('PUBLIC_BEE_ANSWER_CACHE_SEMANTIC', 'false')
+    monkeypatch.setenv('PUBLIC_BEE_JAR_VERSION_TTL', '0')
+    return AnswerCache()
+
+
+def make_bot(jar_id):
+    return PublicBot(id=uuid.uuid4(), honey_jar_ids=[jar_id], system_prompt="Be helpful",
+                     response_guidelines={})
+
+
+def jar(last_updated, document_count):
+    return {'last_updated': last_updated,
+            'stats': {'document_count': document_count, 'embedding_count': document_count * 4}}
+
+
+def test_jar_metadata_sent_with_service_key(monkeypatch):
+    client = FakeKnowledgeClient('service-key')
+    client.jars['jar-1'] = jar('2025-01-01T00:00:00', 3)
+    cache = make_cache(monkeypatch, client)
+
+    version = asyncio.run(cache.content_version(make_bot('jar-1')))
+
+    assert client.requests[0][1] == {'X-API-Key': 'service-key'}
+    assert cache._jar_versions['jar-1'][0] != 'unavailable'
+    assert version
+
+
+def test_jar_update_changes_cache_key(monkeypatch):
+    client = FakeKnowledgeClient('service-key')
+    client.jars['jar-1'] = jar('2025-01-01T00:00:00', 3)
+    cache = make_cache(monkeypatch, client)
+    bot = make_bot('jar-1')
+
+    async def scenario():
+        before = await cache.content_version(bot)
+        lookup = await cache.lookup(bot, "What are your opening hours?")
+        cache.store(lookup, "9 to 5", [])
+        cache.release(lookup)
+        assert (await cache.lookup(bot, "what are your opening hours")).hit is not None
+
+        # A document upload bumps last_updated and document_count
+        client.jars['jar-1'] = jar('2025-01-02T00:00:00', 4)
+        after = await cache.content_version(bot)
+        stale = await cache.lookup(bot, "What are your opening hours?")
+        cache.release(stale)
+        return before, after, stale
+
+    before, after, stale = asyncio.run(scenario())
+
+    assert before != after
+    assert stale.hit is None
+    assert cache.get_bot_stats(str(bot.id))['invalidations'] == 1
+
+
+def test_rejected_key_marks_jar_unavailable(monkeypatch):
+    client = FakeKnowledgeClient('service-key')
+    client.jars['jar-1'] = jar('2025-01-01T00:00:00', 3)
+    cache = make_cache(monkeypatch, client, api_key='wrong-key')
+
+    asyncio.run(cache.content_version(make_bot('jar-1')))
+
+    assert cache._jar_versions['jar-1'][0] == 'unavailable'
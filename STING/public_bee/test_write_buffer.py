@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the Public Bee conversation write buffer
+Covers read-your-writes during a background flush, bad-row isolation and
+draining on shutdown
+
+Run with: python -m pytest public_bee/test_write_buffer.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from write_buffer import ConversationWriteBuffer
+
+
+class RecordingBuffer(ConversationWriteBuffer):
+    """Write buffer whose 'database' is a list; messages containing 'bad' fail to insert"""
+
+    def __init__(self, commit_delay=0.0):
+        super().__init__()
+        self.flush_interval = 3600  # flush only when asked (or on max_batch)
+        self.commit_delay = commit_delay
+        self.committed = []
+
+    def _write_batch(self, batch):
+        time.sleep(self.commit_delay)
+        if any('bad' in (op.get('content') or '') for op in batch):
+            raise ValueError("invalid row")
+        self.committed.extend(op.get('content') for op in batch)
+
+
+def test_flush_waits_for_in_flight_batch():
+    async def scenario():
+        buffer = RecordingBuffer(commit_delay=0.2)
+        buffer.start(session_factory=object)
+        buffer.add_message('conv-1', 'user', 'hello')
+        buffer._wakeup.set()
+        await asyncio.sleep(0.05)  # background flusher has swapped the batch out
+
+        assert buffer._pending == []
+        await buffer.flush()
+        seen = list(buffer.committed)
+        await buffer.stop()
+        return seen
+
+    assert asyncio.run(scenario()) == ['hello']
+
+
+def test_bad_operation_does_not_drop_batch():
+    async def scenario():
+        buffer = RecordingBuffer()
+        buffer.start(session_factory=object)
+        for content in ('one', 'bad', 'two'):
+            buffer.add_message('conv-1', 'user', content)
+        for _ in range(buffer.MAX_FLUSH_ATTEMPTS):
+            await buffer.flush()
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+
+    assert buffer.committed == ['one', 'two']
+    assert buffer.operations_written == 2
+    assert buffer.operations_dropped == 1
+    assert buffer.get_stats()['pending'] == 0
+
+
+def test_stop_drains_batch_being_committed():
+    async def scenario():
+        buffer = RecordingBuffer(commit_delay=0.2)
+        buffer.start(session_factory=object)
+        buffer.add_message('conv-1', 'user', 'first')
+        buffer._wakeup.set()
+        await asyncio.sleep(0.05)
+        buffer.add_message('conv-1', 'assistant', 'second')
+        await buffer.stop()
+        return buffer.committed
+
+    assert asyncio.run(scenario()) == ['first', 'second']
+
+
+def test_cancelled_reader_does_not_lose_batch():
+    async def scenario():
+        buffer = RecordingBuffer(commit_delay=0.2)
+        buffer.start(session_factory=object)
+        buffer.add_message('conv-1', 'user', 'hello')
+        reader = asyncio.create_task(buffer.flush())
+        await asyncio.sleep(0.05)
+        reader.cancel()
+        await buffer.stop()
+        return buffer.committed
+
+    assert asyncio.run(scenario()) == ['hello']
@@ -0,0 +1,361 @@
+"""
+Deferred, batched persistence for Public Bee chat traffic
+
+Each widget message used to commit the conversation row, the user message,
+the assistant message and the usage record separately, all on the event
+loop. ConversationWriteBuffer queues those writes in memory and a background
+task flushes them every PUBLIC_BEE_WRITE_FLUSH_MS (or as soon as
+PUBLIC_BEE_WRITE_MAX_BATCH operations are queued) in a single transaction
+run in a worker thread:
+- Conversations are created idempotently before their messages are inserted
+- Messages and usage records are bulk inserted with their original timestamps
+- Conversation, API key and bot counters are aggregated into one UPDATE per row
+
+Reads that must see the latest messages call flush() first; it also waits
+for a batch the background task is still committing. If a batch fails, its
+operations are retried one per transaction so a single bad row is dropped
+(after MAX_FLUSH_ATTEMPTS) without taking the rest of the batch with it.
+"""
+
+import os
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from models import PublicBot, PublicBotAPIKey, PublicBotUsage, PublicBotConversation, PublicBotMessage
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationWriteBuffer:
+    """Queues conversation, message and usage writes and flushes them in batches"""
+
+    MAX_FLUSH_ATTEMPTS = 3
+
+    def __init__(self):
+        self.flush_interval = int(os.getenv('PUBLIC_BEE_WRITE_FLUSH_MS', '250')) / 1000.0
+        self.max_batch = int(os.getenv('PUBLIC_BEE_WRITE_MAX_BATCH', '200'))
+        self.max_pending = int(os.getenv('PUBLIC_BEE_WRITE_MAX_PENDING', '10000'))
+
+        self._session_factory: Optional[Callable] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.flushes = 0
+        self.operations_written = 0
+        self.operations_dropped = 0
+        self.failed_flushes = 0
+
+    @property
+    def active(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, session_factory: Callable):
+        """Start the background flusher (call from the running event loop)"""
+        if self.active:
+            return
+        self._session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"✅ Conversation write buffer started (flush every {self.flush_interval * 1000:.0f}ms)")
+
+    async def stop(self):
+        """Stop the flusher and write everything still queued
+
+        A flush already in progress is shielded from the cancel and finishes
+        first; the final flush below waits for it on the flush lock.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    # ------------------------------------------------------------------
+    # Enqueue (non-blocking, event loop only)
+    # ------------------------------------------------------------------
+
+    def ensure_conversation(self, conversation_id: str, bot_id: str, session_metadata: Dict = None):
+        self._enqueue({
+            'kind': 'conversation',
+            'conversation_id': conversation_id,
+            'bot_id': bot_id,
+            'session_metadata': session_metadata or {}
+        })
+
+    def add_message(self, conversation_id: str, role: str, content: str,
+                    tokens_used: int = 0, response_time_ms: int = None,
+                    confidence_score: float = None, sources: List = None):
+        self._enqueue({
+            'kind': 'message',
+            'conversation_id': conversation_id,
+            'role': role,
+            'content': content,
+            'tokens_used': tokens_used,
+            'response_time_ms': response_time_ms,
+            'confidence_score': confidence_score,
+            'sources': sources or []
+        })
+
+    def add_usage(self, bot_id, api_key_id, api_key_prefix: str, ip_address: Optional[str],
+                  user_agent: Optional[str], referer: Optional[str], conversation_id: str,
+                  tokens_used: int, response_time_ms: int, success: bool = True,
+                  error_message: str = None):
+        self._enqueue({
+            'kind': 'usage',
+            'bot_id': bot_id,
+            'api_key_id': api_key_id,
+            'api_key': api_key_prefix,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'referer': referer,
+            'conversation_id': conversation_id,
+            'tokens_used': tokens_used,
+            'response_time_ms': response_time_ms,
+            'success': success,
+            'error_message': error_message
+        })
+
+    def _enqueue(self, operation: Dict[str, Any]):
+        operation['timestamp'] = datetime.now(timezone.utc)
+        operation['attempts'] = 0
+
+        if len(self._pending) >= self.max_pending:
+            # Database is down or far behind; keep memory bounded
+            self._pending.pop(0)
+            self.operations_dropped += 1
+            if self.operations_dropped % 100 == 1:
+                logger.error(f"Write buffer full ({self.max_pending}); dropped {self.operations_dropped} operations so far")
+
+        self._pending.append(operation)
+        if len(self._pending) >= self.max_batch and self._wakeup:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all queued operations now
+
+        Returns once everything queued before the call is in the database,
+        including a batch the background flusher is already writing.
+        """
+        if not self._session_factory:
+            return
+        # Shielded so a cancelled caller never abandons a batch mid-commit
+        await asyncio.shield(self._flush())
+
+    async def _flush(self):
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+                self.flushes += 1
+                self.operations_written += len(batch)
+                return
+            except Exception as e:
+                self.failed_flushes += 1
+                if self._is_unavailable(e):
+                    # Database unreachable: keep the batch intact (bounded by max_pending)
+                    self._pending = batch + self._pending
+                    logger.error(f"Failed to flush {len(batch)} buffered writes, database unavailable: {e}")
+                    return
+                logger.warning(f"Failed to flush {len(batch)} buffered writes, retrying one by one: {e}")
+
+            # One bad operation must not sink the rest of the batch
+            written, failed, untried = await asyncio.to_thread(self._write_each, batch)
+            self.operations_written += written
+
+            retry = []
+            for op, error in failed:
+                op['attempts'] += 1
+                if op['attempts'] < self.MAX_FLUSH_ATTEMPTS:
+                    retry.append(op)
+                else:
+                    self.operations_dropped += 1
+                    logger.error(f"Dropping buffered {op['kind']} write for conversation "
+                                 f"{op.get('conversation_id')} after {op['attempts']} attempts: {error}")
+            # Retry on the next flush, ahead of anything queued since
+            self._pending = retry + untried + self._pending
+            if failed:
+                logger.error(f"{len(failed)} of {len(batch)} buffered writes failed "
+                             f"({len(retry)} will be retried)")
+
+    def _write_each(self, batch: List[Dict[str, Any]]):
+        """Write operations one per transaction, in order (runs in a worker thread)
+
+        Returns (written count, [(op, error)] that failed, ops left untried
+        because the database became unavailable).
+        """
+        written = 0
+        failed = []
+        for index, op in enumerate(batch):
+            try:
+                self._write_batch([op])
+                written += 1
+            except Exception as e:
+                if self._is_unavailable(e):
+                    return written, failed, batch[index:]
+                failed.append((op, e))
+        return written, failed, []
+
+    @staticmethod
+    def _is_unavailable(error: Exception) -> bool:
+        """Connection-level failures that say nothing about the rows being written"""
+        return isinstance(error, (OperationalError, InterfaceError)) or \
+            bool(getattr(error, 'connection_invalidated', False))
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """Persist one batch in a single transaction (runs in a worker thread)"""
+        conversations: Dict[str, Dict[str, Any]] = {}
+        messages: List[Dict[str, Any]] = []
+        usage_rows: List[Dict[str, Any]] = []
+        conversation_stats: Dict[str, List] = {}
+        key_stats: Dict[Any, List] = {}
+        bot_stats: Dict[Any, List] = {}
+
+        for op in batch:
+            kind = op['kind']
+            if kind == 'conversation':
+                conversations.setdefault(op['conversation_id'], op)
+            elif kind == 'message':
+                messages.append({
+                    'conversation_id': op['conversation_id'],
+                    'role': op['role'],
+                    'content': op['content'],
+                    'tokens_used': op['tokens_used'],
+                    'response_time_ms': op['response_time_ms'],
+                    'confidence_score': op['confidence_score'],
+                    'sources': op['sources'],
+                    'timestamp': op['timestamp']
+                })
+                stats = conversation_stats.setdefault(op['conversation_id'], [0, 0, op['timestamp']])
+                stats[0] += 1
+                stats[1] += op['tokens_used'] or 0
+                stats[2] = max(stats[2], op['timestamp'])
+            elif kind == 'usage':
+                usage_rows.append({
+                    'bot_id': op['bot_id'],
+                    'api_key': op['api_key'],
+                    'ip_address': op['ip_address'],
+                    'user_agent': op['user_agent'],
+                    'referer': op['referer'],
+                    'conversation_id': op['conversation_id'],
+                    'tokens_used': op['tokens_used'],
+                    'response_time_ms': op['response_time_ms'],
+                    'success': op['success'],
+                    'error_message': op['error_message'],
+                    'timestamp': op['timestamp']
+                })
+                if op['api_key_id'] is not None:
+                    stats = key_stats.setdefault(op['api_key_id'], [0, op['timestamp']])
+                    stats[0] += 1
+                    stats[1] = max(stats[1], op['timestamp'])
+                stats = bot_stats.setdefault(op['bot_id'], [0, 0])
+                stats[0] += 1
+                stats[1] += op['tokens_used'] or 0
+
+        session = self._session_factory()
+        try:
+            if conversations:
+                self._ensure_conversations(session, list(conversations.values()))
+            if messages:
+                session.execute(insert(PublicBotMessage), messages)
+            for conversation_id, (count, tokens, last_at) in conversation_stats.items():
+                session.query(PublicBotConversation).filter(
+                    PublicBotConversation.conversation_id == conversation_id
+                ).update({
+                    PublicBotConversation.message_count: func.coalesce(PublicBotConversation.message_count, 0) + count,
+                    PublicBotConversation.total_tokens: func.coalesce(PublicBotConversation.total_tokens, 0) + tokens,
+                    PublicBotConversation.last_message_at: last_at
+                }, synchronize_session=False)
+            if usage_rows:
+                session.execute(insert(PublicBotUsage), usage_rows)
+            for api_key_id, (count, last_used) in key_stats.items():
+                session.query(PublicBotAPIKey).filter(PublicBotAPIKey.id == api_key_id).update({
+                    PublicBotAPIKey.usage_count: func.coalesce(PublicBotAPIKey.usage_count, 0) + count,
+                    PublicBotAPIKey.last_used_at: last_used
+                }, synchronize_session=False)
+            for bot_id, (count, tokens) in bot_stats.items():
+                session.query(PublicBot).filter(PublicBot.id == bot_id).update({
+                    PublicBot.total_messages: func.coalesce(PublicBot.total_messages, 0) + count,
+                    PublicBot.total_tokens: func.coalesce(PublicBot.total_tokens, 0) + tokens
+                }, synchronize_session=False)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def _ensure_conversations(self, session, conversations: List[Dict[str, Any]]):
+        rows = [{
+            'conversation_id': op['conversation_id'],
+            'bot_id': op['bot_id'],
+            'session_metadata': op['session_metadata'],
+            'status': 'active',
+            'created_at': op['timestamp']
+        } for op in conversations]
+
+        if session.bind.dialect.name == 'postgresql':
+            # Another worker process may create the same conversation concurrently
+            session.execute(
+                pg_insert(PublicBotConversation).on_conflict_do_nothing(index_elements=['conversation_id']),
+                rows
+            )
+            return
+
+        existing = {
+            conversation_id for (conversation_id,) in session.query(PublicBotConversation.conversation_id).filter(
+                PublicBotConversation.conversation_id.in_([row['conversation_id'] for row in rows])
+            )
+        }
+        missing = [row for row in rows if row['conversation_id'] not in existing]
+        if missing:
+            session.execute(insert(PublicBotConversation), missing)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'active': self.active,
+            'pending': len(self._pending),
+            'flushes': self.flushes,
+            'operations_written': self.operations_written,
+            'operations_dropped': self.operations_dropped,
+            'failed_flushes': self.failed_flushes
+        }
+
+
+# Global instance
+_write_buffer: Optional[ConversationWriteBuffer] = None
+
+
+def get_write_buffer() -> ConversationWriteBuffer:
+    """Get or create the global write buffer"""
+    global _write_buffer
+    if _write_buffer is None:
+        _write_buffer = ConversationWriteBuffer()
+    return _write_buffer
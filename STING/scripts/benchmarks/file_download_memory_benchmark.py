@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for file downloads (app/services/file_service.py)
+
+Uploads a synthetic encrypted report of --size-mb through FileService, with
+in-memory stand-ins for Vault and the file_assets table, then downloads it
+through a Flask route while consuming the body chunk by chunk the way a WSGI
+server does. Every run happens in a fresh subprocess and reports download
+time and peak Python heap growth (tracemalloc) during the download:
+
+  whole-file  single-secret storage; download_file() + BytesIO + send_file
+              (the previous route path)
+  streaming   segmented storage; open_download() + file_download_response
+
+The streaming run also checks a Range request and an If-None-Match
+revalidation against the same file.
+
+Run where the app's Python dependencies are installed (e.g. the app container):
+    python scripts/benchmarks/file_download_memory_benchmark.py [--size-mb 1024] \\
+        [--modes whole-file,streaming]
+
+The whole-file path needs several times --size-mb of RAM just to upload;
+use --modes streaming for 1 GB on small hosts.
+"""
+
+import argparse
+import base64
+import gc
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from io import BytesIO
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+os.environ.setdefault('HONEY_RESERVE_MASTER_KEY', base64.b64encode(os.urandom(32)).decode())
+
+USER_ID = 'benchmark-user'
+RANGE_BYTES = 1024 * 1024
+
+
+class MemoryVaultManager:
+    """Stand-in for conf.vault_manager.VaultManager that keeps secrets in a dict"""
+
+    def __init__(self, mount_point: str = 'sting'):
+        self.mount_point = mount_point
+        self.secrets = {}
+        self.client = SimpleNamespace(sys=SimpleNamespace(
+            list_mounted_secrets_engines=lambda: {f'{mount_point}/': {}}
+        ))
+
+    def write_secret(self, path, data):
+        self.secrets[path] = dict(data)
+        return True
+
+    def read_secret(self, path, key=None):
+        secret = self.secrets.get(path)
+        if secret is not None and key:
+            return secret.get(key)
+        return secret
+
+
+class MemoryFileTable:
+    """Stand-in for the file_assets table behind FileService's DB helpers"""
+
+    def __init__(self):
+        self.assets = {}
+
+    @contextmanager
+    def session(self):
+        yield self
+
+    def add(self, asset):
+        asset.file_id = asset.file_id or uuid.uuid4()
+        self.assets[str(asset.file_id)] = asset
+
+    def commit(self):
+        pass
+
+    def get_file_by_id(self, session, file_id, user_id=None):
+        return self.assets.get(file_id)
+
+    def check_file_permission(self, session, file_id, user_id, permission_type):
+        asset = self.assets.get(file_id)
+        return asset is not None and asset.owner_id == user_id
+
+
+def build_service(segment_size: int, max_size: int):
+    from app.services import file_service
+    from app.utils import vault_file_client
+
+    table = MemoryFileTable()
+    vault_file_client.VaultManager = MemoryVaultManager
+    file_service.get_db_session = table.session
+    file_service.get_file_by_id = table.get_file_by_id
+    file_service.check_file_permission = table.check_file_permission
+    file_service.FILE_SEGMENT_SIZE = segment_size
+    # Reports are capped at 100 MB; lift the cap for large runs
+    vault_file_client.FileUploadHandler.FILE_TYPE_CONFIGS['report']['max_size'] = max_size
+    return file_service.FileService()
+
+
+def build_app(service, mode: str):
+    from flask import Flask, send_file
+
+    from app.utils.response_helpers import file_download_response
+
+    app = Flask(__name__)
+
+    @app.route('/files/<file_id>')
+    def download(file_id):
+        if mode == 'whole-file':
+            file_data = service.download_file(file_id, USER_ID)
+            return send_file(
+                BytesIO(file_data['data']),
+                as_attachment=True,
+                download_name=file_data['filename'],
+                mimetype=file_data.get('mime_type') or 'application/octet-stream'
+            )
+        return file_download_response(service.open_download(file_id, USER_ID))
+
+    return app
+
+
+def run_mode(mode: str, size_mb: int):
+    size = size_mb * 1024 * 1024
+    service = build_service(size + 1 if mode == 'whole-file' else 4 * 1024 * 1024, size + 1)
+
+    rng = random.Random(7)
+    data = bytearray(b'%PDF-1.7\n')
+    while len(data) < size:
+        data += rng.randbytes(min(64 * 1024 * 1024, size - len(data)))
+    expected_hash = hashlib.sha256(data).hexdigest()
+    range_start = size // 2
+    expected_range = data[range_start:range_start + RANGE_BYTES]
+    upload = service.upload_file(data, 'benchmark.pdf', 'report', USER_ID)
+    assert upload['success'], upload
+    del data
+    gc.collect()
+
+    client = build_app(service, mode).test_client()
+    url = f"/files/{upload['file_id']}"
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    hasher = hashlib.sha256()
+    received = 0
+    for chunk in response.iter_encoded():
+        hasher.update(chunk)
+        received += len(chunk)
+    response.close()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = {
+        'mode': mode,
+        'seconds': elapsed,
+        'bytes': received,
+        'intact': hasher.hexdigest() == expected_hash,
+        'peak_heap_growth_mb': (peak - baseline) / 1024 / 1024,
+    }
+
+    if mode == 'streaming':
+        partial = client.get(url, headers={'Range': f'bytes={range_start}-{range_start + RANGE_BYTES - 1}'})
+        stats['range_status'] = partial.status_code
+        stats['range_intact'] = partial.data == expected_range
+        stats['revalidate_status'] = client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code
+
+    print(json.dumps(stats))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory benchmark for file downloads")
+    parser.add_argument('--size-mb', type=int, default=1024, help="Size of the downloaded file")
+    parser.add_argument('--modes', default='whole-file,streaming', help="Comma-separated modes to run")
+    parser.add_argument('--mode', choices=['whole-file', 'streaming'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.size_mb)
+        return
+
+    print("File Download Memory Benchmark")
+    print("=" * 60)
+    print(f"File: {args.size_mb} MB, encrypted report")
+
+    for mode in args.modes.split(','):
+        completed = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--size-mb', str(args.size_mb)],
+            check=True, capture_output=True, text=True
+        )
+        stats = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"\n{mode} download")
+        print(f"  time:            {stats['seconds']:9.2f} s ({args.size_mb / stats['seconds']:.0f} MB/s)")
+        print(f"  peak heap:       {stats['peak_heap_growth_mb']:9.1f} MB above baseline")
+        print(f"  body intact:     {stats['intact']}")
+        if mode == 'streaming':
+            print(f"  Range request:   {stats['range_status']} (body intact: {stats['range_intact']})")
+            print(f"  If-None-Match:   {stats['revalidate_status']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the compiled keyword matcher
+
+Compares one KeywordMatcher pass against the per-keyword substring scans
+it replaced (sentiment indicators and report-intent lists) over a mix of
+short chat turns and long pasted messages.
+
+Usage:
+    python scripts/benchmarks/keyword_matcher_benchmark.py [--iterations 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'utils'))
+
+from keyword_matcher import KeywordMatcher
+
+CATEGORIES = {
+    'positive': ['thank', 'thanks', 'great', 'excellent', 'good', 'awesome', 'wonderful',
+                 'fantastic', 'love', 'perfect', 'amazing', 'best', 'appreciate', 'helpful',
+                 'nice', 'please', 'happy', 'glad'],
+    'negative': ['not working', 'error', 'problem', 'issue', 'wrong', 'bad', 'terrible', 'awful',
+                 'hate', 'broken', 'failed', 'crash', 'frustrated', 'annoying', 'confused',
+                 'stuck', 'help', "can't", "won't", "doesn't", "isn't", 'unfortunately'],
+    'question': ['what', 'when', 'where', 'why', 'how', 'which', 'who', 'could', 'would',
+                 'should', 'can', 'will', '?'],
+    'urgency': ['urgent', 'asap', 'immediately', 'now', 'quickly', 'fast', 'emergency',
+                'critical', 'important', 'hurry', 'rush'],
+    'emoji': ['😊', '😃', '🙂', '😄', '😁', '😆', '😍', '🥰', '😢', '😞', '😔', '😟', '😠',
+              '😡', '😤', '😫', '🤔', '😐', '😑', '🤷', '❓', '❔', '⁉️', '❗'],
+    'report': ['generate report', 'create report', 'report on', 'analyze', 'summary report',
+               'detailed analysis', 'word analysis', 'word report'],
+    'use_case': ['use case', 'use-case', 'usecase', 'how can', 'how would', 'how could',
+                 'business scenario', 'real world', 'real-world', 'practical example',
+                 'application', 'implement', 'deploy', 'leverage', 'utilize'],
+    'comparison': ['compare', 'versus', 'vs', 'difference', 'better', 'pros and cons',
+                   'advantages', 'disadvantages', 'alternative'],
+    'summary': ['summary', 'overview', 'summarize', 'brief', 'quick', 'tldr', 'highlights'],
+}
+
+VOCABULARY = (
+    "the honey jar upload failed with an error when i tried to analyze the report "
+    "could you please compare the vault setup versus kratos and summarize it quickly "
+    "thanks so much this is urgent 😊 ❗ deployment architecture policy compliance"
+).split()
+
+
+def naive_match(text: str) -> dict:
+    """Baseline: one substring scan per keyword per category."""
+    text_lower = text.lower()
+    hits = {}
+    for category, keywords in CATEGORIES.items():
+        found = {keyword for keyword in keywords if keyword in text_lower}
+        if found:
+            hits[category] = found
+    return hits
+
+
+def make_messages(count: int, words: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(VOCABULARY) for _ in range(words)) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KeywordMatcher against substring scans")
+    parser.add_argument('--iterations', type=int, default=2000, help="Messages per workload")
+    args = parser.parse_args()
+
+    matcher = KeywordMatcher(CATEGORIES)
+
+    print("Keyword Matcher Benchmark")
+    print("=" * 60)
+    print(f"Categories: {len(CATEGORIES)}, keywords: {sum(len(v) for v in CATEGORIES.values())}")
+    print(f"Long-text threshold: {matcher.long_text_threshold} chars")
+
+    for label, words in (("short chat turn", 12), ("paragraph", 120), ("pasted document", 2000)):
+        messages = make_messages(args.iterations if words < 1000 else max(args.iterations // 20, 1), words)
+
+        # Sanity check: both approaches must agree
+        for message in messages[:50]:
+            assert matcher.match(message) == naive_match(message), message
+
+        naive = timeit.timeit(lambda: [naive_match(m) for m in messages], number=3) / 3
+        compiled = timeit.timeit(lambda: [matcher.match(m) for m in messages], number=3) / 3
+        per_naive = naive / len(messages) * 1e6
+        per_compiled = compiled / len(messages) * 1e6
+
+        print(f"\n{label} ({words} words, {len(messages)} messages)")
+        print(f"  substring scans: {per_naive:9.1f} µs/message")
+        print(f"  compiled matcher: {per_compiled:8.1f} µs/message")
+        print(f"  speedup:          {per_naive / per_compiled:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for PII token replacement
+
+Compares the single-pass span rewriter against the per-item string rebuilding
+it replaced, on ~10k-token documents with a growing number of PII items:
+
+- serialize:   PIISerializer's single-pass rewrite vs text[:start] + token +
+               text[end:] per detection
+- deserialize: PIIDeserializer's token regex + dict lookup vs one
+               str.replace per mapping entry
+- scramble:    HiveScrambler-style {{placeholder}} insertion and unscramble
+               with the same before/after approaches
+
+Usage:
+    python scripts/benchmarks/pii_span_rewrite_benchmark.py [--words 10000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+sys.path.insert(0, os.path.join(ROOT, 'app', 'utils'))
+sys.path.insert(0, os.path.join(ROOT, 'app', 'middleware'))
+
+from span_rewriter import replace_tokens, rewrite_spans
+from pii_serialization.deserializer import TOKEN_PATTERN, PIIDeserializer
+from pii_serialization.detector import PIIDetection, PIIType
+from pii_serialization.serializer import PIISerializer
+
+# Same as HiveScrambler.PLACEHOLDER_PATTERN
+PLACEHOLDER_PATTERN = re.compile(r'\{\{(\w+)\}\}')
+
+VOCABULARY = (
+    "the patient was seen in clinic and the honey jar report was shared with the "
+    "team after review of the compliance profile and the quarterly summary"
+).split()
+
+PII_SAMPLES = [
+    (PIIType.EMAIL, "jane.doe{n}@example.com"),
+    (PIIType.PHONE, "(555) 010-{n:04d}"),
+    (PIIType.SSN, "123-45-{n:04d}"),
+    (PIIType.PERSON_NAME, "Jane Doe{n}"),
+]
+
+
+def make_document(words: int, pii_items: int, seed: int = 7):
+    """Build a document of `words` words with `pii_items` PII values spread through it."""
+    rng = random.Random(seed)
+    tokens = [rng.choice(VOCABULARY) for _ in range(words)]
+    slots = sorted(rng.sample(range(words), pii_items))
+
+    detections = []
+    parts = []
+    position = 0
+    slot_index = 0
+    for index, word in enumerate(tokens):
+        if slot_index < len(slots) and slots[slot_index] == index:
+            pii_type, template = PII_SAMPLES[slot_index % len(PII_SAMPLES)]
+            word = template.format(n=slot_index)
+            detections.append(PIIDetection(pii_type, word, position, position + len(word), 0.9))
+            slot_index += 1
+        parts.append(word)
+        position += len(word) + 1
+
+    return ' '.join(parts), detections
+
+
+def legacy_serialize(text: str, tokens_by_position: list) -> str:
+    """Baseline: rebuild the whole string once per detection, back to front."""
+    serialized_text = text
+    for start, end, token in sorted(tokens_by_position, reverse=True):
+        serialized_text = serialized_text[:start] + token + serialized_text[end:]
+    return serialized_text
+
+
+def legacy_deserialize(text: str, pii_map: dict) -> str:
+    """Baseline: one str.replace per mapping entry."""
+    for token, original_value in pii_map.items():
+        text = text.replace(token, original_value)
+    return text
+
+
+def legacy_scramble(text: str, detections: list):
+    """Baseline: HiveScrambler.scramble's offset-tracking string rebuild."""
+    mapping = {}
+    scrambled_text = text
+    offset = 0
+    for detection in detections:
+        key = f"{detection.pii_type.value}_{len(mapping)}"
+        mapping[key] = detection.value
+        placeholder = f"{{{{{key}}}}}"
+        start = detection.start_pos + offset
+        end = detection.end_pos + offset
+        scrambled_text = scrambled_text[:start] + placeholder + scrambled_text[end:]
+        offset += len(placeholder) - (end - start)
+    return scrambled_text, mapping
+
+
+def new_scramble(text: str, detections: list):
+    mapping = {}
+    spans = []
+    for detection in detections:
+        key = f"{detection.pii_type.value}_{len(mapping)}"
+        mapping[key] = detection.value
+        spans.append((detection.start_pos, detection.end_pos, f"{{{{{key}}}}}"))
+    return rewrite_spans(text, spans), mapping
+
+
+def legacy_unscramble(text: str, mapping: dict) -> str:
+    for placeholder, original in mapping.items():
+        text = text.replace(f"{{{{{placeholder}}}}}", original)
+    return text
+
+
+def bench(func, repeat: int) -> float:
+    """Best-of-`repeat` wall time in milliseconds."""
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-pass PII token replacement")
+    parser.add_argument('--words', type=int, default=10000, help="Document size in words")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    print("PII Span Rewrite Benchmark")
+    print("=" * 72)
+    print(f"Document: {args.words} words, best of {args.repeat}")
+    print(f"\n{'PII items':>9}  {'operation':<12} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+
+    for pii_items in (10, 100, 500, 1000, 2000):
+        text, detections = make_document(args.words, pii_items)
+
+        serializer = PIISerializer(config=None)
+        serialized, pii_map = asyncio.run(serializer.serialize(text, detections))
+        deserializer = PIIDeserializer(config=None)
+
+        # Rebuild the serializer's spans for the baseline
+        tokens = {value: token for token, value in pii_map.items()}
+        spans = [(d.start_pos, d.end_pos, tokens[d.value]) for d in detections]
+
+        # Sanity checks: before and after must agree
+        assert legacy_serialize(text, spans) == serialized
+        assert asyncio.run(deserializer.deserialize(serialized, pii_map)) == legacy_deserialize(serialized, pii_map) == text
+        scrambled, mapping = new_scramble(text, detections)
+        assert (scrambled, mapping) == legacy_scramble(text, detections)
+        assert replace_tokens(scrambled, PLACEHOLDER_PATTERN, mapping, group=1) == legacy_unscramble(scrambled, mapping) == text
+
+        rows = [
+            ("serialize",
+             lambda: legacy_serialize(text, spans),
+             lambda: rewrite_spans(text, sorted(spans))),
+            ("deserialize",
+             lambda: legacy_deserialize(serialized, pii_map),
+             lambda: replace_tokens(serialized, TOKEN_PATTERN, pii_map)),
+            ("scramble",
+             lambda: legacy_scramble(text, detections),
+             lambda: new_scramble(text, detections)),
+            ("unscramble",
+             lambda: legacy_unscramble(scrambled, mapping),
+             lambda: replace_tokens(scrambled, PLACEHOLDER_PATTERN, mapping, group=1)),
+        ]
+        for label, before, after in rows:
+            before_ms = bench(before, args.repeat)
+            after_ms = bench(after, args.repeat)
+            print(f"{pii_items:>9}  {label:<12} {before_ms:>10.2f} {after_ms:>10.2f} {before_ms / after_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
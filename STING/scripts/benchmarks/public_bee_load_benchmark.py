@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the Public Bee chat endpoint
+
+Runs the Public Bee FastAPI app in-process against:
+- a fake knowledge service and AI service (uvicorn on localhost, in a
+  separate process) that answer after configurable delays, with one
+  optionally slow honey jar
+- a throwaway SQLite database
+
+then drives N concurrent widget sessions, each sending M messages, and
+reports latency percentiles and throughput. Point --public-bee-dir at
+another checkout of public_bee/ to compare implementations.
+
+Usage:
+    python scripts/benchmarks/public_bee_load_benchmark.py \\
+        [--sessions 50] [--messages 4] [--jars 3] \\
+        [--search-ms 50] [--slow-jar-ms 5000] [--llm-ms 300] [--distinct-questions 20]
+
+Requires fastapi, uvicorn, sqlalchemy and httpx.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+DEFAULT_PUBLIC_BEE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'public_bee')
+FAKE_PORT = 18099
+
+
+def serve_fake_upstreams(search_ms: int, slow_jar_ms: int, llm_ms: int):
+    """Fake knowledge + external AI service; jar 'jar-slow' answers after slow_jar_ms"""
+    import uvicorn
+    from fastapi import FastAPI
+
+    fake = FastAPI()
+
+    @fake.post("/honey-jars/{jar_id}/search")
+    async def search(jar_id: str, body: dict):
+        await asyncio.sleep((slow_jar_ms if jar_id == 'jar-slow' else search_ms) / 1000)
+        return {"results": [
+            {"content": f"{jar_id} passage {i} about {body.get('query', '')[:20]}",
+             "score": 0.9 - i * 0.1, "metadata": {"title": f"{jar_id} doc {i}"}}
+            for i in range(3)
+        ]}
+
+    @fake.post("/v1/chat/completions")
+    async def completions(body: dict):
+        await asyncio.sleep(llm_ms / 1000)
+        return {"choices": [{"message": {"content": "Here is what the knowledge base says."}}]}
+
+    @fake.get("/honey-jars/{jar_id}")
+    async def jar(jar_id: str):
+        return {"id": jar_id, "last_updated": "2025-01-01T00:00:00", "stats": {"document_count": 10}}
+
+    @fake.post("/knowledge/embeddings")
+    async def embeddings(body: dict):
+        # Deterministic pseudo-embeddings: identical text -> identical vector
+        def embed(text):
+            rng = random.Random(text.lower().strip(' ?!.'))
+            return [rng.uniform(-1, 1) for _ in range(384)]
+        return {"embeddings": [{"embedding": embed(doc), "index": i}
+                               for i, doc in enumerate(body.get("documents", []))]}
+
+    uvicorn.run(fake, host="127.0.0.1", port=FAKE_PORT, log_level="warning")
+
+
+def start_fake_upstreams(search_ms: int, slow_jar_ms: int, llm_ms: int) -> multiprocessing.Process:
+    """Run the fake upstreams in their own process so they don't compete for the GIL"""
+    process = multiprocessing.Process(
+        target=serve_fake_upstreams, args=(search_ms, slow_jar_ms, llm_ms), daemon=True
+    )
+    process.start()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", FAKE_PORT), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Fake upstream server did not start")
+
+
+def allow_postgres_uuid_on_sqlite():
+    """
+    The models use the PostgreSQL UUID type and the app passes ids as strings
+    (psycopg2 accepts both); store them as CHAR(32) in SQLite and coerce
+    strings the same way PostgreSQL would.
+    """
+    import uuid
+
+    from sqlalchemy.dialects.postgresql import UUID
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(UUID, 'sqlite')
+    def compile_uuid(type_, compiler, **kw):
+        return "CHAR(32)"
+
+    original_bind_processor = UUID.bind_processor
+
+    def bind_processor(self, dialect):
+        process = original_bind_processor(self, dialect)
+        if process is None or dialect.name != 'sqlite':
+            return process
+        return lambda value: process(uuid.UUID(value) if isinstance(value, str) else value)
+
+    UUID.bind_processor = bind_processor
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(args):
+    import httpx
+
+    import app as public_bee_app
+    from bot_manager import PublicBotManager
+
+    await public_bee_app.app.router.startup()
+
+    db = public_bee_app.SessionLocal()
+    try:
+        manager = PublicBotManager(db)
+        jar_ids = [f"jar-{i}" for i in range(args.jars - (1 if args.slow_jar_ms else 0))]
+        if args.slow_jar_ms:
+            jar_ids.append('jar-slow')
+        bot = manager.create_bot(
+            name="load-test", display_name="Load Test", description="benchmark",
+            honey_jar_ids=jar_ids
+        )
+        api_key, _ = manager.create_api_key(str(bot.id), "load", rate_limit=1_000_000)
+        bot_id = str(bot.id)
+    finally:
+        db.close()
+
+    latencies = []
+    failures = 0
+    cache_hits = {}
+    transport = httpx.ASGITransport(app=public_bee_app.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://public-bee", timeout=120) as client:
+        async def session(index: int):
+            nonlocal failures
+            conversation_id = None
+            for turn in range(args.messages):
+                if args.distinct_questions:
+                    # Popular questions, varied in case and punctuation like real traffic
+                    topic = (index + turn) % args.distinct_questions
+                    question = f"How do I configure feature {topic}?"
+                    payload = {"message": question.upper() if (index + turn) % 3 == 0 else question}
+                else:
+                    payload = {"message": f"Visitor {index} question {turn} about setup"}
+                if conversation_id:
+                    payload["conversation_id"] = conversation_id
+                started = time.perf_counter()
+                response = await client.post(
+                    f"/api/public/chat/{bot_id}/message", json=payload,
+                    headers={"Authorization": f"Bearer {api_key}"}
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+                    continue
+                body = response.json()
+                conversation_id = body.get("conversation_id")
+                if body.get("cached"):
+                    cache_hits[body["cached"]] = cache_hits.get(body["cached"], 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(session(i) for i in range(args.sessions)))
+        elapsed = time.perf_counter() - started
+
+    await public_bee_app.app.router.shutdown()
+    return latencies, failures, elapsed, cache_hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for Public Bee chat")
+    parser.add_argument('--sessions', type=int, default=50, help="Concurrent widget sessions")
+    parser.add_argument('--messages', type=int, default=4, help="Messages per session")
+    parser.add_argument('--jars', type=int, default=3, help="Honey jars per bot")
+    parser.add_argument('--search-ms', type=int, default=50, help="Knowledge search latency")
+    parser.add_argument('--slow-jar-ms', type=int, default=0, help="Latency of one slow honey jar (0 = none)")
+    parser.add_argument('--llm-ms', type=int, default=300, help="AI completion latency")
+    parser.add_argument('--distinct-questions', type=int, default=0,
+                        help="Draw questions from this many popular ones (0 = every question unique)")
+    parser.add_argument('--public-bee-dir', default=DEFAULT_PUBLIC_BEE_DIR, help="public_bee source to load")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='public-bee-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_path}"
+    os.environ['KNOWLEDGE_SERVICE_URL'] = f"http://127.0.0.1:{FAKE_PORT}"
+    os.environ['EXTERNAL_AI_URL'] = f"http://127.0.0.1:{FAKE_PORT}"
+    sys.path.insert(0, os.path.abspath(args.public_bee_dir))
+    # Shared modules the Dockerfile copies into the public_bee image
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'utils'))
+
+    allow_postgres_uuid_on_sqlite()
+    upstreams = start_fake_upstreams(args.search_ms, args.slow_jar_ms, args.llm_ms)
+    try:
+        latencies, failures, elapsed, cache_hits = asyncio.run(run_load(args))
+    finally:
+        upstreams.terminate()
+
+    total = len(latencies)
+    print("Public Bee Load Benchmark")
+    print("=" * 60)
+    print(f"Source: {os.path.abspath(args.public_bee_dir)}")
+    print(f"Sessions: {args.sessions} x {args.messages} messages, {args.jars} honey jars, "
+          f"search {args.search_ms}ms, slow jar {args.slow_jar_ms}ms, LLM {args.llm_ms}ms")
+    print(f"Requests: {total} ({failures} failed) in {elapsed:.2f}s -> {total / elapsed:.1f} req/s")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:8.0f} ms")
+    print(f"Latency p95: {percentile(latencies, 95) * 1000:8.0f} ms")
+    print(f"Latency p99: {percentile(latencies, 99) * 1000:8.0f} ms")
+    if cache_hits:
+        print(f"Answer cache hits: {cache_hits} ({sum(cache_hits.values()) / total:.0%} of requests)")
+    print(f"Latency max: {max(latencies) * 1000:8.0f} ms (mean {statistics.mean(latencies) * 1000:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the GCRA rate limiter (app/utils/rate_limiter.py)
+
+Needs a reachable Redis (default redis://localhost:6379/15; keys are
+prefixed with "bench:" and expire on their own).
+
+1. Window boundary burst: a client fires as fast as it can just before
+   and just after a window boundary. The previous fixed-window limiter
+   (clock-aligned INCR + EXPIRE) admits up to 2x the limit; GCRA admits
+   the limit.
+2. Hot key throughput: concurrent coroutines check one API key through the
+   async client, with and without local token pre-fetch, reporting checks
+   per second and Redis round trips per check.
+
+Usage:
+    python scripts/benchmarks/rate_limiter_benchmark.py [--redis-url URL] [--checks 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+import redis
+import redis.asyncio as aioredis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'utils'))
+
+from rate_limiter import GCRARateLimiter
+
+
+def fixed_window_allowed(client: redis.Redis, key: str, limit: int, window: int) -> bool:
+    """The previous public_bee RateLimiter.is_rate_limited logic"""
+    now = int(time.time())
+    window_start = now - (now % window)
+    redis_key = f"bench:fixed:{key}:{window_start}"
+    current = int(client.get(redis_key) or 0)
+    if current >= limit:
+        return False
+    pipe = client.pipeline()
+    pipe.incr(redis_key)
+    pipe.expire(redis_key, window)
+    pipe.execute()
+    return True
+
+
+def boundary_burst(client: redis.Redis, limit: int, window: int):
+    """Count admitted requests in the second around a window boundary"""
+    limiter = GCRARateLimiter(redis_client=client, prefix='bench:gcra')
+    key = uuid.uuid4().hex
+
+    # Start half a second before the next boundary
+    now = time.time()
+    boundary = (int(now) // window + 1) * window
+    if boundary - now < 0.5:
+        boundary += window
+    time.sleep(boundary - now - 0.5)
+
+    fixed = gcra = 0
+    end = boundary + 0.5
+    while time.time() < end:
+        fixed += fixed_window_allowed(client, key, limit, window)
+        gcra += limiter.check(key, limit, window).allowed
+    return fixed, gcra
+
+
+async def hot_key_throughput(url: str, checks: int, concurrency: int, prefetch: int):
+    client = aioredis.from_url(url)
+    limiter = GCRARateLimiter(async_redis_client=client, prefix='bench:gcra', prefetch=prefetch)
+    key = uuid.uuid4().hex
+    per_worker = checks // concurrency
+
+    async def worker():
+        for _ in range(per_worker):
+            await limiter.acheck(key, 10_000_000, 3600)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    stats = limiter.get_stats()
+    return stats['checks'] / elapsed, stats['round_trips'] / stats['checks']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GCRA rate limiter")
+    parser.add_argument('--redis-url', default='redis://localhost:6379/15')
+    parser.add_argument('--checks', type=int, default=20000, help="Checks per throughput run")
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=50, help="Limit for the boundary test")
+    parser.add_argument('--window', type=int, default=10, help="Window (seconds) for the boundary test")
+    args = parser.parse_args()
+
+    client = redis.from_url(args.redis_url)
+    client.ping()
+
+    print("Rate Limiter Benchmark")
+    print("=" * 60)
+
+    fixed, gcra = boundary_burst(client, args.limit, args.window)
+    print(f"\nWindow boundary burst ({args.limit} per {args.window}s, 1s around the boundary)")
+    print(f"  fixed window admitted: {fixed:6d}  ({fixed / args.limit:.1f}x limit)")
+    print(f"  GCRA admitted:         {gcra:6d}  ({gcra / args.limit:.1f}x limit)")
+
+    print(f"\nHot key, {args.concurrency} concurrent callers, {args.checks} checks")
+    for prefetch in (0, 5, 20):
+        rate, trips = asyncio.run(hot_key_throughput(args.redis_url, args.checks, args.concurrency, prefetch))
+        label = f"prefetch {prefetch}" if prefetch else "no prefetch"
+        print(f"  {label:12s} {rate:10.0f} checks/s  {trips:.2f} round trips/check")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark for streaming report rendering
+
+Renders a synthetic Bee report of roughly --pages PDF pages two ways and
+reports wall time and peak RSS for each (every run happens in a fresh
+subprocess so peak RSS is not shared):
+
+  in-memory  whole-document markdown parse, fully built story list,
+             BytesIO buffer + getvalue() copy (the previous ReportWorker path)
+  streaming  ReportRenderer: per-section parsing, lazily generated
+             flowables, spooled temporary file
+
+It also times Unicode sanitization: per-mapping str.replace() plus a
+per-character join versus the single-pass table lookup.
+
+Usage:
+    python scripts/benchmarks/report_render_benchmark.py [--pages 500]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+import timeit
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'app', 'workers'))
+
+from report_renderer import (ReportRenderer, PDF_UNICODE_REPLACEMENTS, sanitize_for_pdf,
+                             split_markdown_sections)
+
+WORDS = (
+    "honey jar vault policy document retention encryption access audit compliance "
+    "knowledge bee report analysis summary storage user upload pipeline index query"
+).split()
+UNICODE_BITS = ['—', '’', '“', '”', '→', '•', '…', 'é', '中']
+
+
+def legacy_sanitize(text: str) -> str:
+    """The previous _sanitize_unicode_for_pdf implementation."""
+    if not text:
+        return text
+    for unicode_char, ascii_equiv in PDF_UNICODE_REPLACEMENTS.items():
+        text = text.replace(unicode_char, ascii_equiv)
+    return ''.join(char if (32 <= ord(char) <= 126) or char in '\n\r\t' else ' '
+                   for char in text)
+
+
+def make_report(pages: int, seed: int = 7) -> str:
+    """Roughly 450 words of markdown per rendered page."""
+    rng = random.Random(seed)
+
+    def sentence():
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(UNICODE_BITS))
+        if rng.random() < 0.2:
+            words[0] = f"**{words[0]}**"
+        return ' '.join(words).capitalize() + '.'
+
+    parts = []
+    for page in range(pages):
+        parts.append(f"## Section {page + 1}\n\n")
+        for _ in range(3):
+            parts.append(' '.join(sentence() for _ in range(7)) + "\n\n")
+        for _ in range(4):
+            parts.append(f"- {sentence()}\n")
+        parts.append("\n")
+    return ''.join(parts)
+
+
+PAGE_OBJECT = re.compile(rb'/Type /Page\b(?!s)')
+
+
+def render_in_memory(renderer: ReportRenderer, report_data: dict) -> bytes:
+    """Previous approach: parse everything, build the full story, render to BytesIO."""
+    from markdown_it import MarkdownIt
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate
+
+    import report_renderer
+    report_renderer.sanitize_for_pdf = legacy_sanitize
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, leftMargin=0.75*inch, rightMargin=0.75*inch,
+                            topMargin=1*inch, bottomMargin=1*inch)
+    styles = renderer._pdf_styles()
+
+    # Single whole-document parse instead of per-section parsing
+    original_split = report_renderer.split_markdown_sections
+    report_renderer.split_markdown_sections = lambda content: [content]
+    try:
+        story = list(renderer._pdf_story(report_data, styles, 'Bee Conversational Report', 'Benchmark'))
+    finally:
+        report_renderer.split_markdown_sections = original_split
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_streaming(renderer: ReportRenderer, report_data: dict):
+    result = renderer.render(report_data, 'pdf', 'Bee Conversational Report', 'Benchmark')
+    return result['file']
+
+
+def run_mode(mode: str, pages: int):
+    content = make_report(pages)
+    report_data = {'generated_content': content}
+    renderer = ReportRenderer()
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if mode == 'in-memory':
+        pdf = render_in_memory(renderer, report_data)
+    else:
+        output = render_streaming(renderer, report_data)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if mode == 'streaming':
+        with output:
+            pdf = output.read()
+
+    print(json.dumps({
+        'mode': mode,
+        'seconds': elapsed,
+        'pdf_bytes': len(pdf),
+        'pages': len(PAGE_OBJECT.findall(pdf)),
+        'peak_rss_mb': peak_rss / 1024,
+        'rss_growth_mb': (peak_rss - baseline_rss) / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming report rendering")
+    parser.add_argument('--pages', type=int, default=500, help="Approximate PDF page count")
+    parser.add_argument('--mode', choices=['in-memory', 'streaming'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.pages)
+        return
+
+    content = make_report(args.pages)
+    sections = sum(1 for _ in split_markdown_sections(content))
+
+    print("Report Rendering Benchmark")
+    print("=" * 60)
+    print(f"Generated content: {len(content) / 1024 / 1024:.1f} MB markdown, {sections} sections")
+
+    # Sanitization must be identical before comparing speed
+    assert legacy_sanitize(content) == sanitize_for_pdf(content)
+    legacy = timeit.timeit(lambda: legacy_sanitize(content), number=3) / 3
+    single_pass = timeit.timeit(lambda: sanitize_for_pdf(content), number=3) / 3
+    print("\nUnicode sanitization (whole document)")
+    print(f"  replace + join:  {legacy * 1000:9.1f} ms")
+    print(f"  single pass:     {single_pass * 1000:9.1f} ms")
+    print(f"  speedup:         {legacy / single_pass:9.1f}x")
+
+    for mode in ('in-memory', 'streaming'):
+        completed = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--pages', str(args.pages)],
+            check=True, capture_output=True, text=True
+        )
+        stats = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"\n{mode} PDF render")
+        print(f"  time:            {stats['seconds']:9.2f} s")
+        print(f"  output:          {stats['pdf_bytes'] / 1024 / 1024:9.1f} MB, {stats['pages']} pages")
+        print(f"  peak RSS:        {stats['peak_rss_mb']:9.1f} MB (+{stats['rss_growth_mb']:.1f} MB while rendering)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for single-pass PII token replacement
+Covers overlapping spans, tokens that share a prefix and tokens next to
+punctuation, for both the serializer and the deserializer
+
+Run with: python -m pytest tests/test_pii_token_replacement.py
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'app', 'utils'))
+sys.path.insert(0, os.path.join(ROOT, 'app', 'middleware'))
+
+from span_rewriter import replace_tokens, rewrite_spans
+from pii_serialization.deserializer import TOKEN_PATTERN, PIIDeserializer
+from pii_serialization.detector import PIIDetection, PIIDetector, PIIType
+from pii_serialization.serializer import PIISerializer
+
+
+def detection(text, value, pii_type, confidence=0.9, occurrence=0):
+    start = -1
+    for _ in range(occurrence + 1):
+        start = text.index(value, start + 1)
+    return PIIDetection(pii_type=pii_type, value=value, start_pos=start,
+                        end_pos=start + len(value), confidence=confidence)
+
+
+def round_trip(text, detections):
+    async def scenario():
+        serialized, mapping = await PIISerializer(config=None).serialize(text, detections)
+        restored = await PIIDeserializer(config=None).deserialize(serialized, mapping)
+        return serialized, mapping, restored
+
+    return asyncio.run(scenario())
+
+
+def deserialize(text, mapping):
+    return asyncio.run(PIIDeserializer(config=None).deserialize(text, mapping))
+
+
+# Overlapping spans
+
+def test_rewrite_spans_rejects_overlapping_spans():
+    with pytest.raises(ValueError):
+        rewrite_spans("John Smith", [(0, 10, "$A"), (5, 10, "$B")])
+
+
+def test_rewrite_spans_rejects_unsorted_spans():
+    with pytest.raises(ValueError):
+        rewrite_spans("John Smith", [(5, 10, "$B"), (0, 4, "$A")])
+
+
+def test_rewrite_spans_handles_adjacent_spans():
+    assert rewrite_spans("abcdef", [(0, 3, "X"), (3, 6, "Y")]) == "XY"
+
+
+def test_overlapping_detections_resolved_before_serializing():
+    text = "Email jane.doe@example.com today"
+    detections = sorted([
+        detection(text, "jane.doe@example.com", PIIType.EMAIL, confidence=0.95),
+        detection(text, "jane.doe", PIIType.USERNAME, confidence=0.6),
+    ], key=lambda d: d.start_pos)
+
+    kept = PIIDetector(config=None)._remove_overlaps(detections)
+    serialized, mapping, restored = round_trip(text, kept)
+
+    assert [d.pii_type for d in kept] == [PIIType.EMAIL]
+    assert list(mapping.values()) == ["jane.doe@example.com"]
+    assert "jane.doe" not in serialized
+    assert restored == text
+
+
+def test_adjacent_tokens_without_separator():
+    mapping = {"$Person1_name_b2c4": "Jane Doe", "$Person1_email_a3f5": "jane@example.com"}
+
+    assert deserialize("$Person1_name_b2c4$Person1_email_a3f5", mapping) == "Jane Doejane@example.com"
+
+
+def test_replacement_values_are_not_expanded_again():
+    # A value that itself looks like a token must come back verbatim, not be
+    # substituted a second time as a str.replace chain would do
+    mapping = {
+        "$Person1_name_b2c4": "$Person2_email_c1d2",
+        "$Person2_email_c1d2": "someone@example.com",
+    }
+
+    assert deserialize("Hi $Person1_name_b2c4", mapping) == "Hi $Person2_email_c1d2"
+
+
+# Tokens that share a prefix
+
+def test_token_followed_by_hex_digit_keeps_the_digit():
+    # Hashes are exactly four hex digits, so in "..._a3f51" the token ends at
+    # "a3f5" and the trailing "1" is ordinary text
+    mapping = {"$Person1_email_a3f5": "jane@example.com"}
+
+    assert deserialize("Use $Person1_email_a3f51", mapping) == "Use jane@example.com1"
+
+
+def test_longer_mapping_key_does_not_capture_shorter_token():
+    mapping = {
+        "$Person1_email_a3f5": "jane@example.com",
+        "$Person1_email_a3f51": "not-a-token@example.com",
+    }
+
+    assert deserialize("$Person1_email_a3f5 and $Person1_email_a3f51", mapping) == (
+        "jane@example.com and jane@example.com1"
+    )
+
+
+def test_entity_numbers_sharing_a_prefix():
+    mapping = {
+        "$Person1_email_a3f5": "one@example.com",
+        "$Person12_email_a3f5": "twelve@example.com",
+    }
+
+    assert deserialize("$Person12_email_a3f5, $Person1_email_a3f5", mapping) == (
+        "twelve@example.com, one@example.com"
+    )
+
+
+def test_unknown_token_left_intact_next_to_known_one():
+    mapping = {"$Person1_email_a3f5": "jane@example.com"}
+
+    assert deserialize("$Person1_email_a3f5 $Person11_email_a3f5", mapping) == (
+        "jane@example.com $Person11_email_a3f5"
+    )
+
+
+# Tokens next to punctuation
+
+@pytest.mark.parametrize("template", [
+    "({token})",
+    "{token}.",
+    "{token}, then",
+    '"{token}"',
+    "**{token}**",
+    "{token}'s inbox",
+    "line one\n{token}\nline two",
+    "<{token}>;",
+])
+def test_token_next_to_punctuation(template):
+    mapping = {"$Person1_email_a3f5": "jane@example.com"}
+
+    assert deserialize(template.format(token="$Person1_email_a3f5"), mapping) == (
+        template.format(token="jane@example.com")
+    )
+
+
+def test_round_trip_with_punctuation_around_values():
+    text = 'Call "Jane Doe" (555-010-1234), or mail jane@example.com.'
+    detections = [
+        detection(text, "Jane Doe", PIIType.PERSON_NAME),
+        detection(text, "555-010-1234", PIIType.PHONE),
+        detection(text, "jane@example.com", PIIType.EMAIL),
+    ]
+
+    serialized, mapping, restored = round_trip(text, detections)
+
+    assert TOKEN_PATTERN.findall(serialized) == list(mapping)
+    assert serialized.startswith('Call "$')
+    assert serialized.endswith('.')
+    assert restored == text
+
+
+def test_repeated_value_round_trips():
+    text = "jane@example.com, again jane@example.com."
+    detections = [
+        detection(text, "jane@example.com", PIIType.EMAIL),
+        detection(text, "jane@example.com", PIIType.EMAIL, occurrence=1),
+    ]
+
+    serialized, mapping, restored = round_trip(text, detections)
+
+    assert len(mapping) == 1
+    assert restored == text
+
+
+def test_replace_tokens_reports_each_replacement():
+    replaced = []
+    mapping = {"$Person1_email_a3f5": "jane@example.com"}
+
+    result = replace_tokens("($Person1_email_a3f5), $Person1_email_a3f5.", TOKEN_PATTERN, mapping,
+                            on_replace=lambda match, value: replaced.append(match.start()))
+
+    assert result == "(jane@example.com), jane@example.com."
+    assert replaced == [1, 23]